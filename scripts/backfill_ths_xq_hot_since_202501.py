@@ -1,27 +1,43 @@
 #!/usr/bin/env python3
-"""Backfill THS/Xueqiu popularity data since 2025-01-01 (best effort)."""
+"""Backfill THS/Xueqiu popularity data since 2025-01-01 (best effort).
+
+THS dates are fetched concurrently under a shared rate budget and committed
+one by one into the hot-rank store (data/hot_sources/store), so the backfill
+can be interrupted and resumed at any point.
+"""
 
 from __future__ import annotations
 
+import argparse
 import json
 import os
-import time
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import asdict, dataclass
 from datetime import date, datetime, timedelta
+from itertools import islice
 from pathlib import Path
 
 import pandas as pd
 
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+import hot_rank_store  # noqa: E402
+from utils import RateLimiter, retry_on_exception  # noqa: E402
+
 OUT_DIR = PROJECT_ROOT / "data" / "hot_sources"
+STORE_ROOT = OUT_DIR / "store"
 THS_DIR = OUT_DIR / "ths"
 XQ_DIR = OUT_DIR / "xueqiu"
 SUMMARY_DIR = OUT_DIR / "summaries"
 
 THS_CSV = THS_DIR / "ths_hot_rank_top100_history.csv"
 THS_FAILED_CSV = THS_DIR / "ths_hot_rank_failed_dates.csv"
+THS_EMPTY_JSON = THS_DIR / "ths_hot_rank_empty_dates.json"
 XQ_CSV = XQ_DIR / "xueqiu_hot_rank_snapshots.csv"
+TOPN = 100
 
 
 @dataclass
@@ -31,6 +47,7 @@ class BackfillSummary:
     ths_new_dates: int
     ths_new_rows: int
     ths_failed_dates: int
+    ths_store: str
     xq_snapshots_added: int
     xq_note: str
 
@@ -66,103 +83,172 @@ def normalize_code(raw: object) -> str:
     return s
 
 
-def extract_rank_heat(row: pd.Series, d: date) -> tuple[float | None, float | None]:
-    d8 = d.strftime("%Y%m%d")
-    rank_col = f"个股热度排名[{d8}]"
-    heat_col = f"个股热度[{d8}]"
-    rank = row.get(rank_col)
-    heat = row.get(heat_col)
-    return rank, heat
-
-
-def fetch_ths_by_date(d: date) -> pd.DataFrame:
+def load_empty_dates() -> set[str]:
+    if not THS_EMPTY_JSON.exists():
+        return set()
+    return set(json.loads(THS_EMPTY_JSON.read_text(encoding="utf-8")))
+
+
+def save_empty_dates(dates: set[str]) -> None:
+    tmp = THS_EMPTY_JSON.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(sorted(dates), ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp.replace(THS_EMPTY_JSON)
+
+
+def import_legacy_csv() -> int:
+    """Load the pre-store THS history CSV into the store once (store has no THS dates yet)."""
+    if hot_rank_store.stored_dates(STORE_ROOT, hot_rank_store.WENCAI_THS):
+        return 0
+    if not THS_CSV.exists() or THS_CSV.stat().st_size == 0:
+        return 0
+    old = pd.read_csv(THS_CSV, dtype={"code": str})
+    if old.empty or "date" not in old.columns:
+        return 0
+    old["date"] = pd.to_datetime(old["date"], errors="coerce").dt.strftime("%Y-%m-%d")
+    old = old.dropna(subset=["date"])
+    if "fetch_time" not in old.columns:
+        old["fetch_time"] = datetime.fromtimestamp(THS_CSV.stat().st_mtime)
+    old["source"] = hot_rank_store.WENCAI_THS
+    old["code"] = hot_rank_store.normalize_codes(old["code"])
+    old["name"] = old["name"].fillna("").astype(str)
+    old["rank"] = pd.to_numeric(old["rank"], errors="coerce")
+    old = old[old["rank"].between(1, TOPN)].copy()
+    old["rank"] = old["rank"].astype("int16")
+    old["heat"] = pd.to_numeric(old["heat"], errors="coerce").astype(float)
+    old["fetch_time"] = pd.to_datetime(old["fetch_time"])
+    stats = hot_rank_store.write_hot_ranks(old, STORE_ROOT)
+    print(f"[ths] imported legacy csv: {stats['partitions']} dates, {stats['rows']} rows")
+    return stats["partitions"]
+
+
+def fetch_ths_by_date(d: date) -> pd.DataFrame | None:
+    """
+    THS hot rank list of one date in the store schema
+
+    Returns None when wencai has no list for the date: its answer is a frame
+    without that day's 个股热度排名[YYYYMMDD] column (e.g. a holiday). Any other
+    answer that yields no rows raises, so it is retried and finally reported
+    as failed instead of being recorded as an empty date.
+    """
     import pywencai  # pylint: disable=import-outside-toplevel
 
-    q = f"{d.strftime('%Y-%m-%d')} 人气榜 股票代码 股票简称 人气排名"
-    raw = pywencai.get(query=q, loop=False)
-    if not isinstance(raw, pd.DataFrame) or raw.empty:
-        return pd.DataFrame(columns=["date", "code", "name", "rank", "heat", "latest_price", "latest_pct", "source"])
-
-    out_rows: list[dict] = []
-    for _, row in raw.iterrows():
-        rank, heat = extract_rank_heat(row, d)
-        if pd.isna(rank):
-            continue
-        rank = int(rank)
-        if rank < 1 or rank > 100:
-            continue
-        out_rows.append(
-            {
-                "date": d.strftime("%Y-%m-%d"),
-                "code": normalize_code(row.get("股票代码", row.get("code", ""))),
-                "name": str(row.get("股票简称", "")),
-                "rank": rank,
-                "heat": float(heat) if pd.notna(heat) else None,
-                "latest_price": pd.to_numeric(row.get("最新价"), errors="coerce"),
-                "latest_pct": pd.to_numeric(row.get("最新涨跌幅"), errors="coerce"),
-                "source": "ths_pywencai",
-            }
-        )
-    return pd.DataFrame(out_rows)
-
-
-def backfill_ths(start_date: date, end_date: date) -> tuple[int, int, int, int]:
+    day = d.strftime("%Y-%m-%d")
+    raw = pywencai.get(query=f"{day} 人气榜 股票代码 股票简称 人气排名", loop=False)
+    if not isinstance(raw, pd.DataFrame):
+        # pywencai 请求失败时返回 None / 错误信息等非表格结果，交给重试
+        raise RuntimeError(f"pywencai returned {type(raw).__name__}, not a DataFrame")
+    if day not in hot_rank_store.wencai_rank_dates(raw):
+        return None
+    df = hot_rank_store.normalize_wencai(
+        raw, source=hot_rank_store.WENCAI_THS, date=d, fetch_time=datetime.now(), max_rank=TOPN
+    )
+    if df.empty:
+        raise RuntimeError(f"pywencai rank column for {day} has no rows ranked 1-{TOPN}")
+    return df
+
+
+def backfill_ths(
+    start_date: date,
+    end_date: date,
+    workers: int = 4,
+    rate: float = 2.0,
+    retries: int = 3,
+    retry_delay: float = 2.0,
+    refetch_empty: bool = False,
+) -> tuple[int, int, int, int]:
+    """
+    Fetch missing THS dates concurrently and commit each one into the store
+
+    At most `workers` queries run at once and all of them share one rate
+    budget of `rate` requests per second (retries included). A failed query
+    is retried with exponential backoff. Every finished date is written as
+    its own store partition (dates wencai has no list for go to the empty-date
+    list; `refetch_empty` drops the recorded ones inside the range first)
+    before the next one is submitted, so an interrupted run keeps everything
+    it has fetched and the next run only asks for dates not committed yet.
+
+    Returns:
+        (committed dates before the run, new dates, new rows, failed dates)
+    """
     THS_DIR.mkdir(parents=True, exist_ok=True)
-
-    if THS_CSV.exists() and THS_CSV.stat().st_size > 0:
-        old = pd.read_csv(THS_CSV)
-        if "date" in old.columns and not old.empty:
-            old["date"] = pd.to_datetime(old["date"], errors="coerce").dt.strftime("%Y-%m-%d")
-            existing_dates = set(old["date"].dropna().astype(str).unique().tolist())
-        else:
-            existing_dates = set()
-    else:
-        old = pd.DataFrame(columns=["date", "code", "name", "rank", "heat", "latest_price", "latest_pct", "source"])
-        existing_dates = set()
-
+    import_legacy_csv()
+
+    stored = set(hot_rank_store.stored_dates(STORE_ROOT, hot_rank_store.WENCAI_THS))
+    empty_dates = load_empty_dates()
+    if refetch_empty:
+        in_range = {d for d in empty_dates if start_date.isoformat() <= d <= end_date.isoformat()}
+        empty_dates -= in_range
+        save_empty_dates(empty_dates)
+        print(f"[ths] refetch_empty: cleared {len(in_range)} recorded empty dates")
+    committed = stored | empty_dates
     to_fetch = [
         d
         for d in daterange(start_date, end_date)
-        if d.weekday() < 5 and d.strftime("%Y-%m-%d") not in existing_dates
+        if d.weekday() < 5 and d.strftime("%Y-%m-%d") not in committed
     ]
-    print(f"[ths] existing_dates={len(existing_dates)}, to_fetch={len(to_fetch)}")
-    new_parts: list[pd.DataFrame] = []
-    failed_dates: list[str] = []
-
-    for i, d in enumerate(to_fetch, 1):
-        if i % 20 == 0:
-            print(f"[ths] progress {i}/{len(to_fetch)}")
-        ok = False
-        for attempt in range(1):
-            try:
-                df = fetch_ths_by_date(d)
-                if not df.empty:
-                    new_parts.append(df)
-                ok = True
-                break
-            except Exception:
-                time.sleep(0.3 + attempt * 0.2)
-        if not ok:
-            failed_dates.append(d.strftime("%Y-%m-%d"))
-        time.sleep(0.05)
-
-    if new_parts:
-        new_df = pd.concat(new_parts, ignore_index=True)
-        merged = pd.concat([old, new_df], ignore_index=True)
-    else:
-        new_df = pd.DataFrame(columns=old.columns)
-        merged = old.copy()
+    print(
+        f"[ths] stored_dates={len(stored)}, empty_dates={len(empty_dates)}, to_fetch={len(to_fetch)}, "
+        f"workers={workers}, rate={rate}/s, retries={retries}"
+    )
 
-    merged = merged.drop_duplicates(subset=["date", "code", "source"], keep="last")
-    merged = merged.sort_values(["date", "rank", "code"], ascending=[True, True, True]).reset_index(drop=True)
-    tmp_ths = THS_CSV.with_suffix(".csv.tmp")
+    limiter = RateLimiter(rate)
+
+    @retry_on_exception(max_retries=retries, delay=retry_delay, backoff=2.0)
+    def fetch_day(d: date) -> pd.DataFrame | None:
+        limiter.wait()
+        return fetch_ths_by_date(d)
+
+    new_dates = 0
+    new_rows = 0
+    failed: list[dict] = []
+    today = date.today()
+    pending = iter(to_fetch)
+
+    # 在途任务不超过 2 * workers，中断时最多丢弃这些未提交的日期
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        in_flight = {pool.submit(fetch_day, d): d for d in islice(pending, 2 * max(1, workers))}
+        finished = 0
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                d = in_flight.pop(future)
+                day = d.strftime("%Y-%m-%d")
+                try:
+                    df = future.result()
+                except Exception as exc:  # pylint: disable=broad-except
+                    failed.append({"date": day, "error": f"{type(exc).__name__}: {exc}"})
+                else:
+                    if df is not None:
+                        stats = hot_rank_store.write_hot_ranks(df, STORE_ROOT)
+                        new_dates += 1
+                        new_rows += stats["rows"]
+                    elif d < today:
+                        # 当天榜单可能尚未生成，只把历史上无榜单的日期记为已完成
+                        empty_dates.add(day)
+                        save_empty_dates(empty_dates)
+                finished += 1
+                if finished % 20 == 0:
+                    print(f"[ths] progress {finished}/{len(to_fetch)} new_dates={new_dates} failed={len(failed)}")
+                nxt = next(pending, None)
+                if nxt is not None:
+                    in_flight[pool.submit(fetch_day, nxt)] = nxt
+
+    failed_df = pd.DataFrame(failed, columns=["date", "error"]).sort_values("date")
     tmp_failed = THS_FAILED_CSV.with_suffix(".csv.tmp")
-    merged.to_csv(tmp_ths, index=False, encoding="utf-8")
-    pd.DataFrame({"date": failed_dates}).to_csv(tmp_failed, index=False, encoding="utf-8")
-    tmp_ths.replace(THS_CSV)
+    failed_df.to_csv(tmp_failed, index=False, encoding="utf-8")
     tmp_failed.replace(THS_FAILED_CSV)
 
-    return len(existing_dates), len(new_df["date"].unique()) if not new_df.empty else 0, len(new_df), len(failed_dates)
+    return len(committed), new_dates, new_rows, len(failed)
+
+
+def export_ths_csv() -> int:
+    """Rewrite the flat THS history CSV from the store (for existing consumers)."""
+    df = hot_rank_store.read_hot_ranks(STORE_ROOT, [hot_rank_store.WENCAI_THS])
+    df = df[["date", "code", "name", "rank", "heat", "source", "fetch_time"]]
+    tmp_ths = THS_CSV.with_suffix(".csv.tmp")
+    df.to_csv(tmp_ths, index=False, encoding="utf-8")
+    tmp_ths.replace(THS_CSV)
+    return len(df)
 
 
 def _xq_to_rows(df: pd.DataFrame, kind: str, fetch_time: str) -> pd.DataFrame:
@@ -221,17 +307,46 @@ def capture_xueqiu_snapshot() -> tuple[int, str]:
     return len(new_df), "xueqiu API currently exposes snapshot ranking; historical date replay is not available in this endpoint"
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="回填同花顺/雪球人气数据（可中断续跑）")
+    parser.add_argument("--start", default="2025-01-01", help="开始日期 YYYY-MM-DD（默认 2025-01-01）")
+    parser.add_argument("--end", default=None, help="结束日期 YYYY-MM-DD（默认今天）")
+    parser.add_argument("--workers", type=int, default=4, help="并发查询数（默认 4）")
+    parser.add_argument("--rate", type=float, default=2.0, help="全局请求速率上限，次/秒，含重试（默认 2，0=不限）")
+    parser.add_argument("--retries", type=int, default=3, help="单个日期失败后的重试次数（默认 3，指数退避）")
+    parser.add_argument("--retry-delay", type=float, default=2.0, help="首次重试等待秒数，之后每次翻倍（默认 2）")
+    parser.add_argument("--skip-xueqiu", action="store_true", help="不抓取雪球快照")
+    parser.add_argument(
+        "--refetch-empty", action="store_true", help="重新抓取范围内已记录为无榜单的日期（清除空日期记录）"
+    )
+    return parser.parse_args()
+
+
 def main() -> int:
+    args = parse_args()
     disable_proxy_env()
     OUT_DIR.mkdir(parents=True, exist_ok=True)
     SUMMARY_DIR.mkdir(parents=True, exist_ok=True)
 
-    start = date(2025, 1, 1)
-    end = date.today()
+    start = date.fromisoformat(args.start)
+    end = date.fromisoformat(args.end) if args.end else date.today()
     print(f"backfill range: {start} -> {end}")
 
-    ths_existing_dates, ths_new_dates, ths_new_rows, ths_failed_dates = backfill_ths(start, end)
-    xq_added, xq_note = capture_xueqiu_snapshot()
+    ths_existing_dates, ths_new_dates, ths_new_rows, ths_failed_dates = backfill_ths(
+        start,
+        end,
+        workers=args.workers,
+        rate=args.rate,
+        retries=args.retries,
+        retry_delay=args.retry_delay,
+        refetch_empty=args.refetch_empty,
+    )
+    ths_rows = export_ths_csv()
+    print(f"[ths] csv rows={ths_rows}")
+    if args.skip_xueqiu:
+        xq_added, xq_note = 0, "skipped"
+    else:
+        xq_added, xq_note = capture_xueqiu_snapshot()
 
     summary = BackfillSummary(
         run_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -239,6 +354,7 @@ def main() -> int:
         ths_new_dates=ths_new_dates,
         ths_new_rows=ths_new_rows,
         ths_failed_dates=ths_failed_dates,
+        ths_store=str(STORE_ROOT.relative_to(PROJECT_ROOT)),
         xq_snapshots_added=xq_added,
         xq_note=xq_note,
     )
@@ -246,6 +362,7 @@ def main() -> int:
     summary_path.write_text(json.dumps(asdict(summary), ensure_ascii=False, indent=2), encoding="utf-8")
 
     print(json.dumps(asdict(summary), ensure_ascii=False, indent=2))
+    print(f"ths_store={STORE_ROOT}")
     print(f"ths_csv={THS_CSV}")
     print(f"xq_csv={XQ_CSV}")
     print(f"summary={summary_path}")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""List or purge cached backtest results (see `cache` in config/backtest_base.yaml)."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from result_cache import ResultCache  # noqa: E402
+
+BASE_CONFIG = PROJECT_ROOT / "config" / "backtest_base.yaml"
+
+
+def open_cache(cache_dir: str | None) -> ResultCache:
+    if cache_dir:
+        return ResultCache(cache_dir)
+    with open(BASE_CONFIG, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    # 列表/清理时不受 enabled 开关影响
+    config.setdefault("cache", {})["enabled"] = True
+    return ResultCache.from_config(config, PROJECT_ROOT)
+
+
+def cmd_list(cache: ResultCache) -> int:
+    entries = cache.entries()
+    if not entries:
+        print(f"cache empty: {cache.cache_dir}")
+        return 0
+
+    total = 0
+    print(f"{'key':<18} {'strategy':<40} {'trades':>7} {'size_kb':>9}  last_access")
+    for meta in entries:
+        total += meta["size_bytes"]
+        print(
+            f"{Path(meta['path']).name:<18} {str(meta.get('strategy', '-')):<40} "
+            f"{meta.get('n_trades', 0):>7} {meta['size_bytes'] / 1024:>9.1f}  {meta.get('last_access', '-')}"
+        )
+    print(f"{len(entries)} entries, {total / 1024 / 1024:.1f} MB in {cache.cache_dir}")
+    return 0
+
+
+def cmd_purge(cache: ResultCache, args: argparse.Namespace) -> int:
+    if args.key:
+        removed = sum(cache.remove(k) for k in args.key)
+    elif args.all or (args.older_than_days is None and args.max_size_mb is None):
+        removed = cache.purge(remove_all=True)
+    else:
+        removed = cache.purge(older_than_days=args.older_than_days, max_size_mb=args.max_size_mb)
+    print(f"removed {removed} entries from {cache.cache_dir}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="回测结果缓存管理")
+    parser.add_argument("--cache-dir", default=None, help="缓存目录（默认读取 backtest_base.yaml 的 cache.dir）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("list", help="列出缓存条目")
+
+    purge = sub.add_parser("purge", help="清理缓存条目（不带条件时清空）")
+    purge.add_argument("--key", nargs="+", default=None, help="按key删除")
+    purge.add_argument("--older-than-days", type=float, default=None, help="删除N天内未访问的条目")
+    purge.add_argument("--max-size-mb", type=float, default=None, help="按最近访问保留，总量不超过N MB")
+    purge.add_argument("--all", action="store_true", help="清空全部缓存")
+
+    args = parser.parse_args()
+    cache = open_cache(args.cache_dir)
+
+    if args.command == "list":
+        return cmd_list(cache)
+    return cmd_purge(cache, args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+首次进入人气前10策略：批量参数评估。
+
+一次遍历特征数据，把 (hot_top_n, rise_trigger, exit_rank_threshold, cash_splits, ...)
+组合网格一起评估：
+1) 特征面板转成 日期×股票 的稠密数组（窗口内每个 (date, code) 取第一行，保留日内行序）。
+2) 首次入榜信号、次日低开/触发成交、跌出排名卖出，按参数向量广播一次性计算。
+3) 只有每组参数的现金/仓位记账按日顺序执行，与 BacktestEngine 的逐日逻辑完全一致
+   （含资金不足、达到 max_positions 时未执行的信号顺延到下一日等细节）。
+
+使用示例：
+python scripts/backtest_first_top10_batch.py \
+  --grid hot_top_n=5,10,15,20 --grid rise_trigger=0.01,0.02,0.03 \
+  --grid exit_rank_threshold=30,50,80 --grid cash_splits=3,5,10 \
+  --verify 3
+"""
+
+import argparse
+import logging
+import sys
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from backtest_hot_rank_first_top10_strategy import BacktestEngine, load_strategy_config
+from backtest_metrics import SELECTION_METRICS, compare_runs
+from backtest_worker import parse_grid
+from feature_store import load_features, widen_frame
+
+logger = logging.getLogger(__name__)
+
+# 可批量评估的参数（其余参数取配置文件中的值）
+BATCH_PARAMS = (
+    "hot_top_n",
+    "rise_trigger",
+    "exit_rank_threshold",
+    "cash_splits",
+    "per_trade_cash_frac",
+    "max_positions",
+    "buy_on_gap_down",
+)
+
+
+class PanelArrays:
+    """回测窗口内的 日期×股票 稠密数组"""
+
+    def __init__(self, features_df: pd.DataFrame, start_date: Optional[str] = None, end_date: Optional[str] = None):
+        columns = [c for c in ("date", "code", "hot_rank", "open", "high", "low", "close", "is_tradable", "is_st")
+                   if c in features_df.columns]
+        df = features_df[columns]
+        if start_date:
+            df = df[df["date"] >= pd.Timestamp(start_date)]
+        if end_date:
+            df = df[df["date"] <= pd.Timestamp(end_date)]
+        # 与 DayContext 一致：按日期稳定排序，日内保留文件行序，同一 (date, code) 取第一行
+        df = df.sort_values("date", kind="stable").drop_duplicates(["date", "code"], keep="first")
+        # 与 DayContext 一致：紧凑特征先还原为 float64（价格取两位小数）
+        df = widen_frame(df)
+
+        self.dates = pd.DatetimeIndex(sorted(df["date"].unique()))
+        if len(self.dates) < 2:
+            raise ValueError("交易日数量不足，无法回测")
+        c_idx, self.codes = pd.factorize(df["code"])
+        d_idx = self.dates.get_indexer(df["date"])
+        shape = (len(self.dates), len(self.codes))
+
+        def dense(values, fill, dtype) -> np.ndarray:
+            arr = np.full(shape, fill, dtype=dtype)
+            arr[d_idx, c_idx] = values
+            return arr
+
+        def flag(column: str, default: bool) -> np.ndarray:
+            # 与引擎中 bool(row.get(column, default)) 一致：缺列取默认值，NaN 视为 True
+            if column not in df.columns:
+                return np.full(len(df), default)
+            return df[column].astype(object).where(df[column].notna(), True).astype(bool).to_numpy()
+
+        self.present = dense(True, False, bool)
+        self.pos = dense(df.groupby("date", sort=False).cumcount().to_numpy(), np.iinfo(np.int32).max, np.int32)
+        # 引擎用 int(hot_rank) 比较，这里先取整
+        self.rank = dense(np.floor(df["hot_rank"].to_numpy(dtype=float)), np.nan, float)
+        for col in ("open", "high", "low", "close"):
+            setattr(self, col, dense(df[col].to_numpy(dtype=float), np.nan, float))
+        self.tradable = dense(flag("is_tradable", True), False, bool)
+        self.is_st = dense(flag("is_st", False), False, bool)
+
+        logger.info("面板: %d个交易日 × %d只股票（%s ~ %s）",
+                    shape[0], shape[1], self.dates[0].date(), self.dates[-1].date())
+
+
+def first_entry_signals(panel: PanelArrays, top_ns: List[int]) -> Dict[int, List[np.ndarray]]:
+    """
+    各 hot_top_n 的首次入榜信号（广播计算）
+
+    Returns:
+        hot_top_n -> 每个交易日按日内行序排列的信号股票下标
+    """
+    top = panel.rank[None] <= np.asarray(top_ns, dtype=float)[:, None, None]
+    first = top.copy()
+    first[:, 1:] &= ~top[:, :-1]
+    first[:, 0] = False  # 窗口首日没有窗口内的 T-1，不产生信号
+    first &= (panel.tradable & ~panel.is_st)[None]
+
+    signals = {}
+    for i, n in enumerate(top_ns):
+        per_day = []
+        for d in range(len(panel.dates)):
+            idx = np.flatnonzero(first[i, d])
+            per_day.append(idx[np.argsort(panel.pos[d, idx], kind="stable")])
+        signals[n] = per_day
+    return signals
+
+
+def rise_fills(panel: PanelArrays, rise_triggers: List[float]) -> Dict[float, np.ndarray]:
+    """各 rise_trigger 下，T-1 信号在 T 日盘中触发价是否成交（广播计算）"""
+    trigger = panel.close[None, :-1] * (1.0 + np.asarray(rise_triggers, dtype=float)[:, None, None])
+    hit = np.zeros((len(rise_triggers),) + panel.close.shape, dtype=bool)
+    hit[:, 1:] = (panel.high[None, 1:] >= trigger) & (panel.low[None, 1:] <= trigger)
+    return {r: hit[i] for i, r in enumerate(rise_triggers)}
+
+
+def exit_masks(panel: PanelArrays, thresholds: List[int]) -> Dict[int, np.ndarray]:
+    """各 exit_rank_threshold 下的跌出排名卖出信号（NaN 排名不卖出）"""
+    with np.errstate(invalid="ignore"):
+        masks = panel.rank[None] > np.asarray(thresholds, dtype=float)[:, None, None]
+    return {e: masks[i] for i, e in enumerate(thresholds)}
+
+
+def resolve_params(base_params: dict, overrides: dict) -> dict:
+    """与 BacktestEngine.__init__ 相同的参数推导；网格里有 cash_splits 时仓位参数随之推导"""
+    params = dict(base_params)
+    if "cash_splits" in overrides:
+        for derived in ("per_trade_cash_frac", "max_positions"):
+            if derived not in overrides:
+                params.pop(derived, None)
+    params.update(overrides)
+
+    cash_splits = int(params.get("cash_splits", 3))
+    return {
+        "hot_top_n": int(params.get("hot_top_n", 10)),
+        "rise_trigger": float(params.get("rise_trigger", 0.02)),
+        "buy_on_gap_down": bool(params.get("buy_on_gap_down", True)),
+        "exit_rank_threshold": int(params.get("exit_rank_threshold", 50)),
+        "cash_splits": cash_splits,
+        "per_trade_cash_frac": float(params.get("per_trade_cash_frac", 1.0 / cash_splits)),
+        "max_positions": int(params.get("max_positions", cash_splits)),
+    }
+
+
+def simulate(panel: PanelArrays, p: dict, bt: dict, signals: List[np.ndarray],
+             rise_hit: np.ndarray, exit_mask: np.ndarray) -> Tuple[np.ndarray, List[float], dict]:
+    """
+    单组参数的逐日记账（卖出 → 执行前一日信号 → 生成新信号 → 记录净值）
+
+    Returns:
+        (每日净值, 每笔交易净收益, 统计)
+    """
+    init_cash = float(bt["init_cash"])
+    fee_buy = float(bt["fee_buy"])
+    fee_sell = float(bt["fee_sell"])
+    stamp_tax = float(bt["stamp_tax_sell"])
+    slippage = float(bt["slippage_bps"]) / 10000
+    min_commission = float(bt["min_commission"])
+    lot = int(bt["min_lot_size"])
+    nominal_cash = init_cash * p["per_trade_cash_frac"]
+    max_positions = p["max_positions"]
+    buy_on_gap_down = p["buy_on_gap_down"]
+    rise_mult = 1.0 + p["rise_trigger"]
+
+    present, tradable = panel.present, panel.tradable
+    open_, high, low, close = panel.open, panel.high, panel.low, panel.close
+
+    cash = init_cash
+    positions: Dict[int, list] = {}  # code -> [shares, buy_cost, days_held]
+    pending: Dict[int, int] = {}  # code -> 信号日
+    pnls: List[float] = []
+    stats = defaultdict(int)
+    navs = np.empty(len(panel.dates))
+
+    for d in range(len(panel.dates)):
+        # 1) 卖出：持仓跌出排名阈值，当日收盘卖出
+        to_sell = []
+        for c, pos in positions.items():
+            if present[d, c] and exit_mask[d, c]:
+                to_sell.append(c)
+            pos[2] += 1
+        for c in to_sell:
+            shares, buy_cost, _ = positions.pop(c)
+            sell_exec = float(close[d, c]) * (1 - slippage)
+            commission = max(shares * sell_exec * fee_sell, min_commission)
+            stamp = shares * sell_exec * stamp_tax
+            sell_proceed = shares * sell_exec - commission - stamp
+            cash += sell_proceed
+            pnls.append(sell_proceed - buy_cost)
+            stats["sell_success"] += 1
+
+        # 2) 执行前一日 pending 信号买入
+        for c in list(pending):
+            if len(positions) >= max_positions:
+                break  # 未执行的信号保留到下一日
+            signal_d = pending.pop(c)
+            if c in positions or not present[d, c] or not tradable[d, c]:
+                continue
+
+            signal_close = float(close[signal_d, c])
+            if buy_on_gap_down and open_[d, c] < signal_close:
+                condition, buy_price = "gap_down_buy_count", float(open_[d, c])
+            elif signal_d == d - 1:
+                if not rise_hit[d, c]:
+                    continue
+                condition, buy_price = "rise2_trigger_count", signal_close * rise_mult
+            else:
+                trigger_price = signal_close * rise_mult
+                if not (high[d, c] >= trigger_price and low[d, c] <= trigger_price):
+                    continue
+                condition, buy_price = "rise2_trigger_count", float(trigger_price)
+
+            buy_exec = buy_price * (1 + slippage)
+            shares = int(nominal_cash / buy_exec / lot) * lot
+            if shares <= 0:
+                stats["skip_lot_size"] += 1
+                continue
+            commission = max(shares * buy_exec * fee_buy, min_commission)
+            total_cost = shares * buy_exec + commission
+            if total_cost > cash:
+                stats["skip_cash"] += 1
+                continue
+            cash -= total_cost
+            positions[c] = [shares, total_cost, 0]
+            stats[condition] += 1
+            stats["buy_success"] += 1
+
+        # 3) 生成当日首次入榜信号（用于次日执行）
+        for c in signals[d]:
+            if c in positions or c in pending:
+                continue
+            pending[c] = d
+            stats["first_entry_count"] += 1
+
+        # 4) 每日净值（停牌无行情的持仓不计市值）
+        pos_value = 0.0
+        for c, pos in positions.items():
+            if present[d, c]:
+                pos_value += float(close[d, c]) * pos[0]
+        navs[d] = cash + pos_value
+
+    return navs, pnls, stats
+
+
+def verify_against_engine(config: dict, features_df: pd.DataFrame, panel: PanelArrays,
+                          navs: np.ndarray, n_trades: int, start_date, end_date) -> Tuple[bool, str]:
+    """用逐日引擎回放同一组参数，校验批量结果"""
+    engine = BacktestEngine(config, event_level="off")
+    engine.run(features_df, start_date=start_date, end_date=end_date)
+    _, portfolio_df = engine.result_frames()
+    engine_navs = portfolio_df["nav"].to_numpy(dtype=float)
+    if len(engine_navs) != len(navs):
+        return False, f"交易日数不一致: engine={len(engine_navs)} batch={len(navs)}"
+    if len(engine.trades) != n_trades:
+        return False, f"交易笔数不一致: engine={len(engine.trades)} batch={n_trades}"
+    diff = float(np.max(np.abs(engine_navs - navs)))
+    return diff <= 1e-6, f"{n_trades}笔交易，净值最大偏差 {diff:.2e}"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="首次进入人气前10策略批量参数评估",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument(
+        "--config",
+        default="config/strategies/hot_rank_first_top10_rise2_or_gapdown.yaml",
+        help="策略配置文件路径（网格外的参数取此配置）",
+    )
+    parser.add_argument(
+        "--features",
+        default="data/processed/features/daily_features_v1.parquet",
+        help="特征数据路径",
+    )
+    parser.add_argument("--grid", action="append", default=[], metavar="PARAM=V1,V2",
+                        help=f"参数网格，可重复；支持 {', '.join(BATCH_PARAMS)}")
+    parser.add_argument("--start-date", default=None, help="回测开始日期，如 2025-01-15")
+    parser.add_argument("--end-date", default=None, help="回测结束日期，如 2026-01-31")
+    parser.add_argument("--sort-by", choices=SELECTION_METRICS, default="total_return", help="结果排序指标")
+    parser.add_argument("--top", type=int, default=10, help="日志中展示前N组参数")
+    parser.add_argument("--verify", type=int, default=0, help="用逐日引擎回放前N组参数校验结果")
+    parser.add_argument("--output", default="data/backtest/batch", help="输出目录")
+    args = parser.parse_args()
+
+    try:
+        grid = parse_grid(args.grid)
+    except ValueError as e:
+        parser.error(str(e))
+    unknown = sorted({k for combo in grid for k in combo} - set(BATCH_PARAMS))
+    if unknown:
+        parser.error(f"不支持批量评估的参数: {', '.join(unknown)}")
+
+    config = load_strategy_config(args.config)
+    bt = config["backtest"]
+    resolved = [resolve_params(config["params"], combo) for combo in grid]
+
+    # 只读取面板与引擎校验用到的列，日期窗口下推到 Parquet 读取
+    features_df = load_features(args.features, columns=BacktestEngine.FEATURE_COLUMNS,
+                                start_date=args.start_date, end_date=args.end_date)
+    panel = PanelArrays(features_df, args.start_date, args.end_date)
+
+    signals = first_entry_signals(panel, sorted({p["hot_top_n"] for p in resolved}))
+    fills = rise_fills(panel, sorted({p["rise_trigger"] for p in resolved}))
+    exits = exit_masks(panel, sorted({p["exit_rank_threshold"] for p in resolved}))
+    logger.info("信号预计算完成: %d组参数（hot_top_n %d种, rise_trigger %d种, exit_rank %d种）",
+                len(resolved), len(signals), len(fills), len(exits))
+
+    params, stats_rows, nav_columns, trades = [], [], {}, {}
+    for i, (combo, p) in enumerate(zip(grid, resolved)):
+        navs, pnls, stats = simulate(panel, p, bt, signals[p["hot_top_n"]],
+                                     fills[p["rise_trigger"]], exits[p["exit_rank_threshold"]])
+        params.append({"grid_id": i, **p})
+        stats_rows.append(stats)
+        nav_columns[i] = navs
+        trades[i] = pd.DataFrame({"net_pnl": pnls})
+
+        if i < args.verify:
+            run_config = dict(config, params=dict(config["params"]))
+            run_config["params"].update(p)
+            ok, message = verify_against_engine(run_config, features_df, panel, navs, len(pnls),
+                                                args.start_date, args.end_date)
+            if not ok:
+                logger.error("第%d组参数与逐日引擎不一致: %s", i, message)
+                return 1
+            logger.info("第%d组参数校验通过: %s", i, message)
+
+    # 所有参数组的净值排成 日期×参数组 矩阵，指标一次算出
+    summary = compare_runs(pd.DataFrame(nav_columns), trades, bt["init_cash"]).reset_index(drop=True)
+    results = pd.concat([pd.DataFrame(params), summary, pd.DataFrame(stats_rows)], axis=1)
+    results = results.sort_values(args.sort_by, ascending=False)
+    out = Path(args.output)
+    out.mkdir(parents=True, exist_ok=True)
+    output_file = out / f"{config['strategy']['name']}_batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    results.to_csv(output_file, index=False, encoding="utf-8-sig")
+
+    for row in results.head(args.top).to_dict("records"):
+        logger.info(
+            "top_n=%d rise=%.3f exit_rank=%d splits=%d | 收益%.2f%% 回撤%.2f%% 夏普%.2f 交易%d笔",
+            row["hot_top_n"], row["rise_trigger"], row["exit_rank_threshold"], row["cash_splits"],
+            row["total_return"] * 100, row["max_drawdown"] * 100, row["sharpe_ratio"], row["total_trades"],
+        )
+    logger.info("结果已保存: %s", output_file)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -23,13 +23,27 @@ import sys
 from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
 import yaml
 
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from checkpoint import (
+    capture_engine_state,
+    compare_ledgers,
+    load_checkpoint,
+    restore_engine_state,
+    save_checkpoint,
+)
+from day_context import DayContext, iter_day_contexts, trading_dates
+from event_log import EVENT_LEVELS, TradeEventLog
+from feature_store import load_features
+from hot_rank_index import HotRankIndex
+from result_cache import ResultCache
 
 logging.basicConfig(
     level=logging.INFO,
@@ -124,7 +138,12 @@ class Position:
 
 
 class BacktestEngine:
-    def __init__(self, config: dict):
+    # 回测读取的特征列
+    FEATURE_COLUMNS = ("date", "code", "name", "open", "high", "low", "close", "hot_rank", "is_st", "is_tradable")
+    # 窗口内交易日单独迭代，窗口首日不产生信号，无需预读
+    LOOKBACK_DAYS = 0
+
+    def __init__(self, config: dict, event_level: Optional[str] = None):
         self.config = config
         self.strategy = config["strategy"]
         self.params = config["params"]
@@ -151,8 +170,21 @@ class BacktestEngine:
         self.pending_signals: Dict[str, pd.Series] = {}
         self.trades: List[Trade] = []
         self.daily_portfolio = []
+        self.last_date: Optional[pd.Timestamp] = None
+        # 回测窗口（run() 或多策略运行器设置）
+        self.start_date: Optional[pd.Timestamp] = None
+        self.end_date: Optional[pd.Timestamp] = None
+        # 人气排名前N索引（load_features 时加载；未生成或未加载时按当日切片过滤）
+        self.hot_rank_index: Optional[HotRankIndex] = None
         self.stats = defaultdict(int)
 
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.event_log = TradeEventLog.from_config(
+            config,
+            PROJECT_ROOT / "data" / "backtest" / "logs" / f"trades_{self.strategy['name']}_{timestamp}",
+            level=event_level,
+        )
+
         logger.info(
             "初始化: %s | init_cash=%.0f cash_splits=%d hot_top_n=%d rise_trigger=%.2f exit_rank=%d",
             self.strategy["name"],
@@ -163,9 +195,18 @@ class BacktestEngine:
             self.exit_rank_threshold,
         )
 
-    def load_features(self, features_path: str) -> pd.DataFrame:
-        df = pd.read_parquet(features_path)
-        df["date"] = pd.to_datetime(df["date"])
+    def feature_columns(self) -> List[str]:
+        return list(self.FEATURE_COLUMNS)
+
+    def load_features(self, features_path: str, start_date: Optional[str] = None,
+                      end_date: Optional[str] = None) -> pd.DataFrame:
+        # 只读取用到的列，日期窗口（默认取配置）下推到 Parquet 读取
+        df = load_features(features_path, columns=self.feature_columns(),
+                           start_date=start_date or self.start_date, end_date=end_date or self.end_date,
+                           lookback_days=self.LOOKBACK_DAYS)
+        self.hot_rank_index = HotRankIndex.for_features(features_path)
+        if self.hot_rank_index is not None:
+            logger.info("人气排名索引: %s", self.hot_rank_index)
         return df
 
     def is_first_entry_top_n(self, row_today: pd.Series, row_prev: Optional[pd.Series]) -> bool:
@@ -222,6 +263,18 @@ class BacktestEngine:
             self.stats["rise2_trigger_count"] += 1
 
         self.stats["buy_success"] += 1
+        self.event_log.emit(
+            "BUY",
+            date=trade.entry_date,
+            code=trade.code,
+            condition=condition,
+            buy_price=buy_price,
+            buy_exec=buy_exec,
+            shares=shares,
+            commission=commission,
+            total_cost=total_cost,
+            cash_after=self.cash,
+        )
         return Position(trade)
 
     def execute_sell(self, row_today: pd.Series):
@@ -250,105 +303,144 @@ class BacktestEngine:
         self.trades.append(trade)
         del self.positions[code]
         self.stats["sell_success"] += 1
+        self.event_log.emit(
+            "SELL",
+            date=trade.exit_date,
+            code=code,
+            exit_reason=trade.exit_reason,
+            exit_rank=trade.exit_rank,
+            sell_exec=sell_exec,
+            shares=position.shares,
+            sell_proceed=sell_proceed,
+            pnl=trade.net_pnl,
+            pnl_pct=trade.net_pnl_pct,
+            hold_days=trade.hold_days,
+            cash_after=self.cash,
+        )
 
     def run(self, features_df: pd.DataFrame, start_date: Optional[str] = None, end_date: Optional[str] = None):
-        dates = sorted(features_df["date"].unique())
-        if start_date:
-            start_ts = pd.Timestamp(start_date)
-            dates = [d for d in dates if d >= start_ts]
-        if end_date:
-            end_ts = pd.Timestamp(end_date)
-            dates = [d for d in dates if d <= end_ts]
+        self.set_window(start_date, end_date)
+
+        all_dates = trading_dates(features_df)
+        dates = [d for d in all_dates if self.in_window(d)]
         if len(dates) < 2:
             raise ValueError("交易日数量不足，无法回测")
 
-        for i, date in enumerate(dates):
-            df_today = features_df[features_df["date"] == date]
-            df_prev = features_df[features_df["date"] == dates[i - 1]] if i > 0 else pd.DataFrame()
+        # 窗口内的日历单独迭代：窗口首日不产生信号（与 T-1 在窗口外的情况一致）
+        for ctx in iter_day_contexts(features_df, dates, self.hot_rank_index):
+            self.run_day(ctx)
 
-            # 1) 卖出：持仓跌出前50
-            to_sell: List[str] = []
-            for code, pos in self.positions.items():
-                row = df_today[df_today["code"] == code]
-                if row.empty:
-                    pos.days_held += 1
-                    continue
-                row = row.iloc[0]
-                rank = row.get("hot_rank")
-                if pd.notna(rank) and int(rank) > self.exit_rank_threshold:
-                    to_sell.append(code)
+        self.finish()
+
+    def set_window(self, start_date: Optional[str] = None, end_date: Optional[str] = None):
+        if start_date is not None:
+            self.start_date = pd.Timestamp(start_date)
+        if end_date is not None:
+            self.end_date = pd.Timestamp(end_date)
+
+    def in_window(self, date: pd.Timestamp) -> bool:
+        if self.start_date is not None and date < self.start_date:
+            return False
+        if self.end_date is not None and date > self.end_date:
+            return False
+        return True
+
+    def run_day(self, ctx: DayContext):
+        if not self.in_window(ctx.date):
+            return
+        if self.last_date is not None and ctx.date <= self.last_date:
+            return  # 检查点之前的交易日已模拟
+
+        date = ctx.date
+        # 前一交易日也在回测窗口内时才生成信号
+        has_prev = ctx.prev is not None and self.in_window(ctx.prev_date)
+
+        # 1) 卖出：持仓跌出前50
+        to_sell: List[str] = []
+        for code, pos in self.positions.items():
+            row = ctx.row(code)
+            if row is None:
                 pos.days_held += 1
+                continue
+            rank = row.get("hot_rank")
+            if pd.notna(rank) and int(rank) > self.exit_rank_threshold:
+                to_sell.append(code)
+            pos.days_held += 1
+
+        for code in to_sell:
+            self.execute_sell(ctx.row(code))
+
+        # 2) 执行前一日 pending 信号买入
+        pending_codes = list(self.pending_signals.keys())
+        for code in pending_codes:
+            if len(self.positions) >= self.max_positions:
+                break
+            if code in self.positions:
+                del self.pending_signals[code]
+                continue
 
-            for code in to_sell:
-                row = df_today[df_today["code"] == code].iloc[0]
-                self.execute_sell(row)
-
-            # 2) 执行前一日 pending 信号买入
-            pending_codes = list(self.pending_signals.keys())
-            for code in pending_codes:
-                if len(self.positions) >= self.max_positions:
-                    break
-                if code in self.positions:
-                    del self.pending_signals[code]
-                    continue
+            signal_row = self.pending_signals[code]
+            row_today = ctx.row(code)
+            if row_today is None:
+                del self.pending_signals[code]
+                continue
 
-                signal_row = self.pending_signals[code]
-                row_today = df_today[df_today["code"] == code]
-                if row_today.empty:
-                    del self.pending_signals[code]
+            if not bool(row_today.get("is_tradable", True)):
+                del self.pending_signals[code]
+                continue
+
+            condition = self.check_buy_condition(row_today, float(signal_row["close"]))
+            if condition is not None:
+                cond_name, buy_price = condition
+                pos = self.execute_buy(signal_row, row_today, cond_name, buy_price)
+                if pos is not None:
+                    self.positions[code] = pos
+            del self.pending_signals[code]
+
+        # 3) 生成当日首次入榜前10信号（用于次日执行）
+        # 只遍历当日人气前N（排名索引切片，保持原行顺序，信号插入顺序不变）
+        if has_prev:
+            for _, row in ctx.top_hot_rank(self.hot_top_n).iterrows():
+                code = row["code"]
+
+                if code in self.positions or code in self.pending_signals:
                     continue
-                row_today = row_today.iloc[0]
 
-                if not bool(row_today.get("is_tradable", True)):
-                    del self.pending_signals[code]
+                if not bool(row.get("is_tradable", True)):
+                    continue
+                if bool(row.get("is_st", False)):
                     continue
 
-                condition = self.check_buy_condition(row_today, float(signal_row["close"]))
-                if condition is not None:
-                    cond_name, buy_price = condition
-                    pos = self.execute_buy(signal_row, row_today, cond_name, buy_price)
-                    if pos is not None:
-                        self.positions[code] = pos
-                del self.pending_signals[code]
-
-            # 3) 生成当日首次入榜前10信号（用于次日执行）
-            if i > 0:
-                for _, row in df_today.iterrows():
-                    code = row["code"]
-
-                    if code in self.positions or code in self.pending_signals:
-                        continue
-
-                    if not bool(row.get("is_tradable", True)):
-                        continue
-                    if bool(row.get("is_st", False)):
-                        continue
-
-                    prev_row_df = df_prev[df_prev["code"] == code]
-                    prev_row = prev_row_df.iloc[0] if not prev_row_df.empty else None
-
-                    if self.is_first_entry_top_n(row, prev_row):
-                        self.pending_signals[code] = row.copy()
-                        self.stats["first_entry_count"] += 1
-
-            # 4) 每日净值
-            pos_value = 0.0
-            for code, pos in self.positions.items():
-                row = df_today[df_today["code"] == code]
-                if not row.empty:
-                    pos_value += float(row.iloc[0]["close"]) * pos.shares
-
-            nav = self.cash + pos_value
-            self.daily_portfolio.append(
-                {
-                    "date": date,
-                    "cash": self.cash,
-                    "position_value": pos_value,
-                    "nav": nav,
-                    "n_positions": len(self.positions),
-                }
-            )
+                prev_row = ctx.row(code, "prev")
+
+                if self.is_first_entry_top_n(row, prev_row):
+                    self.pending_signals[code] = row.copy()
+                    self.stats["first_entry_count"] += 1
+
+        # 4) 每日净值
+        self.record_portfolio(ctx)
+
+    def record_portfolio(self, ctx: DayContext):
+        pos_value = 0.0
+        for code, pos in self.positions.items():
+            close = ctx.close_of(code)
+            if close is not None:
+                pos_value += float(close) * pos.shares
+
+        nav = self.cash + pos_value
+        self.daily_portfolio.append(
+            {
+                "date": ctx.date,
+                "cash": self.cash,
+                "position_value": pos_value,
+                "nav": nav,
+                "n_positions": len(self.positions),
+            }
+        )
+        self.last_date = ctx.date
 
+    def finish(self):
+        self.event_log.close()
         logger.info(
             "回测结束: first_entry=%d buy=%d sell=%d gap_down_buy=%d rise2_buy=%d",
             self.stats["first_entry_count"],
@@ -358,7 +450,20 @@ class BacktestEngine:
             self.stats["rise2_trigger_count"],
         )
 
-    def save_results(self, output_dir: str):
+    def get_state(self) -> dict:
+        # 日终状态：现金、持仓及持有天数、待执行信号、统计
+        return capture_engine_state(self, extra_attrs=("pending_signals",))
+
+    def set_state(self, state: dict):
+        restore_engine_state(self, state, Trade, Position, extra_attrs=("pending_signals",))
+
+    def result_frames(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        trades_df = pd.DataFrame([t.to_dict() for t in self.trades])
+        portfolio_df = pd.DataFrame(self.daily_portfolio)
+        return trades_df, portfolio_df
+
+    def save_results(self, output_dir: str, frames: Optional[Tuple[pd.DataFrame, pd.DataFrame]] = None):
+        trades_df, portfolio_df = frames if frames is not None else self.result_frames()
         out = Path(output_dir)
         out.mkdir(parents=True, exist_ok=True)
 
@@ -366,8 +471,7 @@ class BacktestEngine:
         cfg_hash = hashlib.md5(json.dumps(self.params, sort_keys=True).encode()).hexdigest()[:8]
         prefix = f"{self.strategy['name']}_v{self.strategy['version']}_{cfg_hash}_{timestamp}"
 
-        if self.trades:
-            trades_df = pd.DataFrame([t.to_dict() for t in self.trades])
+        if not trades_df.empty:
             trades_df = trades_df.sort_values("entry_date", ascending=False)
 
             trades_dir = out / "trades"
@@ -375,8 +479,7 @@ class BacktestEngine:
             trades_df.to_parquet(trades_dir / f"{prefix}_trades.parquet", index=False)
             trades_df.to_csv(trades_dir / f"{prefix}_trades.csv", index=False, encoding="utf-8-sig")
 
-        if self.daily_portfolio:
-            portfolio_df = pd.DataFrame(self.daily_portfolio)
+        if not portfolio_df.empty:
             portfolio_dir = out / "portfolio"
             portfolio_dir.mkdir(exist_ok=True)
             portfolio_df.to_parquet(portfolio_dir / f"{prefix}_portfolio.parquet", index=False)
@@ -397,13 +500,69 @@ def main():
     parser.add_argument("--start-date", default=None, help="回测开始日期，如 2025-01-15")
     parser.add_argument("--end-date", default=None, help="回测结束日期，如 2026-01-31")
     parser.add_argument("--output", default="data/backtest", help="输出目录")
+    parser.add_argument(
+        "--event-level",
+        choices=list(EVENT_LEVELS),
+        default=None,
+        help="交易事件日志级别（默认读取配置 logging.event_level）",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="忽略结果缓存，强制重新回测")
+    parser.add_argument("--checkpoint", default=None, help="检查点文件路径（指定时不使用结果缓存）")
+    parser.add_argument("--resume", action="store_true", help="从 --checkpoint 恢复，只模拟新增交易日")
+    parser.add_argument("--validate-resume", action="store_true", help="续跑后全量回放并校验结果一致")
     args = parser.parse_args()
 
     config = load_strategy_config(args.config)
-    engine = BacktestEngine(config)
-    features_df = engine.load_features(args.features)
+    engine = BacktestEngine(config, event_level=args.event_level)
+
+    use_cache = not (args.no_cache or args.checkpoint)
+    cache = ResultCache.from_config(config, PROJECT_ROOT) if use_cache else None
+    cache_key = (
+        cache.make_key(config, args.features, args.start_date, args.end_date, engine_file=__file__)
+        if cache
+        else None
+    )
+    cached = cache.get(cache_key) if cache else None
+    if cached is not None:
+        trades_df, portfolio_df, meta = cached
+        logger.info("命中结果缓存: %s（%d笔交易）", cache_key, meta.get("n_trades", 0))
+        engine.save_results(args.output, frames=(trades_df, portfolio_df))
+        return
+
+    features_df = engine.load_features(args.features, args.start_date, args.end_date)
+    if args.resume and args.checkpoint and Path(args.checkpoint).exists():
+        engine.set_state(load_checkpoint(args.checkpoint))
+        logger.info("从检查点恢复: %s（最后交易日 %s）", args.checkpoint, engine.last_date)
+
     engine.run(features_df, start_date=args.start_date, end_date=args.end_date)
-    engine.save_results(args.output)
+
+    if args.checkpoint:
+        save_checkpoint(args.checkpoint, engine.get_state())
+
+    frames = engine.result_frames()
+
+    if args.validate_resume:
+        full_engine = BacktestEngine(config, event_level="off")
+        full_engine.run(features_df, start_date=args.start_date, end_date=args.end_date)
+        identical, message = compare_ledgers(frames, full_engine.result_frames())
+        if not identical:
+            logger.error("续跑结果与全量回放不一致: %s", message)
+            sys.exit(1)
+        logger.info("续跑校验通过: %s", message)
+    if cache:
+        cache.put(
+            cache_key,
+            *frames,
+            meta={
+                "strategy": engine.strategy["name"],
+                "version": engine.strategy["version"],
+                "features": str(args.features),
+                "start_date": args.start_date,
+                "end_date": args.end_date,
+                "stats": dict(engine.stats),
+            },
+        )
+    engine.save_results(args.output, frames=frames)
 
 
 if __name__ == "__main__":
@@ -36,6 +36,16 @@ import yaml
 # 添加项目根目录到路径
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from checkpoint import (capture_engine_state, compare_ledgers, load_checkpoint,
+                        restore_engine_state, save_checkpoint)
+from day_context import DayContext, iter_day_contexts, trading_dates
+from event_log import EVENT_LEVELS, TradeEventLog
+from feature_store import load_features
+from fill_models import TriggerFill, build_fill_model
+from hot_rank_index import HotRankIndex
+from result_cache import ResultCache
 
 # 配置日志
 logging.basicConfig(
@@ -186,8 +196,24 @@ class Position:
 class BacktestEngine:
     """回测引擎（追涨策略版）"""
     
-    def __init__(self, config: dict):
-        """初始化回测引擎"""
+    # 回测读取的特征列（成交模型所需列另行合并，见 feature_columns）
+    FEATURE_COLUMNS = (
+        'date', 'code', 'name', 'high', 'low', 'close', 'amount', 'close_prev', 'hot_rank',
+        'limit_up_price', 'is_limit_up', 'is_st', 'is_tradable', 'days_since_listing',
+        'amplitude_prev', 'pct_change_prev', 'intraday_drop', 'max_drop_5d', 'cum_return_2d',
+        'one_word_board_5d',
+    )
+    # 窗口首日之前需要预读的交易日数（T-1、T-2）
+    LOOKBACK_DAYS = 2
+    
+    def __init__(self, config: dict, event_level: Optional[str] = None):
+        """
+        初始化回测引擎
+        
+        Args:
+            config: 合并后的策略配置
+            event_level: 交易事件日志级别（off/trades/full），None 时读取配置 logging.event_level
+        """
         self.config = config
         self.strategy = config['strategy']
         self.params = config['params']
@@ -198,7 +224,9 @@ class BacktestEngine:
         self.prev_amount_min = self.params['prev_amount_min']
         self.rise_trigger = self.params['rise_trigger']  # 追涨触发阈值 +2%
         self.rise_trigger_cyb_kcb = self.params.get('rise_trigger_cyb_kcb', 0.03)  # 创业板和科创板 +3%
-        self.per_trade_cash_frac = self.params['per_trade_cash_frac']
+        # 资金分份数：每笔 1/cash_splits 初始资金，最多同时持有 cash_splits 只
+        self.cash_splits = self.params.get('cash_splits', 5)
+        self.max_positions = self.cash_splits
         self.hold_on_limit_up = self.params['hold_on_limit_up']
         self.exit_on_limit_down = self.params.get('exit_on_limit_down', True)
         # 卖出跌幅阈值 -7%（支持两种参数名）
@@ -207,6 +235,13 @@ class BacktestEngine:
         self.max_hold_days = self.params['max_hold_days']
         self.max_hot_rank_3d = self.params.get('max_hot_rank_3d', 50)
         
+        # 成交模型（默认：盘中触及 T-1收盘价 × (1+rise_trigger) 时按触发价成交）
+        self.fill_model = build_fill_model(self.params.get('fill_model'), TriggerFill(
+            side='up', trigger=self.rise_trigger, trigger_gem_star=self.rise_trigger_cyb_kcb))
+        
+        # 人气排名前N索引（load_features 时加载；未生成或未加载时按当日切片过滤）
+        self.hot_rank_index: Optional[HotRankIndex] = None
+        
         # 回测参数
         self.init_cash = self.backtest_config['init_cash']
         self.fee_buy = self.backtest_config['fee_buy']
@@ -221,57 +256,63 @@ class BacktestEngine:
         self.positions: Dict[str, Position] = {}
         self.trades: List[Trade] = []
         self.daily_portfolio = []
+        self.last_date: Optional[pd.Timestamp] = None  # 最后一个已模拟的交易日（断点续跑用）
+        
+        # 回测窗口（params.start_date/end_date，默认使用全部交易日）
+        self.start_date = pd.Timestamp(self.params['start_date']) if self.params.get('start_date') else None
+        self.end_date = pd.Timestamp(self.params['end_date']) if self.params.get('end_date') else None
         
         # 统计
         self.stats = defaultdict(int)
         
         # 配置日志
-        self._setup_logging()
+        self._setup_event_log(event_level)
         
         logger.info(f"策略初始化: {self.strategy['name']} v{self.strategy['version']}")
         logger.info(f"参数: hot_top_n={self.hot_top_n}, rise_trigger={self.rise_trigger}, "
                    f"exit_drop_trigger={self.exit_drop_trigger}")
+        logger.info(f"成交模型: {self.fill_model}")
         logger.info(f"初始资金: {self.init_cash:,.0f}")
     
-    def _setup_logging(self):
-        """设置日志"""
-        # 创建日志目录
+    def _setup_event_log(self, event_level: Optional[str] = None):
+        """设置交易事件日志（内存缓冲，批量落盘）"""
         log_dir = PROJECT_ROOT / 'data' / 'backtest' / 'logs'
-        log_dir.mkdir(parents=True, exist_ok=True)
-        
-        # JSON日志文件
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        log_file = log_dir / f"trades_{self.strategy['name']}_{timestamp}.log"
+        path_stem = log_dir / f"trades_{self.strategy['name']}_{timestamp}"
         
-        # 添加文件处理器
-        self.json_logger = logging.getLogger('trades')
-        self.json_logger.setLevel(logging.INFO)
-        fh = logging.FileHandler(log_file, encoding='utf-8')
-        fh.setFormatter(logging.Formatter('%(message)s'))
-        self.json_logger.addHandler(fh)
+        self.event_log = TradeEventLog.from_config(self.config, path_stem, level=event_level)
+        # full 级别才输出逐日/逐笔的控制台明细
+        self.verbose = self.event_log.full
         
-        logger.info(f"交易日志: {log_file}")
+        if self.event_log.enabled:
+            logger.info(f"交易日志: {self.event_log.path} (level={self.event_log.level})")
     
     def log_trade_event(self, event: str, **kwargs):
-        """记录交易事件（JSON格式）"""
-        # 转换Timestamp到字符串
-        for key, value in kwargs.items():
-            if hasattr(value, 'isoformat'):
-                kwargs[key] = value.isoformat()
-        
-        log_entry = {
-            'timestamp': datetime.now().isoformat(),
-            'event': event,
-            **kwargs
-        }
-        self.json_logger.info(json.dumps(log_entry, ensure_ascii=False))
+        """记录交易事件（级别为 off 时直接返回）"""
+        if not self.event_log.wants(event):
+            return
+        self.event_log.emit(event, **kwargs)
     
-    def load_features(self, features_path: str) -> pd.DataFrame:
-        """加载特征数据"""
-        logger.info(f"加载特征数据: {features_path}")
-        df = pd.read_parquet(features_path)
-        df['date'] = pd.to_datetime(df['date'])
+    def feature_columns(self) -> List[str]:
+        """回测需要读取的特征列（策略列 + 成交模型列）"""
+        return sorted(set(self.FEATURE_COLUMNS) | set(self.fill_model.columns))
+    
+    def load_features(self, features_path: str, start_date: Optional[str] = None,
+                      end_date: Optional[str] = None) -> pd.DataFrame:
+        """
+        加载特征数据（紧凑类型，只读取策略用到的列）
+        
+        日期窗口（默认取配置）下推到Parquet读取，窗口前预读LOOKBACK_DAYS个交易日作为T-1/T-2。
+        """
+        start_date = start_date or self.start_date
+        end_date = end_date or self.end_date
+        logger.info(f"加载特征数据: {features_path}（{start_date or '起始'} ~ {end_date or '最新'}）")
+        df = load_features(features_path, columns=self.feature_columns(), start_date=start_date,
+                           end_date=end_date, lookback_days=self.LOOKBACK_DAYS)
         logger.info(f"加载完成: {len(df):,}行, {df['code'].nunique()}只股票")
+        self.hot_rank_index = HotRankIndex.for_features(features_path)
+        if self.hot_rank_index is not None:
+            logger.info(f"人气排名索引: {self.hot_rank_index}")
         return df
     
     def filter_universe(self, df_today: pd.DataFrame, df_prev: pd.DataFrame, df_prev2: pd.DataFrame = None) -> pd.DataFrame:
@@ -280,7 +321,7 @@ class BacktestEngine:
         
         Args:
             df_today: 今日数据
-            df_prev: 昨日数据（T-1）
+            df_prev: 昨日数据（T-1，可只含人气前N）
             df_prev2: 前天数据（T-2）
             
         Returns:
@@ -393,39 +434,8 @@ class BacktestEngine:
         
         return df_prev_hot
     
-    def check_entry_signal(self, row_today: pd.Series, row_prev: pd.Series) -> bool:
-        """
-        检查买入信号（追涨策略：今日股价触及昨日收盘价 × (1 + rise_trigger)）
-        
-        核心逻辑：
-        最低价 <= 触发价，说明我们能在触发价（+2%）买到股票
-        
-        Args:
-            row_today: 今日行情
-            row_prev: 昨日行情（T-1）
-            
-        Returns:
-            是否触发买入
-        """
-        # 根据股票代码选择触发阈值
-        code = row_today['code']
-        if code.startswith('30') or code.startswith('688'):
-            rise_trigger = self.rise_trigger_cyb_kcb  # 创业板/科创板 +3%
-        else:
-            rise_trigger = self.rise_trigger  # 其他 +2%
-        
-        # 计算触发价格
-        trigger_price = row_prev['close'] * (1 + rise_trigger)
-        
-        # 买入条件（必须同时满足）：
-        # 条件1: 最高价涨到过触发价（说明盘中曾达到+2%）
-        condition1 = row_today['high'] >= trigger_price
-        # 条件2: 最低价不高于触发价（说明触发价是可成交的）
-        condition2 = row_today['low'] <= trigger_price
-        
-        return condition1 and condition2
-    
-    def execute_buy(self, date: pd.Timestamp, row_today: pd.Series, row_prev: pd.Series, row_prev_2: Optional[pd.Series] = None) -> Optional[Trade]:
+    def execute_buy(self, date: pd.Timestamp, row_today: pd.Series, row_prev: pd.Series,
+                    row_prev_2: Optional[pd.Series], buy_price: float) -> Optional[Trade]:
         """
         执行买入
         
@@ -434,24 +444,16 @@ class BacktestEngine:
             row_today: 今日行情
             row_prev: 昨日行情（T-1）
             row_prev_2: 前日行情（T-2）
+            buy_price: 成交模型给出的买入价格
             
         Returns:
             交易记录或None
         """
         code = row_today['code']
-        
-        # 根据股票代码选择触发阈值
-        if code.startswith('30') or code.startswith('688'):
-            rise_trigger = self.rise_trigger_cyb_kcb  # 创业板/科创板 +3%
-        else:
-            rise_trigger = self.rise_trigger  # 其他 +2%
-        
-        # 计算买入价格（基于昨日收盘价 × (1 + rise_trigger)）
-        buy_price = row_prev['close'] * (1 + rise_trigger)
         buy_exec = buy_price * (1 + self.slippage_bps / 10000)
         
-        # 计算名义资金（10万全部投入）
-        nominal_cash = self.init_cash * 0.2
+        # 计算名义资金（每笔 1/cash_splits 初始资金）
+        nominal_cash = self.init_cash * (1.0 / self.cash_splits)
         
         # 计算股数（向下取整到100股）
         shares = int(nominal_cash / buy_exec / self.min_lot_size) * self.min_lot_size
@@ -513,10 +515,11 @@ class BacktestEngine:
                            commission=commission,
                            total_cost=total_cost,
                            cash_after=self.cash,
-                           reason='trigger_rise')
+                           reason=self.fill_model.reason)
         
         self.stats['buy_success'] += 1
-        logger.info(f"买入: {date} {code} @{buy_exec:.2f} x{shares}股 成本{total_cost:.2f} 余额{self.cash:.2f}")
+        if self.verbose:
+            logger.info(f"买入: {date} {code} @{buy_exec:.2f} x{shares}股 成本{total_cost:.2f} 余额{self.cash:.2f}")
         
         return trade
     
@@ -610,8 +613,9 @@ class BacktestEngine:
                            cash_after=self.cash)
         
         self.stats['sell_success'] += 1
-        logger.info(f"卖出: {date} {code} @{sell_exec:.2f} x{position.shares}股 "
-                   f"收益{trade.net_pnl:.2f}({trade.net_pnl_pct:.2%}) {reason}")
+        if self.verbose:
+            logger.info(f"卖出: {date} {code} @{sell_exec:.2f} x{position.shares}股 "
+                        f"收益{trade.net_pnl:.2f}({trade.net_pnl_pct:.2%}) {reason}")
         
         # 移除持仓
         del self.positions[code]
@@ -619,118 +623,168 @@ class BacktestEngine:
         # 添加到已完成交易
         self.trades.append(trade)
     
-    def run(self, features_df: pd.DataFrame):
+    def run(self, features_df: pd.DataFrame, start_date: Optional[str] = None, end_date: Optional[str] = None):
         """
         运行回测
         
         Args:
             features_df: 特征数据
+            start_date: 回测开始日期（None 时使用配置/默认值）
+            end_date: 回测结束日期（None 时使用配置/默认值）
         """
         logger.info("="*80)
         logger.info("开始回测（追涨策略）")
         logger.info("="*80)
         
-        # 按日期分组
-        dates = sorted(features_df['date'].unique())
+        # 按日期分组，只模拟窗口内交易日（T-1/T-2取自完整交易日历）
+        self.set_window(start_date, end_date)
+        all_dates = [d for d in trading_dates(features_df) if self.end_date is None or d <= self.end_date]
+        dates = [d for d in all_dates if self.in_window(d)]
+        if not dates:
+            raise ValueError("回测窗口内没有交易日")
         logger.info(f"回测期间: {dates[0]} 至 {dates[-1]}, 共{len(dates)}个交易日")
         
-        for i, date in enumerate(dates):
-            if i == 0:
-                continue  # 第一天没有T-1数据
-            
-            prev_date = dates[i-1]
-            prev_date_2 = dates[i-2] if i >= 2 else None
-            df_today = features_df[features_df['date'] == date]
-            df_prev = features_df[features_df['date'] == prev_date]
-            df_prev_2 = features_df[features_df['date'] == prev_date_2] if prev_date_2 else pd.DataFrame()
-            
+        for ctx in iter_day_contexts(features_df, all_dates, self.hot_rank_index):
+            self.run_day(ctx)
+        
+        self.finish()
+    
+    def set_window(self, start_date: Optional[str] = None, end_date: Optional[str] = None):
+        """
+        设置回测窗口（None 表示不限制；T-1/T-2 仍取自窗口外的完整交易日历）
+        
+        Args:
+            start_date: 窗口开始日期，如 2025-01-15
+            end_date: 窗口结束日期，如 2026-01-31
+        """
+        if start_date is not None:
+            self.start_date = pd.Timestamp(start_date)
+        if end_date is not None:
+            self.end_date = pd.Timestamp(end_date)
+    
+    def in_window(self, date: pd.Timestamp) -> bool:
+        """交易日是否在回测窗口内"""
+        if self.start_date is not None and date < self.start_date:
+            return False
+        if self.end_date is not None and date > self.end_date:
+            return False
+        return True
+    
+    def run_day(self, ctx: DayContext):
+        """
+        模拟单个交易日（先卖后买，再记录组合状态）
+        
+        Args:
+            ctx: 当日上下文（T/T-1/T-2切片及代码索引，可被多个策略共享）
+        """
+        if not self.in_window(ctx.date):
+            return
+        if ctx.prev is None:
+            return  # 第一天没有T-1数据
+        if self.last_date is not None and ctx.date <= self.last_date:
+            return  # 检查点之前的交易日已模拟
+        
+        date = ctx.date
+        df_today = ctx.today
+        df_prev = ctx.prev
+        df_prev_2 = ctx.prev2
+        
+        if self.verbose:
             logger.info(f"\n--- {date} ---")
-            
-            # 1. 检查卖出信号（先卖后买）
-            positions_to_sell = []
-            for code, position in list(self.positions.items()):
-                row_today = df_today[df_today['code'] == code]
-                if row_today.empty or not row_today.iloc[0]['is_tradable']:
-                    # 停牌，继续持有
-                    self.log_trade_event('HOLD', date=date, code=code, reason='suspended')
-                    position.days_held += 1
-                    continue
-                
-                row_today = row_today.iloc[0]
-                should_sell, reason = self.check_exit_signal(position, row_today)
-                
-                if should_sell:
-                    positions_to_sell.append((position, row_today, reason))
-                elif reason == 'hold_limitup':
-                    self.log_trade_event('HOLD', date=date, code=code, reason='limitup',
-                                       close=row_today['close'], limit_up=row_today['limit_up_price'])
+        
+        # 1. 检查卖出信号（先卖后买）
+        positions_to_sell = []
+        for code, position in list(self.positions.items()):
+            row_today = ctx.row(code)
+            if row_today is None or not row_today['is_tradable']:
+                # 停牌，继续持有
+                self.log_trade_event('HOLD', date=date, code=code, reason='suspended')
                 position.days_held += 1
+                continue
             
-            # 执行卖出
-            for position, row_today, reason in positions_to_sell:
-                self.execute_sell(date, position, row_today, reason)
+            should_sell, reason = self.check_exit_signal(position, row_today)
             
-            # 2. 检查买入信号
-            # 限制最多持1只股票（10万资金全部投入）
-            max_positions = 5
-            if len(self.positions) >= max_positions:
-                # 已达到最大持仓数，不再买入
-                pass
-            else:
-                universe = self.filter_universe(df_today, df_prev, df_prev_2)
+            if should_sell:
+                positions_to_sell.append((position, row_today, reason))
+            elif reason == 'hold_limitup':
+                self.log_trade_event('HOLD', date=date, code=code, reason='limitup',
+                                   close=row_today['close'], limit_up=row_today['limit_up_price'])
+            position.days_held += 1
+        
+        # 执行卖出
+        for position, row_today, reason in positions_to_sell:
+            self.execute_sell(date, position, row_today, reason)
+        
+        # 2. 检查买入信号
+        # 限制最多持仓数（= cash_splits）
+        max_positions = self.max_positions
+        if len(self.positions) >= max_positions:
+            # 已达到最大持仓数，不再买入
+            pass
+        else:
+            # T-1人气前N直接取自排名索引，日内保持原行顺序
+            universe = self.filter_universe(df_today, ctx.top_hot_rank(self.hot_top_n, 'prev'), df_prev_2)
+            if self.verbose:
                 logger.info(f"选股池: {len(universe)}只")
-                
-                # 按hot_rank排序（数字越小人气越高，优先买入）
-                universe = universe.sort_values('hot_rank')
-                
-                for _, row_prev in universe.iterrows():
-                    # 检查是否已达最大持仓
-                    if len(self.positions) >= max_positions:
-                        break
-                    
-                    code = row_prev['code']
-                    
-                    # 检查是否已持仓
-                    if code in self.positions:
-                        continue
-                    
-                    # 获取今日行情
-                    row_today = df_today[df_today['code'] == code]
-                    if row_today.empty:
-                        continue
-                    row_today = row_today.iloc[0]
-                    
-                    # 获取T-2数据
-                    row_prev_2 = None
-                    if not df_prev_2.empty:
-                        row_prev_2_data = df_prev_2[df_prev_2['code'] == code]
-                        if not row_prev_2_data.empty:
-                            row_prev_2 = row_prev_2_data.iloc[0]
-                    
-                    # 检查买入信号
-                    if self.check_entry_signal(row_today, row_prev):
-                        trade = self.execute_buy(date, row_today, row_prev, row_prev_2)
-                        if trade is None:
-                            break  # 资金不足，跳过后续信号
             
-            # 3. 记录每日组合状态
-            position_value = sum(
-                df_today[df_today['code'] == code].iloc[0]['close'] * pos.shares
-                if not df_today[df_today['code'] == code].empty else 0
-                for code, pos in self.positions.items()
-            )
-            nav = self.cash + position_value
-            
-            self.daily_portfolio.append({
-                'date': date,
-                'cash': self.cash,
-                'position_value': position_value,
-                'nav': nav,
-                'n_positions': len(self.positions)
-            })
+            # 按hot_rank排序（数字越小人气越高，优先买入）
+            universe = universe.sort_values('hot_rank')
             
+            for _, row_prev in universe.iterrows():
+                # 检查是否已达最大持仓
+                if len(self.positions) >= max_positions:
+                    break
+                
+                code = row_prev['code']
+                
+                # 检查是否已持仓
+                if code in self.positions:
+                    continue
+                
+                # 获取今日行情
+                row_today = ctx.row(code)
+                if row_today is None:
+                    continue
+                
+                # 获取T-2数据
+                row_prev_2 = ctx.row(code, 'prev2')
+                
+                # 检查买入信号（成交模型按日批量计算可成交价格）
+                buy_price = self.fill_model.price(ctx, code)
+                if buy_price is not None:
+                    trade = self.execute_buy(date, row_today, row_prev, row_prev_2, buy_price)
+                    if trade is None:
+                        break  # 资金不足，跳过后续信号
+        
+        # 3. 记录每日组合状态
+        self.record_portfolio(ctx)
+    
+    def record_portfolio(self, ctx: DayContext):
+        """记录每日组合状态（停牌无行情的持仓不计市值）"""
+        position_value = 0
+        for code, pos in self.positions.items():
+            close = ctx.close_of(code)
+            if close is not None:
+                position_value += close * pos.shares
+        nav = self.cash + position_value
+        
+        self.daily_portfolio.append({
+            'date': ctx.date,
+            'cash': self.cash,
+            'position_value': position_value,
+            'nav': nav,
+            'n_positions': len(self.positions)
+        })
+        
+        if self.verbose:
             logger.info(f"持仓: {len(self.positions)}只, 现金: {self.cash:.2f}, "
-                       f"市值: {position_value:.2f}, 净值: {nav:.2f}")
+                        f"市值: {position_value:.2f}, 净值: {nav:.2f}")
+        
+        self.last_date = ctx.date
+    
+    def finish(self):
+        """回测结束：落盘事件日志并打印统计"""
+        self.event_log.close()
         
         logger.info("="*80)
         logger.info("回测完成")
@@ -757,8 +811,29 @@ class BacktestEngine:
         logger.info(f"  最终现金: {self.cash:.2f}")
         logger.info(f"  最终持仓: {len(self.positions)}只")
     
-    def save_results(self, output_dir: str):
-        """保存回测结果"""
+    def get_state(self) -> dict:
+        """导出日终状态（现金、持仓及持有天数、统计），用于断点续跑"""
+        return capture_engine_state(self, extra_attrs=())
+    
+    def set_state(self, state: dict):
+        """从检查点恢复状态，之后 run() 只模拟 last_date 之后的交易日"""
+        restore_engine_state(self, state, Trade, Position, extra_attrs=())
+    
+    def result_frames(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """原始交易明细和每日组合（写入结果缓存、保存结果共用）"""
+        trades_df = pd.DataFrame([t.to_dict() for t in self.trades])
+        portfolio_df = pd.DataFrame(self.daily_portfolio)
+        return trades_df, portfolio_df
+    
+    def save_results(self, output_dir: str, frames: Optional[Tuple[pd.DataFrame, pd.DataFrame]] = None):
+        """
+        保存回测结果
+        
+        Args:
+            output_dir: 输出目录
+            frames: (trades_df, portfolio_df)，命中结果缓存时直接传入，None 时由当前状态生成
+        """
+        trades_df, portfolio_df = frames if frames is not None else self.result_frames()
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
         
@@ -767,8 +842,7 @@ class BacktestEngine:
         prefix = f"{self.strategy['name']}_v{self.strategy['version']}_{config_hash}_{timestamp}"
         
         # 保存交易明细
-        if self.trades:
-            trades_df = pd.DataFrame([t.to_dict() for t in self.trades])
+        if not trades_df.empty:
             trades_file = output_dir / 'trades' / f"{prefix}_trades.parquet"
             trades_file.parent.mkdir(exist_ok=True)
             trades_df.to_parquet(trades_file, index=False)
@@ -787,8 +861,7 @@ class BacktestEngine:
             logger.info(f"交易明细CSV已保存: {csv_file}")
         
         # 保存组合净值
-        if self.daily_portfolio:
-            portfolio_df = pd.DataFrame(self.daily_portfolio)
+        if not portfolio_df.empty:
             portfolio_file = output_dir / 'portfolio' / f"{prefix}_portfolio.parquet"
             portfolio_file.parent.mkdir(exist_ok=True)
             portfolio_df.to_parquet(portfolio_file, index=False)
@@ -817,6 +890,42 @@ def main():
         default='data/backtest',
         help='输出目录'
     )
+    parser.add_argument(
+        '--start-date',
+        default=None,
+        help='回测开始日期，如 2025-01-15（默认读取配置 params.start_date）'
+    )
+    parser.add_argument(
+        '--end-date',
+        default=None,
+        help='回测结束日期，如 2026-01-31（默认读取配置 params.end_date）'
+    )
+    parser.add_argument(
+        '--event-level',
+        choices=list(EVENT_LEVELS),
+        default=None,
+        help='交易事件日志级别（默认读取配置 logging.event_level）'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='忽略结果缓存，强制重新回测'
+    )
+    parser.add_argument(
+        '--checkpoint',
+        default=None,
+        help='检查点文件路径：回测结束后保存日终状态（指定时不使用结果缓存）'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='从 --checkpoint 恢复状态，只模拟新增交易日'
+    )
+    parser.add_argument(
+        '--validate-resume',
+        action='store_true',
+        help='续跑后再全量回放一次，校验两者交易明细和净值完全一致'
+    )
     
     # CLI参数覆盖
     parser.add_argument('--param.hot_top_n', type=int, dest='param_hot_top_n')
@@ -841,16 +950,56 @@ def main():
         config = apply_cli_overrides(config, cli_overrides)
     
     # 初始化回测引擎
-    engine = BacktestEngine(config)
+    engine = BacktestEngine(config, event_level=args.event_level)
+    
+    # 结果缓存：策略/配置/特征文件/引擎代码均未变化时直接复用（断点续跑时不使用）
+    use_cache = not (args.no_cache or args.checkpoint)
+    cache = ResultCache.from_config(config, PROJECT_ROOT) if use_cache else None
+    cache_key = cache.make_key(config, args.features, args.start_date, args.end_date, engine_file=__file__) if cache else None
+    cached = cache.get(cache_key) if cache else None
+    if cached is not None:
+        trades_df, portfolio_df, meta = cached
+        logger.info(f"命中结果缓存: {cache_key}（{meta.get('n_trades', 0)}笔交易，生成于{meta.get('created_at')}）")
+        engine.save_results(args.output, frames=(trades_df, portfolio_df))
+        return
     
     # 加载特征数据
-    features_df = engine.load_features(args.features)
+    features_df = engine.load_features(args.features, args.start_date, args.end_date)
+    
+    # 断点续跑：恢复上次日终状态，只模拟新增交易日
+    if args.resume and args.checkpoint and Path(args.checkpoint).exists():
+        engine.set_state(load_checkpoint(args.checkpoint))
+        logger.info(f"从检查点恢复: {args.checkpoint}（最后交易日 {engine.last_date}）")
     
     # 运行回测
-    engine.run(features_df)
+    engine.run(features_df, start_date=args.start_date, end_date=args.end_date)
+    
+    if args.checkpoint:
+        save_checkpoint(args.checkpoint, engine.get_state())
+    
+    frames = engine.result_frames()
+    
+    # 校验：续跑结果必须与全量回放逐笔一致
+    if args.validate_resume:
+        full_engine = BacktestEngine(config, event_level='off')
+        full_engine.run(features_df, start_date=args.start_date, end_date=args.end_date)
+        identical, message = compare_ledgers(frames, full_engine.result_frames())
+        if not identical:
+            logger.error(f"续跑结果与全量回放不一致: {message}")
+            sys.exit(1)
+        logger.info(f"续跑校验通过: {message}")
     
     # 保存结果
-    engine.save_results(args.output)
+    if cache:
+        cache.put(cache_key, *frames, meta={
+            'strategy': engine.strategy['name'],
+            'version': engine.strategy['version'],
+            'features': str(args.features),
+            'start_date': args.start_date,
+            'end_date': args.end_date,
+            'stats': dict(engine.stats),
+        })
+    engine.save_results(args.output, frames=frames)
 
 
 if __name__ == '__main__':
@@ -36,6 +36,18 @@ import yaml
 # 添加项目根目录到路径
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from checkpoint import (capture_engine_state, compare_ledgers, load_checkpoint,
+                        restore_engine_state, save_checkpoint)
+from day_context import DayContext, iter_day_contexts, trading_dates
+from event_log import EVENT_LEVELS, TradeEventLog
+from excel_export import write_trades_excel
+from feature_store import load_features
+from fill_models import OpenFill, build_fill_model
+from hot_rank_index import HotRankIndex
+from result_cache import ResultCache
+from security_master import classify_code
 
 # 配置日志
 logging.basicConfig(
@@ -194,8 +206,22 @@ class Position:
 class BacktestEngine:
     """回测引擎（TOP10开盘买入策略）"""
     
-    def __init__(self, config: dict):
-        """初始化回测引擎"""
+    # 回测读取的特征列（成交模型所需列另行合并，见 feature_columns）
+    FEATURE_COLUMNS = (
+        'date', 'code', 'name', 'open', 'high', 'low', 'close', 'close_prev', 'hot_rank',
+        'is_st', 'is_tradable',
+    )
+    # 窗口首日之前需要预读的交易日数（T-1、T-2）
+    LOOKBACK_DAYS = 2
+    
+    def __init__(self, config: dict, event_level: Optional[str] = None):
+        """
+        初始化回测引擎
+        
+        Args:
+            config: 合并后的策略配置
+            event_level: 交易事件日志级别（off/trades/full），None 时读取配置 logging.event_level
+        """
         self.config = config
         self.strategy = config['strategy']
         self.params = config['params']
@@ -205,9 +231,18 @@ class BacktestEngine:
         self.hot_top_n = self.params['hot_top_n']
         self.cash_splits = self.params.get('cash_splits', 3)
         self.per_trade_cash_frac = 1.0 / self.cash_splits
-        self.max_positions = self.params.get('max_positions', 3)
+        self.max_positions = self.params.get('max_positions', self.cash_splits)
         self.rank_threshold = self.params.get('rank_threshold', 50)
         self.max_hold_days = self.params.get('max_hold_days', 30)
+        # 成交模型（默认：T+1开盘价买入，一字涨停无法成交）
+        self.fill_model = build_fill_model(self.params.get('fill_model'), OpenFill())
+        # 人气排名前N索引（load_features 时加载；未生成或未加载时按当日切片过滤）
+        self.hot_rank_index: Optional[HotRankIndex] = None
+        # 保存结果时是否导出格式化Excel（批量运行可关闭）
+        self.excel_export = self.config.get('report', {}).get('excel', True)
+        # 回测窗口（默认从2025-01-04开始，避免T-1数据为空）
+        self.start_date = pd.Timestamp(self.params.get('start_date', '2025-01-04'))
+        self.end_date = pd.Timestamp(self.params['end_date']) if self.params.get('end_date') else None
         
         # 回测参数
         self.init_cash = self.backtest_config['init_cash']
@@ -223,91 +258,62 @@ class BacktestEngine:
         self.positions: Dict[str, Position] = {}
         self.trades: List[Trade] = []
         self.daily_portfolio = []
+        self.last_date: Optional[pd.Timestamp] = None  # 最后一个已模拟的交易日（断点续跑用）
         self.pending_buy: Dict[str, pd.Series] = {}  # 待买入信号：code -> row_data
         
         # 统计
         self.stats = defaultdict(int)
         
         # 配置日志
-        self._setup_logging()
+        self._setup_event_log(event_level)
         
         logger.info(f"策略初始化: {self.strategy['name']} v{self.strategy['version']}")
         logger.info(f"参数: hot_top_n={self.hot_top_n}, cash_splits={self.cash_splits}, "
                    f"rank_threshold={self.rank_threshold}")
+        logger.info(f"成交模型: {self.fill_model}")
         logger.info(f"初始资金: {self.init_cash:,.0f}, 分{self.cash_splits}份, "
                    f"每份{self.init_cash * self.per_trade_cash_frac:,.0f}")
     
-    def _setup_logging(self):
-        """设置日志"""
-        # 创建日志目录
+    def _setup_event_log(self, event_level: Optional[str] = None):
+        """设置交易事件日志（内存缓冲，批量落盘）"""
         log_dir = PROJECT_ROOT / 'data' / 'backtest' / 'logs'
-        log_dir.mkdir(parents=True, exist_ok=True)
-        
-        # JSON日志文件
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        log_file = log_dir / f"trades_{self.strategy['name']}_{timestamp}.log"
+        path_stem = log_dir / f"trades_{self.strategy['name']}_{timestamp}"
         
-        # 添加文件处理器
-        self.json_logger = logging.getLogger('trades')
-        self.json_logger.setLevel(logging.INFO)
-        fh = logging.FileHandler(log_file, encoding='utf-8')
-        fh.setFormatter(logging.Formatter('%(message)s'))
-        self.json_logger.addHandler(fh)
+        self.event_log = TradeEventLog.from_config(self.config, path_stem, level=event_level)
+        # full 级别才输出逐日/逐笔的控制台明细
+        self.verbose = self.event_log.full
         
-        logger.info(f"交易日志: {log_file}")
+        if self.event_log.enabled:
+            logger.info(f"交易日志: {self.event_log.path} (level={self.event_log.level})")
     
     def log_trade_event(self, event: str, **kwargs):
-        """记录交易事件（JSON格式）"""
-        # 转换Timestamp到字符串和numpy类型
-        for key, value in kwargs.items():
-            if hasattr(value, 'isoformat'):
-                kwargs[key] = value.isoformat()
-            elif hasattr(value, 'item'):  # numpy types
-                kwargs[key] = value.item()
-            elif pd.isna(value):  # pandas NA/NaT
-                kwargs[key] = None
-        
-        log_entry = {
-            'timestamp': datetime.now().isoformat(),
-            'event': event,
-            **kwargs
-        }
-        self.json_logger.info(json.dumps(log_entry, ensure_ascii=False))
+        """记录交易事件（级别为 off 时直接返回）"""
+        if not self.event_log.wants(event):
+            return
+        self.event_log.emit(event, **kwargs)
     
-    def load_features(self, features_path: str) -> pd.DataFrame:
-        """加载特征数据"""
-        logger.info(f"加载特征数据: {features_path}")
-        df = pd.read_parquet(features_path)
-        df['date'] = pd.to_datetime(df['date'])
-        logger.info(f"加载完成: {len(df):,}行, {df['code'].nunique()}只股票")
-        return df
+    def feature_columns(self) -> List[str]:
+        """回测需要读取的特征列（策略列 + 成交模型列）"""
+        return sorted(set(self.FEATURE_COLUMNS) | set(self.fill_model.columns))
     
-    def is_limit_up_board(self, row: pd.Series, prev_close: float) -> bool:
+    def load_features(self, features_path: str, start_date: Optional[str] = None,
+                      end_date: Optional[str] = None) -> pd.DataFrame:
         """
-        判断是否一字涨停（无法买入）
+        加载特征数据（紧凑类型，只读取策略用到的列）
         
-        一字涨停特征：
-        1. 开盘价 = 最高价 = 最低价（一字板）
-        2. 价格达到涨停价
+        日期窗口（默认取配置）下推到Parquet读取，窗口前预读LOOKBACK_DAYS个交易日作为T-1/T-2。
         """
-        # 检查是否一字板
-        is_flat = (row['open'] == row['high'] == row['low'])
-        
-        # 计算涨停价（根据板块不同）
-        code = row['code']
-        if code.startswith('688') or code.startswith('689'):  # 科创板
-            limit_pct = 0.20
-        elif code.startswith('30'):  # 创业板
-            limit_pct = 0.20
-        elif code.startswith('8') or code.startswith('4'):  # 北交所
-            limit_pct = 0.30
-        else:  # 主板
-            limit_pct = 0.10
-        
-        limit_up_price = round(prev_close * (1 + limit_pct), 2)
-        is_at_limit = row['open'] >= limit_up_price - 0.01  # 允许0.01误差
-        
-        return is_flat and is_at_limit
+        start_date = start_date or self.start_date
+        end_date = end_date or self.end_date
+        logger.info(f"加载特征数据: {features_path}（{start_date or '起始'} ~ {end_date or '最新'}）")
+        df = load_features(features_path, columns=self.feature_columns(), start_date=start_date,
+                           end_date=end_date, lookback_days=self.LOOKBACK_DAYS)
+        logger.info(f"加载完成: {len(df):,}行, {df['code'].nunique()}只股票")
+        self.hot_rank_index = HotRankIndex.for_features(features_path)
+        if self.hot_rank_index is not None:
+            logger.info(f"人气排名索引: {self.hot_rank_index}")
+        return df
     
     def filter_universe(self, df_today: pd.DataFrame, df_prev: pd.DataFrame) -> pd.DataFrame:
         """
@@ -319,7 +325,7 @@ class BacktestEngine:
         3. 返回候选池（在T+1日执行时再计算涨跌幅并选前3）
         
         Args:
-            df_today: T日（今日）特征数据
+            df_today: T日（今日）特征数据（可只含人气前20）
             df_prev: T-1日（昨日）特征数据（保留参数兼容性）
             
         Returns:
@@ -348,31 +354,30 @@ class BacktestEngine:
         
         return df_today_hot
     
-    def execute_buy(self, date: pd.Timestamp, row_today: pd.Series, row_prev: pd.Series, row_prev2: pd.Series = None) -> Optional[Trade]:
+    def execute_buy(self, date: pd.Timestamp, row_today: pd.Series, row_prev: pd.Series,
+                    row_prev2: Optional[pd.Series], buy_price: Optional[float]) -> Optional[Trade]:
         """
-        执行买入（开盘价买入）
+        执行买入（默认开盘价买入）
         
         Args:
             date: 交易日期
             row_today: 今日行情
             row_prev: 昨日行情（T-1）
             row_prev2: 前天行情（T-2），可选
+            buy_price: 成交模型给出的买入价格，None 表示无法成交（如一字涨停）
             
         Returns:
             交易记录或None
         """
         code = row_today['code']
         
-        # 检查是否一字涨停（如果有昨日收盘价）
-        if 'close' in row_prev.index and pd.notna(row_prev['close']):
-            if self.is_limit_up_board(row_today, row_prev['close']):
-                self.stats['skip_limit_up_open'] += 1
-                self.log_trade_event('SKIP_BUY', date=date, code=code, 
-                                   reason='limit_up_open', open=row_today['open'])
-                return None
+        # 成交模型无法成交（默认模型：一字涨停）
+        if buy_price is None:
+            self.stats[f'skip_{self.fill_model.skip_reason}'] += 1
+            self.log_trade_event('SKIP_BUY', date=date, code=code, 
+                               reason=self.fill_model.skip_reason, open=row_today['open'])
+            return None
         
-        # 计算买入价格（开盘价）
-        buy_price = row_today['open']
         buy_exec = buy_price * (1 + self.slippage_bps / 10000)
         
         # 计算名义资金（每份）
@@ -434,10 +439,11 @@ class BacktestEngine:
                            commission=commission,
                            total_cost=total_cost,
                            cash_after=self.cash,
-                           reason='open_price')
+                           reason=self.fill_model.reason)
         
         self.stats['buy_success'] += 1
-        logger.info(f"买入: {date} {code} @{buy_exec:.2f} x{shares}股 成本{total_cost:.2f} 余额{self.cash:.2f}")
+        if self.verbose:
+            logger.info(f"买入: {date} {code} @{buy_exec:.2f} x{shares}股 成本{total_cost:.2f} 余额{self.cash:.2f}")
         
         return trade
     
@@ -461,23 +467,14 @@ class BacktestEngine:
         if position.days_held >= self.max_hold_days:
             return True, 'max_hold_days', False  # 收盘卖出
         
-        # 2. 检查涨停
-        code = row_today['code']
-        if code.startswith('688') or code.startswith('689'):  # 科创板
-            limit_pct = 0.20
-        elif code.startswith('30'):  # 创业板
-            limit_pct = 0.20
-        elif code.startswith('8') or code.startswith('4'):  # 北交所
-            limit_pct = 0.30
-        else:  # 主板
-            limit_pct = 0.10
-        
+        # 2. 检查涨停（按板块涨跌幅限制）
+        limit_pct = classify_code(row_today['code']).limit_pct
         limit_up_price = round(row_today['close_prev'] * (1 + limit_pct), 2)
         is_limit_up = row_today['close'] >= limit_up_price - 0.01
         
         # 3. 检查人气排名
         rank = row_today.get('hot_rank', 999)
-        rank_out_top50 = (not pd.isna(rank) and rank > 50)  # 跌出前50
+        rank_out_top50 = (not pd.isna(rank) and rank > self.rank_threshold)  # 跌出前rank_threshold（默认50）
         
         # 判断卖出
         if not is_limit_up and rank_out_top50:
@@ -521,15 +518,7 @@ class BacktestEngine:
         self.cash += sell_proceed
         
         # 检查涨停
-        code_check = row_today['code']
-        if code_check.startswith('688') or code_check.startswith('689'):
-            limit_pct = 0.20
-        elif code_check.startswith('30'):
-            limit_pct = 0.20
-        elif code_check.startswith('8') or code_check.startswith('4'):
-            limit_pct = 0.30
-        else:
-            limit_pct = 0.10
+        limit_pct = classify_code(row_today['code']).limit_pct
         limit_up_price = round(row_today['close_prev'] * (1 + limit_pct), 2)
         is_limit_up = row_today['close'] >= limit_up_price - 0.01
         
@@ -565,8 +554,9 @@ class BacktestEngine:
                            cash_after=self.cash)
         
         self.stats['sell_success'] += 1
-        logger.info(f"卖出: {date} {code} @{sell_exec:.2f} x{position.shares}股 "
-                   f"收益{trade.net_pnl:.2f}({trade.net_pnl_pct:.2%}) {reason}")
+        if self.verbose:
+            logger.info(f"卖出: {date} {code} @{sell_exec:.2f} x{position.shares}股 "
+                        f"收益{trade.net_pnl:.2f}({trade.net_pnl_pct:.2%}) {reason}")
         
         # 移除持仓
         del self.positions[code]
@@ -574,156 +564,206 @@ class BacktestEngine:
         # 添加到已完成交易
         self.trades.append(trade)
     
-    def run(self, features_df: pd.DataFrame):
+    def run(self, features_df: pd.DataFrame, start_date: Optional[str] = None, end_date: Optional[str] = None):
         """
         运行回测
         
         Args:
             features_df: 特征数据
+            start_date: 回测开始日期（None 时使用配置/默认值）
+            end_date: 回测结束日期（None 时使用配置/默认值）
         """
         logger.info("="*80)
         logger.info("开始回测（TOP10开盘买入策略）")
         logger.info("="*80)
         
-        # 按日期分组，从2025-01-04开始（避免T-1数据为空）
-        all_dates = sorted(features_df['date'].unique())
-        start_date = pd.Timestamp('2025-01-04')
-        dates = [d for d in all_dates if d >= start_date]
+        # 按日期分组，只模拟窗口内交易日（T-1/T-2取自完整交易日历）
+        self.set_window(start_date, end_date)
+        all_dates = [d for d in trading_dates(features_df) if self.end_date is None or d <= self.end_date]
+        dates = [d for d in all_dates if self.in_window(d)]
+        if not dates:
+            raise ValueError("回测窗口内没有交易日")
         logger.info(f"回测期间: {dates[0]} 至 {dates[-1]}, 共{len(dates)}个交易日")
         
-        for i, date in enumerate(dates):
-            # 获取前一个和前两个交易日
-            date_idx = all_dates.index(date)
-            if date_idx == 0:
-                continue  # 第一天没有T-1数据
-            prev_date = all_dates[date_idx - 1]
-            prev2_date = all_dates[date_idx - 2] if date_idx >= 2 else None
-            
-            df_today = features_df[features_df['date'] == date]
-            df_prev = features_df[features_df['date'] == prev_date]
-            df_prev2 = features_df[features_df['date'] == prev2_date] if prev2_date else pd.DataFrame()
-            
+        for ctx in iter_day_contexts(features_df, all_dates, self.hot_rank_index):
+            self.run_day(ctx)
+        
+        self.finish()
+    
+    def set_window(self, start_date: Optional[str] = None, end_date: Optional[str] = None):
+        """
+        设置回测窗口（None 表示不限制；T-1/T-2 仍取自窗口外的完整交易日历）
+        
+        Args:
+            start_date: 窗口开始日期，如 2025-01-15
+            end_date: 窗口结束日期，如 2026-01-31
+        """
+        if start_date is not None:
+            self.start_date = pd.Timestamp(start_date)
+        if end_date is not None:
+            self.end_date = pd.Timestamp(end_date)
+    
+    def in_window(self, date: pd.Timestamp) -> bool:
+        """交易日是否在回测窗口内"""
+        if self.start_date is not None and date < self.start_date:
+            return False
+        if self.end_date is not None and date > self.end_date:
+            return False
+        return True
+    
+    def run_day(self, ctx: DayContext):
+        """
+        模拟单个交易日（卖出 → 执行昨日信号 → 生成新信号 → 记录组合）
+        
+        Args:
+            ctx: 当日上下文（T/T-1/T-2切片及代码索引，可被多个策略共享）
+        """
+        if not self.in_window(ctx.date):
+            return
+        if ctx.prev is None:
+            return  # 第一天没有T-1数据
+        if self.last_date is not None and ctx.date <= self.last_date:
+            return  # 检查点之前的交易日已模拟
+        
+        date = ctx.date
+        df_today = ctx.today
+        df_prev = ctx.prev
+        
+        if self.verbose:
             logger.info(f"\n--- {date} ---")
-            
-            # 1. 检查卖出信号（先卖后买）
-            positions_to_sell = []
-            for code, position in list(self.positions.items()):
-                row_today = df_today[df_today['code'] == code]
-                if row_today.empty or not row_today.iloc[0]['is_tradable']:
-                    # 停牌，继续持有
-                    self.log_trade_event('HOLD', date=date, code=code, reason='suspended')
-                    position.days_held += 1
-                    continue
-                
-                row_today = row_today.iloc[0]
-                should_sell, reason, sell_at_open = self.check_exit_signal(position, row_today)
-                
-                if should_sell:
-                    positions_to_sell.append((position, row_today, reason, sell_at_open))
-                elif reason.startswith('hold'):
-                    rank = row_today.get('hot_rank', 'N/A')
-                    self.log_trade_event('HOLD', date=date, code=code, reason=reason,
-                                       close=row_today['close'], rank=rank)
+        
+        # 1. 检查卖出信号（先卖后买）
+        positions_to_sell = []
+        for code, position in list(self.positions.items()):
+            row_today = ctx.row(code)
+            if row_today is None or not row_today['is_tradable']:
+                # 停牌，继续持有
+                self.log_trade_event('HOLD', date=date, code=code, reason='suspended')
                 position.days_held += 1
+                continue
+            
+            should_sell, reason, sell_at_open = self.check_exit_signal(position, row_today)
             
-            # 执行卖出
-            for position, row_today, reason, sell_at_open in positions_to_sell:
-                self.execute_sell(date, position, row_today, reason, sell_at_open)
+            if should_sell:
+                positions_to_sell.append((position, row_today, reason, sell_at_open))
+            elif reason.startswith('hold'):
+                rank = row_today.get('hot_rank', 'N/A')
+                self.log_trade_event('HOLD', date=date, code=code, reason=reason,
+                                   close=row_today['close'], rank=rank)
+            position.days_held += 1
+        
+        # 执行卖出
+        for position, row_today, reason, sell_at_open in positions_to_sell:
+            self.execute_sell(date, position, row_today, reason, sell_at_open)
+        
+        # 2. 处理昨日pending_buy信号（T+1日执行买入）
+        if self.pending_buy:
+            # 收集所有候选股票在T+1日的数据
+            candidate_codes = list(self.pending_buy.keys())
+            candidates = []
             
-            # 2. 处理昨日pending_buy信号（T+1日执行买入）
-            if self.pending_buy:
-                # 收集所有候选股票在T+1日的数据
-                candidate_codes = list(self.pending_buy.keys())
-                candidates = []
+            for code in candidate_codes:
+                row_today = ctx.row(code)
+                if row_today is None:
+                    logger.warning(f"{code} 昨日产生买入信号，但今日无数据")
+                    continue
                 
-                for code in candidate_codes:
-                    row_today = df_today[df_today['code'] == code]
-                    if row_today.empty:
-                        logger.warning(f"{code} 昨日产生买入信号，但今日无数据")
-                        continue
-                    
-                    row_today = row_today.iloc[0]
-                    
-                    # 检查是否可交易
-                    if not row_today['is_tradable']:
+                # 检查是否可交易
+                if not row_today['is_tradable']:
+                    if self.verbose:
                         logger.info(f"{code} 昨日产生买入信号，但今日停牌，跳过")
-                        continue
-                    
-                    # 检查是否已持仓
-                    if code in self.positions:
-                        continue
-                    
-                    # 计算T+1日开盘涨跌幅（相对T日收盘）
-                    row_signal = self.pending_buy[code]
-                    if 'close' in row_signal.index and pd.notna(row_signal['close']) and row_signal['close'] > 0:
-                        open_change_pct = (row_today['open'] - row_signal['close']) / row_signal['close']
-                        candidates.append({
-                            'code': code,
-                            'row_today': row_today,
-                            'row_signal': row_signal,
-                            'open_change_pct': open_change_pct
-                        })
+                    continue
                 
-                # 按涨跌幅升序排序（跌幅最大或涨幅最小的在前）
-                candidates.sort(key=lambda x: x['open_change_pct'])
+                # 检查是否已持仓
+                if code in self.positions:
+                    continue
                 
-                # 取前3只（考虑持仓限制）
-                n_to_buy = min(3, self.max_positions - len(self.positions))
-                selected_candidates = candidates[:n_to_buy]
+                # 计算T+1日开盘涨跌幅（相对T日收盘）
+                row_signal = self.pending_buy[code]
+                if 'close' in row_signal.index and pd.notna(row_signal['close']) and row_signal['close'] > 0:
+                    open_change_pct = (row_today['open'] - row_signal['close']) / row_signal['close']
+                    candidates.append({
+                        'code': code,
+                        'row_today': row_today,
+                        'row_signal': row_signal,
+                        'open_change_pct': open_change_pct
+                    })
+            
+            # 按涨跌幅升序排序（跌幅最大或涨幅最小的在前）
+            candidates.sort(key=lambda x: x['open_change_pct'])
+            
+            # 取前3只（考虑持仓限制）
+            n_to_buy = min(3, self.max_positions - len(self.positions))
+            selected_candidates = candidates[:n_to_buy]
+            
+            # 执行买入
+            for cand in selected_candidates:
+                code = cand['code']
+                row_today = cand['row_today']
+                row_signal = cand['row_signal']
                 
-                # 执行买入
-                for cand in selected_candidates:
-                    code = cand['code']
-                    row_today = cand['row_today']
-                    row_signal = cand['row_signal']
-                    
-                    # 获取T-2日数据
-                    row_prev2 = df_prev2[df_prev2['code'] == code]
-                    row_prev2 = row_prev2.iloc[0] if len(row_prev2) > 0 else None
-                    
-                    trade = self.execute_buy(date, row_today, row_signal, row_prev2)
-                    if trade is None:
-                        if self.stats['skip_cash'] > 0:
-                            logger.info(f"现金不足，暂时无法买入{code}")
+                # 获取T-2日数据
+                row_prev2 = ctx.row(code, 'prev2')
                 
-                # 清空pending_buy队列
-                self.pending_buy.clear()
+                # 成交价格（成交模型按日批量计算）
+                buy_price = self.fill_model.price(ctx, code)
+                trade = self.execute_buy(date, row_today, row_signal, row_prev2, buy_price)
+                if trade is None:
+                    if self.verbose and self.stats['skip_cash'] > 0:
+                        logger.info(f"现金不足，暂时无法买入{code}")
             
-            # 3. 检查新买入信号（T日发现，T+1日执行）
-            if len(self.positions) < self.max_positions:
-                universe = self.filter_universe(df_today, df_prev)
+            # 清空pending_buy队列
+            self.pending_buy.clear()
+        
+        # 3. 检查新买入信号（T日发现，T+1日执行）
+        if len(self.positions) < self.max_positions:
+            # T日人气前20直接取自排名索引，日内保持原行顺序
+            universe = self.filter_universe(ctx.top_hot_rank(20), df_prev)
+            if self.verbose:
                 logger.info(f"选股池: {len(universe)}只（首次进入前{self.hot_top_n}）")
+            
+            # filter_universe已经按hot_rank升序排序（1→20，优先买入排名靠前的）
+            for _, row_today in universe.iterrows():
+                code = row_today['code']
+                
+                # 检查是否已持仓或已在pending队列
+                if code in self.positions or code in self.pending_buy:
+                    continue
                 
-                # filter_universe已经按hot_rank升序排序（1→20，优先买入排名靠前的）
-                for _, row_today in universe.iterrows():
-                    code = row_today['code']
-                    
-                    # 检查是否已持仓或已在pending队列
-                    if code in self.positions or code in self.pending_buy:
-                        continue
-                    
-                    # 将信号加入pending_buy队列，明天执行
-                    self.pending_buy[code] = row_today.copy()
+                # 将信号加入pending_buy队列，明天执行
+                self.pending_buy[code] = row_today.copy()
+                if self.verbose:
                     logger.info(f"添加买入信号: {code} (T日排名={row_today['hot_rank']}) -> 明日开盘买入")
-            
-            # 4. 记录每日组合状态
-            position_value = sum(
-                df_today[df_today['code'] == code].iloc[0]['close'] * pos.shares
-                if not df_today[df_today['code'] == code].empty else 0
-                for code, pos in self.positions.items()
-            )
-            nav = self.cash + position_value
-            
-            self.daily_portfolio.append({
-                'date': date,
-                'cash': self.cash,
-                'position_value': position_value,
-                'nav': nav,
-                'n_positions': len(self.positions)
-            })
-            
+        
+        # 4. 记录每日组合状态
+        self.record_portfolio(ctx)
+    
+    def record_portfolio(self, ctx: DayContext):
+        """记录每日组合状态（停牌无行情的持仓不计市值）"""
+        position_value = 0
+        for code, pos in self.positions.items():
+            close = ctx.close_of(code)
+            if close is not None:
+                position_value += close * pos.shares
+        nav = self.cash + position_value
+        
+        self.daily_portfolio.append({
+            'date': ctx.date,
+            'cash': self.cash,
+            'position_value': position_value,
+            'nav': nav,
+            'n_positions': len(self.positions)
+        })
+        
+        if self.verbose:
             logger.info(f"持仓: {len(self.positions)}只, 现金: {self.cash:.2f}, "
-                       f"市值: {position_value:.2f}, 净值: {nav:.2f}")
+                        f"市值: {position_value:.2f}, 净值: {nav:.2f}")
+        
+        self.last_date = ctx.date
+    
+    def finish(self):
+        """回测结束：落盘事件日志并打印统计"""
+        self.event_log.close()
         
         logger.info("="*80)
         logger.info("回测完成")
@@ -743,87 +783,45 @@ class BacktestEngine:
         logger.info(f"  最终现金: {self.cash:.2f}")
         logger.info(f"  最终持仓: {len(self.positions)}只")
     
-    def save_formatted_excel(self, df: pd.DataFrame, filepath: Path):
+    def save_formatted_excel(self, df: pd.DataFrame, filepath: Path) -> bool:
         """
-        保存格式化的Excel文件（带颜色和样式）
+        保存格式化的Excel文件（流式写入，表头共享命名样式，隔行底色/边框/盈亏颜色用条件格式）
         
         Args:
             df: 交易数据DataFrame
             filepath: 输出文件路径
+            
+        Returns:
+            是否已写入（未安装openpyxl时返回False）
         """
-        try:
-            from openpyxl import Workbook
-            from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
-            from openpyxl.utils.dataframe import dataframe_to_rows
-        except ImportError:
-            logger.warning("未安装openpyxl，跳过Excel格式化导出。可使用 pip install openpyxl 安装")
-            return
+        if write_trades_excel(df, filepath):
+            return True
+        logger.warning("未安装openpyxl，跳过Excel格式化导出。可使用 pip install openpyxl 安装")
+        return False
+    
+    def get_state(self) -> dict:
+        """导出日终状态（现金、持仓及持有天数、待买入信号、统计），用于断点续跑"""
+        return capture_engine_state(self, extra_attrs=('pending_buy',))
+    
+    def set_state(self, state: dict):
+        """从检查点恢复状态，之后 run() 只模拟 last_date 之后的交易日"""
+        restore_engine_state(self, state, Trade, Position, extra_attrs=('pending_buy',))
+    
+    def result_frames(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """原始交易明细和每日组合（写入结果缓存、保存结果共用）"""
+        trades_df = pd.DataFrame([t.to_dict() for t in self.trades])
+        portfolio_df = pd.DataFrame(self.daily_portfolio)
+        return trades_df, portfolio_df
+    
+    def save_results(self, output_dir: str, frames: Optional[Tuple[pd.DataFrame, pd.DataFrame]] = None):
+        """
+        保存回测结果
         
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "交易明细"
-        
-        # 写入数据
-        for r_idx, row in enumerate(dataframe_to_rows(df, index=False, header=True), 1):
-            for c_idx, value in enumerate(row, 1):
-                # 处理net_pnl_pct列：转换为百分比
-                if r_idx > 1 and 'net_pnl_pct' in df.columns and c_idx == df.columns.get_loc('net_pnl_pct') + 1:
-                    if isinstance(value, (int, float)):
-                        value = f"{value * 100:.2f}%"
-                
-                cell = ws.cell(row=r_idx, column=c_idx, value=value)
-                
-                # 表头样式
-                if r_idx == 1:
-                    cell.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-                    cell.font = Font(bold=True, color="FFFFFF", size=11)
-                    cell.alignment = Alignment(horizontal="center", vertical="center")
-                else:
-                    # 交替行颜色
-                    if r_idx % 2 == 0:
-                        cell.fill = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
-                    else:
-                        cell.fill = PatternFill(start_color="FFFFFF", end_color="FFFFFF", fill_type="solid")
-                    
-                    # 根据盈亏上色
-                    if 'net_pnl' in df.columns and c_idx == df.columns.get_loc('net_pnl') + 1:
-                        if isinstance(value, (int, float)) and value != 0:
-                            if value > 0:
-                                cell.font = Font(color="00AA00", bold=True)  # 绿色
-                            elif value < 0:
-                                cell.font = Font(color="FF0000", bold=True)  # 红色
-                    
-                    cell.alignment = Alignment(horizontal="left", vertical="center")
-                
-                # 边框
-                thin_border = Border(
-                    left=Side(style='thin', color='CCCCCC'),
-                    right=Side(style='thin', color='CCCCCC'),
-                    top=Side(style='thin', color='CCCCCC'),
-                    bottom=Side(style='thin', color='CCCCCC')
-                )
-                cell.border = thin_border
-        
-        # 自动调整列宽
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if cell.value:
-                        max_length = max(max_length, len(str(cell.value)))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
-        # 冻结首行
-        ws.freeze_panes = 'A2'
-        
-        wb.save(filepath)
-    
-    def save_results(self, output_dir: str):
-        """保存回测结果"""
+        Args:
+            output_dir: 输出目录
+            frames: (trades_df, portfolio_df)，命中结果缓存时直接传入，None 时由当前状态生成
+        """
+        trades_df, portfolio_df = frames if frames is not None else self.result_frames()
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
         
@@ -832,8 +830,7 @@ class BacktestEngine:
         prefix = f"{self.strategy['name']}_v{self.strategy['version']}_{config_hash}_{timestamp}"
         
         # 保存交易明细
-        if self.trades:
-            trades_df = pd.DataFrame([t.to_dict() for t in self.trades])
+        if not trades_df.empty:
             
             # 调整列顺序：将盈亏列移到前面，买卖价格和日期挨着
             cols = list(trades_df.columns)
@@ -866,13 +863,13 @@ class BacktestEngine:
             logger.info(f"交易明细CSV已保存: {csv_file}")
             
             # 保存格式化的Excel文件
-            xlsx_file = output_dir / 'trades' / f"{prefix}_trades.xlsx"
-            self.save_formatted_excel(trades_df, xlsx_file)
-            logger.info(f"格式化Excel已保存: {xlsx_file}")
+            if self.excel_export:
+                xlsx_file = output_dir / 'trades' / f"{prefix}_trades.xlsx"
+                if self.save_formatted_excel(trades_df, xlsx_file):
+                    logger.info(f"格式化Excel已保存: {xlsx_file}")
         
         # 保存组合净值
-        if self.daily_portfolio:
-            portfolio_df = pd.DataFrame(self.daily_portfolio)
+        if not portfolio_df.empty:
             portfolio_file = output_dir / 'portfolio' / f"{prefix}_portfolio.parquet"
             portfolio_file.parent.mkdir(exist_ok=True)
             portfolio_df.to_parquet(portfolio_file, index=False)
@@ -901,6 +898,47 @@ def main():
         default='data/backtest',
         help='输出目录'
     )
+    parser.add_argument(
+        '--start-date',
+        default=None,
+        help='回测开始日期，如 2025-01-15（默认读取配置 params.start_date）'
+    )
+    parser.add_argument(
+        '--end-date',
+        default=None,
+        help='回测结束日期，如 2026-01-31（默认读取配置 params.end_date）'
+    )
+    parser.add_argument(
+        '--event-level',
+        choices=list(EVENT_LEVELS),
+        default=None,
+        help='交易事件日志级别（默认读取配置 logging.event_level）'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='忽略结果缓存，强制重新回测'
+    )
+    parser.add_argument(
+        '--checkpoint',
+        default=None,
+        help='检查点文件路径：回测结束后保存日终状态（指定时不使用结果缓存）'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='从 --checkpoint 恢复状态，只模拟新增交易日'
+    )
+    parser.add_argument(
+        '--validate-resume',
+        action='store_true',
+        help='续跑后再全量回放一次，校验两者交易明细和净值完全一致'
+    )
+    parser.add_argument(
+        '--no-excel',
+        action='store_true',
+        help='不导出格式化Excel（默认读取配置 report.excel）'
+    )
     
     # CLI参数覆盖
     parser.add_argument('--param.cash_splits', type=int, dest='param_cash_splits')
@@ -922,16 +960,58 @@ def main():
         config = apply_cli_overrides(config, cli_overrides)
     
     # 初始化回测引擎
-    engine = BacktestEngine(config)
+    engine = BacktestEngine(config, event_level=args.event_level)
+    if args.no_excel:
+        engine.excel_export = False
+    
+    # 结果缓存：策略/配置/特征文件/引擎代码均未变化时直接复用（断点续跑时不使用）
+    use_cache = not (args.no_cache or args.checkpoint)
+    cache = ResultCache.from_config(config, PROJECT_ROOT) if use_cache else None
+    cache_key = cache.make_key(config, args.features, args.start_date, args.end_date, engine_file=__file__) if cache else None
+    cached = cache.get(cache_key) if cache else None
+    if cached is not None:
+        trades_df, portfolio_df, meta = cached
+        logger.info(f"命中结果缓存: {cache_key}（{meta.get('n_trades', 0)}笔交易，生成于{meta.get('created_at')}）")
+        engine.save_results(args.output, frames=(trades_df, portfolio_df))
+        return
     
     # 加载特征数据
-    features_df = engine.load_features(args.features)
+    features_df = engine.load_features(args.features, args.start_date, args.end_date)
+    
+    # 断点续跑：恢复上次日终状态，只模拟新增交易日
+    if args.resume and args.checkpoint and Path(args.checkpoint).exists():
+        engine.set_state(load_checkpoint(args.checkpoint))
+        logger.info(f"从检查点恢复: {args.checkpoint}（最后交易日 {engine.last_date}）")
     
     # 运行回测
-    engine.run(features_df)
+    engine.run(features_df, start_date=args.start_date, end_date=args.end_date)
+    
+    if args.checkpoint:
+        save_checkpoint(args.checkpoint, engine.get_state())
+    
+    frames = engine.result_frames()
+    
+    # 校验：续跑结果必须与全量回放逐笔一致
+    if args.validate_resume:
+        full_engine = BacktestEngine(config, event_level='off')
+        full_engine.run(features_df, start_date=args.start_date, end_date=args.end_date)
+        identical, message = compare_ledgers(frames, full_engine.result_frames())
+        if not identical:
+            logger.error(f"续跑结果与全量回放不一致: {message}")
+            sys.exit(1)
+        logger.info(f"续跑校验通过: {message}")
     
     # 保存结果
-    engine.save_results(args.output)
+    if cache:
+        cache.put(cache_key, *frames, meta={
+            'strategy': engine.strategy['name'],
+            'version': engine.strategy['version'],
+            'features': str(args.features),
+            'start_date': args.start_date,
+            'end_date': args.end_date,
+            'stats': dict(engine.stats),
+        })
+    engine.save_results(args.output, frames=frames)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+多策略单次遍历回测
+
+特征数据只加载一次，所有策略实例（各自独立的现金/持仓）在同一个日期循环中推进，
+共享每日T/T-1/T-2切片和代码索引。输出每个策略各自的结果，以及合并组合净值。
+
+使用示例：
+    # 同时跑四个策略
+    python scripts/backtest_multi_strategy.py
+
+    # 指定策略和配置
+    python scripts/backtest_multi_strategy.py \\
+        --strategies drop7 first_top10 \\
+        --config first_top10=config/strategies/hot_rank_first_top10_rise2_or_gapdown.yaml
+"""
+
+import argparse
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict
+
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from backtest_metrics import compare_runs
+from day_context import iter_day_contexts, trading_dates
+from event_log import EVENT_LEVELS
+from feature_store import load_features
+from hot_rank_index import HotRankIndex
+from strategy_registry import STRATEGIES, create_engine, load_config
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def combine_portfolios(engines: Dict[str, object]) -> pd.DataFrame:
+    """
+    合并各策略每日净值
+
+    每个策略的净值按日期对齐；策略尚未开始（或当日未记录）时沿用前值，
+    开始前按初始资金计。
+
+    Args:
+        engines: 策略key -> 已运行的引擎
+
+    Returns:
+        DataFrame[date, nav_<key>..., nav, init_cash]
+    """
+    navs = []
+    for key, engine in engines.items():
+        if not engine.daily_portfolio:
+            continue
+        df = pd.DataFrame(engine.daily_portfolio)[['date', 'nav']]
+        navs.append(df.set_index('date')['nav'].rename(f'nav_{key}'))
+
+    if not navs:
+        return pd.DataFrame()
+
+    combined = pd.concat(navs, axis=1).sort_index().ffill()
+    for key, engine in engines.items():
+        col = f'nav_{key}'
+        if col in combined.columns:
+            combined[col] = combined[col].fillna(engine.init_cash)
+
+    nav_cols = [c for c in combined.columns if c.startswith('nav_')]
+    combined['nav'] = combined[nav_cols].sum(axis=1)
+    combined['init_cash'] = sum(engines[c[4:]].init_cash for c in nav_cols)
+    return combined.reset_index().rename(columns={'index': 'date'})
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='多策略单次遍历回测',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        '--strategies',
+        nargs='+',
+        default=list(STRATEGIES),
+        choices=list(STRATEGIES),
+        help='参与回测的策略'
+    )
+    parser.add_argument(
+        '--config',
+        nargs='*',
+        default=[],
+        metavar='KEY=PATH',
+        help='覆盖某个策略的配置文件路径'
+    )
+    parser.add_argument(
+        '--features',
+        default='data/processed/features/daily_features_v1.parquet',
+        help='特征数据路径'
+    )
+    parser.add_argument(
+        '--start-date',
+        default=None,
+        help='回测开始日期，如 2025-01-15（所有策略共用）'
+    )
+    parser.add_argument(
+        '--end-date',
+        default=None,
+        help='回测结束日期，如 2026-01-31（所有策略共用）'
+    )
+    parser.add_argument(
+        '--output',
+        default='data/backtest',
+        help='输出目录'
+    )
+    parser.add_argument(
+        '--event-level',
+        choices=list(EVENT_LEVELS),
+        default=None,
+        help='交易事件日志级别（默认读取各策略配置 logging.event_level）'
+    )
+    parser.add_argument(
+        '--no-excel',
+        action='store_true',
+        help='不导出格式化Excel（默认读取各策略配置 report.excel）'
+    )
+    args = parser.parse_args()
+
+    config_paths = {}
+    for item in args.config:
+        key, _, path = item.partition('=')
+        if key not in STRATEGIES or not path:
+            parser.error(f'--config 格式应为 KEY=PATH，KEY ∈ {list(STRATEGIES)}: {item}')
+        config_paths[key] = path
+
+    # 初始化各策略引擎（各自独立的现金/持仓）
+    engines = {}
+    for key in args.strategies:
+        config = load_config(key, config_paths.get(key))
+        if args.no_excel:
+            config.setdefault('report', {})['excel'] = False
+        engines[key] = create_engine(key, config, event_level=args.event_level)
+        engines[key].set_window(args.start_date, args.end_date)
+
+    # 特征数据只加载一次：各策略所需列的并集，日期取各策略窗口的并集
+    columns = sorted(set().union(*(engine.feature_columns() for engine in engines.values())))
+    starts = [engine.start_date for engine in engines.values()]
+    ends = [engine.end_date for engine in engines.values()]
+    features_df = load_features(
+        args.features,
+        columns=columns,
+        start_date=None if any(d is None for d in starts) else min(starts),
+        end_date=None if any(d is None for d in ends) else max(ends),
+        lookback_days=max(engine.LOOKBACK_DAYS for engine in engines.values()),
+    )
+    dates = trading_dates(features_df)
+    if args.end_date:
+        dates = [d for d in dates if d <= pd.Timestamp(args.end_date)]
+    if not any(engine.in_window(d) for d in dates for engine in engines.values()):
+        # 特征为空，或 --end-date 早于首个特征日期
+        logger.error("交易日数量不足，无法回测")
+        sys.exit(1)
+
+    logger.info("=" * 80)
+    logger.info(f"多策略回测: {', '.join(engines)}")
+    logger.info(f"回测期间: {dates[0]} 至 {dates[-1]}, 共{len(dates)}个交易日")
+    logger.info("=" * 80)
+
+    # 人气排名前N索引由所有策略共享（未生成时各策略按当日切片过滤）
+    hot_rank_index = HotRankIndex.for_features(args.features)
+    for ctx in iter_day_contexts(features_df, dates, hot_rank_index):
+        for engine in engines.values():
+            engine.run_day(ctx)
+
+    for key, engine in engines.items():
+        logger.info(f"[{key}]")
+        engine.finish()
+        engine.save_results(args.output)
+
+    # 合并组合净值
+    combined = combine_portfolios(engines)
+    if not combined.empty:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        combined_file = Path(args.output) / 'portfolio' / f"multi_{'_'.join(engines)}_{timestamp}_combined_portfolio.parquet"
+        combined_file.parent.mkdir(parents=True, exist_ok=True)
+        combined.to_parquet(combined_file, index=False)
+        logger.info(f"合并组合净值已保存: {combined_file}")
+
+        # 各策略与合并组合的指标在同一净值矩阵上一次算出
+        keys = [key for key in engines if f'nav_{key}' in combined.columns]
+        navs = combined.set_index('date')[[f'nav_{key}' for key in keys] + ['nav']]
+        navs.columns = keys + ['combined']
+        trades = {key: engines[key].result_frames()[0] for key in keys}
+        trades['combined'] = pd.concat(trades.values(), ignore_index=True)
+        init_cash = {key: engines[key].init_cash for key in keys}
+        init_cash['combined'] = combined['init_cash'].iloc[-1]
+        summary = compare_runs(navs, trades, init_cash)
+
+        logger.info("\n汇总:")
+        for name, row in summary.iterrows():
+            logger.info(f"  {name:<16} 交易{int(row['total_trades']):>5}笔  期末净值{row['final_nav']:>14,.2f}  "
+                        f"收益{row['total_return']:>8.2%}  回撤{row['max_drawdown']:>8.2%}  "
+                        f"夏普{row['sharpe_ratio']:>6.2f}  胜率{row['win_rate']:>7.2%}")
+
+
+if __name__ == '__main__':
+    main()
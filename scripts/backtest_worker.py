@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Worker-process helpers shared by the parameter search drivers (walk-forward, successive halving)."""
+
+from __future__ import annotations
+
+import copy
+import itertools
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import pandas as pd
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from backtest_metrics import summarize_portfolio  # noqa: E402
+from feature_store import load_features  # noqa: E402
+from fill_models import ALL_FILL_COLUMNS  # noqa: E402
+from hot_rank_index import HotRankIndex  # noqa: E402
+from result_cache import ResultCache  # noqa: E402
+from strategy_registry import create_engine, load_module  # noqa: E402
+
+# 每个工作进程各自加载一次特征数据
+_WORKER: Dict[str, Any] = {}
+
+# 由 cash_splits 推导的仓位参数：网格只给 cash_splits 时去掉配置里的固定值
+DERIVED_FROM_CASH_SPLITS = ("per_trade_cash_frac", "max_positions")
+
+
+def parse_grid(items: List[str]) -> List[Dict[str, Any]]:
+    """`param=v1,v2` 列表 -> 参数组合（笛卡尔积）"""
+    space = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        if not name or not values:
+            raise ValueError(f"--grid 格式应为 param=v1,v2: {item}")
+        space[name] = values.split(",")
+    return expand_space(space)
+
+
+def expand_space(space: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """搜索空间（param -> 候选值列表）-> 参数组合（笛卡尔积）"""
+    axes = []
+    for name, values in space.items():
+        values = values if isinstance(values, list) else [values]
+        axes.append([(name, yaml.safe_load(v) if isinstance(v, str) else v) for v in values])
+    return [dict(combo) for combo in itertools.product(*axes)] if axes else [{}]
+
+
+def apply_params(base_config: dict, overrides: Dict[str, Any]) -> dict:
+    """复制配置并覆盖 params"""
+    config = copy.deepcopy(base_config)
+    params = config["params"]
+    if "cash_splits" in overrides:
+        for derived in DERIVED_FROM_CASH_SPLITS:
+            if derived not in overrides:
+                params.pop(derived, None)
+    params.update(overrides)
+    return config
+
+
+def init_worker(key: str, base_config: dict, features_path: str, use_cache: bool, quiet: bool = True):
+    """进程池 initializer：加载特征数据和结果缓存"""
+    if quiet:
+        logging.getLogger().setLevel(logging.WARNING)
+    _WORKER["key"] = key
+    _WORKER["features_path"] = features_path
+    _WORKER["engine_file"] = load_module(key).__file__
+    _WORKER["cache"] = ResultCache.from_config(base_config, PROJECT_ROOT) if use_cache else None
+    # 窗口各不相同，只裁剪列；参数搜索可能切换成交模型，一并读取其所需列
+    engine = create_engine(key, base_config, event_level="off")
+    columns = sorted(set(engine.feature_columns()) | set(ALL_FILL_COLUMNS))
+    _WORKER["features"] = load_features(features_path, columns=columns)
+    _WORKER["hot_rank_index"] = HotRankIndex.for_features(features_path)
+
+
+def run_backtest(config: dict, start: pd.Timestamp, end: pd.Timestamp) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """在当前进程的特征数据上回测一个窗口（命中缓存时直接返回）"""
+    cache = _WORKER["cache"]
+    start_s, end_s = start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+    cache_key = None
+    if cache:
+        cache_key = cache.make_key(config, _WORKER["features_path"], start_s, end_s,
+                                   engine_file=_WORKER["engine_file"])
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached[0], cached[1]
+
+    engine = create_engine(_WORKER["key"], config, event_level="off")
+    engine.hot_rank_index = _WORKER["hot_rank_index"]
+    engine.run(_WORKER["features"], start_date=start_s, end_date=end_s)
+    frames = engine.result_frames()
+    if cache:
+        cache.put(cache_key, *frames, meta={
+            "strategy": engine.strategy["name"],
+            "start_date": start_s,
+            "end_date": end_s,
+            "stats": dict(engine.stats),
+        })
+    return frames
+
+
+def evaluate_params(base_config: dict, params: Dict[str, Any],
+                    start: pd.Timestamp, end: pd.Timestamp) -> Dict[str, float]:
+    """回测一组参数并返回汇总指标"""
+    trades_df, portfolio_df = run_backtest(apply_params(base_config, params), start, end)
+    return summarize_portfolio(portfolio_df, trades_df, base_config["backtest"]["init_cash"])
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Monte Carlo robustness check of a trade ledger (any strategy's *_trades.parquet).
+
+Example:
+    python scripts/bootstrap_trades.py data/backtest/trades/xxx_trades.parquet \
+        --sims 20000 --method block --block-size 5 --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from trade_bootstrap import (  # noqa: E402
+    METHODS,
+    infer_cash_splits,
+    nav_paths,
+    path_stats,
+    simulate_chunk,
+    summarize,
+)
+
+BASE_CONFIG = PROJECT_ROOT / "config" / "backtest_base.yaml"
+
+
+def default_init_cash() -> float:
+    with open(BASE_CONFIG, "r", encoding="utf-8") as f:
+        return float(yaml.safe_load(f)["backtest"]["init_cash"])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="交易明细蒙特卡洛/自助法稳健性检验",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("trades", help="交易明细 parquet（save_results 输出）")
+    parser.add_argument("--sims", type=int, default=10000, help="模拟路径数")
+    parser.add_argument("--method", choices=METHODS, default="block", help="重采样方式")
+    parser.add_argument("--block-size", type=int, default=5, help="块自助法的块长度（笔）")
+    parser.add_argument("--init-cash", type=float, default=None, help="初始资金（默认读取 backtest_base.yaml）")
+    parser.add_argument("--cash-splits", type=int, default=None, help="资金分份数（默认按 buy_cost 中位数推断）")
+    parser.add_argument("--compound", action="store_true", help="按当前净值分份（默认按初始资金固定分份）")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="每块模拟路径数（控制内存）")
+    parser.add_argument("--workers", type=int, default=1, help="并行进程数（按块并行）")
+    parser.add_argument("--output", default=None, help="结果 JSON 路径（默认不保存）")
+    args = parser.parse_args()
+
+    trades = pd.read_parquet(args.trades)
+    if trades.empty or "net_pnl_pct" not in trades.columns:
+        print(f"no trades with net_pnl_pct in {args.trades}")
+        return 1
+    sort_col = "exit_date" if "exit_date" in trades.columns else "entry_date"
+    trades = trades.sort_values(sort_col, kind="stable")
+    returns = trades["net_pnl_pct"].to_numpy(dtype=float)
+    returns = returns[np.isfinite(returns)]
+    if len(returns) == 0:
+        print(f"no finite net_pnl_pct values in {args.trades}")
+        return 1
+
+    init_cash = args.init_cash or default_init_cash()
+    cash_splits = args.cash_splits
+    if cash_splits is None and "buy_cost" in trades.columns:
+        cash_splits = infer_cash_splits(trades["buy_cost"].to_numpy(dtype=float), init_cash)
+    cash_splits = cash_splits or 1
+
+    # 原始顺序的净值路径作为对照
+    actual = path_stats(nav_paths(returns[None, :], init_cash, cash_splits, args.compound), init_cash)
+
+    sizes = [min(args.chunk_size, args.sims - i) for i in range(0, args.sims, args.chunk_size)]
+    seeds = np.random.SeedSequence(args.seed).spawn(len(sizes))
+    chunk_args = [(returns, n, s, init_cash, cash_splits, args.method, args.block_size, args.compound)
+                  for n, s in zip(sizes, seeds)]
+    if args.workers > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            chunks = list(pool.map(simulate_chunk, *zip(*chunk_args)))
+    else:
+        chunks = [simulate_chunk(*a) for a in chunk_args]
+    final_nav = np.concatenate([c["final_nav"] for c in chunks])
+    max_dd = np.concatenate([c["max_drawdown"] for c in chunks])
+
+    result = {
+        "trades": str(args.trades),
+        "n_trades": int(len(returns)),
+        "sims": int(args.sims),
+        "method": args.method,
+        "block_size": args.block_size if args.method == "block" else None,
+        "init_cash": init_cash,
+        "cash_splits": cash_splits,
+        "compound": args.compound,
+        "actual": {"final_nav": float(actual["final_nav"][0]), "max_drawdown": float(actual["max_drawdown"][0])},
+        "final_nav": summarize(final_nav),
+        "max_drawdown": summarize(max_dd),
+        "prob_loss": float((final_nav < init_cash).mean()),
+        "prob_drawdown_worse_than_actual": float((max_dd < actual["max_drawdown"][0]).mean()),
+    }
+
+    print(f"{len(returns)} trades, {args.sims} sims ({args.method}), init_cash={init_cash:,.0f}, cash_splits={cash_splits}")
+    print(f"  actual     final_nav={result['actual']['final_nav']:>14,.0f}  max_dd={result['actual']['max_drawdown']:>8.2%}")
+    for q in ("p05", "p25", "p50", "p75", "p95"):
+        print(f"  {q:<10} final_nav={result['final_nav'][q]:>14,.0f}  max_dd={result['max_drawdown'][q]:>8.2%}")
+    print(f"  P(loss)={result['prob_loss']:.2%}  P(max_dd worse than actual)={result['prob_drawdown_worse_than_actual']:.2%}")
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"saved: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
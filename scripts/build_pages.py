@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""Incremental local build of the GitHub Pages site (public/).
+
+Builds the same site as the Pages workflow, but only redoes work whose
+inputs changed since the last build:
+
+1. Exporters run as independent chains in parallel. An exporter is skipped
+   when the fingerprint of its script and input paths is unchanged and its
+   declared outputs exist (an exporter without declared outputs always runs). The network probe (try_hot_rank_multi_source.py) only runs
+   with --probe; otherwise its last output under data/experiments is used.
+2. Every page / asset of public/ is a target with an input fingerprint
+   (source file size + mtime, or the generated text). Unchanged targets are
+   left alone, changed Markdown is converted to HTML, targets that are no
+   longer produced are deleted.
+
+Fingerprints are kept in public/.build_manifest.json. Without a manifest
+(first run, or a public/ built by the old shell script) public/ is rebuilt
+from scratch; --clean forces that.
+
+Example:
+    python scripts/build_pages.py
+    python scripts/build_pages.py --probe --force-exporters
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+PUBLIC_DIR = PROJECT_ROOT / "public"
+MANIFEST_NAME = ".build_manifest.json"
+
+
+class Exporter(NamedTuple):
+    """One exporter script and the paths it reads / writes (relative to the project root)"""
+    name: str
+    script: str
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()  # none declared: always run
+    network: bool = False  # only run with --probe
+    optional: bool = False  # failure does not fail the build
+
+
+# Chains run in parallel; exporters within a chain run in order.
+# publish_latest_experiment picks the newest directory under data/experiments,
+# so it runs after the multi-source probe that may add one.
+EXPORT_CHAINS: Tuple[Tuple[Exporter, ...], ...] = (
+    (
+        Exporter("hot_rank_top100", "scripts/export_hot_rank_top100_history.py",
+                 inputs=("data/parquet/ashare_daily",),
+                 outputs=("reports/hot_rank_top100_explorer.html", "reports/hot_rank_top100_history.csv",
+                          "reports/hot_rank_top100/index.json")),
+    ),
+    (
+        Exporter("multi_source_probe", "scripts/try_hot_rank_multi_source.py", network=True, optional=True),
+        Exporter("multi_source_pages", "scripts/export_hot_rank_multi_source_pages.py",
+                 inputs=("data/hot_sources/store", "data/experiments/hot_rank_multi_source"),
+                 outputs=("reports/hot_rank_multi_source_explorer.html",), optional=True),
+        Exporter("latest_experiment", "scripts/publish_latest_experiment_to_reports.py",
+                 inputs=("data/experiments",), outputs=("reports/latest.md",)),
+    ),
+    (
+        Exporter("strategy_trades", "scripts/publish_strategy_trades.py", inputs=("data/backtest/trades",),
+                 outputs=tuple(f"reports/trades/{key}_trades_latest.html"
+                               for key in ("drop7", "rise2", "top20_newentry", "first_top10"))),
+    ),
+)
+
+HTML_TEMPLATE = '''<!doctype html>
+<html lang="zh-CN">
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1">
+  <title>{title}</title>
+  <style>
+    body {{ font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", sans-serif; max-width: 900px; margin: 2rem auto; padding: 0 1rem; line-height: 1.6; }}
+    a {{ color: #0969da; }}
+    pre {{ background: #f6f8fa; padding: 1rem; overflow-x: auto; border-radius: 6px; }}
+    code {{ background: #f6f8fa; padding: 0.2em 0.4em; border-radius: 3px; }}
+    table {{ border-collapse: collapse; width: 100%; }}
+    th, td {{ border: 1px solid #d0d7de; padding: 8px; text-align: left; }}
+    th {{ background: #f6f8fa; }}
+    h1, h2, h3 {{ border-bottom: 1px solid #d0d7de; padding-bottom: 0.3em; }}
+  </style>
+</head>
+<body>
+{content}
+</body>
+</html>'''
+
+INDEX_TEMPLATE = '''<!doctype html>
+<html lang="zh-CN">
+<head>
+  <meta charset="utf-8" />
+  <meta name="viewport" content="width=device-width, initial-scale=1" />
+  <title>量化统计结果 v0.1</title>
+  <style>body{{font-family:-apple-system,BlinkMacSystemFont,"Segoe UI",sans-serif;max-width:840px;margin:2rem auto;padding:0 1rem;line-height:1.6}}.card{{border:1px solid #e5e7eb;border-radius:10px;padding:1rem 1.2rem;margin-top:1rem}}.commit-id{{position:absolute;top:1rem;right:1rem;font-size:0.75rem;color:#6b7280;font-family:monospace}}</style>
+</head>
+<body style="position:relative">
+  <div class="commit-id">commit: {commit}</div>
+  <h1>量化统计结果（v0.1）</h1>
+  <div class="card"><a href="./latest.html">最新统计</a></div>
+  <div class="card"><a href="./hot_rank_top100_explorer.html">热度个股前100历史筛选</a></div>
+  <div class="card"><a href="./hot_rank_multi_source_explorer.html">多源热度近30天看板</a></div>
+  <div class="card"><a href="./reports/index.html">统计报告列表</a></div>
+  <div class="card"><a href="./trades/index.html">买卖记录列表</a></div>
+  <div class="card"><a href="./strategies/index.html">策略配置与说明</a></div>
+  <div class="card"><a href="./README.html">项目说明（README）</a></div>
+</body>
+</html>
+'''
+
+# Converted pages depend on the template too
+_TEMPLATE_HASH = hashlib.md5(HTML_TEMPLATE.encode("utf-8")).hexdigest()[:8]
+MD_LINK_RE = re.compile(r"\]\(([^)]+)\.md\)")
+
+# A target's content: a source file, or generated text
+Source = Union[Path, str]
+
+
+def tree_fingerprint(paths: Iterable[Path]) -> str:
+    """(relative path, size, mtime_ns) of every file under the given files / directories"""
+    h = hashlib.md5()
+    for path in paths:
+        if not path.exists():
+            h.update(f"{path}|missing\n".encode("utf-8"))
+            continue
+        files = [path] if path.is_file() else sorted(p for p in path.rglob("*") if p.is_file())
+        for f in files:
+            st = f.stat()
+            h.update(f"{f.relative_to(PROJECT_ROOT).as_posix()}|{st.st_size}|{st.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def exporter_fingerprint(exporter: Exporter) -> str:
+    return tree_fingerprint([PROJECT_ROOT / exporter.script] + [PROJECT_ROOT / p for p in exporter.inputs])
+
+
+def run_chain(chain: Tuple[Exporter, ...], previous: Dict[str, str], probe: bool,
+              force: bool) -> List[Tuple[Exporter, str, Optional[str]]]:
+    """
+    Run one exporter chain
+
+    Returns:
+        (exporter, status, fingerprint to record) per exporter; status is
+        ran / unchanged / skipped / failed
+    """
+    results = []
+    for exporter in chain:
+        if exporter.network and not probe:
+            results.append((exporter, "skipped", None))
+            continue
+        fingerprint = exporter_fingerprint(exporter)
+        outputs_exist = bool(exporter.outputs) and all((PROJECT_ROOT / p).exists() for p in exporter.outputs)
+        if not exporter.network and not force and outputs_exist and previous.get(exporter.name) == fingerprint:
+            results.append((exporter, "unchanged", fingerprint))
+            continue
+        proc = subprocess.run([sys.executable, exporter.script], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, encoding="utf-8", errors="replace")
+        if proc.returncode != 0:
+            tail = (proc.stderr or proc.stdout).strip().splitlines()[-5:]
+            print(f"[{exporter.name}] failed (exit {proc.returncode})" + "".join(f"\n    {line}" for line in tail))
+            results.append((exporter, "failed", None))
+            if not exporter.optional:
+                break
+            continue
+        results.append((exporter, "ran", fingerprint))
+    return results
+
+
+def run_exporters(previous: Dict[str, str], probe: bool, force: bool) -> Tuple[Dict[str, str], bool]:
+    """Run all exporter chains in parallel; returns (new fingerprints, all required exporters succeeded)"""
+    fingerprints = dict(previous)
+    ok = True
+    with ThreadPoolExecutor(max_workers=len(EXPORT_CHAINS)) as pool:
+        futures = [pool.submit(run_chain, chain, previous, probe, force) for chain in EXPORT_CHAINS]
+        for future in futures:
+            for exporter, status, fingerprint in future.result():
+                print(f"  exporter {exporter.name:<20} {status}")
+                if fingerprint is not None:
+                    fingerprints[exporter.name] = fingerprint
+                else:
+                    fingerprints.pop(exporter.name, None)
+                if status == "failed" and not exporter.optional:
+                    ok = False
+    return fingerprints, ok
+
+
+def _add_glob(targets: Dict[str, Source], dest: str, directory: str, *patterns: str):
+    for pattern in patterns:
+        for path in sorted((PROJECT_ROOT / directory).glob(pattern)):
+            if path.is_file():
+                targets[f"{dest}/{path.name}" if dest else path.name] = path
+
+
+def _listing(title: str, targets: Dict[str, Source], directory: str) -> str:
+    """index.md listing the targets of one public/ subdirectory (same as the shell `ls` loop)"""
+    prefix = f"{directory}/"
+    names = sorted(k[len(prefix):] for k in targets if k.startswith(prefix) and "/" not in k[len(prefix):])
+    lines = [f"# {title}"] + [f"- [{name}](./{name})" for name in names if name != "index.md"]
+    return "\n".join(lines) + "\n"
+
+
+def commit_id() -> str:
+    try:
+        proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True)
+        return proc.stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def plan_site() -> Dict[str, Source]:
+    """
+    Every target of public/ (same layout as the Pages workflow)
+
+    Returns:
+        Path in public/ -> source; Markdown targets keep their .md name and
+        are written as .html
+    """
+    targets: Dict[str, Source] = {}
+    latest = PROJECT_ROOT / "reports" / "latest.md"
+    targets["latest.md"] = latest if latest.exists() else \
+        "# Daily Quant Notes\n\n`reports/latest.md` is not found yet.\n"
+    targets["README.md"] = PROJECT_ROOT / "README.md"
+
+    _add_glob(targets, "strategies", "docs", "STRATEGY_REQUIREMENTS.md")
+    _add_glob(targets, "strategies", "config/strategies", "*.yaml")
+    _add_glob(targets, "strategies", "reports/strategies", "*.md")
+    _add_glob(targets, "reports", "reports", "*.md", "*.png")
+    _add_glob(targets, "generated", "reports/generated", "*.md")
+    _add_glob(targets, "", "reports", "hot_rank_top100_history.csv", "hot_rank_top100_explorer.html",
+              "hot_rank_wencai_last30_normalized.csv", "hot_rank_multi_source_snapshot_latest.csv",
+              "hot_rank_multi_source_explorer.html", "hot_rank_multi_source_summary.json")
+    shards = PROJECT_ROOT / "reports" / "hot_rank_top100"
+    if shards.is_dir():
+        for path in sorted(shards.rglob("*")):
+            if path.is_file():
+                targets[path.relative_to(PROJECT_ROOT / "reports").as_posix()] = path
+
+    _add_glob(targets, "trades", "reports/trades", "*.csv", "*.md", "*.html")
+    _add_glob(targets, "trades", "data/backtest/trades", "*.csv")
+    if "trades/README.md" not in targets:
+        targets["trades/README.md"] = "# Buy/Sell Records\n\nPut trade CSV files under `reports/trades/` to publish them.\n"
+
+    targets["strategies/index.md"] = _listing("策略配置与说明", targets, "strategies")
+    targets["reports/index.md"] = _listing("统计报告列表", targets, "reports")
+    if not (PROJECT_ROOT / "reports" / "trades" / "index.md").exists():
+        targets["trades/index.md"] = _listing("买卖记录列表", targets, "trades")
+    targets["index.html"] = INDEX_TEMPLATE.format(commit=commit_id())
+    return targets
+
+
+def output_name(target: str) -> str:
+    return target[:-3] + ".html" if target.endswith(".md") else target
+
+
+def target_fingerprint(target: str, source: Source) -> str:
+    if isinstance(source, Path):
+        st = source.stat()
+        key = f"file|{source.relative_to(PROJECT_ROOT).as_posix()}|{st.st_size}|{st.st_mtime_ns}"
+    else:
+        key = "text|" + hashlib.md5(source.encode("utf-8")).hexdigest()
+    if target.endswith(".md"):
+        key += f"|md:{_TEMPLATE_HASH}"
+    return hashlib.md5(key.encode("utf-8")).hexdigest()
+
+
+def write_target(target: str, source: Source, md) -> None:
+    out = PUBLIC_DIR / output_name(target)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    if target.endswith(".md"):
+        text = source.read_text(encoding="utf-8") if isinstance(source, Path) else source
+        html = md.convert(MD_LINK_RE.sub(r"](\1.html)", text))
+        md.reset()
+        out.write_text(HTML_TEMPLATE.format(title=Path(target).stem, content=html), encoding="utf-8")
+    elif isinstance(source, Path):
+        shutil.copy2(source, out)
+    else:
+        out.write_text(source, encoding="utf-8")
+
+
+def load_manifest() -> Optional[dict]:
+    path = PUBLIC_DIR / MANIFEST_NAME
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="增量构建本地 GitHub Pages 站点（public/）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--probe", action="store_true", help="运行联网的多源热度探测（默认使用上次结果）")
+    parser.add_argument("--skip-exporters", action="store_true", help="不运行导出脚本，只组装站点")
+    parser.add_argument("--force-exporters", action="store_true", help="忽略指纹，重新运行全部导出脚本")
+    parser.add_argument("--clean", action="store_true", help="清空 public/ 后全量构建")
+    args = parser.parse_args()
+
+    try:
+        import markdown
+    except ImportError:
+        print("missing dependency: markdown (pip install markdown)")
+        return 1
+
+    t0 = time.perf_counter()
+    manifest = None if args.clean else load_manifest()
+    if manifest is None:
+        shutil.rmtree(PUBLIC_DIR, ignore_errors=True)
+        manifest = {}
+    PUBLIC_DIR.mkdir(parents=True, exist_ok=True)
+
+    ok = True
+    exporters = manifest.get("exporters", {})
+    if not args.skip_exporters:
+        print("exporters:")
+        exporters, ok = run_exporters(exporters, args.probe, args.force_exporters)
+
+    previous = manifest.get("pages", {})
+    targets = plan_site()
+    md = markdown.Markdown(extensions=["tables", "fenced_code"])
+    pages: Dict[str, str] = {}
+    written = 0
+    for target, source in targets.items():
+        out = output_name(target)
+        fingerprint = target_fingerprint(target, source)
+        if previous.get(out) != fingerprint or not (PUBLIC_DIR / out).exists():
+            write_target(target, source, md)
+            written += 1
+        pages[out] = fingerprint
+
+    removed = 0
+    for out in set(previous) - set(pages):
+        path = PUBLIC_DIR / out
+        if path.exists():
+            path.unlink()
+            removed += 1
+
+    (PUBLIC_DIR / MANIFEST_NAME).write_text(
+        json.dumps({"exporters": exporters, "pages": pages}, ensure_ascii=False, indent=1, sort_keys=True),
+        encoding="utf-8")
+    print(f"pages: {written} written, {len(pages) - written} unchanged, {removed} removed "
+          f"({time.perf_counter() - t0:.1f}s) -> {PUBLIC_DIR / 'index.html'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Compare several backtest runs side by side (Markdown report like reports/comparison_*.md).
+
+All runs are aligned into one date x run NAV matrix and measured in one pass
+by backtest_metrics: returns, drawdown, Sharpe, win rate, profit/loss ratio,
+monthly returns and exit-reason counts.
+
+Example:
+    python scripts/compare_strategies.py \\
+        --run 10亿 data/backtest/portfolio/a_portfolio.parquet data/backtest/trades/a_trades.parquet \\
+        --run 20亿 data/backtest/portfolio/b_portfolio.parquet data/backtest/trades/b_trades.parquet \\
+        --output reports/comparison_10b_vs_20b.md
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from backtest_metrics import compare_runs, exit_reason_breakdown, monthly_returns, nav_matrix  # noqa: E402
+
+# (column, label, format); percentages are shown with %, the rest as numbers
+ROWS = (
+    ("total_return", "**总收益率**", "pct"),
+    ("annual_return", "年化收益率", "pct"),
+    ("max_drawdown", "**最大回撤**", "pct"),
+    ("sharpe_ratio", "**夏普比率**", "num"),
+    ("calmar_ratio", "卡玛比率", "num"),
+    ("final_nav", "最终净值", "money"),
+    ("n_days", "交易天数", "int"),
+    ("total_trades", "总交易笔数", "int"),
+    ("winning_trades", "盈利笔数", "int"),
+    ("losing_trades", "亏损笔数", "int"),
+    ("win_rate", "**胜率**", "pct"),
+    ("profit_loss_ratio", "盈亏比", "num"),
+    ("avg_win", "平均盈利", "money"),
+    ("avg_loss", "平均亏损", "money"),
+)
+
+
+def read_table(path: str) -> pd.DataFrame:
+    """Parquet or CSV result file"""
+    if path.lower().endswith(".csv"):
+        return pd.read_csv(path, encoding="utf-8-sig")
+    return pd.read_parquet(path)
+
+
+def fmt(value, kind: str) -> str:
+    if pd.isna(value):
+        return "-"
+    if kind == "pct":
+        return f"{value:.2%}"
+    if kind == "money":
+        return f"{value:,.2f}"
+    if kind == "int":
+        return f"{int(value)}"
+    return f"{value:.2f}"
+
+
+def fmt_change(delta, kind: str) -> str:
+    if pd.isna(delta):
+        return "-"
+    if kind == "pct":
+        return f"{delta:+.2%}"
+    if kind == "money":
+        return f"{delta:+,.2f}"
+    if kind == "int":
+        return f"{int(delta):+d}"
+    return f"{delta:+.2f}"
+
+
+def markdown_table(header: List[str], rows: List[List[str]]) -> List[str]:
+    lines = ["| " + " | ".join(header) + " |", "|" + "|".join("------" for _ in header) + "|"]
+    lines += ["| " + " | ".join(row) + " |" for row in rows]
+    return lines
+
+
+def build_report(table: pd.DataFrame, monthly: pd.DataFrame, reasons: pd.DataFrame,
+                 navs: pd.DataFrame, title: Optional[str] = None) -> str:
+    """Markdown comparison of the runs in `table` (runs as columns)"""
+    runs = list(table.index)
+    with_change = len(runs) == 2
+    lines = [f"# {title or '回测对比报告：' + ' vs '.join(map(str, runs))}", "",
+             f"生成时间：{datetime.now().strftime('%Y-%m-%d %H:%M')}", ""]
+
+    lines += ["## 回测区间", ""]
+    period_rows = []
+    for run in runs:
+        dates = navs[run].dropna().index
+        span = f"{dates[0].date()} ~ {dates[-1].date()}" if len(dates) else "-"
+        period_rows.append([str(run), span, str(len(dates))])
+    lines += markdown_table(["回测", "区间", "交易天数"], period_rows) + ["", "---", ""]
+
+    lines += ["## 核心指标对比", ""]
+    header = ["指标"] + [str(r) for r in runs] + (["变化"] if with_change else [])
+    rows = []
+    for column, label, kind in ROWS:
+        row = [label] + [fmt(table.at[run, column], kind) for run in runs]
+        if with_change:
+            row.append(fmt_change(table.at[runs[1], column] - table.at[runs[0], column], kind))
+        rows.append(row)
+    lines += markdown_table(header, rows) + [""]
+
+    if not monthly.empty:
+        lines += ["## 月度收益", ""]
+        rows = [[str(month)] + [fmt(v, "pct") for v in values] for month, values in monthly.iterrows()]
+        lines += markdown_table(["月份"] + [str(r) for r in runs], rows) + [""]
+
+    if not reasons.empty:
+        lines += ["## 卖出原因分布", ""]
+        totals = reasons.sum(axis=0)
+        rows = []
+        for reason, counts in reasons.iterrows():
+            cells = [f"{int(counts[run])} ({counts[run] / totals[run]:.1%})" if totals[run] else "0"
+                     for run in runs]
+            rows.append([str(reason)] + cells)
+        lines += markdown_table(["原因"] + [str(r) for r in runs], rows) + [""]
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="多个回测结果对比（净值矩阵一次计算全部指标）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--run", nargs="+", action="append", required=True,
+                        metavar="LABEL PORTFOLIO [TRADES]", help="回测名称、组合净值文件、交易明细文件（可选），可重复")
+    parser.add_argument("--init-cash", type=float, default=None, help="初始资金（默认取各回测首日净值）")
+    parser.add_argument("--title", default=None, help="报告标题")
+    parser.add_argument("--output", default=None, help="Markdown 报告路径（默认输出到终端）")
+    parser.add_argument("--csv", default=None, help="指标表 CSV 路径（可选）")
+    args = parser.parse_args()
+
+    portfolios: Dict[str, pd.DataFrame] = {}
+    trades: Dict[str, Optional[pd.DataFrame]] = {}
+    for spec in args.run:
+        if len(spec) not in (2, 3):
+            parser.error(f"--run 需要 LABEL PORTFOLIO [TRADES]: {' '.join(spec)}")
+        label = spec[0]
+        if label in portfolios:
+            parser.error(f"回测名称重复: {label}")
+        portfolios[label] = read_table(spec[1])
+        trades[label] = read_table(spec[2]) if len(spec) == 3 else None
+
+    navs = nav_matrix(portfolios)
+    table = compare_runs(navs, trades, args.init_cash)
+    report = build_report(table, monthly_returns(navs, args.init_cash),
+                          exit_reason_breakdown(trades, navs.columns), navs, args.title)
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(report, encoding="utf-8")
+        print(f"saved: {output}")
+    else:
+        print(report)
+    if args.csv:
+        csv = Path(args.csv)
+        csv.parent.mkdir(parents=True, exist_ok=True)
+        table.to_csv(csv, index_label="run", encoding="utf-8-sig")
+        print(f"saved: {csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -37,6 +37,7 @@ import yaml
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from manifest import Manifest
+from security_master import market_symbol
 from utils import RateLimiter, retry_on_exception, setup_logging
 from validation import deduplicate_dataframe, validate_dataframe
 
@@ -149,14 +150,7 @@ class AShareDownloader:
         
         try:
             # Determine market prefix
-            if code.startswith(('000', '001', '002', '003', '300')):
-                symbol = f"SZ{code}"
-            elif code.startswith(('600', '601', '603', '688')):
-                symbol = f"SH{code}"
-            elif code.startswith(('8', '4')):
-                symbol = f"BJ{code}"
-            else:
-                symbol = f"SZ{code}"  # Default to SZ
+            symbol = market_symbol(code)
             
             df = ak.stock_hot_rank_detail_em(symbol=symbol)
             
@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
-"""Build multi-source hot-rank CSV/HTML pages from latest experiment output."""
+"""Build multi-source hot-rank CSV/HTML pages from the normalized hot-rank store."""
 
 from __future__ import annotations
 
 import json
-import re
+import sys
 from datetime import datetime
 from pathlib import Path
 
@@ -12,6 +12,11 @@ import pandas as pd
 
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+import hot_rank_store  # noqa: E402
+
+STORE_ROOT = PROJECT_ROOT / "data" / "hot_sources" / "store"
 EXPERIMENT_ROOT = PROJECT_ROOT / "data" / "experiments" / "hot_rank_multi_source"
 REPORTS_DIR = PROJECT_ROOT / "reports"
 CSV_LAST30_PATH = REPORTS_DIR / "hot_rank_wencai_last30_normalized.csv"
@@ -19,6 +24,9 @@ CSV_SNAPSHOT_PATH = REPORTS_DIR / "hot_rank_multi_source_snapshot_latest.csv"
 HTML_PATH = REPORTS_DIR / "hot_rank_multi_source_explorer.html"
 SUMMARY_JSON_PATH = REPORTS_DIR / "hot_rank_multi_source_summary.json"
 TOPN = 100
+LAST_DAYS = 30
+SNAPSHOT_SOURCES = (hot_rank_store.WENCAI_KAIPANLA, hot_rank_store.ADATA_THS)
+PAGE_COLUMNS = ["date", "source", "code", "name", "rank", "heat"]
 
 
 HTML_TEMPLATE = """<!doctype html>
@@ -170,119 +178,55 @@ def _latest_run_dir() -> Path | None:
     return sorted(candidates)[-1]
 
 
-def _normalize_code(raw: object) -> str:
-    s = str(raw).strip()
-    if "." in s:
-        s = s.split(".")[0]
-    if s.isdigit():
-        return s.zfill(6)
-    return s
-
-
-def _extract_rank_from_row(row: pd.Series) -> tuple[float | None, float | None]:
-    qd = str(row.get("query_date", "")).replace("-", "")
-    rank_col = f"个股热度排名[{qd}]"
-    heat_col = f"个股热度[{qd}]"
-    rank = row.get(rank_col)
-    heat = row.get(heat_col)
-    return rank, heat
-
-
-def _build_last30_df(run_dir: Path) -> pd.DataFrame:
-    f = run_dir / "wencai_hot_rank_last30d_pywencai.csv"
-    if not f.exists():
-        return pd.DataFrame(columns=["date", "source", "code", "name", "rank", "heat"])
-    df = pd.read_csv(f)
-    if df.empty:
-        return pd.DataFrame(columns=["date", "source", "code", "name", "rank", "heat"])
-
-    rows: list[dict] = []
-    for _, row in df.iterrows():
-        rank, heat = _extract_rank_from_row(row)
-        if pd.isna(rank):
-            continue
-        rank_num = int(rank)
-        if rank_num < 1 or rank_num > TOPN:
-            continue
-        rows.append(
-            {
-                "date": str(row.get("query_date", "")),
-                "source": "pywencai_ths",
-                "code": _normalize_code(row.get("股票代码", row.get("code", ""))),
-                "name": str(row.get("股票简称", "")),
-                "rank": rank_num,
-                "heat": float(heat) if pd.notna(heat) else None,
-            }
-        )
-    return pd.DataFrame(rows)
-
-
-def _build_snapshot_df(run_dir: Path, date_str: str) -> pd.DataFrame:
-    chunks: list[pd.DataFrame] = []
-
-    kp = run_dir / "kaipanla_hot_rank_snapshot_pywencai.csv"
-    if kp.exists():
-        df = pd.read_csv(kp)
-        if not df.empty:
-            rank_col = next((c for c in df.columns if str(c).startswith("个股热度排名[")), None)
-            heat_col = next((c for c in df.columns if str(c).startswith("个股热度[")), None)
-            kp_date = date_str
-            if rank_col:
-                m = re.search(r"\[(\d{8})\]", str(rank_col))
-                if m:
-                    kp_date = f"{m.group(1)[:4]}-{m.group(1)[4:6]}-{m.group(1)[6:]}"
-            tmp = pd.DataFrame(
-                {
-                    "date": kp_date,
-                    "source": "pywencai_kaipanla",
-                    "code": df.get("股票代码", "").map(_normalize_code),
-                    "name": df.get("股票简称", ""),
-                    "rank": pd.to_numeric(df.get(rank_col) if rank_col else None, errors="coerce"),
-                    "heat": pd.to_numeric(df.get(heat_col) if heat_col else None, errors="coerce"),
-                }
-            )
-            chunks.append(tmp)
-
-    ths = run_dir / "ths_hot_rank_100_snapshot_adata.csv"
-    if ths.exists():
-        df = pd.read_csv(ths)
-        if not df.empty:
-            if "fetch_time" in df.columns and pd.notna(df["fetch_time"].iloc[0]):
-                date_str = str(df["fetch_time"].iloc[0])[:10]
-            name_col = "short_name" if "short_name" in df.columns else "stock_name"
-            heat_col = "hot_value" if "hot_value" in df.columns else ("hot" if "hot" in df.columns else None)
-            tmp = pd.DataFrame(
-                {
-                    "date": date_str,
-                    "source": "adata_ths",
-                    "code": df.get("stock_code", "").map(_normalize_code),
-                    "name": df.get(name_col, ""),
-                    "rank": pd.to_numeric(df.get("rank"), errors="coerce"),
-                    "heat": pd.to_numeric(df.get(heat_col) if heat_col else None, errors="coerce"),
-                }
-            )
-            chunks.append(tmp)
+def _migrate_latest_run() -> Path | None:
+    """One-time import of the newest legacy run directory into an empty store."""
+    run_dir = _latest_run_dir()
+    if run_dir is None:
+        return None
+    stats = hot_rank_store.write_hot_ranks(hot_rank_store.normalize_run_dir(run_dir, TOPN), STORE_ROOT)
+    print(f"migrated {run_dir.name} into store: {stats['partitions']} partitions, {stats['rows']} rows")
+    return run_dir
+
+
+def _build_last30_df(days: int = LAST_DAYS) -> pd.DataFrame:
+    """THS (pywencai) ranks of the last `days` calendar days of the newest stored date."""
+    latest = hot_rank_store.latest_date(STORE_ROOT, hot_rank_store.WENCAI_THS)
+    if latest is None:
+        return hot_rank_store.empty_frame()[PAGE_COLUMNS]
+    start = pd.Timestamp(latest) - pd.Timedelta(days=days - 1)
+    return hot_rank_store.read_hot_ranks(
+        STORE_ROOT, [hot_rank_store.WENCAI_THS], start_date=start, max_rank=TOPN, columns=PAGE_COLUMNS
+    )
 
+
+def _build_snapshot_df() -> pd.DataFrame:
+    """Newest stored list of each snapshot source."""
+    chunks = []
+    for source in SNAPSHOT_SOURCES:
+        latest = hot_rank_store.latest_date(STORE_ROOT, source)
+        if latest is None:
+            continue
+        chunks.append(hot_rank_store.read_hot_ranks(
+            STORE_ROOT, [source], start_date=latest, end_date=latest, max_rank=TOPN, columns=PAGE_COLUMNS
+        ))
     if not chunks:
-        return pd.DataFrame(columns=["date", "source", "code", "name", "rank", "heat"])
-    out = pd.concat(chunks, ignore_index=True)
-    out = out[out["rank"].between(1, TOPN, inclusive="both")]
-    out["rank"] = out["rank"].astype(int)
-    return out
+        return hot_rank_store.empty_frame()[PAGE_COLUMNS]
+    return pd.concat(chunks, ignore_index=True)
 
 
 def main() -> int:
-    run_dir = _latest_run_dir()
-    if run_dir is None:
-        print(f"skip: no valid run under {EXPERIMENT_ROOT}")
-        return 0
+    migrated = None
+    if not hot_rank_store.list_partitions(STORE_ROOT):
+        migrated = _migrate_latest_run()
+        if migrated is None:
+            print(f"skip: empty store {STORE_ROOT} and no legacy run under {EXPERIMENT_ROOT}")
+            return 0
 
     REPORTS_DIR.mkdir(parents=True, exist_ok=True)
     run_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    date_str = run_time[:10]
 
-    last30_df = _build_last30_df(run_dir)
-    snap_df = _build_snapshot_df(run_dir, date_str)
+    last30_df = _build_last30_df()
+    snap_df = _build_snapshot_df()
 
     last30_df.to_csv(CSV_LAST30_PATH, index=False, encoding="utf-8")
     snap_df.to_csv(CSV_SNAPSHOT_PATH, index=False, encoding="utf-8")
@@ -292,11 +236,8 @@ def main() -> int:
         print("skip: no normalized rows to build html")
         return 0
 
-    merged = merged.dropna(subset=["date", "source", "code", "rank"]).copy()
-    merged["code"] = merged["code"].map(_normalize_code)
-    merged["rank"] = pd.to_numeric(merged["rank"], errors="coerce")
-    merged = merged[merged["rank"].between(1, TOPN, inclusive="both")]
     merged["rank"] = merged["rank"].astype(int)
+    merged["heat"] = merged["heat"].astype(object).where(merged["heat"].notna(), None)
     merged = merged.sort_values(["date", "source", "rank", "code"], ascending=[False, True, True, True])
     rows = merged.to_dict(orient="records")
 
@@ -307,7 +248,8 @@ def main() -> int:
         json.dumps(
             {
                 "run_time": run_time,
-                "source_run_dir": str(run_dir.relative_to(PROJECT_ROOT)),
+                "store": str(STORE_ROOT.relative_to(PROJECT_ROOT)),
+                "migrated_run_dir": str(migrated.relative_to(PROJECT_ROOT)) if migrated else None,
                 "rows_total": len(rows),
                 "rows_last30": int(len(last30_df)),
                 "rows_snapshot": int(len(snap_df)),
@@ -322,7 +264,7 @@ def main() -> int:
         encoding="utf-8",
     )
 
-    print(f"source_run_dir={run_dir}")
+    print(f"store={STORE_ROOT}")
     print(f"rows_total={len(rows)}")
     print(f"html={HTML_PATH}")
     return 0
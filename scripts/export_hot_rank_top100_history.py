@@ -1,10 +1,29 @@
 #!/usr/bin/env python3
-"""Export historical hot-rank stocks and generate a readable explorer page."""
+"""Export historical hot-rank stocks and generate a readable explorer page.
+
+The page carries no data itself. Rows are written as compact columnar JSON
+shards next to it and fetched on demand:
+
+    hot_rank_top100/index.json          dates, row counts, shard versions
+    hot_rank_top100/days/YYYY-MM.json   one month: dates/offsets + rank/code/name columns
+    hot_rank_top100/codes/XXX.json      history of the codes starting with XXX
+
+Exports are incremental: index.json records the exported trading dates, and
+the next run only scans the lake partitions from the last exported month,
+re-exporting the last exported date (it may have been captured mid-day) and
+any newer dates. Only the month shards and code buckets touched by those
+rows are rewritten. --full rebuilds everything.
+"""
 
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
+import re
+from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 import duckdb
 
@@ -13,6 +32,10 @@ PARQUET_GLOB = PROJECT_ROOT / "data" / "parquet" / "ashare_daily" / "**" / "*.pa
 REPORTS_DIR = PROJECT_ROOT / "reports"
 CSV_PATH = REPORTS_DIR / "hot_rank_top100_history.csv"
 HTML_PATH = REPORTS_DIR / "hot_rank_top100_explorer.html"
+DATA_DIR_NAME = "hot_rank_top100"
+DATA_DIR = REPORTS_DIR / DATA_DIR_NAME
+CODE_BUCKET_LEN = 3
+PARTITION_RE = re.compile(r"year=(\d{4})/month=(\d{1,2})$")
 RANK_LIMIT = 100
 PARQUET_ROOT = PROJECT_ROOT / "data" / "parquet" / "ashare_daily"
 
@@ -102,53 +125,72 @@ HTML_TEMPLATE = """<!doctype html>
     </div>
   </div>
 
-  <script id=\"data-json\" type=\"application/json\">__DATA_JSON__</script>
   <script>
-    const rows = JSON.parse(document.getElementById('data-json').textContent);
-    const byDate = new Map();
-    const byCode = new Map();
-
-    for (const r of rows) {
-      if (!byDate.has(r.date)) byDate.set(r.date, []);
-      byDate.get(r.date).push(r);
-      if (!byCode.has(r.code)) byCode.set(r.code, []);
-      byCode.get(r.code).push(r);
-    }
+    // 数据按月分片（days/YYYY-MM.json）和按代码前三位分片（codes/XXX.json），按需加载并缓存
+    const DATA_DIR = '__DATA_DIR__';
+    const shardCache = new Map();
+    let index = null;
+    let dates = [];
+    let dayToken = 0;
+    let codeToken = 0;
 
-    const dates = [...byDate.keys()].sort();
     const dateSelect = document.getElementById('dateSelect');
     const dayKeyword = document.getElementById('dayKeyword');
     const dayBody = document.getElementById('dayBody');
     const codeBody = document.getElementById('codeBody');
     const codeInput = document.getElementById('codeInput');
 
-    document.getElementById('summary').textContent = `共 ${rows.length.toLocaleString()} 条记录，${dates.length.toLocaleString()} 个交易日。`;
+    function fetchJson(path, version) {
+      const url = `${DATA_DIR}/${path}` + (version ? `?v=${version}` : '');
+      if (!shardCache.has(url)) {
+        const p = fetch(url).then(r => {
+          if (!r.ok) throw new Error(`${r.status} ${url}`);
+          return r.json();
+        });
+        p.catch(() => shardCache.delete(url));
+        shardCache.set(url, p);
+      }
+      return shardCache.get(url);
+    }
 
-    for (const d of dates) {
-      const op = document.createElement('option');
-      op.value = d;
-      op.textContent = d;
-      dateSelect.appendChild(op);
+    async function loadDay(d) {
+      const month = index.months[d.slice(0, 7)];
+      if (!month) return [];
+      const shard = await fetchJson(month.file, month.v);
+      const i = shard.dates.indexOf(d);
+      if (i < 0) return [];
+      const list = [];
+      for (let j = shard.offsets[i]; j < shard.offsets[i + 1]; j++) {
+        list.push({ hot_rank: shard.rank[j], code: shard.code[j], name: shard.name[j] });
+      }
+      return list;
     }
 
-    dateSelect.value = dates[dates.length - 1] || '';
+    async function loadCode(code) {
+      const bucket = index.code_buckets[code.slice(0, 3)];
+      if (!bucket) return [];
+      const shard = await fetchJson(bucket.file, bucket.v);
+      const h = shard[code];
+      if (!h) return [];
+      return h.date.map((d, k) => ({ date: d, hot_rank: h.rank[k], name: h.names[h.name[k]] }));
+    }
 
-    function renderDay() {
+    async function renderDay() {
+      const token = ++dayToken;
       const d = dateSelect.value;
       const kw = dayKeyword.value.trim();
-      const list = (byDate.get(d) || []).slice().sort((a,b)=>a.hot_rank-b.hot_rank);
+      let list;
+      try {
+        list = await loadDay(d);
+      } catch (e) {
+        dayBody.innerHTML = `<tr><td colspan=\"3\">加载失败：${e.message}</td></tr>`;
+        return;
+      }
+      if (token !== dayToken) return;
       const filtered = kw ? list.filter(x => x.code.includes(kw) || (x.name || '').includes(kw)) : list;
 
       document.getElementById('dayTitle').textContent = `当日榜单：${d}（${filtered.length} 条）`;
       dayBody.innerHTML = filtered.map(x => `<tr><td class=\"rank\">${x.hot_rank}</td><td><a href=\"#\" data-code=\"${x.code}\">${x.code}</a></td><td>${x.name || ''}</td></tr>`).join('');
-
-      dayBody.querySelectorAll('a[data-code]').forEach(a => {
-        a.addEventListener('click', (e) => {
-          e.preventDefault();
-          codeInput.value = a.dataset.code;
-          renderCode();
-        });
-      });
     }
 
     function normalizeCode(raw) {
@@ -157,7 +199,8 @@ HTML_TEMPLATE = """<!doctype html>
       return s;
     }
 
-    function renderCode() {
+    async function renderCode() {
+      const token = ++codeToken;
       const code = normalizeCode(codeInput.value);
       codeInput.value = code;
       if (!code) {
@@ -165,7 +208,15 @@ HTML_TEMPLATE = """<!doctype html>
         codeBody.innerHTML = '';
         return;
       }
-      const list = (byCode.get(code) || []).slice().sort((a,b)=>a.date < b.date ? 1 : -1);
+      let list;
+      try {
+        list = await loadCode(code);
+      } catch (e) {
+        codeBody.innerHTML = `<tr><td colspan=\"3\">加载失败：${e.message}</td></tr>`;
+        return;
+      }
+      if (token !== codeToken) return;
+      list = list.slice().sort((a,b)=>a.date < b.date ? 1 : -1);
       document.getElementById('codeTitle').textContent = `个股历史排名：${code}（${list.length} 条）`;
       codeBody.innerHTML = list.map(x => `<tr><td>${x.date}</td><td class=\"rank\">${x.hot_rank}</td><td>${x.name || ''}</td></tr>`).join('');
     }
@@ -178,6 +229,13 @@ HTML_TEMPLATE = """<!doctype html>
       renderDay();
     }
 
+    dayBody.addEventListener('click', (e) => {
+      const a = e.target.closest('a[data-code]');
+      if (!a) return;
+      e.preventDefault();
+      codeInput.value = a.dataset.code;
+      renderCode();
+    });
     dateSelect.addEventListener('change', renderDay);
     dayKeyword.addEventListener('input', renderDay);
     document.getElementById('queryCode').addEventListener('click', renderCode);
@@ -185,45 +243,90 @@ HTML_TEMPLATE = """<!doctype html>
     document.getElementById('prevDay').addEventListener('click', () => shiftDay(-1));
     document.getElementById('nextDay').addEventListener('click', () => shiftDay(1));
 
-    renderDay();
+    fetchJson('index.json', String(Date.now())).then(idx => {
+      index = idx;
+      dates = idx.dates;
+      document.getElementById('summary').textContent = `共 ${idx.rows.toLocaleString()} 条记录，${idx.trade_dates.toLocaleString()} 个交易日。`;
+      for (const d of dates) {
+        const op = document.createElement('option');
+        op.value = d;
+        op.textContent = d;
+        dateSelect.appendChild(op);
+      }
+      dateSelect.value = dates[dates.length - 1] || '';
+      renderDay();
+    }).catch(e => {
+      document.getElementById('summary').textContent = `索引加载失败（${e.message}），请通过 HTTP 访问本页面。`;
+    });
   </script>
 </body>
 </html>
 """
 
 
-def load_rows(rank_limit: int):
+def lake_sources(since: Optional[str] = None) -> list[str]:
+    """Parquet globs of the lake partitions from the month of `since` on (all when None)"""
+    if since is None:
+        return [str(PARQUET_GLOB)]
+    first = (int(since[:4]), int(since[5:7]))
+    sources = []
+    for month_dir in sorted(PARQUET_ROOT.glob("year=*/month=*")):
+        match = PARTITION_RE.search(month_dir.relative_to(PARQUET_ROOT).as_posix())
+        if match and (int(match.group(1)), int(match.group(2))) >= first:
+            sources.append(str(month_dir / "*.parquet"))
+    return sources
+
+
+def load_rows(rank_limit: int, since: Optional[str] = None):
+    """
+    Top-ranked rows of the lake in one pass (dates >= since when given)
+
+    A stock listed twice on a date keeps its best rank.
+    """
+    sources = lake_sources(since)
+    if not sources:
+        return None
     con = duckdb.connect()
     sql = """
-    WITH base AS (
-      SELECT
-        CAST(date AS DATE) AS date,
-        code,
-        name,
-        CAST(hot_rank AS INTEGER) AS hot_rank,
-        ROW_NUMBER() OVER (
-          PARTITION BY CAST(date AS DATE), code
-          ORDER BY CAST(hot_rank AS INTEGER) ASC
-        ) AS rn
-      FROM read_parquet(?)
-      WHERE hot_rank IS NOT NULL
-        AND CAST(hot_rank AS INTEGER) BETWEEN 1 AND ?
-    )
     SELECT
-      strftime(date, '%Y-%m-%d') AS date,
+      strftime(CAST(date AS DATE), '%Y-%m-%d') AS date,
       LPAD(CAST(code AS VARCHAR), 6, '0') AS code,
-      name,
-      hot_rank
-    FROM base
-    WHERE rn = 1
+      arg_min(name, CAST(hot_rank AS INTEGER)) AS name,
+      min(CAST(hot_rank AS INTEGER)) AS hot_rank
+    FROM read_parquet(?)
+    WHERE hot_rank IS NOT NULL
+      AND CAST(hot_rank AS INTEGER) BETWEEN 1 AND ?
+      AND CAST(date AS DATE) >= CAST(? AS DATE)
+    GROUP BY 1, 2
     ORDER BY date DESC, hot_rank ASC, code ASC
     """
-    df = con.execute(sql, [str(PARQUET_GLOB), rank_limit]).fetchdf()
-    trade_dates = con.execute(
-        "SELECT COUNT(DISTINCT CAST(date AS DATE)) FROM read_parquet(?) WHERE hot_rank IS NOT NULL",
-        [str(PARQUET_GLOB)],
-    ).fetchone()[0]
-    return df, trade_dates
+    return con.execute(sql, [sources, rank_limit, since or "1900-01-01"]).fetchdf()
+
+
+def load_state() -> Optional[dict]:
+    """Index of the previous export (None when the shards or the CSV are missing)"""
+    index_path = DATA_DIR / "index.json"
+    if not index_path.exists() or not CSV_PATH.exists():
+        return None
+    with open(index_path, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    return index if index.get("dates") else None
+
+
+def merge_rows(new):
+    """
+    Previous CSV rows with the re-exported dates replaced by `new`
+
+    Returns:
+        (merged rows, replaced previous rows of the re-exported dates)
+    """
+    import pandas as pd  # 仅在有本地数据时需要（Pages CI 不安装 pandas）
+
+    old = pd.read_csv(CSV_PATH, dtype={"code": str, "date": str}, encoding="utf-8")
+    replaced = old["date"].isin(set(new["date"]))
+    df = pd.concat([old[~replaced], new], ignore_index=True)
+    df = df.sort_values(["date", "hot_rank", "code"], ascending=[False, True, True]).reset_index(drop=True)
+    return df, old[replaced]
 
 
 def write_csv(df) -> None:
@@ -231,29 +334,149 @@ def write_csv(df) -> None:
     df.to_csv(CSV_PATH, index=False, encoding="utf-8")
 
 
-def write_html(rows: list[dict], rank_limit: int) -> None:
-    html = HTML_TEMPLATE.replace("__RANK_LIMIT__", str(rank_limit)).replace(
-        "__DATA_JSON__", json.dumps(rows, ensure_ascii=False)
-    )
+def dump_json(path: Path, obj) -> str:
+    """Write compact JSON and return a short content hash (cache-busting version)"""
+    text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return hashlib.md5(text.encode("utf-8")).hexdigest()[:10]
+
+
+def month_shard(month_df) -> dict:
+    """One month of rows, date ascending and rank ascending within the date"""
+    month_df = month_df.sort_values(["date", "hot_rank", "code"])
+    dates = month_df["date"].tolist()
+    starts = [i for i in range(len(dates)) if i == 0 or dates[i] != dates[i - 1]]
+    return {
+        "dates": [dates[i] for i in starts],
+        "offsets": starts + [len(dates)],
+        "rank": month_df["hot_rank"].astype(int).tolist(),
+        "code": month_df["code"].tolist(),
+        "name": month_df["name"].fillna("").tolist(),
+    }
+
+
+def code_shard(bucket_df) -> dict:
+    """History of every code in one bucket: date/rank columns plus a name dictionary"""
+    shard = {}
+    for code, g in bucket_df.sort_values(["code", "date"]).groupby("code", sort=True):
+        names = g["name"].fillna("").tolist()
+        dictionary = list(dict.fromkeys(names))
+        lookup = {name: i for i, name in enumerate(dictionary)}
+        shard[code] = {
+            "date": g["date"].tolist(),
+            "rank": g["hot_rank"].astype(int).tolist(),
+            "names": dictionary,
+            "name": [lookup[name] for name in names],
+        }
+    return shard
+
+
+def write_shards(df, rank_limit: int, previous: Optional[dict] = None, new=None, replaced=None) -> dict:
+    """
+    Write month / code shards and the index
+
+    Args:
+        df: All exported rows
+        rank_limit: Rank limit of the export
+        previous: Index of the previous export; its untouched shards are kept
+        new: Rows re-exported in this run (None: full rebuild, stale shards are removed)
+        replaced: Previous rows of the re-exported dates (their code shards are
+                  rewritten too, so codes that dropped out of a day lose it)
+
+    Returns:
+        New index
+    """
+    months = dict(previous["months"]) if previous and new is not None else {}
+    code_buckets = dict(previous["code_buckets"]) if previous and new is not None else {}
+    if new is None:
+        touched_months = touched_buckets = None
+    else:
+        touched_months = set(new["date"].str.slice(0, 7))
+        touched_buckets = set(new["code"].str.slice(0, CODE_BUCKET_LEN))
+        if replaced is not None:
+            touched_buckets |= set(replaced["code"].str.slice(0, CODE_BUCKET_LEN))
+
+    month_keys = df["date"].str.slice(0, 7)
+    for month in sorted(touched_months if touched_months is not None else set(month_keys)):
+        g = df[month_keys == month]
+        rel = f"days/{month}.json"
+        months[month] = {"file": rel, "rows": len(g), "v": dump_json(DATA_DIR / rel, month_shard(g))}
+
+    bucket_keys = df["code"].str.slice(0, CODE_BUCKET_LEN)
+    for bucket in sorted(touched_buckets if touched_buckets is not None else set(bucket_keys)):
+        g = df[bucket_keys == bucket]
+        rel = f"codes/{bucket}.json"
+        if g.empty:
+            code_buckets.pop(bucket, None)
+            (DATA_DIR / rel).unlink(missing_ok=True)
+            continue
+        code_buckets[bucket] = {"file": rel, "codes": int(g["code"].nunique()),
+                                "v": dump_json(DATA_DIR / rel, code_shard(g))}
+
+    if new is None:
+        written = {DATA_DIR / m["file"] for m in months.values()} | {DATA_DIR / b["file"] for b in code_buckets.values()}
+        for sub in ("days", "codes"):
+            for path in (DATA_DIR / sub).glob("*.json"):
+                if path not in written:
+                    path.unlink()
+
+    dates = sorted(df["date"].unique().tolist())
+    index = {
+        "rank_limit": rank_limit,
+        "rows": len(df),
+        "trade_dates": len(dates),
+        "dates": dates,
+        "months": dict(sorted(months.items())),
+        "code_buckets": dict(sorted(code_buckets.items())),
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    dump_json(DATA_DIR / "index.json", index)
+    return index
+
+
+def write_html(rank_limit: int) -> None:
+    html = HTML_TEMPLATE.replace("__RANK_LIMIT__", str(rank_limit)).replace("__DATA_DIR__", DATA_DIR_NAME)
     HTML_PATH.write_text(html, encoding="utf-8")
 
 
 def main() -> int:
+    parser = argparse.ArgumentParser(description="导出热度前100历史榜单（CSV + 分片JSON + 浏览页面）")
+    parser.add_argument("--full", action="store_true", help="全量重建（默认只导出新增交易日）")
+    args = parser.parse_args()
+
     # GitHub Actions 中通常不会包含本地大体积 parquet 数据，缺失时直接跳过。
     if not PARQUET_ROOT.exists() or not any(PARQUET_ROOT.rglob("*.parquet")):
         print(f"skip: no parquet files found under {PARQUET_ROOT}")
         return 0
 
-    df, trade_dates = load_rows(RANK_LIMIT)
+    previous = None if args.full else load_state()
+    since = previous["dates"][-1] if previous else None
+    new = load_rows(RANK_LIMIT, since)
+    if previous is None:
+        if new is None or new.empty:
+            print("skip: no hot rank rows found")
+            return 0
+        df = new
+        index = write_shards(df, RANK_LIMIT)
+    elif new is None or new.empty:
+        print(f"up to date: last exported date {since}")
+        return 0
+    else:
+        df, replaced = merge_rows(new)
+        index = write_shards(df, RANK_LIMIT, previous=previous, new=new, replaced=replaced)
     write_csv(df)
-    rows = df.to_dict(orient="records")
-    write_html(rows, RANK_LIMIT)
+    write_html(RANK_LIMIT)
 
     print(f"rank_limit={RANK_LIMIT}")
+    print(f"mode={'full' if previous is None else f'incremental since {since}'}")
+    print(f"new_rows={len(new)} new_dates={new['date'].nunique()}")
     print(f"rows={len(df)}")
-    print(f"trade_dates={trade_dates}")
+    print(f"trade_dates={index['trade_dates']}")
+    print(f"shards={len(index['months'])} months, {len(index['code_buckets'])} code buckets")
     print(f"csv={CSV_PATH}")
     print(f"html={HTML_PATH}")
+    print(f"data={DATA_DIR}")
     return 0
 
 
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Memory footprint of the feature panel: plain pd.read_parquet vs the compact loader.
+
+Each mode loads the panel in a fresh process so the RSS deltas are comparable.
+
+Example:
+    python scripts/feature_memory_report.py --features data/processed/features/daily_features_v1.parquet
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from feature_store import load_features  # noqa: E402
+
+MODES = ("plain", "compact")
+
+
+def rss_mb() -> Optional[float]:
+    """Resident set size of this process (Linux /proc, otherwise psutil if installed)"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / 1024 / 1024
+
+
+def measure(mode: str, features_path: str) -> Dict[str, Any]:
+    """Load the panel in one mode and report RSS / frame memory (runs in a child process)"""
+    import pyarrow  # noqa: F401  # library import is not part of the panel's footprint
+
+    before = rss_mb()
+    t0 = time.perf_counter()
+    if mode == "plain":
+        df = pd.read_parquet(features_path)
+        df["date"] = pd.to_datetime(df["date"])
+    else:
+        df = load_features(features_path)
+    seconds = time.perf_counter() - t0
+    after = rss_mb()
+    return {
+        "mode": mode,
+        "rows": len(df),
+        "load_seconds": round(seconds, 3),
+        "frame_mb": round(df.memory_usage(deep=True).sum() / 1024 / 1024, 1),
+        "rss_delta_mb": round(after - before, 1) if before is not None and after is not None else None,
+        "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()},
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="特征数据内存占用对比（普通加载 vs 紧凑类型加载）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--features", default="data/processed/features/daily_features_v1.parquet", help="特征数据路径")
+    parser.add_argument("--dtypes", action="store_true", help="输出各列类型")
+    parser.add_argument("--output", default=None, help="结果 JSON 路径（默认不保存）")
+    args = parser.parse_args()
+
+    results = {}
+    ctx = multiprocessing.get_context("spawn")
+    for mode in MODES:
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            results[mode] = pool.submit(measure, mode, args.features).result()
+
+    print(f"{args.features} ({results['plain']['rows']:,} rows)")
+    print(f"  {'mode':<8} {'frame MB':>10} {'RSS +MB':>10} {'load s':>8}")
+    for mode in MODES:
+        r = results[mode]
+        rss = f"{r['rss_delta_mb']:>10.1f}" if r["rss_delta_mb"] is not None else f"{'n/a':>10}"
+        print(f"  {mode:<8} {r['frame_mb']:>10.1f} {rss} {r['load_seconds']:>8.2f}")
+    plain, compact = results["plain"], results["compact"]
+    print(f"  frame memory reduction: {1 - compact['frame_mb'] / plain['frame_mb']:.1%}")
+    if plain["rss_delta_mb"] and compact["rss_delta_mb"] is not None:
+        print(f"  RSS reduction: {1 - compact['rss_delta_mb'] / plain['rss_delta_mb']:.1%}")
+    if args.dtypes:
+        for col, dtype in compact["dtypes"].items():
+            print(f"    {col:<22} {plain['dtypes'].get(col, '-'):<16} -> {dtype}")
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"saved: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -8,20 +8,31 @@
 2. 计算策略指标（收益率、夏普比、最大回撤等）
 3. 生成Markdown报告
 4. 生成可视化图表（净值曲线、收益分布、持仓分析等）
+   - 多份回测结果一起出报告时，各图表在进程池中并行绘制
+   - 输入指纹（图表数据 + dpi + 绘图代码）未变化的图表直接跳过
+   - --preview 低分辨率快速出图
 
 使用示例：
     python scripts/generate_report.py \\
         --trades data/backtest/trades/xxx_trades.parquet \\
         --portfolio data/backtest/portfolio/xxx_portfolio.parquet \\
         --output data/backtest/reports/report_20260102.md
+
+    # 多份结果一起出报告，预览分辨率
+    python scripts/generate_report.py --preview \\
+        --trades a_trades.parquet b_trades.parquet \\
+        --portfolio a_portfolio.parquet b_portfolio.parquet
 """
 
 import argparse
+import hashlib
+import json
 import logging
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, NamedTuple
 
 import matplotlib
 matplotlib.use('Agg')  # 非交互式后端
@@ -36,6 +47,9 @@ plt.rcParams['axes.unicode_minus'] = False
 # 添加项目根目录到路径
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'src'))
+
+from backtest_metrics import compare_runs, drawdowns, exit_reason_breakdown, monthly_returns, nav_matrix
 
 # 配置日志
 logging.basicConfig(
@@ -44,34 +58,50 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DEFAULT_DPI = 150
+PREVIEW_DPI = 72
+# 未指定 --workers 时，待绘图表少于此数直接串行（进程池启动 + 各进程导入 matplotlib 的开销大于收益）
+MIN_POOL_JOBS = 8
+DEFAULT_WORKERS = 4
+CHART_MANIFEST = '_charts.json'
+
+# 绘图代码变化时所有图表指纹随之失效
+_SOURCE_HASH = hashlib.sha1(Path(__file__).read_bytes()).hexdigest()[:12]
+
+
+class ChartJob(NamedTuple):
+    """一张待绘制的图表"""
+    name: str
+    data: Dict[str, np.ndarray]
+    path: str
+    dpi: int
+    fingerprint: str
+
 
 class PerformanceAnalyzer:
     """策略表现分析器"""
     
     def __init__(self, trades_df: pd.DataFrame, portfolio_df: pd.DataFrame):
-        """初始化分析器"""
-        self.trades = trades_df
-        self.portfolio = portfolio_df
-        
+        """初始化分析器（不修改传入的DataFrame）"""
         # 转换日期格式
-        if not pd.api.types.is_datetime64_any_dtype(self.trades['entry_date']):
-            self.trades['entry_date'] = pd.to_datetime(self.trades['entry_date'])
-        if not pd.api.types.is_datetime64_any_dtype(self.trades['exit_date']):
-            self.trades['exit_date'] = pd.to_datetime(self.trades['exit_date'])
-        if not pd.api.types.is_datetime64_any_dtype(self.portfolio['date']):
-            self.portfolio['date'] = pd.to_datetime(self.portfolio['date'])
+        self.trades = trades_df.assign(entry_date=pd.to_datetime(trades_df['entry_date']),
+                                       exit_date=pd.to_datetime(trades_df['exit_date']))
+        self.portfolio = portfolio_df.assign(date=pd.to_datetime(portfolio_df['date']))
         
+        # 净值矩阵（单列），指标与多回测对比共用 backtest_metrics
+        self.navs = nav_matrix({'strategy': self.portfolio})
         self.metrics = {}
         
     def calculate_metrics(self) -> Dict:
         """计算所有指标"""
         logger.info("计算策略指标...")
         
-        # 基础统计
-        self.metrics['total_trades'] = len(self.trades)
-        self.metrics['winning_trades'] = (self.trades['net_pnl'] > 0).sum()
-        self.metrics['losing_trades'] = (self.trades['net_pnl'] < 0).sum()
-        self.metrics['win_rate'] = self.metrics['winning_trades'] / self.metrics['total_trades']
+        # 净值与交易笔数指标（初始净值 = 首日净值）
+        summary = compare_runs(self.navs, {'strategy': self.trades}).loc['strategy']
+        for key in ('total_trades', 'winning_trades', 'losing_trades'):
+            self.metrics[key] = int(summary[key])
+        for key in ('win_rate', 'profit_loss_ratio', 'total_return', 'max_drawdown', 'sharpe_ratio'):
+            self.metrics[key] = float(summary[key])
         
         # 收益统计
         self.metrics['total_pnl'] = self.trades['net_pnl'].sum()
@@ -94,25 +124,8 @@ class PerformanceAnalyzer:
         self.metrics['max_nav'] = self.portfolio['nav'].max()
         self.metrics['min_nav'] = self.portfolio['nav'].min()
         
-        # 收益率
-        self.metrics['total_return'] = (self.metrics['final_nav'] / self.metrics['init_nav']) - 1
-        
-        # 最大回撤
-        running_max = self.portfolio['nav'].cummax()
-        drawdown = (self.portfolio['nav'] / running_max) - 1
-        self.metrics['max_drawdown'] = drawdown.min()
-        
-        # 夏普比率（假设无风险利率=0，年化252个交易日）
-        self.portfolio['daily_return'] = self.portfolio['nav'].pct_change()
-        daily_returns = self.portfolio['daily_return'].dropna()
-        if len(daily_returns) > 0 and daily_returns.std() > 0:
-            self.metrics['sharpe_ratio'] = (daily_returns.mean() / daily_returns.std()) * np.sqrt(252)
-        else:
-            self.metrics['sharpe_ratio'] = 0
-        
         # 卖出原因统计
-        exit_reason_counts = self.trades['exit_reason'].value_counts()
-        self.metrics['exit_reasons'] = exit_reason_counts.to_dict()
+        self.metrics['exit_reasons'] = exit_reason_breakdown({'strategy': self.trades})['strategy'].to_dict()
         
         logger.info(f"指标计算完成: 总交易{self.metrics['total_trades']}笔, "
                    f"胜率{self.metrics['win_rate']:.2%}, "
@@ -159,6 +172,7 @@ class PerformanceAnalyzer:
         report_lines.append(f"| 盈利笔数 | {self.metrics['winning_trades']} |\n")
         report_lines.append(f"| 亏损笔数 | {self.metrics['losing_trades']} |\n")
         report_lines.append(f"| **胜率** | **{self.metrics['win_rate']:.2%}** |\n")
+        report_lines.append(f"| 盈亏比 | {self.metrics['profit_loss_ratio']:.2f} |\n")
         report_lines.append(f"| 平均收益率 | {self.metrics['avg_pnl_pct']:.2%} |\n")
         report_lines.append(f"| 中位数收益率 | {self.metrics['median_pnl_pct']:.2%} |\n")
         report_lines.append(f"| 最大单笔盈利 | {self.metrics['max_win']:,.2f} ({self.metrics['max_win_pct']:.2%}) |\n")
@@ -204,151 +218,242 @@ class PerformanceAnalyzer:
         
         logger.info(f"报告已保存: {output_path}")
     
-    def generate_charts(self, output_dir: str):
-        """生成图表"""
-        logger.info(f"生成图表...")
+    def chart_inputs(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """每张图表的输入数据（纯数组：可跨进程传递，也用于计算输入指纹）"""
+        hold_days = self.trades['hold_days'].value_counts().sort_index()
+        monthly = monthly_returns(self.navs)['strategy']
+        return {
+            'nav_curve': {
+                'dates': self.navs.index.to_numpy(dtype='datetime64[ns]'),
+                'nav': self.navs['strategy'].to_numpy(dtype=float),
+                'drawdown': drawdowns(self.navs)['strategy'].to_numpy(dtype=float),
+                'summary': np.array([self.metrics['init_nav'], self.metrics['total_return'],
+                                     self.metrics['max_drawdown']], dtype=float),
+            },
+            'pnl_distribution': {
+                'pnl_pct': self.trades['net_pnl_pct'].to_numpy(dtype=float) * 100,
+                'net_pnl': self.trades['net_pnl'].to_numpy(dtype=float),
+                'win_rate': np.array([self.metrics['win_rate']], dtype=float),
+            },
+            'hold_days': {
+                'days': hold_days.index.to_numpy(dtype=float),
+                'counts': hold_days.to_numpy(dtype=float),
+                'avg_hold_days': np.array([self.metrics['avg_hold_days']], dtype=float),
+            },
+            'monthly_returns': {
+                'months': monthly.index.to_numpy(dtype=str),
+                'returns': monthly.to_numpy(dtype=float) * 100,
+            },
+        }
+
+    def plan_charts(self, output_dir: str, dpi: int = DEFAULT_DPI, force: bool = False) -> List[ChartJob]:
+        """
+        需要重新绘制的图表
+
+        图表输入指纹（数据 + dpi + 绘图代码）与目录中 _charts.json 记录一致、
+        且图片存在时跳过。
+
+        Args:
+            output_dir: 图表目录
+            dpi: 分辨率
+            force: 忽略指纹，全部重绘
+
+        Returns:
+            待绘制任务列表
+        """
         output_dir = Path(output_dir)
-        output_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 1. 净值曲线
-        self._plot_nav_curve(output_dir / 'nav_curve.png')
-        
-        # 2. 收益分布
-        self._plot_pnl_distribution(output_dir / 'pnl_distribution.png')
-        
-        # 3. 持仓天数分布
-        self._plot_hold_days(output_dir / 'hold_days.png')
-        
-        # 4. 月度收益
-        self._plot_monthly_returns(output_dir / 'monthly_returns.png')
-        
-        logger.info(f"图表已保存: {output_dir}")
+        manifest = load_chart_manifest(output_dir)
+        jobs = []
+        for name, data in self.chart_inputs().items():
+            path = output_dir / f'{name}.png'
+            fingerprint = chart_fingerprint(name, data, dpi)
+            if not force and path.exists() and manifest.get(name) == fingerprint:
+                continue
+            jobs.append(ChartJob(name, data, str(path), dpi, fingerprint))
+        return jobs
+
+    def generate_charts(self, output_dir: str, dpi: int = DEFAULT_DPI, workers: int = 1,
+                        force: bool = False) -> int:
+        """生成图表（未变化的跳过，其余并行绘制），返回实际绘制的张数"""
+        logger.info(f"生成图表...")
+        jobs = self.plan_charts(output_dir, dpi, force)
+        render_charts(jobs, workers)
+        logger.info(f"图表已保存: {output_dir}（绘制{len(jobs)}张，"
+                    f"未变化跳过{len(CHART_RENDERERS) - len(jobs)}张）")
+        return len(jobs)
+
+
+def _plot_nav_curve(data: Dict[str, np.ndarray], output_path: str, dpi: int):
+    """绘制净值曲线"""
+    dates, nav, drawdown = data['dates'], data['nav'], data['drawdown']
+    init_nav, total_return, max_drawdown = data['summary']
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8), sharex=True)
     
-    def _plot_nav_curve(self, output_path: Path):
-        """绘制净值曲线"""
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8), sharex=True)
-        
-        # 净值曲线
-        ax1.plot(self.portfolio['date'], self.portfolio['nav'], 
-                linewidth=1.5, color='#2E86AB', label='净值')
-        ax1.axhline(y=self.metrics['init_nav'], color='gray', 
-                   linestyle='--', linewidth=0.8, label='初始净值')
-        ax1.fill_between(self.portfolio['date'], self.portfolio['nav'], 
-                         self.metrics['init_nav'], 
-                         where=(self.portfolio['nav'] >= self.metrics['init_nav']),
-                         alpha=0.3, color='green', interpolate=True)
-        ax1.fill_between(self.portfolio['date'], self.portfolio['nav'], 
-                         self.metrics['init_nav'],
-                         where=(self.portfolio['nav'] < self.metrics['init_nav']),
-                         alpha=0.3, color='red', interpolate=True)
-        ax1.set_ylabel('净值', fontsize=12)
-        ax1.set_title(f'净值曲线 (收益率: {self.metrics["total_return"]:.2%})', 
-                     fontsize=14, fontweight='bold')
-        ax1.legend(loc='best')
-        ax1.grid(True, alpha=0.3)
-        
-        # 回撤曲线
-        running_max = self.portfolio['nav'].cummax()
-        drawdown = (self.portfolio['nav'] / running_max) - 1
-        ax2.fill_between(self.portfolio['date'], drawdown * 100, 0, 
-                         color='#A23B72', alpha=0.6)
-        ax2.set_ylabel('回撤 (%)', fontsize=12)
-        ax2.set_xlabel('日期', fontsize=12)
-        ax2.set_title(f'回撤曲线 (最大回撤: {self.metrics["max_drawdown"]:.2%})', 
-                     fontsize=14, fontweight='bold')
-        ax2.grid(True, alpha=0.3)
-        
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
-        
-    def _plot_pnl_distribution(self, output_path: Path):
-        """绘制收益分布"""
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
-        
-        # 直方图
-        pnl_pct = self.trades['net_pnl_pct'] * 100
-        ax1.hist(pnl_pct, bins=50, color='#2E86AB', alpha=0.7, edgecolor='black')
-        ax1.axvline(x=pnl_pct.mean(), color='red', linestyle='--', 
-                   linewidth=2, label=f'均值: {pnl_pct.mean():.2f}%')
-        ax1.axvline(x=pnl_pct.median(), color='orange', linestyle='--', 
-                   linewidth=2, label=f'中位数: {pnl_pct.median():.2f}%')
-        ax1.set_xlabel('收益率 (%)', fontsize=12)
-        ax1.set_ylabel('交易笔数', fontsize=12)
-        ax1.set_title('收益率分布', fontsize=14, fontweight='bold')
-        ax1.legend()
-        ax1.grid(True, alpha=0.3)
-        
-        # 箱线图
-        box_data = [
-            pnl_pct[self.trades['net_pnl'] > 0],
-            pnl_pct[self.trades['net_pnl'] < 0]
-        ]
-        bp = ax2.boxplot(box_data, labels=['盈利', '亏损'], 
-                        patch_artist=True, widths=0.6)
-        bp['boxes'][0].set_facecolor('#90EE90')
-        bp['boxes'][1].set_facecolor('#FFB6C1')
-        ax2.set_ylabel('收益率 (%)', fontsize=12)
-        ax2.set_title(f'盈亏分布 (胜率: {self.metrics["win_rate"]:.2%})', 
-                     fontsize=14, fontweight='bold')
-        ax2.grid(True, alpha=0.3, axis='y')
-        
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
+    # 净值曲线
+    ax1.plot(dates, nav, linewidth=1.5, color='#2E86AB', label='净值')
+    ax1.axhline(y=init_nav, color='gray', linestyle='--', linewidth=0.8, label='初始净值')
+    ax1.fill_between(dates, nav, init_nav, where=(nav >= init_nav),
+                     alpha=0.3, color='green', interpolate=True)
+    ax1.fill_between(dates, nav, init_nav, where=(nav < init_nav),
+                     alpha=0.3, color='red', interpolate=True)
+    ax1.set_ylabel('净值', fontsize=12)
+    ax1.set_title(f'净值曲线 (收益率: {total_return:.2%})', fontsize=14, fontweight='bold')
+    ax1.legend(loc='best')
+    ax1.grid(True, alpha=0.3)
     
-    def _plot_hold_days(self, output_path: Path):
-        """绘制持仓天数分布"""
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        hold_days_counts = self.trades['hold_days'].value_counts().sort_index()
-        ax.bar(hold_days_counts.index, hold_days_counts.values, 
-              color='#2E86AB', alpha=0.7, edgecolor='black')
-        ax.axvline(x=self.metrics['avg_hold_days'], color='red', 
-                  linestyle='--', linewidth=2, 
-                  label=f'平均: {self.metrics["avg_hold_days"]:.1f}天')
-        ax.set_xlabel('持仓天数', fontsize=12)
-        ax.set_ylabel('交易笔数', fontsize=12)
-        ax.set_title('持仓天数分布', fontsize=14, fontweight='bold')
-        ax.legend()
-        ax.grid(True, alpha=0.3, axis='y')
-        
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
+    # 回撤曲线
+    ax2.fill_between(dates, drawdown * 100, 0, color='#A23B72', alpha=0.6)
+    ax2.set_ylabel('回撤 (%)', fontsize=12)
+    ax2.set_xlabel('日期', fontsize=12)
+    ax2.set_title(f'回撤曲线 (最大回撤: {max_drawdown:.2%})', fontsize=14, fontweight='bold')
+    ax2.grid(True, alpha=0.3)
     
-    def _plot_monthly_returns(self, output_path: Path):
-        """绘制月度收益"""
-        # 计算月度收益
-        portfolio_monthly = self.portfolio.copy()
-        portfolio_monthly['year_month'] = portfolio_monthly['date'].dt.to_period('M')
-        
-        monthly_stats = []
-        for ym, group in portfolio_monthly.groupby('year_month'):
-            start_nav = group['nav'].iloc[0]
-            end_nav = group['nav'].iloc[-1]
-            monthly_return = (end_nav / start_nav) - 1
-            monthly_stats.append({
-                'year_month': str(ym),
-                'return': monthly_return * 100
-            })
-        
-        monthly_df = pd.DataFrame(monthly_stats)
-        
-        fig, ax = plt.subplots(figsize=(14, 6))
-        colors = ['green' if r >= 0 else 'red' for r in monthly_df['return']]
-        ax.bar(range(len(monthly_df)), monthly_df['return'], 
-              color=colors, alpha=0.7, edgecolor='black')
-        ax.axhline(y=0, color='black', linewidth=0.8)
-        ax.set_xticks(range(len(monthly_df)))
-        ax.set_xticklabels(monthly_df['year_month'], rotation=45, ha='right')
-        ax.set_ylabel('收益率 (%)', fontsize=12)
-        ax.set_title('月度收益率', fontsize=14, fontweight='bold')
-        ax.grid(True, alpha=0.3, axis='y')
-        
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=150, bbox_inches='tight')
-        plt.close()
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+
+
+def _plot_pnl_distribution(data: Dict[str, np.ndarray], output_path: str, dpi: int):
+    """绘制收益分布"""
+    pnl_pct, net_pnl = data['pnl_pct'], data['net_pnl']
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
+    
+    # 直方图
+    mean, median = np.mean(pnl_pct), np.median(pnl_pct)
+    ax1.hist(pnl_pct, bins=50, color='#2E86AB', alpha=0.7, edgecolor='black')
+    ax1.axvline(x=mean, color='red', linestyle='--', linewidth=2, label=f'均值: {mean:.2f}%')
+    ax1.axvline(x=median, color='orange', linestyle='--', linewidth=2, label=f'中位数: {median:.2f}%')
+    ax1.set_xlabel('收益率 (%)', fontsize=12)
+    ax1.set_ylabel('交易笔数', fontsize=12)
+    ax1.set_title('收益率分布', fontsize=14, fontweight='bold')
+    ax1.legend()
+    ax1.grid(True, alpha=0.3)
+    
+    # 箱线图
+    box_data = [pnl_pct[net_pnl > 0], pnl_pct[net_pnl < 0]]
+    bp = ax2.boxplot(box_data, labels=['盈利', '亏损'], patch_artist=True, widths=0.6)
+    bp['boxes'][0].set_facecolor('#90EE90')
+    bp['boxes'][1].set_facecolor('#FFB6C1')
+    ax2.set_ylabel('收益率 (%)', fontsize=12)
+    ax2.set_title(f'盈亏分布 (胜率: {data["win_rate"][0]:.2%})', fontsize=14, fontweight='bold')
+    ax2.grid(True, alpha=0.3, axis='y')
+    
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+
+
+def _plot_hold_days(data: Dict[str, np.ndarray], output_path: str, dpi: int):
+    """绘制持仓天数分布"""
+    avg_hold_days = data['avg_hold_days'][0]
+    fig, ax = plt.subplots(figsize=(10, 6))
+    
+    ax.bar(data['days'], data['counts'], color='#2E86AB', alpha=0.7, edgecolor='black')
+    ax.axvline(x=avg_hold_days, color='red', linestyle='--', linewidth=2,
+               label=f'平均: {avg_hold_days:.1f}天')
+    ax.set_xlabel('持仓天数', fontsize=12)
+    ax.set_ylabel('交易笔数', fontsize=12)
+    ax.set_title('持仓天数分布', fontsize=14, fontweight='bold')
+    ax.legend()
+    ax.grid(True, alpha=0.3, axis='y')
+    
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+
+
+def _plot_monthly_returns(data: Dict[str, np.ndarray], output_path: str, dpi: int):
+    """绘制月度收益（月末净值对上月末净值）"""
+    months, returns = data['months'], data['returns']
+    fig, ax = plt.subplots(figsize=(14, 6))
+    colors = ['green' if r >= 0 else 'red' for r in returns]
+    ax.bar(range(len(months)), returns, color=colors, alpha=0.7, edgecolor='black')
+    ax.axhline(y=0, color='black', linewidth=0.8)
+    ax.set_xticks(range(len(months)))
+    ax.set_xticklabels(months, rotation=45, ha='right')
+    ax.set_ylabel('收益率 (%)', fontsize=12)
+    ax.set_title('月度收益率', fontsize=14, fontweight='bold')
+    ax.grid(True, alpha=0.3, axis='y')
+    
+    plt.tight_layout()
+    plt.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+
+
+CHART_RENDERERS = {
+    'nav_curve': _plot_nav_curve,
+    'pnl_distribution': _plot_pnl_distribution,
+    'hold_days': _plot_hold_days,
+    'monthly_returns': _plot_monthly_returns,
+}
+
+
+def chart_fingerprint(name: str, data: Dict[str, np.ndarray], dpi: int) -> str:
+    """图表输入指纹：图表名 + dpi + 本脚本源码 + 各输入数组的类型与内容"""
+    h = hashlib.sha1(f"{name}|{dpi}|{_SOURCE_HASH}".encode('utf-8'))
+    for key in sorted(data):
+        value = np.ascontiguousarray(data[key])
+        h.update(f"|{key}|{value.dtype}|{value.shape}|".encode('utf-8'))
+        h.update(value.tobytes())
+    return h.hexdigest()
+
+
+def load_chart_manifest(output_dir: Path) -> Dict[str, str]:
+    """图表目录中记录的 图表名 -> 输入指纹（不存在或损坏时为空）"""
+    path = Path(output_dir) / CHART_MANIFEST
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def render_chart(name: str, data: Dict[str, np.ndarray], output_path: str, dpi: int) -> str:
+    """绘制单张图表（进程池任务）"""
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    CHART_RENDERERS[name](data, output_path, dpi)
+    return output_path
+
+
+def render_charts(jobs: List[ChartJob], workers: int = 1):
+    """
+    绘制图表任务并更新各目录的指纹记录
+
+    workers > 1 时所有任务（可来自多份报告）提交到同一进程池，
+    总耗时取决于最慢的一张图而不是所有图之和。
+    """
+    if not jobs:
+        return
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            futures = [pool.submit(render_chart, job.name, job.data, job.path, job.dpi) for job in jobs]
+            for future in futures:
+                future.result()
+    else:
+        for job in jobs:
+            render_chart(job.name, job.data, job.path, job.dpi)
+
+    # 全部绘制成功后再记录指纹
+    by_dir: Dict[Path, List[ChartJob]] = {}
+    for job in jobs:
+        by_dir.setdefault(Path(job.path).parent, []).append(job)
+    for output_dir, dir_jobs in by_dir.items():
+        manifest = load_chart_manifest(output_dir)
+        manifest.update({job.name: job.fingerprint for job in dir_jobs})
+        (output_dir / CHART_MANIFEST).write_text(json.dumps(manifest, indent=2, sort_keys=True),
+                                                 encoding='utf-8')
+
+
+def config_dpi(config_path: Path) -> int:
+    """配置文件 report.charts.dpi（读取失败时用默认值）"""
+    try:
+        import yaml
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+        return int(config.get('report', {}).get('charts', {}).get('dpi', DEFAULT_DPI))
+    except (ImportError, OSError, ValueError, AttributeError, TypeError):
+        return DEFAULT_DPI
 
 
 def main():
@@ -360,56 +465,89 @@ def main():
     
     parser.add_argument(
         '--trades',
+        nargs='+',
         required=True,
-        help='交易明细parquet文件路径'
+        help='交易明细parquet文件路径（可传多个，与 --portfolio 一一对应）'
     )
     parser.add_argument(
         '--portfolio',
+        nargs='+',
         required=True,
         help='组合净值parquet文件路径'
     )
     parser.add_argument(
         '--output',
-        help='输出报告路径（Markdown）'
+        help='输出报告路径（Markdown；多份报告时为输出目录）'
     )
     parser.add_argument(
         '--charts-dir',
-        help='图表输出目录'
+        help='图表输出目录（多份报告时按组合文件名分子目录）'
+    )
+    parser.add_argument(
+        '--config',
+        default=None,
+        help='使用该配置文件的 report.charts.dpi 作为图表分辨率（如 config/backtest_base.yaml）'
+    )
+    parser.add_argument('--dpi', type=int, default=None, help=f'图表分辨率（默认 {DEFAULT_DPI}）')
+    parser.add_argument('--preview', action='store_true', help=f'预览模式：低分辨率（{PREVIEW_DPI} dpi）快速出图')
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help=f'绘图进程数（1 = 串行；默认待绘图表不少于{MIN_POOL_JOBS}张时用{DEFAULT_WORKERS}个进程，否则串行）'
     )
+    parser.add_argument('--force', action='store_true', help='忽略输入指纹，重绘全部图表')
     
     args = parser.parse_args()
-    
-    # 加载数据
-    logger.info(f"加载交易数据: {args.trades}")
-    trades_df = pd.read_parquet(args.trades)
-    logger.info(f"加载完成: {len(trades_df)}笔交易")
-    
-    logger.info(f"加载组合数据: {args.portfolio}")
-    portfolio_df = pd.read_parquet(args.portfolio)
-    logger.info(f"加载完成: {len(portfolio_df)}个交易日")
-    
-    # 初始化分析器
-    analyzer = PerformanceAnalyzer(trades_df, portfolio_df)
-    
-    # 计算指标
-    metrics = analyzer.calculate_metrics()
-    
-    # 生成报告
-    if args.output:
-        analyzer.generate_markdown_report(args.output)
+    if len(args.trades) != len(args.portfolio):
+        parser.error('--trades 与 --portfolio 数量必须一致')
+    if args.preview:
+        dpi = PREVIEW_DPI
+    elif args.dpi:
+        dpi = args.dpi
+    elif args.config:
+        dpi = config_dpi(Path(args.config))
     else:
-        # 默认路径
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        output_path = PROJECT_ROOT / 'data' / 'backtest' / 'reports' / f'report_{timestamp}.md'
+        dpi = DEFAULT_DPI
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    reports_dir = PROJECT_ROOT / 'data' / 'backtest' / 'reports'
+    multiple = len(args.trades) > 1
+    jobs = []
+    for trades_path, portfolio_path in zip(args.trades, args.portfolio):
+        # 加载数据
+        logger.info(f"加载交易数据: {trades_path}")
+        trades_df = pd.read_parquet(trades_path)
+        logger.info(f"加载完成: {len(trades_df)}笔交易")
+        
+        logger.info(f"加载组合数据: {portfolio_path}")
+        portfolio_df = pd.read_parquet(portfolio_path)
+        logger.info(f"加载完成: {len(portfolio_df)}个交易日")
+        
+        # 初始化分析器并计算指标
+        analyzer = PerformanceAnalyzer(trades_df, portfolio_df)
+        analyzer.calculate_metrics()
+        
+        # 生成报告（默认路径带时间戳；多份报告按组合文件名区分）
+        stem = Path(portfolio_path).stem.replace('_portfolio', '')
+        if multiple:
+            output_path = Path(args.output or reports_dir) / f'report_{stem}.md'
+            charts_dir = Path(args.charts_dir or reports_dir / 'charts') / stem
+        else:
+            output_path = args.output or reports_dir / f'report_{timestamp}.md'
+            charts_dir = args.charts_dir or reports_dir / 'charts'
         analyzer.generate_markdown_report(output_path)
+        
+        # 所有报告的待绘图表汇总后一起并行绘制
+        jobs.extend(analyzer.plan_charts(charts_dir, dpi, args.force))
     
-    # 生成图表
-    if args.charts_dir:
-        analyzer.generate_charts(args.charts_dir)
-    else:
-        # 默认路径
-        charts_dir = PROJECT_ROOT / 'data' / 'backtest' / 'reports' / 'charts'
-        analyzer.generate_charts(charts_dir)
+    n_total = len(args.trades) * len(CHART_RENDERERS)
+    workers = args.workers
+    if workers is None:
+        workers = DEFAULT_WORKERS if len(jobs) >= MIN_POOL_JOBS else 1
+    logger.info(f"绘制图表: {len(jobs)}/{n_total}张需要更新 (dpi={dpi}, workers={workers})")
+    render_charts(jobs, workers)
+    logger.info(f"图表生成完成，未变化跳过{n_total - len(jobs)}张")
 
 
 if __name__ == '__main__':
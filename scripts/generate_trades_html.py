@@ -8,66 +8,38 @@
 2. 按卖出日期排序计算资金余额
 3. 生成可排序的HTML表格（修复日期排序问题）
 4. 添加策略说明
+
+余额、统计与每行格式化均按列向量化计算，表格主体分块流式写出。
+基准测试：python scripts/generate_trades_html.py --benchmark 100000
+自检：python -m doctest scripts/generate_trades_html.py
 """
 
 import argparse
+import tempfile
+import time
 from pathlib import Path
+from typing import Dict, Iterator
+
+import numpy as np
 import pandas as pd
 
-def generate_html(csv_path: str, output_path: str, init_cash: float = 1_000_000):
-    """生成交易记录HTML页面"""
+NUMERIC_COLUMNS = [
+    "buy_cost",
+    "sell_proceed",
+    "net_pnl",
+    "net_pnl_pct",
+    "buy_price",
+    "sell_price",
+    "buy_shares",
+    "exit_rank",
+    "hold_days",
+]
+DATE_COLUMNS = ["signal_date", "entry_date", "exit_date"]
 
-    # 读取CSV，保留代码前导0。
-    df = pd.read_csv(csv_path, dtype={"code": str})
+# 表格行按块写出，避免整页字符串常驻内存
+ROW_CHUNK_SIZE = 5000
 
-    # 数值列统一转数值，便于后续计算与展示格式控制。
-    numeric_cols = [
-        "buy_cost",
-        "sell_proceed",
-        "net_pnl",
-        "net_pnl_pct",
-        "buy_price",
-        "sell_price",
-        "buy_shares",
-        "exit_rank",
-        "hold_days",
-    ]
-    for col in numeric_cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-    
-    # 确保日期列是datetime类型
-    df['signal_date'] = pd.to_datetime(df['signal_date'])
-    df['entry_date'] = pd.to_datetime(df['entry_date'])
-    df['exit_date'] = pd.to_datetime(df['exit_date'])
-    
-    # 按卖出日期排序，计算资金余额
-    df_sorted = df.sort_values('exit_date').reset_index(drop=True)
-    balance = init_cash
-    balances = []
-    for _, row in df_sorted.iterrows():
-        # 卖出后的余额 = 之前的余额 - 买入成本 + 卖出收入
-        balance = balance - row['buy_cost'] + row['sell_proceed']
-        balances.append(balance)
-    df_sorted['balance'] = balances
-    
-    # 按信号日期降序排列显示
-    df_display = df_sorted.sort_values('signal_date', ascending=False).reset_index(drop=True)
-    
-    # 统计
-    total = len(df_display)
-    wins = len(df_display[df_display['net_pnl'] > 0])
-    losses = len(df_display[df_display['net_pnl'] < 0])
-    win_rate = wins / total * 100 if total > 0 else 0
-    total_pnl = df_display['net_pnl'].sum()
-    avg_pnl_pct = df_display['net_pnl_pct'].mean() * 100
-    final_balance = df_display.iloc[0]['balance'] if len(df_display) > 0 else init_cash
-    
-    # 生成HTML
-    html_parts = []
-    
-    # Head
-    html_parts.append('''<!DOCTYPE html>
+PAGE_HEAD = '''<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
 <meta charset="UTF-8">
@@ -113,12 +85,9 @@ tr:hover { background: #f1f5f9; }
 <li><b>仓位管理</b>：初始资金100万，每笔交易使用1/3资金，最多同时持有3个仓位</li>
 </ul>
 </div>
-''')
-    
-    # Summary
-    pnl_class = "positive" if total_pnl >= 0 else "negative"
-    avg_class = "positive" if avg_pnl_pct >= 0 else "negative"
-    html_parts.append(f'''<div class="summary">
+'''
+
+SUMMARY_TEMPLATE = '''<div class="summary">
 <span>总交易: <b>{total}</b></span>
 <span>盈利: <b class="positive">{wins}</b></span>
 <span>亏损: <b class="negative">{losses}</b></span>
@@ -127,10 +96,9 @@ tr:hover { background: #f1f5f9; }
 <span>平均收益率: <b class="{avg_class}">{avg_pnl_pct:.2f}%</b></span>
 <span>最终余额: <b class="balance">{final_balance:,.2f}</b></span>
 </div>
-''')
-    
-    # Table header
-    html_parts.append('''<table id="tradesTable">
+'''
+
+TABLE_HEAD = '''<table id="tradesTable">
 <thead><tr>
 <th onclick="sortTable(this)">代码</th>
 <th onclick="sortTable(this)">名称</th>
@@ -150,63 +118,9 @@ tr:hover { background: #f1f5f9; }
 <th onclick="sortTable(this)">资金余额</th>
 </tr></thead>
 <tbody>
-''')
-
-    def format_code(v) -> str:
-        s = str(v).strip()
-        if s.endswith(".0"):
-            s = s[:-2]
-        return s.zfill(6) if s.isdigit() else s
-
-    # Table rows
-    for _, row in df_display.iterrows():
-        code = format_code(row["code"])
-        name = row['name']
-        signal_date = row['signal_date'].strftime('%Y-%m-%d')
-        signal_ts = int(row['signal_date'].timestamp())
-        entry_date = row['entry_date'].strftime('%Y-%m-%d')
-        entry_ts = int(row['entry_date'].timestamp())
-        exit_date = row['exit_date'].strftime('%Y-%m-%d')
-        exit_ts = int(row['exit_date'].timestamp())
-        
-        condition = "低开买" if row['entry_condition'] == 'gap_down_open' else "涨2%买"
-        buy_price = row['buy_price']
-        buy_shares = int(row['buy_shares'])
-        buy_cost = float(row['buy_cost'])
-        exit_rank = int(row['exit_rank'])
-        sell_price = row['sell_price']
-        sell_proceed = float(row['sell_proceed'])
-        hold_days = int(row['hold_days'])
-        net_pnl = row['net_pnl']
-        net_pnl_pct = row['net_pnl_pct'] * 100
-        balance = row['balance']
-        
-        pnl_class = "pnl-pos" if net_pnl >= 0 else "pnl-neg"
-        pnl_str = f"{net_pnl:,.2f}"
-        pnl_pct_str = f"{net_pnl_pct:.2f}%"
-        
-        html_parts.append(f'''<tr>
-<td>{code}</td>
-<td>{name}</td>
-<td data-sort="{signal_ts}">{signal_date}</td>
-<td data-sort="{entry_ts}">{entry_date}</td>
-<td>{condition}</td>
-<td>{buy_price:.2f}</td>
-<td>{buy_shares}</td>
-<td>{buy_cost:,.2f}</td>
-<td data-sort="{exit_ts}">{exit_date}</td>
-<td>{exit_rank}</td>
-<td>{sell_price:.2f}</td>
-<td>{sell_proceed:,.2f}</td>
-<td>{hold_days}</td>
-<td class="{pnl_class}">{pnl_str}</td>
-<td class="{pnl_class}">{pnl_pct_str}</td>
-<td class="balance">{balance:,.2f}</td>
-</tr>
-''')
-    
-    # Close table and add script
-    html_parts.append('''</tbody></table>
+'''
+
+PAGE_TAIL = '''</tbody></table>
 <script>
 let sortCol = -1, sortAsc = true;
 function sortTable(th) {
@@ -237,26 +151,234 @@ function sortTable(th) {
 </script>
 </body>
 </html>
-''')
-    
-    # Write output
+'''
+
+
+def load_trades(csv_path: str) -> pd.DataFrame:
+    """读取交易CSV：保留代码前导0，数值列转数值，日期列转datetime"""
+    df = pd.read_csv(csv_path, dtype={"code": str})
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col in DATE_COLUMNS:
+        df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def add_balance(df: pd.DataFrame, init_cash: float) -> pd.DataFrame:
+    """
+    按卖出日期累计资金余额
+
+    卖出后的余额 = 之前的余额 - 买入成本 + 卖出收入，即按卖出顺序对
+    (sell_proceed - buy_cost) 做累计和。
+
+    Returns:
+        按卖出日期排序、带 balance 列的新DataFrame
+    """
+    df_sorted = df.sort_values("exit_date", kind="stable").reset_index(drop=True)
+    flow = df_sorted["sell_proceed"].to_numpy(dtype=float) - df_sorted["buy_cost"].to_numpy(dtype=float)
+    df_sorted["balance"] = init_cash + np.cumsum(flow)
+    return df_sorted
+
+
+def trade_stats(df: pd.DataFrame, init_cash: float) -> Dict[str, float]:
+    """
+    汇总统计（df 为 add_balance() 的结果）
+
+    最终余额是最后一笔卖出后的余额。下例中信号较晚的交易先卖出（亏1000），
+    信号较早的交易后卖出（赚1000），最终余额为 100000 而不是信号最晚那一行的 99000：
+
+    >>> trades = pd.DataFrame({
+    ...     "signal_date": pd.to_datetime(["2025-01-02", "2025-01-03"]),
+    ...     "exit_date": pd.to_datetime(["2025-01-10", "2025-01-06"]),
+    ...     "buy_cost": [10000.0, 20000.0],
+    ...     "sell_proceed": [11000.0, 19000.0],
+    ...     "net_pnl": [1000.0, -1000.0],
+    ...     "net_pnl_pct": [0.1, -0.05],
+    ... })
+    >>> df = add_balance(trades, 100000.0)
+    >>> df["balance"].tolist()
+    [99000.0, 100000.0]
+    >>> stats = trade_stats(df, 100000.0)
+    >>> stats["final_balance"], stats["wins"], stats["losses"], stats["win_rate"]
+    (100000.0, 1, 1, 50.0)
+    """
+    pnl = df["net_pnl"].to_numpy(dtype=float)
+    total = len(pnl)
+    wins = int(np.count_nonzero(pnl > 0))
+    losses = int(np.count_nonzero(pnl < 0))
+    return {
+        "total": total,
+        "wins": wins,
+        "losses": losses,
+        "win_rate": wins / total * 100 if total > 0 else 0,
+        "total_pnl": float(np.nansum(pnl)),
+        "avg_pnl_pct": float(df["net_pnl_pct"].mean() * 100),
+        # 最后一笔卖出后的余额
+        "final_balance": float(df["balance"].iloc[-1]) if total > 0 else init_cash,
+    }
+
+
+def format_code(codes: pd.Series) -> pd.Series:
+    """代码列：去掉 ".0" 后缀，纯数字补足6位"""
+    s = codes.astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+    return s.where(~s.str.isdigit(), s.str.zfill(6))
+
+
+def _fmt(values: pd.Series, spec: str) -> pd.Series:
+    return values.map(spec.format)
+
+
+def _epoch_seconds(dates: pd.Series) -> pd.Series:
+    return (dates.to_numpy(dtype="datetime64[s]").astype(np.int64)).astype(str)
+
+
+def format_rows(df: pd.DataFrame) -> pd.Series:
+    """
+    每笔交易一行 <tr>（按列格式化后拼接，不逐行循环）
+
+    Args:
+        df: 按显示顺序排列、带 balance 列的交易
+
+    Returns:
+        与 df 行对齐的HTML行字符串
+    """
+    pnl_class = pd.Series(np.where(df["net_pnl"].to_numpy(dtype=float) >= 0, "pnl-pos", "pnl-neg"), index=df.index)
+    condition = pd.Series(np.where(df["entry_condition"] == "gap_down_open", "低开买", "涨2%买"), index=df.index)
+    cells = [
+        ("<tr>\n<td>", format_code(df["code"])),
+        ("</td>\n<td>", df["name"].astype(str)),
+        ("</td>\n<td data-sort=\"", _epoch_seconds(df["signal_date"])),
+        ("\">", df["signal_date"].dt.strftime("%Y-%m-%d")),
+        ("</td>\n<td data-sort=\"", _epoch_seconds(df["entry_date"])),
+        ("\">", df["entry_date"].dt.strftime("%Y-%m-%d")),
+        ("</td>\n<td>", condition),
+        ("</td>\n<td>", _fmt(df["buy_price"], "{:.2f}")),
+        ("</td>\n<td>", df["buy_shares"].astype(np.int64).astype(str)),
+        ("</td>\n<td>", _fmt(df["buy_cost"], "{:,.2f}")),
+        ("</td>\n<td data-sort=\"", _epoch_seconds(df["exit_date"])),
+        ("\">", df["exit_date"].dt.strftime("%Y-%m-%d")),
+        ("</td>\n<td>", df["exit_rank"].astype(np.int64).astype(str)),
+        ("</td>\n<td>", _fmt(df["sell_price"], "{:.2f}")),
+        ("</td>\n<td>", _fmt(df["sell_proceed"], "{:,.2f}")),
+        ("</td>\n<td>", df["hold_days"].astype(np.int64).astype(str)),
+        ("</td>\n<td class=\"", pnl_class),
+        ("\">", _fmt(df["net_pnl"], "{:,.2f}")),
+        ("</td>\n<td class=\"", pnl_class),
+        ("\">", _fmt(df["net_pnl_pct"] * 100, "{:.2f}%")),
+        ("</td>\n<td class=\"balance\">", _fmt(df["balance"], "{:,.2f}")),
+    ]
+    rows = pd.Series("", index=df.index)
+    for prefix, values in cells:
+        rows = rows + prefix + values
+    return rows + "</td>\n</tr>\n"
+
+
+def iter_table_body(df: pd.DataFrame, chunk_size: int = ROW_CHUNK_SIZE) -> Iterator[str]:
+    """表格主体按 chunk_size 行一块生成"""
+    for start in range(0, len(df), chunk_size):
+        yield "".join(format_rows(df.iloc[start:start + chunk_size]).tolist())
+
+
+def generate_html(csv_path: str, output_path: str, init_cash: float = 1_000_000) -> Dict[str, float]:
+    """生成交易记录HTML页面，返回汇总统计"""
+    df_sorted = add_balance(load_trades(csv_path), init_cash)
+    stats = trade_stats(df_sorted, init_cash)
+
+    # 按信号日期降序排列显示
+    df_display = df_sorted.sort_values("signal_date", ascending=False, kind="stable").reset_index(drop=True)
+
+    summary = SUMMARY_TEMPLATE.format(
+        pnl_class="positive" if stats["total_pnl"] >= 0 else "negative",
+        avg_class="positive" if stats["avg_pnl_pct"] >= 0 else "negative",
+        **stats,
+    )
+
+    # 流式写出：页头、汇总、表头，然后逐块写表格行
     output = Path(output_path)
     output.parent.mkdir(parents=True, exist_ok=True)
-    with open(output, 'w', encoding='utf-8') as f:
-        f.write(''.join(html_parts))
-    
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(PAGE_HEAD)
+        f.write(summary)
+        f.write(TABLE_HEAD)
+        for chunk in iter_table_body(df_display):
+            f.write(chunk)
+        f.write(PAGE_TAIL)
+
     print(f"Generated: {output}")
-    print(f"Total trades: {total}, Wins: {wins}, Losses: {losses}, Win rate: {win_rate:.1f}%")
-    print(f"Total PnL: {total_pnl:,.2f}, Avg PnL%: {avg_pnl_pct:.2f}%, Final balance: {final_balance:,.2f}")
+    print(f"Total trades: {stats['total']}, Wins: {stats['wins']}, Losses: {stats['losses']}, "
+          f"Win rate: {stats['win_rate']:.1f}%")
+    print(f"Total PnL: {stats['total_pnl']:,.2f}, Avg PnL%: {stats['avg_pnl_pct']:.2f}%, "
+          f"Final balance: {stats['final_balance']:,.2f}")
+    return stats
+
+
+def synthetic_trades(n: int, seed: int = 0) -> pd.DataFrame:
+    """n 笔随机交易（列与回测导出的交易CSV一致），用于基准测试"""
+    rng = np.random.default_rng(seed)
+    signal = pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 1500, n), unit="D")
+    hold_days = rng.integers(1, 20, n)
+    buy_price = np.round(rng.uniform(3, 100, n), 2)
+    sell_price = np.round(buy_price * (1 + rng.normal(0, 0.06, n)), 2)
+    buy_shares = rng.integers(1, 100, n) * 100
+    buy_cost = buy_price * buy_shares
+    sell_proceed = sell_price * buy_shares
+    return pd.DataFrame({
+        "code": rng.integers(1, 700000, n).astype(str),
+        "name": np.char.add("股票", rng.integers(0, 5000, n).astype(str)),
+        "signal_date": signal,
+        "entry_date": signal + pd.Timedelta(days=1),
+        "exit_date": signal + pd.to_timedelta(hold_days + 1, unit="D"),
+        "entry_condition": np.where(rng.random(n) < 0.5, "gap_down_open", "rise_trigger"),
+        "buy_price": buy_price,
+        "buy_shares": buy_shares,
+        "buy_cost": buy_cost,
+        "exit_rank": rng.integers(51, 500, n),
+        "sell_price": sell_price,
+        "sell_proceed": sell_proceed,
+        "hold_days": hold_days,
+        "net_pnl": sell_proceed - buy_cost,
+        "net_pnl_pct": sell_proceed / buy_cost - 1,
+    })
+
+
+def run_benchmark(n: int, init_cash: float) -> None:
+    """在 n 笔合成交易上计时：读取+余额+统计、行格式化、完整页面生成"""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "trades.csv"
+        synthetic_trades(n).to_csv(csv_path, index=False)
+
+        t0 = time.perf_counter()
+        df_sorted = add_balance(load_trades(str(csv_path)), init_cash)
+        trade_stats(df_sorted, init_cash)
+        t1 = time.perf_counter()
+        for _ in iter_table_body(df_sorted):
+            pass
+        t2 = time.perf_counter()
+        generate_html(str(csv_path), str(Path(tmp) / "trades.html"), init_cash)
+        t3 = time.perf_counter()
+        size_mb = (Path(tmp) / "trades.html").stat().st_size / 1024 / 1024
+
+    print(f"benchmark: {n:,} trades")
+    print(f"  load + balance + stats  {t1 - t0:8.3f}s")
+    print(f"  format rows             {t2 - t1:8.3f}s ({n / max(t2 - t1, 1e-9):,.0f} rows/s)")
+    print(f"  full page               {t3 - t2:8.3f}s ({size_mb:.1f} MB)")
 
 
 def main():
     parser = argparse.ArgumentParser(description="Generate trades HTML report")
-    parser.add_argument("--csv", required=True, help="Input CSV file path")
-    parser.add_argument("--output", required=True, help="Output HTML file path")
+    parser.add_argument("--csv", help="Input CSV file path")
+    parser.add_argument("--output", help="Output HTML file path")
     parser.add_argument("--init-cash", type=float, default=1_000_000, help="Initial cash (default: 1000000)")
+    parser.add_argument("--benchmark", type=int, default=None, metavar="N",
+                        help="Time the generator on N synthetic trades (e.g. 100000) instead of a CSV")
     args = parser.parse_args()
-    
+
+    if args.benchmark:
+        run_benchmark(args.benchmark, args.init_cash)
+        return
+    if not args.csv or not args.output:
+        parser.error("--csv and --output are required")
     generate_html(args.csv, args.output, args.init_cash)
 
 
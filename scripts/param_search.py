@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Successive-halving parameter search over the `search_space` declared in a strategy YAML.
+
+All configs are first run on a short window ending at the last trading day.
+Only the best 1/eta by the chosen metric are promoted to a window eta times
+longer. The last rung covers the whole calendar.
+
+Example:
+    python scripts/param_search.py --strategy top20_newentry --min-days 40 --eta 3 --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import math
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pandas as pd
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from backtest_metrics import SELECTION_METRICS  # noqa: E402
+from backtest_worker import evaluate_params, expand_space, init_worker, parse_grid  # noqa: E402
+from day_context import trading_dates  # noqa: E402
+from strategy_registry import STRATEGIES, load_config  # noqa: E402
+
+logger = logging.getLogger("param_search")
+
+
+def rung_lengths(n_days: int, min_days: int, eta: int) -> List[int]:
+    """各轮窗口长度（交易日数），最后一轮为全部交易日"""
+    lengths = []
+    length = min_days
+    while length < n_days:
+        lengths.append(length)
+        length *= eta
+    lengths.append(n_days)
+    return lengths
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="逐级减半参数搜索",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--strategy", required=True, choices=list(STRATEGIES), help="策略key")
+    parser.add_argument("--config", default=None, help="策略配置文件（默认使用注册表中的配置）")
+    parser.add_argument("--features", default="data/processed/features/daily_features_v1.parquet", help="特征数据路径")
+    parser.add_argument("--grid", action="append", default=[], metavar="PARAM=V1,V2",
+                        help="覆盖配置中的 search_space，可重复")
+    parser.add_argument("--metric", choices=SELECTION_METRICS, default="sharpe_ratio", help="淘汰指标")
+    parser.add_argument("--eta", type=int, default=3, help="每轮保留 1/eta，窗口放大 eta 倍")
+    parser.add_argument("--min-days", type=int, default=40, help="第一轮窗口交易日数")
+    parser.add_argument("--start-date", default=None, help="日历开始日期")
+    parser.add_argument("--end-date", default=None, help="日历结束日期（各轮窗口均以此为终点）")
+    parser.add_argument("--max-configs", type=int, default=None, help="组合过多时随机抽样的数量")
+    parser.add_argument("--seed", type=int, default=42, help="随机抽样种子")
+    parser.add_argument("--workers", type=int, default=1, help="并行进程数")
+    parser.add_argument("--no-cache", action="store_true", help="不读写结果缓存")
+    parser.add_argument("--output", default="data/backtest/param_search", help="输出目录")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    # 回测引擎的日志在工作进程中降为 WARNING，本脚本的进度日志保持 INFO
+    logger.setLevel(logging.INFO)
+    if args.eta < 2:
+        parser.error("--eta 至少为2")
+
+    base_config = load_config(args.strategy, args.config)
+    try:
+        candidates = parse_grid(args.grid) if args.grid else expand_space(base_config.get("search_space") or {})
+    except ValueError as e:
+        parser.error(str(e))
+    if candidates == [{}]:
+        parser.error("没有可搜索的参数：请在策略配置中声明 search_space 或使用 --grid")
+    if args.max_configs and len(candidates) > args.max_configs:
+        candidates = random.Random(args.seed).sample(candidates, args.max_configs)
+
+    dates = trading_dates(pd.read_parquet(args.features, columns=["date"]).assign(
+        date=lambda df: pd.to_datetime(df["date"])))
+    if args.start_date:
+        dates = [d for d in dates if d >= pd.Timestamp(args.start_date)]
+    if args.end_date:
+        dates = [d for d in dates if d <= pd.Timestamp(args.end_date)]
+    if len(dates) < 2:
+        logger.error("交易日数量不足，无法搜索")
+        return 1
+
+    lengths = rung_lengths(len(dates), min(args.min_days, len(dates)), args.eta)
+    logger.info("%s: %d组参数，%d轮窗口 %s 交易日，淘汰指标 %s",
+                args.strategy, len(candidates), len(lengths), lengths, args.metric)
+
+    init_args = (args.strategy, base_config, args.features, not args.no_cache)
+    pool = None
+    if args.workers > 1:
+        pool = ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=init_args)
+    else:
+        init_worker(*init_args)
+
+    rows: List[Dict[str, Any]] = []
+    survivors = list(range(len(candidates)))
+    rung = 0
+    try:
+        while True:
+            length = lengths[rung]
+            start, end = dates[-length], dates[-1]
+            if pool:
+                futures = [pool.submit(evaluate_params, base_config, candidates[i], start, end) for i in survivors]
+                summaries = [f.result() for f in futures]
+            else:
+                summaries = [evaluate_params(base_config, candidates[i], start, end) for i in survivors]
+
+            ranked = sorted(zip(survivors, summaries), key=lambda x: x[1][args.metric], reverse=True)
+            for place, (i, summary) in enumerate(ranked):
+                rows.append({"rung": rung, "start_date": start, "end_date": end, "n_days": length,
+                             "config_id": i, "place": place, **candidates[i], **summary})
+            best_i, best = ranked[0]
+            logger.info("第%d轮 %s~%s（%d日）: %d组，最优 #%d %s=%.3f 收益%.2f%%",
+                        rung, start.date(), end.date(), length, len(ranked),
+                        best_i, args.metric, best[args.metric], best["total_return"] * 100)
+
+            if rung == len(lengths) - 1:
+                break
+            keep = max(1, math.ceil(len(ranked) / args.eta))
+            survivors = [i for i, _ in ranked[:keep]]
+            # 只剩一组时直接用全部交易日评估
+            rung = len(lengths) - 1 if len(survivors) == 1 else rung + 1
+    finally:
+        if pool:
+            pool.shutdown()
+
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    prefix = output_dir / f"{args.strategy}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    pd.DataFrame(rows).to_csv(f"{prefix}_rungs.csv", index=False, encoding="utf-8-sig")
+    with open(f"{prefix}_best.yaml", "w", encoding="utf-8") as f:
+        yaml.safe_dump({"params": candidates[best_i], "search": {
+            "metric": args.metric, "value": float(best[args.metric]),
+            "start_date": str(start.date()), "end_date": str(end.date()),
+        }}, f, allow_unicode=True, sort_keys=False)
+
+    logger.info("最优参数: %s", candidates[best_i])
+    logger.info("结果已保存: %s_rungs.csv / %s_best.yaml", prefix, prefix)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -30,12 +30,20 @@ from pathlib import Path
 from typing import Dict, Optional
 
 import duckdb
+import numpy as np
 import pandas as pd
 import yaml
 
 # 添加项目根目录到路径
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'src'))
+
+from feature_store import (compact_features, dataset_is_current, load_features, read_dataset_manifest,
+                           widen_frame, write_feature_dataset)
+from hot_rank_index import HotRankIndex, index_path
+from security_master import (BSE, GEM, MAIN, ST_LIMIT_PCT, STAR, SecurityMaster, board_limit_pcts,
+                             classify_code, limit_pcts_of, resolve_master_dir)
 
 # 配置日志
 logging.basicConfig(
@@ -49,6 +57,25 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# 增量模式下每只股票在已保存日期之前需加载的行数：
+# 新首日的 max_drop_5d 取前5行的 intraday_drop，其中最早一行还需要它自己的 close_prev
+WARMUP_ROWS = 6
+
+# 输出列（save_features 与 verify_incremental 共用）
+FEATURE_COLUMNS = [
+    'date', 'code', 'name',
+    'open', 'high', 'low', 'close', 'volume', 'amount', 'turnover',
+    'close_prev', 'amount_prev', 'turnover_prev',
+    'hot_rank', 'hot_rank_prev',
+    'limit_up_price', 'limit_down_price',
+    'is_limit_up', 'is_limit_down',
+    'is_st', 'is_tradable', 'is_new_ipo',
+    'days_since_listing',
+    'amplitude_prev', 'pct_change_prev',
+    'intraday_drop', 'max_drop_5d', 'cum_return_2d', 'one_word_board_5d'
+]
+
+
 class LimitPriceCalculator:
     """涨跌停价格计算器"""
     
@@ -60,11 +87,13 @@ class LimitPriceCalculator:
             config: 涨跌停规则配置
         """
         self.rules = config.get('limit_up_rules', {})
-        self.main_board = self.rules.get('main_board', 0.10)
-        self.gem_board = self.rules.get('gem_board', 0.20)
-        self.star_board = self.rules.get('star_board', 0.20)
-        self.bse_board = self.rules.get('bse_board', 0.30)
-        self.st_stock = self.rules.get('st_stock', 0.05)
+        # 板块默认涨跌幅及覆盖规则统一由证券主表处理
+        self.board_pcts = board_limit_pcts(self.rules)
+        self.main_board = self.board_pcts[MAIN]
+        self.gem_board = self.board_pcts[GEM]
+        self.star_board = self.board_pcts[STAR]
+        self.bse_board = self.board_pcts[BSE]
+        self.st_stock = self.rules.get('st_stock', ST_LIMIT_PCT)
         self.precision = self.rules.get('price_precision', 0.01)
         
         logger.info(f"Limit price rules loaded: main={self.main_board}, gem={self.gem_board}, "
@@ -84,20 +113,8 @@ class LimitPriceCalculator:
         if is_st:
             return self.st_stock
         
-        # 科创板（688/689开头）
-        if code.startswith('688') or code.startswith('689'):
-            return self.star_board
-        
-        # 创业板（300/301开头）
-        if code.startswith('300') or code.startswith('301'):
-            return self.gem_board
-        
-        # 北交所（8/4开头）
-        if code.startswith('8') or code.startswith('4'):
-            return self.bse_board
-        
-        # 主板/中小板（默认）
-        return self.main_board
+        # 板块由证券主表判断（科创板688/689、创业板30x、北交所8/4/920、其余主板）
+        return self.board_pcts[classify_code(code).board]
     
     def calc_limit_up_price(self, prev_close: float, code: str, is_st: bool = False) -> float:
         """计算涨停价"""
@@ -110,6 +127,24 @@ class LimitPriceCalculator:
         limit_pct = self.get_limit_pct(code, is_st)
         limit_price = prev_close * (1 - limit_pct)
         return round(limit_price / self.precision) * self.precision
+    
+    def calc_limit_prices(self, prev_close: pd.Series, codes: pd.Series, is_st: pd.Series):
+        """
+        向量化计算涨停价、跌停价（每个代码只判断一次板块）
+        
+        Args:
+            prev_close: 前收盘价
+            codes: 股票代码
+            is_st: 是否ST股票
+            
+        Returns:
+            (涨停价数组, 跌停价数组)，前收盘价缺失时为NaN
+        """
+        limit_pct = limit_pcts_of(codes, is_st.to_numpy(dtype=bool), self.rules)
+        prev_close = prev_close.to_numpy(dtype=float)
+        limit_up = np.round(prev_close * (1 + limit_pct) / self.precision) * self.precision
+        limit_down = np.round(prev_close * (1 - limit_pct) / self.precision) * self.precision
+        return limit_up, limit_down
 
 
 class FeatureEngineer:
@@ -138,6 +173,13 @@ class FeatureEngineer:
         backtest_config = self._load_backtest_config()
         self.limit_calculator = LimitPriceCalculator(backtest_config)
         
+        # 证券主表（上市日期、名称/ST历史，由 scripts/update_security_master.py 维护）
+        master_dir = resolve_master_dir(PROJECT_ROOT, self.config['data'])
+        self.security_master = SecurityMaster.load(master_dir)
+        if len(self.security_master) == 0:
+            logger.warning(f"Security master not found in {master_dir}: "
+                           f"is_st falls back to names, days_since_listing to rows in the lake")
+        
         # Manifest路径
         self.manifest_path = self.features_dir / 'manifest.json'
         self.manifest = self._load_manifest()
@@ -190,24 +232,10 @@ class FeatureEngineer:
             json.dump(self.manifest, f, indent=2, ensure_ascii=False)
         logger.info(f"Manifest saved: {self.manifest_path}")
     
-    def load_raw_data(self, start_date: Optional[str] = None, 
-                     end_date: Optional[str] = None) -> pd.DataFrame:
-        """
-        从Parquet数据湖加载原始数据
-        
-        Args:
-            start_date: 开始日期（YYYY-MM-DD）
-            end_date: 结束日期（YYYY-MM-DD）
-            
-        Returns:
-            原始数据DataFrame
-        """
-        logger.info("Loading raw data from Parquet...")
-        
-        # 构建查询SQL
+    def _lake_sql(self) -> str:
+        """原始数据湖中特征计算所需的列"""
         parquet_path = str(self.raw_dir / '**/*.parquet').replace('\\', '/')
-        
-        sql = f"""
+        return f"""
         SELECT 
             date,
             code,
@@ -222,19 +250,76 @@ class FeatureEngineer:
             hot_rank
         FROM read_parquet('{parquet_path}', hive_partitioning=true)
         """
+    
+    def load_trading_calendar(self, end_date: Optional[str] = None) -> np.ndarray:
+        """
+        数据湖的全部交易日（截至 end_date），与加载窗口无关，
+        使增量运行与全量重建的上市天数一致
+        """
+        sql = f"SELECT DISTINCT date FROM ({self._lake_sql()})"
+        if end_date:
+            sql += f" WHERE date <= '{end_date}'"
+        dates = self.con.execute(sql + " ORDER BY date").df()['date']
+        return pd.to_datetime(dates).to_numpy(dtype='datetime64[D]')
+    
+    def load_raw_data(self, start_date: Optional[str] = None, 
+                     end_date: Optional[str] = None,
+                     after_date: Optional[str] = None) -> pd.DataFrame:
+        """
+        从Parquet数据湖加载原始数据
         
-        if start_date or end_date:
-            conditions = []
-            if start_date:
-                conditions.append(f"date >= '{start_date}'")
-            if end_date:
-                conditions.append(f"date <= '{end_date}'")
-            sql += " WHERE " + " AND ".join(conditions)
+        Args:
+            start_date: 开始日期（YYYY-MM-DD）
+            end_date: 结束日期（YYYY-MM-DD）
+            after_date: 增量模式的已保存截止日：加载该日之后的行，
+                        外加每只股票截至该日的最后 WARMUP_ROWS 行作为前值预热
+                        （此时忽略 start_date）
+            
+        Returns:
+            原始数据DataFrame，history_rows 列为每只股票在已加载行之前的行数
+        """
+        logger.info("Loading raw data from Parquet...")
         
-        sql += " ORDER BY code, date"
+        if after_date:
+            # 前值/滚动特征按股票自身的前几行计算（停牌股的前几行可能远早于截止日），
+            # 因此按股票取最后 WARMUP_ROWS 行，而不是按日历回退固定天数
+            upper = f" AND date <= '{end_date}'" if end_date else ""
+            sql = f"""
+            WITH lake AS ({self._lake_sql()}),
+            history AS (
+                SELECT *,
+                    row_number() OVER (PARTITION BY code ORDER BY date DESC) AS _rn,
+                    count(*) OVER (PARTITION BY code) AS _n
+                FROM lake
+                WHERE date <= '{after_date}'
+            )
+            SELECT date, code, name, open, high, low, close, volume, amount, turnover, hot_rank,
+                _n - least(_n, {WARMUP_ROWS}) AS history_rows
+            FROM history
+            WHERE _rn <= {WARMUP_ROWS}
+            UNION ALL
+            SELECT *, NULL AS history_rows
+            FROM lake
+            WHERE date > '{after_date}'{upper}
+            ORDER BY code, date
+            """
+        else:
+            sql = self._lake_sql()
+            if start_date or end_date:
+                conditions = []
+                if start_date:
+                    conditions.append(f"date >= '{start_date}'")
+                if end_date:
+                    conditions.append(f"date <= '{end_date}'")
+                sql += " WHERE " + " AND ".join(conditions)
+            sql += " ORDER BY code, date"
         
         logger.info(f"Executing DuckDB query...")
         df = self.con.execute(sql).df()
+        if after_date:
+            df['history_rows'] = df.groupby('code')['history_rows'].transform('max').fillna(0).astype(int)
+        else:
+            df['history_rows'] = 0
         
         logger.info(f"Loaded {len(df):,} rows, {df['code'].nunique()} unique stocks")
         logger.info(f"Date range: {df['date'].min()} to {df['date'].max()}")
@@ -277,22 +362,12 @@ class FeatureEngineer:
         """
         logger.info("Calculating limit up/down prices...")
         
-        # 判断是否ST股票
-        df['is_st'] = df['name'].str.contains('ST|退', na=False, regex=True)
-        
-        # 计算涨停价和跌停价
-        df['limit_up_price'] = df.apply(
-            lambda row: self.limit_calculator.calc_limit_up_price(
-                row['close_prev'], row['code'], row['is_st']
-            ) if pd.notna(row['close_prev']) else None,
-            axis=1
-        )
+        # 判断是否ST股票（按名称历史区间关联；主表未覆盖的行按当行名称判断）
+        df['is_st'] = self.security_master.st_flags(df['code'], df['date'], fallback_names=df['name'])
         
-        df['limit_down_price'] = df.apply(
-            lambda row: self.limit_calculator.calc_limit_down_price(
-                row['close_prev'], row['code'], row['is_st']
-            ) if pd.notna(row['close_prev']) else None,
-            axis=1
+        # 计算涨停价和跌停价（向量化，与逐行 calc_limit_up_price/calc_limit_down_price 结果一致）
+        df['limit_up_price'], df['limit_down_price'] = self.limit_calculator.calc_limit_prices(
+            df['close_prev'], df['code'], df['is_st']
         )
         
         # 判断是否涨停/跌停
@@ -314,12 +389,13 @@ class FeatureEngineer:
         
         return df
     
-    def add_trading_flags(self, df: pd.DataFrame) -> pd.DataFrame:
+    def add_trading_flags(self, df: pd.DataFrame, calendar: Optional[np.ndarray] = None) -> pd.DataFrame:
         """
         添加交易标记
         
         Args:
             df: DataFrame
+            calendar: 交易日历（计算上市天数用；None 时使用 df 自身的日期）
             
         Returns:
             包含交易标记的DataFrame
@@ -329,8 +405,12 @@ class FeatureEngineer:
         # 是否可交易（成交量>0）
         df['is_tradable'] = df['volume'] > 0
         
-        # 是否新股（上市天数）
-        df['days_since_listing'] = df.groupby('code').cumcount() + 1
+        # 是否新股（上市交易日数，按证券主表的上市日期；无上市日期的代码按数据湖中的行数）
+        days_since_listing = self.security_master.days_since_listing(df['code'], df['date'], calendar)
+        rows_so_far = df.groupby('code').cumcount() + 1 + df['history_rows']
+        df['days_since_listing'] = np.where(
+            np.isnan(days_since_listing), rows_so_far, days_since_listing
+        ).astype(int)
         df['is_new_ipo'] = df['days_since_listing'] <= 60
         
         # 计算T-1日振幅和跌幅（用于过滤极端波动）
@@ -389,62 +469,133 @@ class FeatureEngineer:
         
         return df
     
-    def save_features(self, df: pd.DataFrame, version: str = 'v1'):
+    def save_features(self, df: pd.DataFrame, version: str = 'v1', after_date: Optional[str] = None):
         """
-        保存特征数据
+        保存特征数据（按年/月分区的Parquet数据集，只重写内容有变化的分区）
         
         Args:
             df: 特征DataFrame
             version: 版本号
+            after_date: 只写入该日期之后的行（增量模式下起始日已保存，仅用于计算前值）
         """
-        output_file = self.features_dir / f'daily_features_{version}.parquet'
-        
-        logger.info(f"Saving features to {output_file}...")
-        
-        # 选择最终列
-        columns = [
-            'date', 'code', 'name',
-            'open', 'high', 'low', 'close', 'volume', 'amount', 'turnover',
-            'close_prev', 'amount_prev', 'turnover_prev',
-            'hot_rank', 'hot_rank_prev',
-            'limit_up_price', 'limit_down_price',
-            'is_limit_up', 'is_limit_down',
-            'is_st', 'is_tradable', 'is_new_ipo',
-            'days_since_listing',
-            'amplitude_prev', 'pct_change_prev',
-            'intraday_drop', 'max_drop_5d', 'cum_return_2d', 'one_word_board_5d'
-        ]
-        
-        df_output = df[columns].copy()
-        
-        # 保存为Parquet
-        df_output.to_parquet(
-            output_file,
-            engine='pyarrow',
-            compression='snappy',
-            index=False
+        output_dir = self.features_dir / f'daily_features_{version}.parquet'
+        
+        logger.info(f"Saving features to {output_dir}/ ...")
+        
+        df_output = df[FEATURE_COLUMNS]
+        if after_date:
+            df_output = df_output[df_output['date'] > pd.Timestamp(after_date)]
+        if df_output.empty:
+            logger.info("No new feature rows to save")
+            return
+        
+        # 分区内按 (date, hot_rank, code) 排序，行组不跨日，
+        # 单日人气前N只读取当日第一个行组；紧凑类型：字典编码代码/名称、float32成交价、int16排名、date32日期（涨跌停价与阈值比较用的比率列保持float64）
+        write_config = self.config.get('write', {})
+        counts = write_feature_dataset(
+            df_output,
+            output_dir,
+            compression=write_config.get('compression', 'snappy'),
+            row_group_size=write_config.get('row_group_size')
         )
-        
-        # 更新manifest
+        logger.info(f"Partitions: {counts['written']} written, {counts['unchanged']} unchanged, "
+                    f"{counts['partitions']} total")
+        
+        # 人气排名前100索引（与数据集同样按日期合并，回测时以切片代替全日过滤）
+        existing_index = HotRankIndex.for_features(output_dir)
+        if 'migrated_rows' in counts:
+            # 单文件特征库已迁移为分区数据集（保留全部历史行），索引按完整数据重建
+            logger.info(f"Migrated single-file feature store: {counts['migrated_rows']:,} earlier rows kept")
+            hot_rank_index = HotRankIndex.build(load_features(output_dir, columns=['code', 'hot_rank']))
+        elif existing_index is not None:
+            hot_rank_index = existing_index.merge(HotRankIndex.build(df_output))
+        else:
+            hot_rank_index = HotRankIndex.build(df_output)
+        hot_rank_index.save(index_path(output_dir))
+        logger.info(f"Hot rank index saved: {hot_rank_index}")
+        
+        # 更新manifest（分区指纹见数据集目录下的 _manifest.json）
+        date_range = self.manifest.get('date_range', {})
+        start = str(df_output['date'].min())
+        if 'migrated_rows' in counts:
+            partitions = read_dataset_manifest(output_dir)['partitions'].values()
+            start = str(pd.Timestamp(min(p['first_date'] for p in partitions)))
+            # 单文件库旁的旧索引文件已由数据集目录内的索引取代
+            output_dir.with_name(output_dir.stem + '.hot_rank_index.npz').unlink(missing_ok=True)
+        elif date_range.get('start') and after_date:
+            start = min(date_range['start'], start)
         self.manifest['date_range'] = {
-            'start': str(df['date'].min()),
-            'end': str(df['date'].max())
+            'start': start,
+            'end': str(df_output['date'].max())
         }
         self.manifest['stats'] = {
-            'total_rows': len(df_output),
+            'new_rows': len(df_output),
             'unique_stocks': df_output['code'].nunique(),
             'unique_dates': df_output['date'].nunique(),
+            'partitions_written': counts['written'],
+            'partitions_total': counts['partitions'],
             'version': version,
-            'output_file': str(output_file.name)
+            'output_file': str(output_dir.name)
         }
         self._save_manifest()
         
+        size = sum(f.stat().st_size for f in output_dir.rglob('*.parquet'))
         logger.info(f"Features saved: {len(df_output):,} rows")
-        logger.info(f"File size: {output_file.stat().st_size / 1024 / 1024:.2f} MB")
+        logger.info(f"Dataset size: {size / 1024 / 1024:.2f} MB")
+    
+    def build_features(self, start_date: Optional[str] = None,
+                       end_date: Optional[str] = None,
+                       after_date: Optional[str] = None) -> pd.DataFrame:
+        """
+        加载原始数据并计算全部特征（不保存）
+        
+        Args:
+            start_date: 开始日期（全量模式）
+            end_date: 结束日期
+            after_date: 增量模式的已保存截止日（见 load_raw_data）
+            
+        Returns:
+            特征DataFrame（增量模式包含预热行，由 save_features 按 after_date 截断）
+        """
+        df = self.load_raw_data(start_date, end_date, after_date=after_date)
+        df = self.calculate_prev_values(df)
+        df = self.add_limit_prices(df)
+        return self.add_trading_flags(df, self.load_trading_calendar(end_date))
+    
+    def verify_incremental(self, version: str, after_date: str, end_date: Optional[str] = None) -> bool:
+        """
+        检查增量写入的行与全量重建的结果一致
+        
+        Args:
+            version: 版本号
+            after_date: 增量运行的截止日（比较其后的日期）
+            end_date: 结束日期
+            
+        Returns:
+            全部列一致时为 True
+        """
+        output_dir = self.features_dir / f'daily_features_{version}.parquet'
+        after = pd.Timestamp(after_date)
+        full = self.build_features(None, end_date)
+        full = full.loc[full['date'] > after, FEATURE_COLUMNS]
+        saved = load_features(output_dir, columns=FEATURE_COLUMNS,
+                              start_date=after + pd.Timedelta(days=1), end_date=end_date)
+        expected = widen_frame(compact_features(full)).sort_values(['date', 'code']).reset_index(drop=True)
+        actual = widen_frame(saved).sort_values(['date', 'code']).reset_index(drop=True)
+        if len(expected) != len(actual):
+            logger.error(f"Incremental check: {len(actual):,} rows saved, full rebuild has {len(expected):,}")
+            return False
+        mismatched = [col for col in FEATURE_COLUMNS if not expected[col].equals(actual[col])]
+        if mismatched:
+            logger.error(f"Incremental check: columns differ from a full rebuild: {mismatched}")
+            return False
+        logger.info(f"Incremental check passed: {len(actual):,} rows identical to a full rebuild")
+        return True
     
     def run(self, start_date: Optional[str] = None, 
             end_date: Optional[str] = None,
-            version: str = 'v1'):
+            version: str = 'v1',
+            incremental: bool = False):
         """
         运行完整特征工程流程
         
@@ -452,26 +603,19 @@ class FeatureEngineer:
             start_date: 开始日期
             end_date: 结束日期
             version: 版本号
+            incremental: 增量模式（start_date 当天已保存，不再覆盖）
         """
         logger.info("="*80)
         logger.info("Starting feature engineering pipeline")
         logger.info("="*80)
         
         try:
-            # 1. 加载原始数据
-            df = self.load_raw_data(start_date, end_date)
-            
-            # 2. 计算前值
-            df = self.calculate_prev_values(df)
-            
-            # 3. 添加涨跌停价
-            df = self.add_limit_prices(df)
-            
-            # 4. 添加交易标记
-            df = self.add_trading_flags(df)
+            # 1-4. 加载原始数据（增量模式带前值预热行）并计算特征
+            after_date = start_date if incremental else None
+            df = self.build_features(start_date, end_date, after_date)
             
-            # 5. 保存特征
-            self.save_features(df, version)
+            # 5. 保存特征（增量模式只写入 after_date 之后的行）
+            self.save_features(df, version, after_date=after_date)
             
             logger.info("="*80)
             logger.info("Feature engineering completed successfully!")
@@ -512,6 +656,11 @@ def main():
         action='store_true',
         help='Incremental update (only process new data)'
     )
+    parser.add_argument(
+        '--verify-incremental',
+        action='store_true',
+        help='After an incremental update, check the new rows against a full rebuild (slow)'
+    )
     
     args = parser.parse_args()
     
@@ -523,15 +672,29 @@ def main():
     
     # 增量更新逻辑
     start_date = args.start_date
-    if args.incremental and engineer.manifest['date_range']['end']:
+    incremental = bool(args.incremental and engineer.manifest['date_range']['end'])
+    dataset_dir = engineer.features_dir / f'daily_features_{args.version}.parquet'
+    if dataset_dir.exists() and not dataset_is_current(dataset_dir):
+        # 旧版本数据集的列类型不同（float32 比率列已有精度损失），只重写部分日期会混用两种类型，
+        # 因此无论增量还是指定 --start-date，都改为从头全量重建
+        logger.warning(f"{dataset_dir.name} was written with an older schema, running a full rebuild"
+                       + (f" (ignoring --start-date {start_date})" if start_date else ""))
+        incremental = False
+        start_date = None
+    if incremental:
         start_date = engineer.manifest['date_range']['end']
         logger.info(f"Incremental mode: starting from {start_date}")
     
     engineer.run(
         start_date=start_date,
         end_date=args.end_date,
-        version=args.version
+        version=args.version,
+        incremental=incremental
     )
+    
+    if args.verify_incremental and incremental:
+        if not engineer.verify_incremental(args.version, start_date, args.end_date):
+            sys.exit(1)
 
 
 if __name__ == '__main__':
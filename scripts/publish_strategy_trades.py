@@ -5,6 +5,7 @@ from __future__ import annotations
 
 from pathlib import Path
 import html
+import json
 import shutil
 import pandas as pd
 
@@ -25,52 +26,78 @@ def latest_file(prefix: str, suffix: str) -> Path | None:
     return files[-1] if files else None
 
 
-def render_html_from_csv(csv_path: Path, out_html: Path, title: str) -> None:
-    # 统一按字符串读取，避免 code 前导 0 被 pandas 吞掉。
-    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
-    cols = list(df.columns)
+def format_cell(col: str, val: str) -> str:
+    c = col.lower()
+    v = (val or "").strip()
+    if v == "":
+        return ""
 
-    thead = "".join([f"<th>{html.escape(c)}</th>" for c in cols])
+    # 股票代码统一 6 位展示。
+    if c == "code" and v.isdigit():
+        return v.zfill(6)
 
-    rows = []
-    def format_cell(col: str, val: str) -> str:
-        c = col.lower()
-        v = (val or "").strip()
-        if v == "":
-            return ""
-
-        # 股票代码统一 6 位展示。
-        if c == "code" and v.isdigit():
-            return v.zfill(6)
-
-        # 比例字段统一为 4 位小数，阅读更稳定。
-        if "pct" in c:
-            try:
-                return f"{float(v):.4f}"
-            except ValueError:
-                return v
-
-        # 分类型字段保留原样（整数或日期等）。
-        plain_tokens = ("rank", "days", "shares", "date", "reason", "condition")
-        if any(t in c for t in plain_tokens):
+    # 比例字段统一为 4 位小数，阅读更稳定。
+    if "pct" in c:
+        try:
+            return f"{float(v):.4f}"
+        except ValueError:
             return v
 
-        # 其余可解析为数字的字段统一按两位小数展示（金额/价格等）。
-        # 这样能覆盖 buy_exec/sell_exec/trigger_xxx/open/high/low/close 等字段。
-        if c != "code":
-            try:
-                return f"{float(v):.2f}"
-            except ValueError:
-                return v
-
+    # 分类型字段保留原样（整数或日期等）。
+    plain_tokens = ("rank", "days", "shares", "date", "reason", "condition")
+    if any(t in c for t in plain_tokens):
         return v
 
-    for _, r in df.iterrows():
-        cells = []
-        for c in cols:
-            s = format_cell(c, str(r[c]))
-            cells.append(f"<td>{html.escape(s)}</td>")
-        rows.append(f"<tr>{''.join(cells)}</tr>")
+    # 其余可解析为数字的字段统一按两位小数展示（金额/价格等）。
+    # 这样能覆盖 buy_exec/sell_exec/trigger_xxx/open/high/low/close 等字段。
+    if c != "code":
+        try:
+            return f"{float(v):.2f}"
+        except ValueError:
+            return v
+
+    return v
+
+
+def sort_key(value: str) -> tuple:
+    """空值在前，其次数值（按大小），最后文本"""
+    if value == "":
+        return (0, 0.0, "")
+    try:
+        return (1, float(value.replace(",", "")), "")
+    except ValueError:
+        return (2, 0.0, value)
+
+
+def build_table_data(df: pd.DataFrame) -> dict:
+    """
+    列式数据块：全表共用一个取值字典（同时作为筛选用的词索引），
+    每列存字典下标，并预先计算每列的升序行顺序
+    """
+    tokens: dict[str, int] = {}
+    columns = []
+    orders = []
+    for col in df.columns:
+        values = [format_cell(col, v) for v in df[col].tolist()]
+        columns.append([tokens.setdefault(v, len(tokens)) for v in values])
+        keys = [sort_key(v) for v in values]
+        orders.append(sorted(range(len(values)), key=keys.__getitem__))
+    return {
+        "columns": list(df.columns),
+        "rows": len(df),
+        "dict": list(tokens),
+        "data": columns,
+        "order": orders,
+    }
+
+
+def render_html_from_csv(csv_path: Path, out_html: Path, title: str) -> None:
+    # 统一按字符串读取，避免 code 前导 0 被 pandas 吞掉。
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    cols = list(df.columns)
+
+    thead = "".join([f"<th>{html.escape(c)}</th>" for c in cols])
+    data_json = json.dumps(build_table_data(df), ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
 
     html_text = f"""<!doctype html>
 <html lang=\"zh-CN\">
@@ -86,10 +113,12 @@ def render_html_from_csv(csv_path: Path, out_html: Path, title: str) -> None:
     .panel {{ background:#fff; border:1px solid #d7e0d7; border-radius:10px; padding:10px; margin-bottom:12px; }}
     input {{ width:320px; max-width:100%; padding:8px 10px; border:1px solid #cdd8cd; border-radius:8px; }}
     table {{ width:100%; border-collapse:collapse; font-size:13px; }}
-    th, td {{ border-bottom:1px solid #e5e7eb; padding:6px 8px; text-align:left; white-space:nowrap; }}
+    th, td {{ border-bottom:1px solid #e5e7eb; padding:6px 8px; text-align:left; white-space:nowrap; height:17px; }}
     th {{ background:#eef4ef; position:sticky; top:0; cursor:pointer; }}
     tr:hover {{ background:#f7faf8; }}
+    tr.spacer td {{ padding:0; border:0; height:auto; }}
     .tbl {{ overflow:auto; max-height:72vh; border:1px solid #d7e0d7; border-radius:8px; }}
+    .count {{ margin-left:10px; color:#4b5563; font-size:13px; }}
   </style>
 </head>
 <body>
@@ -97,49 +126,118 @@ def render_html_from_csv(csv_path: Path, out_html: Path, title: str) -> None:
     <h1>{html.escape(title)}</h1>
     <div class=\"meta\">记录条数：{len(df)}，列数：{len(cols)}，来源：{html.escape(csv_path.name)}</div>
     <div class=\"panel\">
-      <input id=\"q\" placeholder=\"输入代码/日期/字段内容进行筛选\" />
+      <input id=\"q\" placeholder=\"输入代码/日期/字段内容进行筛选\" /><span class=\"count\" id=\"count\"></span>
     </div>
-    <div class=\"tbl\">
+    <div class=\"tbl\" id=\"scroller\">
       <table id=\"tbl\">
         <thead><tr>{thead}</tr></thead>
-        <tbody>
-          {''.join(rows)}
-        </tbody>
+        <tbody></tbody>
       </table>
     </div>
   </div>
+<script id=\"trades-data\" type=\"application/json\">{data_json}</script>
 <script>
+// 列式数据 + 预排序 + 取值字典：筛选只扫描去重后的取值，表格只渲染可见行
+const D = JSON.parse(document.getElementById('trades-data').textContent);
 const q = document.getElementById('q');
+const scroller = document.getElementById('scroller');
 const tbl = document.getElementById('tbl');
 const tbody = tbl.querySelector('tbody');
-const allRows = Array.from(tbody.querySelectorAll('tr'));
+const countEl = document.getElementById('count');
+const nCols = D.columns.length;
+const dictLower = D.dict.map(v => v.toLowerCase());
+const OVERSCAN = 20;
+let rowHeight = 30;
+let mask = null;      // Uint8Array，null 表示不筛选
+let view = [];        // 当前显示的行号（已筛选、已排序）
+let sortCol = -1;
+let sortAsc = true;
+
+function esc(s) {{
+  return s.replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
+}}
+
+function rebuildView() {{
+  let base;
+  if (sortCol < 0) {{
+    base = Array.from({{length: D.rows}}, (_, i) => i);
+  }} else {{
+    base = D.order[sortCol];
+    if (!sortAsc) base = base.slice().reverse();
+  }}
+  view = mask ? base.filter(i => mask[i]) : base;
+  countEl.textContent = mask ? `匹配 ${{view.length}} / ${{D.rows}} 条` : '';
+  scroller.scrollTop = 0;
+  render();
+}}
 
+function render() {{
+  const top = scroller.scrollTop;
+  const height = scroller.clientHeight || 600;
+  const start = Math.max(0, Math.floor(top / rowHeight) - OVERSCAN);
+  const end = Math.min(view.length, Math.ceil((top + height) / rowHeight) + OVERSCAN);
+  const parts = [`<tr class="spacer"><td colspan="${{nCols}}" style="height:${{start * rowHeight}}px"></td></tr>`];
+  for (let k = start; k < end; k++) {{
+    const i = view[k];
+    let cells = '';
+    for (let c = 0; c < nCols; c++) cells += `<td>${{esc(D.dict[D.data[c][i]])}}</td>`;
+    parts.push(`<tr>${{cells}}</tr>`);
+  }}
+  parts.push(`<tr class="spacer"><td colspan="${{nCols}}" style="height:${{(view.length - end) * rowHeight}}px"></td></tr>`);
+  tbody.innerHTML = parts.join('');
+  const first = tbody.children[1];
+  if (first && first.offsetHeight && first.offsetHeight !== rowHeight && end > start) {{
+    rowHeight = first.offsetHeight;
+    render();
+  }}
+}}
+
+function applyFilter() {{
+  const terms = q.value.trim().toLowerCase().split(/\\s+/).filter(Boolean);
+  if (!terms.length) {{
+    mask = null;
+    rebuildView();
+    return;
+  }}
+  // 每个词：先在去重取值中找包含该词的取值，再按列下标标记命中的行（多个词需同时命中）
+  let result = null;
+  for (const term of terms) {{
+    const hit = new Uint8Array(D.dict.length);
+    dictLower.forEach((v, t) => {{ if (v.includes(term)) hit[t] = 1; }});
+    const rows = new Uint8Array(D.rows);
+    for (let c = 0; c < nCols; c++) {{
+      const col = D.data[c];
+      for (let i = 0; i < D.rows; i++) if (hit[col[i]]) rows[i] = 1;
+    }}
+    if (result) for (let i = 0; i < D.rows; i++) result[i] &= rows[i];
+    else result = rows;
+  }}
+  mask = result;
+  rebuildView();
+}}
+
+let pending = 0;
 q.addEventListener('input', () => {{
-  const kw = q.value.trim().toLowerCase();
-  allRows.forEach(r => {{
-    const ok = !kw || r.textContent.toLowerCase().includes(kw);
-    r.style.display = ok ? '' : 'none';
-  }});
+  clearTimeout(pending);
+  pending = setTimeout(applyFilter, 80);
+}});
+
+let ticking = false;
+scroller.addEventListener('scroll', () => {{
+  if (ticking) return;
+  ticking = true;
+  requestAnimationFrame(() => {{ ticking = false; render(); }});
 }});
 
-let sortCol = -1;
-let sortAsc = true;
 Array.from(tbl.querySelectorAll('th')).forEach((th, idx) => {{
   th.addEventListener('click', () => {{
     if (sortCol === idx) sortAsc = !sortAsc;
     else {{ sortCol = idx; sortAsc = true; }}
-    const rows = Array.from(tbody.querySelectorAll('tr'));
-    rows.sort((a,b) => {{
-      const va = (a.children[idx]?.textContent || '').trim();
-      const vb = (b.children[idx]?.textContent || '').trim();
-      const na = Number(va.replace(/,/g,''));
-      const nb = Number(vb.replace(/,/g,''));
-      if (!Number.isNaN(na) && !Number.isNaN(nb) && va !== '' && vb !== '') return sortAsc ? na-nb : nb-na;
-      return sortAsc ? va.localeCompare(vb, 'zh') : vb.localeCompare(va, 'zh');
-    }});
-    rows.forEach(r => tbody.appendChild(r));
+    rebuildView();
   }});
 }});
+
+rebuildView();
 </script>
 </body>
 </html>
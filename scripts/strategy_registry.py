@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Registry of backtest strategies: key -> engine module and default config."""
+
+from __future__ import annotations
+
+import importlib
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = PROJECT_ROOT / "scripts"
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+
+@dataclass(frozen=True)
+class StrategySpec:
+    module: str
+    config: str
+
+
+# 与 publish_strategy_trades.STRATEGIES 使用相同的 key
+STRATEGIES: Dict[str, StrategySpec] = {
+    "drop7": StrategySpec("backtest_hot_rank_strategy", "config/strategies/hot_rank_drop7.yaml"),
+    "rise2": StrategySpec("backtest_hot_rank_rise2_strategy", "config/strategies/hot_rank_rise2.yaml"),
+    "top20_newentry": StrategySpec(
+        "backtest_hot_rank_top10_open_strategy", "config/strategies/hot_rank_top10_open.yaml"
+    ),
+    "first_top10": StrategySpec(
+        "backtest_hot_rank_first_top10_strategy",
+        "config/strategies/hot_rank_first_top10_rise2_or_gapdown.yaml",
+    ),
+}
+
+
+def get_spec(key: str) -> StrategySpec:
+    if key not in STRATEGIES:
+        raise KeyError(f"unknown strategy: {key} (available: {', '.join(STRATEGIES)})")
+    return STRATEGIES[key]
+
+
+def load_module(key: str) -> ModuleType:
+    return importlib.import_module(get_spec(key).module)
+
+
+def load_config(key: str, config_path: Optional[str] = None,
+                param_overrides: Optional[Dict[str, Any]] = None) -> dict:
+    """Load merged strategy config and apply `params` overrides (same as --param.xxx)."""
+    module = load_module(key)
+    path = Path(config_path) if config_path else PROJECT_ROOT / get_spec(key).config
+    config = module.load_strategy_config(str(path))
+    if param_overrides:
+        config.setdefault("params", {}).update(param_overrides)
+    return config
+
+
+def create_engine(key: str, config: dict, event_level: Optional[str] = None):
+    """Instantiate the strategy's BacktestEngine."""
+    return load_module(key).BacktestEngine(config, event_level=event_level)
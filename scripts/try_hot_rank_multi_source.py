@@ -5,6 +5,7 @@ from __future__ import annotations
 
 import json
 import os
+import sys
 import time
 from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta
@@ -16,7 +17,13 @@ import pandas as pd
 
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+import hot_rank_store  # noqa: E402
+from security_master import market_symbol  # noqa: E402
+
 OUT_ROOT = PROJECT_ROOT / "data" / "experiments" / "hot_rank_multi_source"
+STORE_ROOT = PROJECT_ROOT / "data" / "hot_sources" / "store"
 
 
 @dataclass
@@ -110,7 +117,7 @@ def fetch_eastmoney_last_30d(out_dir: Path, topn: int = 50) -> AttemptResult:
 
     chunks: list[pd.DataFrame] = []
     for code in codes:
-        symbol = f"SZ{code}" if code.startswith(("0", "3")) else f"SH{code}"
+        symbol = market_symbol(code)
         try:
             df = ak.stock_hot_rank_detail_em(symbol=symbol)
             if df is None or df.empty:
@@ -421,8 +428,12 @@ def main() -> int:
         encoding="utf-8-sig",
     )
 
+    # 标准化后写入多源热度库（按 source/date 分区覆盖），运行目录仅保留原始尝试记录
+    stored = hot_rank_store.write_hot_ranks(hot_rank_store.normalize_run_dir(out_dir), STORE_ROOT)
+
     ok_cnt = sum(1 for x in results if x.status == "ok")
     print(f"out_dir={out_dir}")
+    print(f"store={STORE_ROOT} partitions={stored['partitions']} rows={stored['rows']}")
     print(f"ok={ok_cnt}/{len(results)}")
     for item in results:
         print(f"[{item.status}] {item.source} | {item.method} | rows={item.rows} | {item.error or item.note}")
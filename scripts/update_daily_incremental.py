@@ -29,6 +29,7 @@ import yaml
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from manifest import Manifest
+from security_master import SecurityMaster, resolve_master_dir
 from utils import setup_logging
 
 # Import from download script (reuse logic)
@@ -67,6 +68,9 @@ class IncrementalUpdater(AShareDownloader):
         total_stocks = len(stock_list)
         logger.info(f"Total stocks in market: {total_stocks}")
         
+        # Record today's names in the security master (name / ST history)
+        self.record_name_snapshot(stock_list, end_date)
+        
         # Determine what needs updating
         update_tasks = []
         
@@ -160,6 +164,24 @@ class IncrementalUpdater(AShareDownloader):
         # Generate report
         self._generate_report(results, len(update_tasks), end_date)
     
+    def record_name_snapshot(self, stock_list: pd.DataFrame, as_of: str):
+        """
+        Record a stock-list name snapshot in the security master
+        
+        Args:
+            stock_list: DataFrame with code, name
+            as_of: Snapshot date (YYYY-MM-DD)
+        """
+        # 与 prepare_features / update_security_master 相同：读取 data_config.yaml 的 data.security_master_dir
+        master_dir = resolve_master_dir(Path(__file__).parent.parent)
+        try:
+            master = SecurityMaster.load(master_dir)
+            added = master.observe_names(stock_list[["code", "name"]].assign(date=as_of))
+            master.save()
+            logger.info(f"Security master: {len(master)} codes, {added} new name intervals")
+        except Exception as e:
+            logger.warning(f"Failed to update security master: {str(e)}")
+    
     def _generate_report(self, results: Dict, total: int, end_date: str):
         """Generate and log daily update report"""
         logger.info("="*60)
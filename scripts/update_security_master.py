@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Build / update the persisted security master (listing dates, name and ST history).
+
+Listing dates come from the SH/SZ/BJ exchange stock lists, names from the
+current stock list snapshot. --from-lake additionally replays the name column
+of the raw daily lake, which seeds the history on the first run.
+
+Example:
+    python scripts/update_security_master.py --from-lake
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import akshare as ak
+import pandas as pd
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from security_master import SecurityMaster, resolve_master_dir  # noqa: E402
+from utils import retry_on_exception  # noqa: E402
+
+logger = logging.getLogger("update_security_master")
+
+# (source, fetch, code column, name column, listing date column)
+LISTING_SOURCES: List[Tuple[str, Callable[[], pd.DataFrame], str, str, str]] = [
+    ("sh_main", lambda: ak.stock_info_sh_name_code(symbol="主板A股"), "证券代码", "证券简称", "上市日期"),
+    ("sh_star", lambda: ak.stock_info_sh_name_code(symbol="科创板"), "证券代码", "证券简称", "上市日期"),
+    ("sz", lambda: ak.stock_info_sz_name_code(symbol="A股列表"), "A股代码", "A股简称", "A股上市日期"),
+    ("bj", lambda: ak.stock_info_bj_name_code(), "证券代码", "证券简称", "上市日期"),
+]
+
+
+@retry_on_exception(max_retries=2, delay=3.0, backoff=1.5)
+def fetch_listing(fetch: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    return fetch()
+
+
+def fetch_listings() -> pd.DataFrame:
+    """Exchange stock lists -> code, name, list_date"""
+    frames = []
+    for source, fetch, code_col, name_col, date_col in LISTING_SOURCES:
+        try:
+            df = fetch_listing(fetch)
+        except Exception as e:
+            logger.warning("%s 股票列表获取失败: %s", source, e)
+            continue
+        if df is None or df.empty or code_col not in df.columns:
+            logger.warning("%s 股票列表为空或缺少代码列", source)
+            continue
+        frames.append(pd.DataFrame({
+            "code": df[code_col].astype(str).str.zfill(6),
+            "name": df[name_col].astype(str).str.replace(" ", "", regex=False) if name_col in df.columns else None,
+            "list_date": pd.to_datetime(df[date_col], errors="coerce") if date_col in df.columns else pd.NaT,
+        }))
+        logger.info("%s: %d只", source, len(df))
+    if not frames:
+        return pd.DataFrame(columns=["code", "name", "list_date"])
+    return pd.concat(frames, ignore_index=True).drop_duplicates("code", keep="last")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="更新证券主表（上市日期、名称/ST历史）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--config", default="config/data_config.yaml", help="数据路径配置")
+    parser.add_argument("--from-lake", action="store_true", help="回放原始日线数据的名称列（首次构建历史）")
+    parser.add_argument("--as-of", default=None, help="名称快照日期（默认今天）")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    with open(PROJECT_ROOT / args.config, "r", encoding="utf-8") as f:
+        data_config = yaml.safe_load(f)["data"]
+    master = SecurityMaster.load(resolve_master_dir(PROJECT_ROOT, data_config))
+    logger.info("证券主表: %d只, %d条名称区间", len(master), len(master.names))
+
+    if args.from_lake:
+        raw_dir = PROJECT_ROOT / data_config["raw_dir"]
+        lake = pd.read_parquet(raw_dir, columns=["date", "code", "name"])
+        added = master.observe_names(lake)
+        logger.info("原始数据回放: %s行, 新增%d条名称区间", f"{len(lake):,}", added)
+
+    listings = fetch_listings()
+    if not listings.empty:
+        changed = master.update_listing(listings)
+        as_of = args.as_of or datetime.now().strftime("%Y-%m-%d")
+        added = master.observe_names(listings[["code", "name"]].assign(date=as_of))
+        logger.info("交易所列表: %d只, 上市日期更新%d只, 新增%d条名称区间", len(listings), changed, added)
+
+    master.save()
+    n_listed = master.securities["list_date"].notna().sum()
+    n_st = master.names[master.names["valid_to"].isna()]["is_st"].sum()
+    logger.info("已保存 %s: %d只（%d只有上市日期）, 当前ST %d只", master.root, len(master), n_listed, n_st)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
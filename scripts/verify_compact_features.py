@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Check that every engine produces the same ledger from compact features as from float64 features.
+
+The float64 baseline panel is computed from the raw lake in memory (the
+values prepare_features writes). It is then written through the dataset
+writer into a temporary directory and read back with each engine's own
+compact loader. Each engine runs once on each panel; trade ledgers and daily
+portfolios must be identical (no hot rank index on either side, so both runs
+take the top-N from the day slice).
+
+Example:
+    python scripts/verify_compact_features.py --start-date 2025-01-15 --end-date 2026-01-31
+    python scripts/verify_compact_features.py --engines drop7 rise2
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import logging
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+# prepare_features logs to logs/ from import time on
+(PROJECT_ROOT / "logs").mkdir(exist_ok=True)
+
+from checkpoint import compare_ledgers  # noqa: E402
+from feature_store import write_feature_dataset  # noqa: E402
+from prepare_features import FEATURE_COLUMNS, FeatureEngineer  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# name -> (engine module under scripts/, strategy config)
+ENGINES: Dict[str, Tuple[str, str]] = {
+    "drop7": ("backtest_hot_rank_strategy", "config/strategies/hot_rank_drop7.yaml"),
+    "rise2": ("backtest_hot_rank_rise2_strategy", "config/strategies/hot_rank_rise2.yaml"),
+    "top10_open": ("backtest_hot_rank_top10_open_strategy", "config/strategies/hot_rank_top10_open.yaml"),
+    "first_top10": ("backtest_hot_rank_first_top10_strategy",
+                    "config/strategies/hot_rank_first_top10_rise2_or_gapdown.yaml"),
+}
+
+
+def verify_engine(name: str, baseline: pd.DataFrame, dataset: Path,
+                  start_date: Optional[str], end_date: Optional[str]) -> Tuple[bool, str]:
+    """Run one engine on the float64 baseline and on the compact dataset and compare the results"""
+    module_name, config_path = ENGINES[name]
+    module = importlib.import_module(module_name)
+    config = module.load_strategy_config(str(PROJECT_ROOT / config_path))
+
+    compact_engine = module.BacktestEngine(config, event_level="off")
+    compact_df = compact_engine.load_features(str(dataset), start_date, end_date)
+    # Same rows and columns as the compact load, in the same (date, code) order
+    window = baseline[baseline["date"].isin(compact_df["date"].unique())]
+    baseline_df = window[list(compact_df.columns)].reset_index(drop=True)
+
+    baseline_engine = module.BacktestEngine(config, event_level="off")
+    baseline_engine.run(baseline_df, start_date=start_date, end_date=end_date)
+    compact_engine.run(compact_df, start_date=start_date, end_date=end_date)
+    return compare_ledgers(compact_engine.result_frames(), baseline_engine.result_frames())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="校验紧凑类型特征与 float64 特征的回测结果逐笔一致",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--config", default="config/data_config.yaml", help="特征工程配置文件路径")
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES), help="要校验的策略引擎")
+    parser.add_argument("--start-date", default=None, help="回测开始日期（默认读取各策略配置）")
+    parser.add_argument("--end-date", default=None, help="回测结束日期（默认读取各策略配置）")
+    args = parser.parse_args()
+
+    # float64 基线：特征从原始数据湖全量计算（前值需要完整历史），不经过紧凑类型
+    engineer = FeatureEngineer(args.config)
+    baseline = engineer.build_features(end_date=args.end_date)[FEATURE_COLUMNS]
+    baseline = baseline.sort_values(["date", "code"], kind="stable").reset_index(drop=True)
+    logger.info("float64 基线: %d行, %d个交易日", len(baseline), baseline["date"].nunique())
+
+    failed = []
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset = Path(tmp) / "daily_features.parquet"
+        write_feature_dataset(baseline, dataset)
+        for name in args.engines:
+            ok, message = verify_engine(name, baseline, dataset, args.start_date, args.end_date)
+            if ok:
+                logger.info("%s: 一致 %s", name, message)
+            else:
+                logger.error("%s: 不一致 %s", name, message)
+                failed.append(name)
+
+    if failed:
+        logger.error("紧凑类型特征改变了回测结果: %s", ", ".join(failed))
+        return 1
+    logger.info("全部%d个引擎的交易明细与净值与 float64 基线一致", len(args.engines))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
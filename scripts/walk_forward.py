@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Walk-forward evaluation: pick params on rolling train windows, score them out of sample.
+
+Example:
+    python scripts/walk_forward.py --strategy first_top10 \
+        --grid hot_top_n=5,10,20 --grid rise_trigger=0.02,0.03 \
+        --train-days 120 --test-days 40 --metric sharpe_ratio --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from backtest_metrics import SELECTION_METRICS, summarize_portfolio  # noqa: E402
+from backtest_worker import apply_params, init_worker, parse_grid, run_backtest  # noqa: E402
+from day_context import trading_dates  # noqa: E402
+from strategy_registry import STRATEGIES, load_config  # noqa: E402
+
+logger = logging.getLogger("walk_forward")
+
+
+def build_windows(dates: List[pd.Timestamp], train_days: int, test_days: int,
+                  step_days: int, anchored: bool = False) -> List[Dict[str, pd.Timestamp]]:
+    """
+    按交易日切分训练/测试窗口
+
+    Args:
+        dates: 交易日历
+        train_days: 训练窗口交易日数
+        test_days: 测试窗口交易日数
+        step_days: 窗口滚动步长
+        anchored: True 时训练窗口起点固定（扩张窗口）
+    """
+    windows = []
+    start = 0
+    while start + train_days + test_days <= len(dates):
+        train_start = 0 if anchored else start
+        train_end = start + train_days - 1
+        test_end = train_end + test_days
+        windows.append({
+            "window": len(windows),
+            "train_start": dates[train_start],
+            "train_end": dates[train_end],
+            "test_start": dates[train_end + 1],
+            "test_end": dates[test_end],
+        })
+        start += step_days
+    return windows
+
+
+def evaluate_window(window: Dict[str, pd.Timestamp], base_config: dict,
+                    grid: List[Dict[str, Any]], metric: str) -> Dict[str, Any]:
+    """训练窗口内遍历参数网格选优，再用最优参数跑测试窗口"""
+    init_cash = base_config["backtest"]["init_cash"]
+
+    grid_rows = []
+    for i, params in enumerate(grid):
+        trades_df, portfolio_df = run_backtest(apply_params(base_config, params), window["train_start"], window["train_end"])
+        summary = summarize_portfolio(portfolio_df, trades_df, init_cash)
+        grid_rows.append({"window": window["window"], "grid_id": i, **params, **summary})
+
+    best = max(range(len(grid)), key=lambda i: grid_rows[i][metric])
+    trades_df, portfolio_df = run_backtest(apply_params(base_config, grid[best]), window["test_start"], window["test_end"])
+    oos = summarize_portfolio(portfolio_df, trades_df, init_cash)
+
+    result = dict(window)
+    result.update({f"param.{k}": v for k, v in grid[best].items()})
+    result.update({f"is_{k}": v for k, v in grid_rows[best].items() if k in oos})
+    result.update({f"oos_{k}": v for k, v in oos.items()})
+    return {"result": result, "grid": grid_rows, "oos_portfolio": portfolio_df}
+
+
+def stitch_oos(portfolios: List[pd.DataFrame], init_cash: float) -> pd.DataFrame:
+    """把各测试窗口的净值按收益率首尾相接（每个窗口都从 init_cash 起步）"""
+    pieces = []
+    scale = 1.0
+    for df in portfolios:
+        if df.empty:
+            continue
+        piece = df[["date", "nav"]].copy()
+        piece["nav"] = piece["nav"] * scale
+        scale = piece["nav"].iloc[-1] / init_cash
+        pieces.append(piece)
+    return pd.concat(pieces, ignore_index=True) if pieces else pd.DataFrame(columns=["date", "nav"])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="滚动窗口 walk-forward 评估",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    parser.add_argument("--strategy", required=True, choices=list(STRATEGIES), help="策略key")
+    parser.add_argument("--config", default=None, help="策略配置文件（默认使用注册表中的配置）")
+    parser.add_argument("--features", default="data/processed/features/daily_features_v1.parquet", help="特征数据路径")
+    parser.add_argument("--grid", action="append", default=[], metavar="PARAM=V1,V2", help="参数网格，可重复")
+    parser.add_argument("--train-days", type=int, default=120, help="训练窗口交易日数")
+    parser.add_argument("--test-days", type=int, default=40, help="测试窗口交易日数")
+    parser.add_argument("--step-days", type=int, default=None, help="滚动步长（默认等于测试窗口）")
+    parser.add_argument("--anchored", action="store_true", help="训练窗口起点固定（扩张窗口）")
+    parser.add_argument("--start-date", default=None, help="日历开始日期")
+    parser.add_argument("--end-date", default=None, help="日历结束日期")
+    parser.add_argument("--metric", choices=SELECTION_METRICS, default="sharpe_ratio", help="训练窗口选优指标")
+    parser.add_argument("--workers", type=int, default=1, help="并行进程数（按窗口并行）")
+    parser.add_argument("--no-cache", action="store_true", help="不读写结果缓存")
+    parser.add_argument("--output", default="data/backtest/walk_forward", help="输出目录")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    # 回测引擎的日志在工作进程中降为 WARNING，本脚本的进度日志保持 INFO
+    logger.setLevel(logging.INFO)
+
+    try:
+        grid = parse_grid(args.grid)
+    except ValueError as e:
+        parser.error(str(e))
+
+    base_config = load_config(args.strategy, args.config)
+    init_cash = base_config["backtest"]["init_cash"]
+
+    dates = trading_dates(pd.read_parquet(args.features, columns=["date"]).assign(
+        date=lambda df: pd.to_datetime(df["date"])))
+    if args.start_date:
+        dates = [d for d in dates if d >= pd.Timestamp(args.start_date)]
+    if args.end_date:
+        dates = [d for d in dates if d <= pd.Timestamp(args.end_date)]
+
+    windows = build_windows(dates, args.train_days, args.test_days,
+                            args.step_days or args.test_days, args.anchored)
+    if not windows:
+        logger.error("交易日不足以切出一个训练+测试窗口（%d个交易日）", len(dates))
+        return 1
+    logger.info("%s: %d个窗口 × %d组参数，选优指标 %s", args.strategy, len(windows), len(grid), args.metric)
+
+    init_args = (args.strategy, base_config, args.features, not args.no_cache)
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=init_args) as pool:
+            outputs = list(pool.map(evaluate_window, windows, itertools.repeat(base_config),
+                                    itertools.repeat(grid), itertools.repeat(args.metric)))
+    else:
+        init_worker(*init_args)
+        outputs = [evaluate_window(w, base_config, grid, args.metric) for w in windows]
+
+    results_df = pd.DataFrame([o["result"] for o in outputs])
+    grid_df = pd.DataFrame([row for o in outputs for row in o["grid"]])
+    oos_df = stitch_oos([o["oos_portfolio"] for o in outputs], init_cash)
+
+    output_dir = Path(args.output)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    prefix = output_dir / f"{args.strategy}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    results_df.to_csv(f"{prefix}_windows.csv", index=False, encoding="utf-8-sig")
+    grid_df.to_csv(f"{prefix}_grid.csv", index=False, encoding="utf-8-sig")
+    oos_df.to_parquet(f"{prefix}_oos_portfolio.parquet", index=False)
+
+    for row in results_df.to_dict("records"):
+        params = ", ".join(f"{k[6:]}={v}" for k, v in row.items() if k.startswith("param."))
+        logger.info(
+            "窗口%d 测试 %s~%s [%s]  IS %s=%.3f  OOS 收益%.2f%% 回撤%.2f%%",
+            row["window"], row["test_start"].date(), row["test_end"].date(), params,
+            args.metric, row[f"is_{args.metric}"], row["oos_total_return"] * 100, row["oos_max_drawdown"] * 100,
+        )
+    oos = summarize_portfolio(oos_df, init_cash=init_cash)
+    logger.info("样本外拼接: 收益%.2f%%，最大回撤%.2f%%，夏普%.2f",
+                oos["total_return"] * 100, oos["max_drawdown"] * 100, oos["sharpe_ratio"])
+    logger.info("结果已保存: %s_*", prefix)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
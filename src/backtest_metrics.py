@@ -0,0 +1,297 @@
+"""
+Summary metrics of backtest results (NAV curve and trade ledger)
+
+Metrics are computed for many runs at once: the NAV series of N runs are
+aligned into one date x run matrix and every metric is a column-wise NumPy
+reduction over it, so comparing a parameter sweep or several strategies is
+one call instead of N. summarize_portfolio() is the single-run view of the
+same computation.
+
+Definitions: drawdown against the running max NAV (starting from the
+initial capital), Sharpe on daily NAV returns with rf=0 and 252 days per
+year, monthly returns from month-end to month-end NAV.
+
+Example (checked with python -m doctest src/backtest_metrics.py). Capital
+100, NAV 110 / 99 / 108.9: daily returns +10%, -10%, +10% (the first one
+from the initial capital), mean 1/30, sample std sqrt(0.04/3), so Sharpe =
+sqrt(252) / (2 * sqrt(3)) = 4.5826. January is measured from the capital
+(99 / 100 - 1), February from January's close (108.9 / 99 - 1).
+
+>>> navs = nav_matrix({"a": pd.DataFrame({"date": ["2025-01-30", "2025-01-31", "2025-02-03"],
+...                                       "nav": [110.0, 99.0, 108.9]})})
+>>> trades = {"a": pd.DataFrame({"net_pnl": [5.0, -2.0, 3.0],
+...                              "exit_reason": ["take_profit", "stop_loss", "take_profit"]})}
+>>> row = compare_runs(navs, trades, init_cash=100.0).loc["a"]
+>>> [round(float(row[k]), 4) for k in ("n_days", "final_nav", "total_return", "max_drawdown", "sharpe_ratio")]
+[3.0, 108.9, 0.089, -0.1, 4.5826]
+>>> [round(float(row[k]), 4) for k in ("win_rate", "avg_win", "avg_loss", "profit_loss_ratio")]
+[0.6667, 4.0, -2.0, 2.0]
+>>> monthly_returns(navs, init_cash=100.0)["a"].round(4).tolist()
+[-0.01, 0.1]
+>>> counts = exit_reason_breakdown(trades)
+>>> counts.index.tolist(), counts["a"].tolist()
+(['take_profit', 'stop_loss'], [2, 1])
+"""
+from typing import Dict, Mapping, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Metrics where a larger value is better (max_drawdown is negative, so larger is better too)
+SELECTION_METRICS = ("total_return", "annual_return", "sharpe_ratio", "calmar_ratio", "max_drawdown")
+
+NAV_METRICS = ("n_days", "final_nav", "total_return", "annual_return", "max_drawdown",
+               "sharpe_ratio", "calmar_ratio")
+TRADE_METRICS = ("total_trades", "winning_trades", "losing_trades", "win_rate",
+                 "avg_win", "avg_loss", "profit_loss_ratio")
+
+InitCash = Union[None, float, Mapping[str, float]]
+
+
+def nav_matrix(portfolios: Mapping[str, pd.DataFrame], date_col: str = "date",
+               nav_col: str = "nav") -> pd.DataFrame:
+    """
+    Align the NAV series of several runs into one date x run matrix
+
+    Args:
+        portfolios: Run name -> daily portfolio with date / nav columns
+        date_col: Date column
+        nav_col: NAV column
+
+    Returns:
+        DataFrame indexed by the union of dates (sorted), one column per run;
+        NaN on dates a run did not record
+    """
+    series = []
+    for name, df in portfolios.items():
+        if df is None or df.empty:
+            series.append(pd.Series(dtype=float, name=name))
+            continue
+        s = pd.Series(df[nav_col].to_numpy(dtype=float), index=pd.to_datetime(df[date_col]), name=name)
+        series.append(s[~s.index.duplicated(keep="last")])
+    if not series:
+        return pd.DataFrame()
+    return pd.concat(series, axis=1).sort_index()
+
+
+def _bases(matrix: pd.DataFrame, init_cash: InitCash) -> np.ndarray:
+    """Initial capital per run (default: the run's first recorded NAV)"""
+    values = matrix.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    first = np.full(values.shape[1], np.nan)
+    has_data = valid.any(axis=0)
+    first[has_data] = values[valid.argmax(axis=0)[has_data], np.flatnonzero(has_data)]
+    if init_cash is None:
+        return first
+    if isinstance(init_cash, Mapping):
+        given = np.array([init_cash.get(name) or np.nan for name in matrix.columns], dtype=float)
+        return np.where(np.isnan(given), first, given)
+    return np.full(values.shape[1], float(init_cash)) if init_cash else first
+
+
+def _filled_curve(matrix: pd.DataFrame, bases: np.ndarray) -> np.ndarray:
+    """
+    (1 + T) x N curve: the base row, then NAVs carried forward across gaps
+
+    Dates before a run starts take its base, dates after it ends keep the
+    last NAV, so neither moves the drawdown nor the final value.
+    """
+    filled = matrix.ffill().to_numpy(dtype=float)
+    filled = np.where(np.isnan(filled), bases, filled)
+    return np.vstack([bases, filled])
+
+
+def drawdowns(matrix: pd.DataFrame, init_cash: InitCash = None) -> pd.DataFrame:
+    """Drawdown from the running max NAV per date and run (same shape as matrix)"""
+    curve = _filled_curve(matrix, _bases(matrix, init_cash))
+    drawdown = curve / np.maximum.accumulate(curve, axis=0) - 1
+    return pd.DataFrame(drawdown[1:], index=matrix.index, columns=matrix.columns)
+
+
+def nav_metrics(matrix: pd.DataFrame, init_cash: InitCash = None) -> pd.DataFrame:
+    """
+    NAV-based metrics of every run in a date x run matrix
+
+    Args:
+        matrix: Output of nav_matrix()
+        init_cash: Initial capital, one value for all runs or run -> value
+                   (default: each run's first NAV)
+
+    Returns:
+        DataFrame indexed by run with NAV_METRICS columns (runs without
+        data report zeros)
+    """
+    values = matrix.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    bases = _bases(matrix, init_cash)
+    curve = _filled_curve(matrix, bases)
+    n_days = valid.sum(axis=0)
+    final_nav = curve[-1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = final_nav / bases
+        total_return = growth - 1
+        years = n_days / TRADING_DAYS_PER_YEAR
+        annual_return = np.where((growth > 0) & (years > 0), np.power(growth, 1 / years) - 1, 0.0)
+        max_drawdown = (curve / np.maximum.accumulate(curve, axis=0) - 1).min(axis=0)
+
+        # Only the days a run actually recorded count as returns
+        returns = np.where(valid, np.diff(curve, axis=0) / curve[:-1], np.nan)
+        mean = np.nansum(returns, axis=0) / np.maximum(n_days, 1)
+        sq = np.nansum((returns - mean) ** 2, axis=0)
+        std = np.where(n_days > 1, np.sqrt(sq / np.maximum(n_days - 1, 1)), 0.0)
+        sharpe = np.where(std > 0, mean / std * np.sqrt(TRADING_DAYS_PER_YEAR), 0.0)
+        calmar = np.where(max_drawdown < 0, annual_return / -max_drawdown, 0.0)
+
+    result = pd.DataFrame({
+        "n_days": n_days.astype(int),
+        "final_nav": final_nav,
+        "total_return": total_return,
+        "annual_return": annual_return,
+        "max_drawdown": max_drawdown,
+        "sharpe_ratio": sharpe,
+        "calmar_ratio": calmar,
+    }, index=matrix.columns)
+    return result.fillna(0.0)
+
+
+def _stack_trades(trades: Mapping[str, Optional[pd.DataFrame]], runs) -> pd.DataFrame:
+    """All trade ledgers in one frame with a categorical `run` column"""
+    frames = [df.assign(run=name) for name, df in trades.items() if df is not None and not df.empty]
+    if not frames:
+        return pd.DataFrame({"run": pd.Categorical([], categories=list(runs)), "net_pnl": []})
+    stacked = pd.concat(frames, ignore_index=True)
+    stacked["run"] = pd.Categorical(stacked["run"], categories=list(runs))
+    return stacked
+
+
+def trade_metrics(trades: Mapping[str, Optional[pd.DataFrame]], runs=None) -> pd.DataFrame:
+    """
+    Trade-ledger metrics of every run
+
+    Args:
+        trades: Run name -> closed trades with a `net_pnl` column
+        runs: Runs to report, in order (default: trades keys)
+
+    Returns:
+        DataFrame indexed by run with TRADE_METRICS columns; profit_loss_ratio
+        is the average win over the average loss (0 when either is missing)
+    """
+    runs = list(trades) if runs is None else list(runs)
+    stacked = _stack_trades(trades, runs)
+    codes = stacked["run"].cat.codes.to_numpy()
+    keep = codes >= 0
+    codes = codes[keep]
+    pnl = stacked["net_pnl"].to_numpy(dtype=float)[keep]
+    n = len(runs)
+
+    win, loss = pnl > 0, pnl < 0
+    total = np.bincount(codes, minlength=n)
+    wins = np.bincount(codes, weights=win, minlength=n)
+    losses = np.bincount(codes, weights=loss, minlength=n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        win_rate = np.where(total > 0, wins / total, 0.0)
+        avg_win = np.where(wins > 0, np.bincount(codes, weights=np.where(win, pnl, 0), minlength=n) / wins, 0.0)
+        avg_loss = np.where(losses > 0, np.bincount(codes, weights=np.where(loss, pnl, 0), minlength=n) / losses, 0.0)
+        ratio = np.where((avg_win > 0) & (avg_loss < 0), avg_win / -avg_loss, 0.0)
+
+    return pd.DataFrame({
+        "total_trades": total.astype(int),
+        "winning_trades": wins.astype(int),
+        "losing_trades": losses.astype(int),
+        "win_rate": win_rate,
+        "avg_win": avg_win,
+        "avg_loss": avg_loss,
+        "profit_loss_ratio": ratio,
+    }, index=pd.Index(runs))
+
+
+def monthly_returns(matrix: pd.DataFrame, init_cash: InitCash = None) -> pd.DataFrame:
+    """
+    Month-end to month-end NAV returns
+
+    Args:
+        matrix: Output of nav_matrix() (datetime index)
+        init_cash: As in nav_metrics(); the first month is measured from it
+
+    Returns:
+        DataFrame indexed by month ("YYYY-MM"), one column per run; NaN for
+        months a run has no data in
+    """
+    if matrix.empty:
+        return pd.DataFrame(columns=matrix.columns)
+    bases = _bases(matrix, init_cash)
+    curve = _filled_curve(matrix, bases)[1:]
+    months = matrix.index.to_period("M")
+    last = np.r_[months[1:] != months[:-1], True]
+    month_end = curve[last]
+    prev = np.vstack([bases, month_end[:-1]])
+    active = pd.DataFrame(~matrix.isna().to_numpy(), index=months).groupby(level=0).any().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.where(active, month_end / prev - 1, np.nan)
+    return pd.DataFrame(returns, index=months[last].astype(str), columns=matrix.columns)
+
+
+def exit_reason_breakdown(trades: Mapping[str, Optional[pd.DataFrame]], runs=None,
+                          column: str = "exit_reason") -> pd.DataFrame:
+    """
+    Trade count per exit reason and run
+
+    Returns:
+        DataFrame indexed by exit reason (most frequent first), one column per run
+    """
+    runs = list(trades) if runs is None else list(runs)
+    stacked = _stack_trades(trades, runs)
+    if column not in stacked.columns or stacked.empty:
+        return pd.DataFrame(columns=runs, dtype=int)
+    counts = pd.crosstab(stacked[column], stacked["run"], dropna=False).reindex(columns=runs, fill_value=0)
+    counts = counts.loc[counts.sum(axis=1).sort_values(ascending=False, kind="stable").index]
+    counts.columns.name = None
+    return counts.astype(int)
+
+
+def compare_runs(matrix: pd.DataFrame, trades: Optional[Mapping[str, Optional[pd.DataFrame]]] = None,
+                 init_cash: InitCash = None) -> pd.DataFrame:
+    """
+    Comparison table of several runs
+
+    Args:
+        matrix: Date x run NAV matrix (nav_matrix())
+        trades: Run name -> closed trades (optional)
+        init_cash: Initial capital, one value or run -> value (default: first NAV)
+
+    Returns:
+        DataFrame indexed by run with NAV_METRICS + TRADE_METRICS columns
+    """
+    table = nav_metrics(matrix, init_cash)
+    return table.join(trade_metrics(trades or {}, matrix.columns))
+
+
+def summarize_portfolio(portfolio_df: pd.DataFrame, trades_df: Optional[pd.DataFrame] = None,
+                        init_cash: Optional[float] = None) -> Dict[str, float]:
+    """
+    Summarize one backtest run
+
+    Args:
+        portfolio_df: Daily portfolio with `nav` column
+        trades_df: Closed trades with `net_pnl` column (optional)
+        init_cash: Starting capital (default: first NAV)
+
+    Returns:
+        Dict of metrics (NaN-free; empty runs report zeros)
+    """
+    if portfolio_df is None or portfolio_df.empty:
+        metrics = {name: 0.0 for name in NAV_METRICS}
+        metrics.update(n_days=0, final_nav=float(init_cash or 0.0))
+    else:
+        matrix = pd.DataFrame({"run": portfolio_df["nav"].to_numpy(dtype=float)})
+        metrics = nav_metrics(matrix, init_cash).iloc[0].to_dict()
+        metrics["n_days"] = int(metrics["n_days"])
+    stats = trade_metrics({"run": trades_df}).iloc[0].to_dict()
+    metrics.update((name, stats[name]) for name in TRADE_METRICS)
+    for name in ("total_trades", "winning_trades", "losing_trades"):
+        metrics[name] = int(metrics[name])
+    return {name: (value if isinstance(value, int) else float(value)) for name, value in metrics.items()}
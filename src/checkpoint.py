@@ -0,0 +1,152 @@
+"""
+End-of-day checkpoints for resuming backtests incrementally
+"""
+import logging
+import os
+import pickle
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Tuple
+
+from result_cache import config_hash
+
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+
+
+def capture_engine_state(engine, extra_attrs: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Capture end-of-day state of a BacktestEngine
+
+    Trades and positions are stored as plain attribute dicts, so a checkpoint
+    does not depend on the module the engine class was loaded from.
+
+    Args:
+        engine: Engine instance (cash / positions / trades / daily_portfolio / stats)
+        extra_attrs: Additional state attributes, e.g. pending_buy / pending_signals
+
+    Returns:
+        State dict
+    """
+    state = {
+        "checkpoint_version": CHECKPOINT_VERSION,
+        "created_at": datetime.now().isoformat(),
+        "strategy": engine.strategy.get("name"),
+        "config_hash": config_hash(engine.config),
+        "last_date": engine.last_date,
+        "cash": engine.cash,
+        "positions": [
+            {"trade": dict(vars(pos.trade)), "days_held": pos.days_held}
+            for pos in engine.positions.values()
+        ],
+        "trades": [dict(vars(t)) for t in engine.trades],
+        "daily_portfolio": list(engine.daily_portfolio),
+        "stats": dict(engine.stats),
+        "extra": {},
+    }
+    for attr in extra_attrs:
+        value = getattr(engine, attr)
+        state["extra"][attr] = dict(value) if isinstance(value, dict) else value
+    return state
+
+
+def restore_engine_state(engine, state: Dict[str, Any], trade_cls, position_cls,
+                         extra_attrs: Iterable[str] = ()):
+    """
+    Restore engine state captured by capture_engine_state
+
+    Args:
+        engine: Freshly initialized engine
+        state: State dict
+        trade_cls: Trade class of the engine module
+        position_cls: Position class of the engine module
+        extra_attrs: Additional state attributes to restore
+
+    Raises:
+        ValueError: If the checkpoint was produced by a different config
+    """
+    if state.get("checkpoint_version") != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version: {state.get('checkpoint_version')}")
+    if state.get("config_hash") != config_hash(engine.config):
+        raise ValueError(
+            f"Checkpoint config mismatch for {state.get('strategy')}: "
+            "params/backtest settings changed, rerun without --resume"
+        )
+
+    def make_trade(attrs: Dict[str, Any]):
+        trade = trade_cls.__new__(trade_cls)
+        trade.__dict__.update(attrs)
+        return trade
+
+    engine.cash = state["cash"]
+    engine.last_date = state["last_date"]
+    engine.trades = [make_trade(t) for t in state["trades"]]
+    engine.daily_portfolio = list(state["daily_portfolio"])
+    engine.stats = defaultdict(int, state["stats"])
+
+    engine.positions = {}
+    for item in state["positions"]:
+        pos = position_cls(make_trade(item["trade"]))
+        pos.days_held = item["days_held"]
+        engine.positions[pos.code] = pos
+
+    for attr in extra_attrs:
+        if attr in state["extra"]:
+            setattr(engine, attr, state["extra"][attr])
+
+
+def save_checkpoint(path: str, state: Dict[str, Any]):
+    """
+    Write checkpoint atomically
+
+    Args:
+        path: Checkpoint file path
+        state: State dict
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    logger.info(f"Checkpoint saved: {path} (last_date={state.get('last_date')})")
+
+
+def load_checkpoint(path: str) -> Dict[str, Any]:
+    """
+    Load checkpoint
+
+    Args:
+        path: Checkpoint file path
+
+    Returns:
+        State dict
+    """
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def compare_ledgers(frames_a: Tuple[Any, Any], frames_b: Tuple[Any, Any]) -> Tuple[bool, str]:
+    """
+    Check that two (trades_df, portfolio_df) results are identical
+
+    Args:
+        frames_a: Result of the resumed run
+        frames_b: Result of the full replay
+
+    Returns:
+        (identical, message)
+    """
+    import pandas as pd
+
+    for label, a, b in (("trades", frames_a[0], frames_b[0]), ("portfolio", frames_a[1], frames_b[1])):
+        try:
+            pd.testing.assert_frame_equal(
+                a.reset_index(drop=True), b.reset_index(drop=True), check_exact=True
+            )
+        except AssertionError as e:
+            return False, f"{label} differ: {e}"
+    return True, f"identical ({len(frames_a[0])} trades, {len(frames_a[1])} days)"
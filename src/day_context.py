@@ -0,0 +1,211 @@
+"""
+Per-day feature slices and code lookups shared across strategy engines
+"""
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from feature_store import widen_frame
+from hot_rank_index import HotRankIndex
+
+
+class DayContext:
+    """One trading day of the feature panel (T, T-1, T-2 slices)"""
+
+    def __init__(self, date: pd.Timestamp, today: pd.DataFrame,
+                 prev: Optional[pd.DataFrame] = None, prev2: Optional[pd.DataFrame] = None,
+                 prev_date: Optional[pd.Timestamp] = None, prev2_date: Optional[pd.Timestamp] = None,
+                 hot_rank_index: Optional[HotRankIndex] = None):
+        """
+        Args:
+            date: Trading date (T)
+            today: Rows of day T
+            prev: Rows of day T-1 (None on the first day of the calendar)
+            prev2: Rows of day T-2 (empty DataFrame when unavailable)
+            prev_date: Date of T-1
+            prev2_date: Date of T-2
+            hot_rank_index: Precomputed top-N index (None: filter the slices)
+        """
+        self.date = date
+        self.today = today
+        self.prev = prev
+        self.prev2 = prev2 if prev2 is not None else pd.DataFrame()
+        self.prev_date = prev_date
+        self.prev2_date = prev2_date
+        self.hot_rank_index = hot_rank_index
+        # Scratch space for per-day derived data shared by several engines
+        self.cache: Dict[str, object] = {}
+        self._positions: Dict[str, Dict[str, int]] = {}
+
+    def _date(self, which: str) -> Optional[pd.Timestamp]:
+        return {"today": self.date, "prev": self.prev_date, "prev2": self.prev2_date}[which]
+
+    def _frame(self, which: str) -> Optional[pd.DataFrame]:
+        if which == "today":
+            return self.today
+        if which == "prev":
+            return self.prev
+        if which == "prev2":
+            return self.prev2
+        raise ValueError(f"Unknown slice: {which}")
+
+    def positions(self, which: str = "today") -> Dict[str, int]:
+        """
+        code -> row position in the slice (first occurrence wins)
+
+        Args:
+            which: today / prev / prev2
+        """
+        index = self._positions.get(which)
+        if index is None:
+            frame = self._frame(which)
+            index = {}
+            if frame is not None and not frame.empty:
+                for i, code in enumerate(frame["code"].tolist()):
+                    index.setdefault(code, i)
+            self._positions[which] = index
+        return index
+
+    def row(self, code: str, which: str = "today") -> Optional[pd.Series]:
+        """
+        Row of one stock, equivalent to `df[df['code'] == code].iloc[0]`
+
+        Args:
+            code: Stock code
+            which: today / prev / prev2
+
+        Returns:
+            Row Series, or None if the stock has no row that day
+        """
+        i = self.positions(which).get(code)
+        if i is None:
+            return None
+        return self._frame(which).iloc[i]
+
+    def aligned(self, column: str, which: str = "prev") -> np.ndarray:
+        """
+        Column of an earlier slice aligned with today's rows (cached)
+
+        Args:
+            column: Column name, e.g. close
+            which: prev / prev2
+
+        Returns:
+            float array of len(today); NaN where the stock has no row in that slice
+        """
+        key = ("aligned", column, which)
+        values = self.cache.get(key)
+        if values is None:
+            frame = self._frame(which)
+            values = np.full(len(self.today), np.nan)
+            if frame is not None and not frame.empty:
+                positions = self.positions(which)
+                idx = np.array([positions.get(c, -1) for c in self.today["code"].tolist()], dtype=np.int64)
+                found = idx >= 0
+                values[found] = frame[column].to_numpy(dtype=float)[idx[found]]
+            self.cache[key] = values
+        return values
+
+    def hot_rank_rows(self, n: int, which: str = "today") -> np.ndarray:
+        """
+        Row positions of the stocks with 1 <= hot_rank <= n in a slice (cached)
+
+        Uses the precomputed index when it covers the date and its row ids
+        match the slice, otherwise filters the slice's hot_rank column.
+
+        Args:
+            n: Rank limit
+            which: today / prev / prev2
+
+        Returns:
+            int array of row positions in the slice's row order
+        """
+        key = ("hot_rank_rows", n, which)
+        rows = self.cache.get(key)
+        if rows is not None:
+            return rows
+        frame = self._frame(which)
+        rows = None
+        if frame is None or frame.empty:
+            rows = np.empty(0, dtype=np.int64)
+        elif self.hot_rank_index is not None and n <= self.hot_rank_index.max_rank \
+                and self.hot_rank_index.has_date(self._date(which)):
+            _, codes, index_rows = self.hot_rank_index.top(self._date(which), n)
+            index_rows = index_rows.astype(np.int64)
+            if (index_rows < len(frame)).all() and \
+                    (frame["code"].to_numpy()[index_rows].astype(str) == codes).all():
+                rows = np.sort(index_rows)
+        if rows is None:
+            ranks = frame["hot_rank"].to_numpy(dtype=float)
+            with np.errstate(invalid="ignore"):
+                rows = np.flatnonzero((ranks >= 1) & (ranks <= n))
+        self.cache[key] = rows
+        return rows
+
+    def top_hot_rank(self, n: int, which: str = "today") -> pd.DataFrame:
+        """
+        Rows of a slice with 1 <= hot_rank <= n, in the slice's row order
+
+        Equivalent to `frame[frame['hot_rank'] <= n]` for positive ranks.
+
+        Args:
+            n: Rank limit
+            which: today / prev / prev2
+        """
+        frame = self._frame(which)
+        if frame is None:
+            return pd.DataFrame()
+        return frame.iloc[self.hot_rank_rows(n, which)]
+
+    def close_of(self, code: str) -> Optional[float]:
+        """Today's close of one stock (None if missing)"""
+        i = self.positions("today").get(code)
+        if i is None:
+            return None
+        return self.today["close"].iat[i]
+
+
+def trading_dates(features_df: pd.DataFrame) -> List[pd.Timestamp]:
+    """Sorted unique trading dates of the panel"""
+    return [pd.Timestamp(d) for d in sorted(features_df["date"].unique())]
+
+
+def iter_day_contexts(features_df: pd.DataFrame,
+                      dates: Optional[List[pd.Timestamp]] = None,
+                      hot_rank_index: Optional[HotRankIndex] = None) -> Iterator[DayContext]:
+    """
+    Iterate the panel day by day
+
+    The panel is stably sorted by date once, so each day is a contiguous
+    slice and rows keep their original (file) order within the day. Slices of
+    a compact panel (see feature_store) are widened to float64 per day.
+
+    Args:
+        features_df: Feature panel
+        dates: Calendar to iterate (default: all dates of the panel).
+               T-1 / T-2 refer to the previous entries of this list.
+        hot_rank_index: Precomputed top-N index shared by the contexts
+
+    Yields:
+        DayContext
+    """
+    if not features_df["date"].is_monotonic_increasing:
+        features_df = features_df.sort_values("date", kind="stable")
+    date_values = features_df["date"].values
+    if dates is None:
+        dates = trading_dates(features_df)
+
+    def day_slice(d: pd.Timestamp) -> pd.DataFrame:
+        key = np.datetime64(d, "ns")
+        lo = np.searchsorted(date_values, key, side="left")
+        hi = np.searchsorted(date_values, key, side="right")
+        return widen_frame(features_df.iloc[lo:hi])
+
+    prev = prev2 = None
+    prev_date = prev2_date = None
+    for d in dates:
+        today = day_slice(d)
+        yield DayContext(d, today, prev, prev2, prev_date, prev2_date, hot_rank_index)
+        prev2, prev2_date = prev, prev_date
+        prev, prev_date = today, d
@@ -0,0 +1,172 @@
+"""
+Buffered structured event sink for backtest trade logs
+"""
+import json
+import logging
+import math
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+# off: no events, trades: BUY/SELL/SKIP_BUY only, full: everything incl. HOLD
+EVENT_LEVELS = {"off": 0, "trades": 1, "full": 2}
+
+# Events that are only recorded at the "full" level
+FULL_ONLY_EVENTS = {"HOLD"}
+
+EVENT_FORMATS = ("jsonl", "parquet")
+
+
+def _to_plain(value: Any) -> Any:
+    """Convert timestamps / numpy scalars / NA into JSON-friendly values"""
+    if value is None or isinstance(value, (str, bool, int)):
+        return value
+    if isinstance(value, float):
+        return None if math.isnan(value) else value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        try:
+            return _to_plain(value.item())
+        except (ValueError, TypeError):
+            pass
+    try:
+        # pd.NA / NaT
+        if value != value:  # noqa: PLR0124
+            return None
+    except TypeError:
+        return None
+    return str(value)
+
+
+class TradeEventLog:
+    """Collect trade events in memory and flush them in batches"""
+
+    def __init__(self, path_stem: str, level: str = "full", fmt: str = "jsonl",
+                 flush_every: int = 1000):
+        """
+        Initialize event log
+
+        Args:
+            path_stem: Output path without suffix (e.g. data/backtest/logs/trades_xxx)
+            level: off / trades / full
+            fmt: jsonl or parquet
+            flush_every: Number of buffered events that triggers a flush
+        """
+        if level not in EVENT_LEVELS:
+            raise ValueError(f"Unknown event level: {level} (expected one of {list(EVENT_LEVELS)})")
+        if fmt not in EVENT_FORMATS:
+            raise ValueError(f"Unknown event format: {fmt} (expected one of {EVENT_FORMATS})")
+
+        self.level = level
+        self.fmt = fmt
+        self.flush_every = max(int(flush_every), 1)
+        self._level_no = EVENT_LEVELS[level]
+        self._buffer: List[Dict[str, Any]] = []
+        self._n_parts = 0
+        self.n_events = 0
+
+        path_stem = Path(path_stem)
+        if fmt == "jsonl":
+            self.path: Optional[Path] = path_stem.with_suffix(".log")
+        else:
+            # Parquet 按批次写成分片文件，放在同名目录下
+            self.path = path_stem
+        if not self.enabled:
+            self.path = None
+
+    @classmethod
+    def from_config(cls, config: dict, path_stem: str, level: Optional[str] = None) -> "TradeEventLog":
+        """
+        Build event log from the `logging` section of a strategy config
+
+        Args:
+            config: Merged strategy config
+            path_stem: Output path without suffix
+            level: Optional override of `logging.event_level`
+        """
+        log_cfg = config.get("logging", {}) or {}
+        if level is None:
+            level = log_cfg.get("event_level")
+        if level is None:
+            # 兼容旧配置：log_trades=false 等价于关闭
+            level = "full" if log_cfg.get("log_trades", True) else "off"
+        return cls(
+            path_stem,
+            level=level,
+            fmt=log_cfg.get("event_format", "jsonl"),
+            flush_every=log_cfg.get("event_flush_every", 1000),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any event is recorded"""
+        return self._level_no > 0
+
+    @property
+    def full(self) -> bool:
+        """Whether per-day / per-fill detail is recorded"""
+        return self._level_no >= EVENT_LEVELS["full"]
+
+    def wants(self, event: str) -> bool:
+        """Check whether an event type is recorded at the current level"""
+        if self._level_no == 0:
+            return False
+        if event in FULL_ONLY_EVENTS:
+            return self._level_no >= EVENT_LEVELS["full"]
+        return True
+
+    def emit(self, event: str, **fields):
+        """
+        Buffer one event (serialization is deferred until flush)
+
+        Args:
+            event: Event type (BUY / SELL / HOLD / SKIP_BUY ...)
+            **fields: Event payload
+        """
+        if not self.wants(event):
+            return
+        self._buffer.append({"timestamp": datetime.now(), "event": event, **fields})
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Write buffered events to disk"""
+        if not self._buffer or self.path is None:
+            self._buffer.clear()
+            return
+
+        records = [{k: _to_plain(v) for k, v in rec.items()} for rec in self._buffer]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        if self.fmt == "jsonl":
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(json.dumps(r, ensure_ascii=False) for r in records))
+                f.write("\n")
+        else:
+            import pandas as pd
+
+            df = pd.DataFrame(records)
+            # 同一列可能混合数值与字符串（如 reason），统一转为字符串避免写入失败
+            for col in df.columns:
+                if df[col].dtype == object:
+                    types = {type(v) for v in df[col].dropna()}
+                    if len(types) > 1:
+                        df[col] = df[col].map(lambda v: None if v is None else str(v))
+            self.path.mkdir(parents=True, exist_ok=True)
+            part_file = self.path / f"part-{self._n_parts:05d}.parquet"
+            df.to_parquet(part_file, index=False)
+            self._n_parts += 1
+
+        self.n_events += len(records)
+        self._buffer.clear()
+
+    def close(self):
+        """Flush remaining events"""
+        self.flush()
+        if self.path is not None and self.n_events:
+            logger.info(f"Trade events written: {self.path} ({self.n_events} events)")
@@ -0,0 +1,113 @@
+"""
+Formatted Excel export of trade tables (streaming, shared styles)
+
+The workbook is written in openpyxl's write-only mode: rows are streamed as
+plain values and all formatting comes from one named header style plus
+worksheet-level conditional formatting (banded rows, grid borders, PnL
+coloring), so no style objects are created per cell. Column widths are
+computed from the DataFrame before any row is written.
+"""
+from pathlib import Path
+from typing import Iterable, Union
+
+import numpy as np
+import pandas as pd
+
+HEADER_STYLE = "trade_header"
+MAX_COLUMN_WIDTH = 50
+
+
+def column_widths(df: pd.DataFrame, max_width: int = MAX_COLUMN_WIDTH) -> np.ndarray:
+    """Display width per column: longest header / value text + 2, capped at max_width"""
+    if df.empty:
+        lengths = np.zeros(len(df.columns), dtype=int)
+    else:
+        lengths = df.astype(str).apply(lambda s: s.str.len().max()).to_numpy(dtype=int)
+    header = np.array([len(str(c)) for c in df.columns], dtype=int)
+    return np.minimum(np.maximum(lengths, header) + 2, max_width)
+
+
+def _percent_text(s: pd.Series) -> pd.Series:
+    """Ratio column -> "12.34%" text (non-numeric values unchanged)"""
+    numeric = pd.to_numeric(s, errors="coerce")
+    text = (numeric * 100).map("{:.2f}%".format)
+    return text.where(numeric.notna(), s)
+
+
+def write_trades_excel(df: pd.DataFrame, filepath: Union[str, Path], sheet_name: str = "交易明细",
+                       pnl_column: str = "net_pnl", percent_columns: Iterable[str] = ("net_pnl_pct",)) -> bool:
+    """
+    Write a trade table to a formatted .xlsx file
+
+    Args:
+        df: Trade table (written as is, in column order)
+        filepath: Output path
+        sheet_name: Worksheet name
+        pnl_column: Column colored green (> 0) / red (< 0)
+        percent_columns: Ratio columns written as percentage text
+
+    Returns:
+        False when openpyxl is not installed, True otherwise
+    """
+    try:
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.formatting.rule import CellIsRule, FormulaRule
+        from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+        from openpyxl.utils import get_column_letter
+    except ImportError:
+        return False
+
+    df = df.copy()
+    for col in percent_columns:
+        if col in df.columns:
+            df[col] = _percent_text(df[col])
+    widths = column_widths(df)
+
+    side = Side(style="thin", color="CCCCCC")
+    border = Border(left=side, right=side, top=side, bottom=side)
+
+    wb = Workbook(write_only=True)
+    header_style = NamedStyle(
+        name=HEADER_STYLE,
+        fill=PatternFill(start_color="366092", end_color="366092", fill_type="solid"),
+        font=Font(bold=True, color="FFFFFF", size=11),
+        alignment=Alignment(horizontal="center", vertical="center"),
+        border=border,
+    )
+    wb.add_named_style(header_style)
+    ws = wb.create_sheet(sheet_name)
+
+    # 列宽、冻结首行、条件格式须在写入行之前设置
+    n_rows, n_cols = len(df), len(df.columns)
+    for i, width in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(i)].width = int(width)
+    ws.freeze_panes = "A2"
+    if n_rows > 0:
+        last_col = get_column_letter(n_cols)
+        data_range = f"A2:{last_col}{n_rows + 1}"
+        ws.conditional_formatting.add(data_range, FormulaRule(
+            formula=["MOD(ROW(),2)=0"], fill=PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")))
+        ws.conditional_formatting.add(data_range, FormulaRule(formula=["TRUE"], border=border))
+        if pnl_column in df.columns:
+            letter = get_column_letter(df.columns.get_loc(pnl_column) + 1)
+            pnl_range = f"{letter}2:{letter}{n_rows + 1}"
+            ws.conditional_formatting.add(pnl_range, CellIsRule(
+                operator="greaterThan", formula=["0"], font=Font(color="00AA00", bold=True)))
+            ws.conditional_formatting.add(pnl_range, CellIsRule(
+                operator="lessThan", formula=["0"], font=Font(color="FF0000", bold=True)))
+
+    header = []
+    for name in df.columns:
+        cell = WriteOnlyCell(ws, value=str(name))
+        cell.style = HEADER_STYLE
+        header.append(cell)
+    ws.append(header)
+
+    # 缺失值写为空单元格
+    values = df.astype(object).where(df.notna(), None)
+    for row in values.itertuples(index=False, name=None):
+        ws.append(row)
+
+    wb.save(filepath)
+    return True
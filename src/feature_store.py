@@ -0,0 +1,456 @@
+"""
+Compact on-disk / in-memory schema of the daily feature panel
+
+On disk (written by prepare_features.py):
+  - code / name: dictionary-encoded strings (pandas category in memory)
+  - traded prices and counts: float32
+  - limit prices and ratios compared against strategy thresholds: float64
+  - hot ranks: nullable int16 (float32 in memory so NaN keeps working)
+  - flags: bool (bit-packed by Parquet)
+  - date: date32 (int32 day numbers)
+
+In memory the whole panel stays compact. iter_day_contexts() widens each
+day's slice with widen_frame(), so engines still compute in float64 on exact
+two-decimal prices and existing float64 feature files behave as before.
+
+The panel is stored either as a single file (write_features) or as a
+Hive-partitioned dataset directory (write_feature_dataset):
+
+  daily_features_v1.parquet/
+    _manifest.json                      per-partition fingerprints
+    year=2025/month=03/part-0.parquet   sorted by (date, hot_rank, code)
+
+Within a partition no row group spans two days, so "top N hot rank on day D"
+reads the first row group of that day only. load_features() accepts both
+layouts and always returns rows in (date, code) order.
+"""
+import hashlib
+import json
+import re
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+CATEGORY_COLUMNS = ("code", "name")
+# Exchange prices have two decimals, so float32 round-trips them exactly after rounding
+PRICE_COLUMNS = ("open", "high", "low", "close", "close_prev")
+# Small integer counts are exact in float32
+FLOAT32_COLUMNS = ("one_word_board_5d",)
+# Unrounded ratios that filter_universe compares to hard thresholds (amplitude <= 15,
+# max_drop_5d >= -20, turnover <= 40, ...): float32 would move boundary rows across them
+# Limit prices are k * price_precision, often one ulp off the two-decimal double
+# (0.35000000000000003), so rounding them back would change high >= limit_up checks
+FLOAT64_COLUMNS = ("turnover", "turnover_prev", "amplitude_prev", "pct_change_prev",
+                   "intraday_drop", "max_drop_5d", "cum_return_2d", "limit_up_price", "limit_down_price")
+RANK_COLUMNS = ("hot_rank", "hot_rank_prev")
+INT16_COLUMNS = ("days_since_listing",)
+BOOL_COLUMNS = ("is_limit_up", "is_limit_down", "is_st", "is_tradable", "is_new_ipo")
+# volume / amount / amount_prev stay float64 too: VWAP and the amount filters need the precision
+
+PRICE_DECIMALS = 2
+
+DATASET_SORT = ("date", "hot_rank", "code")
+DATASET_MANIFEST = "_manifest.json"
+# Bumped when stored column types change; older datasets need a full rebuild
+# (2: limit prices and threshold ratios moved from float32 to float64)
+DATASET_SCHEMA_VERSION = 2
+DATASET_ROW_GROUP_SIZE = 1000
+_PARTITION_RE = re.compile(r"year=(\d{4})/month=(\d{1,2})/[^/]+\.parquet$")
+
+
+def compact_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert a feature frame to the compact in-memory dtypes
+
+    Args:
+        df: Feature frame (any subset of the feature columns)
+
+    Returns:
+        New DataFrame with compact dtypes; unknown columns are left unchanged
+    """
+    dtypes = {}
+    for col in df.columns:
+        if col in CATEGORY_COLUMNS:
+            dtypes[col] = "category"
+        elif col in PRICE_COLUMNS or col in FLOAT32_COLUMNS or col in RANK_COLUMNS:
+            dtypes[col] = "float32"
+        elif col in FLOAT64_COLUMNS:
+            dtypes[col] = "float64"
+        elif col in INT16_COLUMNS and df[col].notna().all():
+            dtypes[col] = "int16"
+    df = df.astype(dtypes)
+    for col in BOOL_COLUMNS:
+        if col in df.columns and df[col].dtype != bool:
+            df[col] = df[col].fillna(False).astype(bool)
+    if "date" in df.columns:
+        df["date"] = pd.to_datetime(df["date"]).astype("datetime64[ns]")
+    return df
+
+
+def is_compact(df: pd.DataFrame) -> bool:
+    """Whether the frame uses compact dtypes (float32 or category columns)"""
+    return any(dtype == np.float32 or isinstance(dtype, pd.CategoricalDtype) for dtype in df.dtypes)
+
+
+def widen_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Upcast a compact frame to float64 / object columns, rounding prices back to two decimals
+
+    Args:
+        df: Feature frame (typically one day's slice)
+
+    Returns:
+        The same frame when it is not compact, otherwise a widened copy
+    """
+    if not is_compact(df):
+        return df
+    columns = {}
+    for col in df.columns:
+        s = df[col]
+        if s.dtype == np.float32:
+            values = s.to_numpy(dtype=np.float64)
+            if col in PRICE_COLUMNS:
+                values = np.round(values, PRICE_DECIMALS)
+            columns[col] = pd.Series(values, index=s.index, name=col)
+        elif isinstance(s.dtype, pd.CategoricalDtype):
+            columns[col] = s.astype(object)
+        else:
+            columns[col] = s
+    return pd.DataFrame(columns, index=df.index)
+
+
+def to_arrow(df: pd.DataFrame) -> pa.Table:
+    """Compact frame -> Arrow table with int16 ranks and date32 dates"""
+    df = compact_features(df)
+    for col in RANK_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].round().astype("Int16")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if "date" in table.column_names:
+        i = table.column_names.index("date")
+        table = table.set_column(i, "date", table.column("date").cast(pa.date32()))
+    return table
+
+
+def write_features(df: pd.DataFrame, path: Union[str, Path], compression: str = "snappy",
+                   row_group_size: Optional[int] = None) -> Path:
+    """
+    Write a feature frame with the compact schema
+
+    Args:
+        df: Feature frame
+        path: Output Parquet file
+        compression: Parquet compression codec
+        row_group_size: Rows per row group (None: pyarrow default)
+
+    Returns:
+        Output path
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(to_arrow(df), path, compression=compression, row_group_size=row_group_size)
+    return path
+
+
+def _partition_name(year: int, month: int) -> str:
+    return f"year={year}/month={month:02d}"
+
+
+def partition_fingerprint(df: pd.DataFrame) -> str:
+    """Content hash of one partition's rows (column names, order and values)"""
+    h = hashlib.sha1("|".join(df.columns).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def read_dataset_manifest(root: Union[str, Path]) -> dict:
+    """Manifest of a partitioned feature dataset ({} when absent)"""
+    path = Path(root) / DATASET_MANIFEST
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def dataset_is_current(root: Union[str, Path]) -> bool:
+    """
+    Whether a feature store was written with the current column types
+
+    A dataset directory is checked by its manifest's schema_version (the
+    oldest version among its partitions), a single file by its Parquet schema
+    (no FLOAT64_COLUMNS stored as float32).
+    """
+    root = Path(root)
+    if root.is_file():
+        schema = pq.read_schema(root)
+        return not any(name in schema.names and schema.field(name).type == pa.float32()
+                       for name in FLOAT64_COLUMNS)
+    return read_dataset_manifest(root).get("schema_version") == DATASET_SCHEMA_VERSION
+
+
+def _sort_partition(df: pd.DataFrame) -> pd.DataFrame:
+    """Sort rows by (date, hot_rank, code); stocks without a rank go last within the day"""
+    by = [col for col in DATASET_SORT if col in df.columns]
+    df = df.sort_values(by, kind="stable", na_position="last").reset_index(drop=True)
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.remove_unused_categories()
+    return df
+
+
+def _write_partition(df: pd.DataFrame, path: Path, compression: str, row_group_size: int) -> None:
+    """Write one sorted partition, one day at a time so no row group spans two days"""
+    table = to_arrow(df)
+    dates = df["date"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1]])
+    ends = np.r_[starts[1:], len(df)]
+    tmp = path.with_suffix(".tmp")
+    with pq.ParquetWriter(tmp, table.schema, compression=compression) as writer:
+        for lo, hi in zip(starts, ends):
+            writer.write_table(table.slice(lo, hi - lo), row_group_size=row_group_size)
+    tmp.replace(path)
+
+
+def _migrate_single_file(df: pd.DataFrame, root: Path, compression: str,
+                         row_group_size: Optional[int]) -> Dict[str, int]:
+    """
+    Convert a single-file feature store at `root` into a dataset directory
+
+    All rows of the old file are kept (dates present in `df` are replaced by
+    the new rows). The old file is moved aside first and only deleted once
+    every partition has been written; on any error the partial directory is
+    removed, the file is put back and the error is re-raised.
+    """
+    legacy = root.with_name(root.name + ".migrating")
+    legacy_version = DATASET_SCHEMA_VERSION if dataset_is_current(root) else 1
+    stored = compact_features(pq.read_table(root).to_pandas(date_as_object=False))
+    new = compact_features(df)
+    stored = stored[~stored["date"].isin(new["date"])]
+    root.replace(legacy)
+    try:
+        # Old rows keep the old file's version, so months still holding them stay out of date
+        if not stored.empty:
+            write_feature_dataset(stored, root, compression, row_group_size, schema_version=legacy_version)
+        counts = write_feature_dataset(new, root, compression, row_group_size)
+    except BaseException:
+        shutil.rmtree(root, ignore_errors=True)
+        legacy.replace(root)
+        raise
+    legacy.unlink()
+    counts["migrated_rows"] = len(stored)
+    return counts
+
+
+def write_feature_dataset(df: pd.DataFrame, root: Union[str, Path], compression: str = "snappy",
+                          row_group_size: Optional[int] = None,
+                          schema_version: int = DATASET_SCHEMA_VERSION) -> Dict[str, int]:
+    """
+    Write / update a year/month partitioned feature dataset
+
+    Dates present in `df` replace the same dates in the stored partitions;
+    other stored dates and partitions are kept, so an incremental run only
+    touches the months it covers. A partition whose content fingerprint is
+    unchanged is not rewritten.
+
+    Every partition records the schema version of its rows (the oldest one
+    when new rows are merged into stored ones). The dataset's schema_version
+    is the oldest partition version, so a partial rewrite of an older dataset
+    does not mark it current.
+
+    Args:
+        df: Feature frame
+        root: Dataset directory; a single-file feature store at this path is
+              migrated into it (its rows are kept, see _migrate_single_file)
+        compression: Parquet compression codec
+        row_group_size: Max rows per row group (None: DATASET_ROW_GROUP_SIZE)
+        schema_version: Schema version the rows of `df` were computed with
+
+    Returns:
+        {"written": n, "unchanged": n, "partitions": n} counts, plus
+        "migrated_rows" when a single-file store was converted
+    """
+    root = Path(root)
+    interrupted = root.with_name(root.name + ".migrating")
+    if interrupted.is_file():
+        # A migration was killed before it finished: start it over from the old file
+        shutil.rmtree(root, ignore_errors=True)
+        interrupted.replace(root)
+    if root.is_file():
+        return _migrate_single_file(df, root, compression, row_group_size)
+    root.mkdir(parents=True, exist_ok=True)
+    row_group_size = row_group_size or DATASET_ROW_GROUP_SIZE
+    manifest = read_dataset_manifest(root)
+    partitions = manifest.get("partitions", {})
+    # Partitions written before versions were tracked per partition carry the dataset's version
+    prior_version = manifest.get("schema_version", 1)
+    for entry in partitions.values():
+        entry.setdefault("schema_version", prior_version)
+
+    df = compact_features(df)
+    dates = df["date"]
+    written = unchanged = 0
+    for (year, month), part in df.groupby([dates.dt.year, dates.dt.month], sort=True):
+        name = _partition_name(int(year), int(month))
+        path = root / name / "part-0.parquet"
+        version = schema_version
+        if path.exists():
+            stored_dates = pq.read_table(path, columns=["date"]).column("date").to_pandas()
+            stored_dates = pd.to_datetime(stored_dates).astype("datetime64[ns]")
+            if not stored_dates.isin(part["date"]).all():
+                stored = compact_features(pq.read_table(path).to_pandas(date_as_object=False))
+                stored = stored[~stored["date"].isin(part["date"])]
+                part = compact_features(pd.concat([stored, part], ignore_index=True))
+                version = min(version, partitions.get(name, {}).get("schema_version", prior_version))
+        part = _sort_partition(part)
+
+        fingerprint = partition_fingerprint(part)
+        if path.exists() and partitions.get(name, {}).get("fingerprint") == fingerprint:
+            partitions[name]["schema_version"] = version
+            unchanged += 1
+            continue
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_partition(part, path, compression, row_group_size)
+        partitions[name] = {
+            "file": path.relative_to(root).as_posix(),
+            "rows": len(part),
+            "dates": int(part["date"].nunique()),
+            "first_date": str(part["date"].min().date()),
+            "last_date": str(part["date"].max().date()),
+            "fingerprint": fingerprint,
+            "schema_version": version,
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        written += 1
+
+    manifest.update({
+        "schema_version": min((p["schema_version"] for p in partitions.values()), default=schema_version),
+        "partitioning": ["year", "month"],
+        "sort": list(DATASET_SORT),
+        "row_group_size": row_group_size,
+        "partitions": dict(sorted(partitions.items())),
+    })
+    with open(root / DATASET_MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return {"written": written, "unchanged": unchanged, "partitions": len(partitions)}
+
+
+def _dataset_files(root: Path, start_date: Optional[pd.Timestamp] = None,
+                   end_date: Optional[pd.Timestamp] = None) -> List[str]:
+    """Partition files of a dataset directory whose month overlaps [start_date, end_date]"""
+    lo = (start_date.year, start_date.month) if start_date is not None else (0, 0)
+    hi = (end_date.year, end_date.month) if end_date is not None else (9999, 12)
+    files = []
+    for path in sorted(root.rglob("*.parquet")):
+        match = _PARTITION_RE.search(path.relative_to(root).as_posix())
+        if match is None:
+            continue
+        if lo <= (int(match.group(1)), int(match.group(2))) <= hi:
+            files.append(str(path))
+    return files
+
+
+def _open_dataset(path: Union[str, Path], start_date: Optional[pd.Timestamp] = None,
+                  end_date: Optional[pd.Timestamp] = None) -> Optional[ds.Dataset]:
+    """Single feature file or the partitions of a dataset directory overlapping the window"""
+    path = Path(path)
+    if not path.is_dir():
+        return ds.dataset(str(path), format="parquet")
+    files = _dataset_files(path, start_date, end_date)
+    if not files:
+        return None
+    return ds.dataset(files, format="parquet")
+
+
+def _date_value(date_type: pa.DataType, date: pd.Timestamp) -> pa.Scalar:
+    """Filter scalar matching the date column type (date32 or timestamp)"""
+    if pa.types.is_date(date_type):
+        return pa.scalar(date.date(), type=date_type)
+    return pa.scalar(date.to_pydatetime(), type=date_type)
+
+
+def warm_start(path: Union[str, Path], start_date: pd.Timestamp, lookback_days: int) -> pd.Timestamp:
+    """
+    First date to read so that `lookback_days` trading days precede start_date
+
+    Only the date column of the rows before start_date is read.
+    """
+    dataset = _open_dataset(path, end_date=start_date)
+    if dataset is None:
+        return start_date
+    date_field = ds.field("date")
+    earlier = dataset.to_table(
+        columns=["date"],
+        filter=date_field < _date_value(dataset.schema.field("date").type, start_date),
+    )
+    dates = sorted(pd.to_datetime(pc.unique(earlier.column("date")).to_pandas()))
+    if not dates:
+        return start_date
+    return pd.Timestamp(dates[-min(lookback_days, len(dates))])
+
+
+def _date_code_order(df: pd.DataFrame) -> pd.DataFrame:
+    """Rows in (date, code) order, the order engines iterate a day's stocks in"""
+    if df.empty or "code" not in df.columns:
+        return df
+    codes = df["code"].cat.reorder_categories(sorted(df["code"].cat.categories))
+    order = np.lexsort((codes.cat.codes.to_numpy(), df["date"].to_numpy()))
+    df = df.assign(code=codes).iloc[order]
+    return df.reset_index(drop=True)
+
+
+def load_features(path: Union[str, Path], columns: Optional[Iterable[str]] = None,
+                  start_date: Optional[Union[str, pd.Timestamp]] = None,
+                  end_date: Optional[Union[str, pd.Timestamp]] = None,
+                  lookback_days: int = 0) -> pd.DataFrame:
+    """
+    Load the feature panel with compact dtypes
+
+    Works for compact files, partitioned datasets and older float64/string
+    feature files. Column and date filters are pushed down to the Parquet
+    reader: partitions outside the window are not opened and row groups whose
+    date statistics fall outside it are skipped.
+
+    Args:
+        path: Feature Parquet file or partitioned dataset directory
+        columns: Columns to read (None: all; date is always read, absent columns are skipped)
+        start_date: First date of the window (None: from the beginning)
+        end_date: Last date of the window (None: to the end)
+        lookback_days: Trading days before start_date to include as well,
+                       so T-1 / T-2 exist on the window's first day
+
+    Returns:
+        Feature panel (date as datetime64[ns]), rows in (date, code) order
+    """
+    start = pd.Timestamp(start_date) if start_date is not None else None
+    end = pd.Timestamp(end_date) if end_date is not None else None
+    if start is not None and lookback_days > 0:
+        start = warm_start(path, start, lookback_days)
+
+    dataset = _open_dataset(path, start, end)
+    if dataset is None:
+        return pd.DataFrame(columns=["date", *(columns or [])])
+    if columns is not None:
+        # Columns missing from older feature files are skipped (engines fill defaults)
+        available = set(dataset.schema.names)
+        columns = [col for col in dict.fromkeys(["date", *columns]) if col in available]
+
+    date_type = dataset.schema.field("date").type
+    date_field = ds.field("date")
+    condition = None
+    if start is not None:
+        condition = date_field >= _date_value(date_type, start)
+    if end is not None:
+        upper = date_field <= _date_value(date_type, end)
+        condition = upper if condition is None else condition & upper
+    table = dataset.to_table(columns=columns, filter=condition)
+    df = table.to_pandas(date_as_object=False)
+    return _date_code_order(compact_features(df))
@@ -0,0 +1,215 @@
+"""
+Intraday fill models shared by the backtest engines
+
+A fill model turns one trading day into an array of fill prices aligned with
+the rows of DayContext.today (NaN = cannot be filled that day). The array is
+computed once per day with vectorized OHLC arithmetic and stored in
+ctx.cache, so several strategies using the same model and parameters on the
+same day (multi-strategy runner) share it.
+
+Strategies pick a model with `params.fill_model`, either a name or a dict:
+
+    fill_model: "vwap"
+    fill_model: {type: "trigger", side: "up", trigger: 0.03}
+"""
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from security_master import GEM, STAR, board_mask, classify_code
+
+
+def _gem_star_mask(codes: pd.Series) -> np.ndarray:
+    """ChiNext / STAR rows, which use the wider trigger thresholds"""
+    return board_mask(codes, (GEM, STAR))
+
+
+class FillModel:
+    """Base class: subclasses implement compute(ctx)"""
+
+    name = "base"
+    columns = ()  # feature columns read by compute()
+    reason = "fill"  # reason recorded on BUY events
+    skip_reason = "no_fill"  # reason recorded when the model cannot fill
+
+    def __init__(self, **options):
+        self.options = options
+
+    def cache_key(self) -> tuple:
+        return ("fill", self.name) + tuple(sorted(self.options.items()))
+
+    def compute(self, ctx) -> np.ndarray:
+        raise NotImplementedError
+
+    def prices(self, ctx) -> np.ndarray:
+        """Fill prices aligned with ctx.today rows (cached per day)"""
+        key = self.cache_key()
+        prices = ctx.cache.get(key)
+        if prices is None:
+            prices = self.compute(ctx)
+            ctx.cache[key] = prices
+        return prices
+
+    def price(self, ctx, code: str) -> Optional[float]:
+        """
+        Fill price of one stock today
+
+        Args:
+            ctx: DayContext
+            code: Stock code
+
+        Returns:
+            Price, or None if the order cannot be filled
+        """
+        i = ctx.positions().get(code)
+        if i is None:
+            return None
+        value = self.prices(ctx)[i]
+        return None if np.isnan(value) else float(value)
+
+    def __repr__(self):
+        opts = ", ".join(f"{k}={v}" for k, v in sorted(self.options.items()))
+        return f"{self.name}({opts})"
+
+
+class TriggerFill(FillModel):
+    """
+    Fill at prev_close * (1 ± trigger) when the day's range reaches it
+
+    side="up": high >= trigger price >= low (chasing a rise)
+    side="down": low <= trigger price, and low stays above
+                 prev_close * (1 - max_move) when max_move is set
+    """
+
+    name = "trigger"
+    columns = ("code", "close", "high", "low")
+
+    def __init__(self, side: str = "up", trigger: float = 0.02, trigger_gem_star: Optional[float] = None,
+                 max_move: Optional[float] = None, max_move_gem_star: Optional[float] = None):
+        if side not in ("up", "down"):
+            raise ValueError(f"Unknown trigger side: {side}")
+        if trigger_gem_star is None:
+            trigger_gem_star = trigger
+        if max_move is not None and max_move_gem_star is None:
+            max_move_gem_star = max_move
+        super().__init__(side=side, trigger=trigger, trigger_gem_star=trigger_gem_star,
+                         max_move=max_move, max_move_gem_star=max_move_gem_star)
+        self.reason = f"trigger_{'rise' if side == 'up' else 'drop'}"
+
+    def compute(self, ctx) -> np.ndarray:
+        o = self.options
+        prev_close = ctx.aligned("close", "prev")
+        gem_star = _gem_star_mask(ctx.today["code"])
+        high = ctx.today["high"].to_numpy(dtype=float)
+        low = ctx.today["low"].to_numpy(dtype=float)
+
+        trigger = np.where(gem_star, o["trigger_gem_star"], o["trigger"])
+        if o["side"] == "up":
+            price = prev_close * (1 + trigger)
+            fillable = (high >= price) & (low <= price)
+        else:
+            price = prev_close * (1 - trigger)
+            fillable = low <= price
+            if o["max_move"] is not None:
+                max_move = np.where(gem_star, o["max_move_gem_star"], o["max_move"])
+                fillable &= low >= prev_close * (1 - max_move)
+        return np.where(fillable, price, np.nan)
+
+
+class OpenFill(FillModel):
+    """Fill at the open; a one-price limit-up board (open == high == low at limit) cannot be bought"""
+
+    name = "open"
+    columns = ("code", "open", "high", "low", "close")
+    reason = "open_price"
+    skip_reason = "limit_up_open"
+
+    def __init__(self, skip_limit_up_board: bool = True):
+        super().__init__(skip_limit_up_board=skip_limit_up_board)
+
+    def compute(self, ctx) -> np.ndarray:
+        today = ctx.today
+        open_ = today["open"].to_numpy(dtype=float)
+        price = open_.copy()
+        if not self.options["skip_limit_up_board"]:
+            return price
+
+        prev_close = ctx.aligned("close", "prev")
+        flat = (open_ == today["high"].to_numpy(dtype=float)) & (open_ == today["low"].to_numpy(dtype=float))
+        flat &= ~np.isnan(prev_close)
+        codes = today["code"].to_numpy()
+        # Flat boards are rare: price them one by one with Python round(), as the row-wise check did
+        for i in np.flatnonzero(flat):
+            limit_up_price = round(float(prev_close[i]) * (1 + classify_code(str(codes[i])).limit_pct), 2)
+            if open_[i] >= limit_up_price - 0.01:  # 0.01 tolerance
+                price[i] = np.nan
+        return price
+
+
+class CloseFill(FillModel):
+    """Fill at the close"""
+
+    name = "close"
+    columns = ("close",)
+    reason = "close_price"
+
+    def compute(self, ctx) -> np.ndarray:
+        return ctx.today["close"].to_numpy(dtype=float).copy()
+
+
+class VwapFill(FillModel):
+    """
+    Fill at the day's average price amount / volume, clipped to [low, high]
+
+    amount is in 亿元 and volume in 手 (see download_ashare_3y_to_parquet.py).
+    """
+
+    name = "vwap"
+    columns = ("amount", "volume", "low", "high")
+    reason = "vwap"
+
+    def compute(self, ctx) -> np.ndarray:
+        today = ctx.today
+        amount = today["amount"].to_numpy(dtype=float) * 1e8
+        volume = today["volume"].to_numpy(dtype=float) * 100
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vwap = np.where(volume > 0, amount / volume, np.nan)
+        return np.clip(vwap, today["low"].to_numpy(dtype=float), today["high"].to_numpy(dtype=float))
+
+
+FILL_MODELS = {
+    "trigger": TriggerFill,
+    "open": OpenFill,
+    "close": CloseFill,
+    "vwap": VwapFill,
+}
+
+# Columns any configurable fill model may read (parameter searches can switch models)
+ALL_FILL_COLUMNS = tuple(sorted({col for model in FILL_MODELS.values() for col in model.columns}))
+
+
+def build_fill_model(spec: Union[None, str, Dict[str, Any]], default: FillModel) -> FillModel:
+    """
+    Build the fill model configured by `params.fill_model`
+
+    Args:
+        spec: None (use default), a model name, or {type: name, **options}.
+              Options not given fall back to the default model's options when
+              the type matches (e.g. only override `trigger`).
+        default: Strategy's built-in model
+
+    Returns:
+        FillModel
+    """
+    if not spec:
+        return default
+    if isinstance(spec, str):
+        spec = {"type": spec}
+    options = dict(spec)
+    kind = options.pop("type", default.name)
+    if kind not in FILL_MODELS:
+        raise ValueError(f"Unknown fill model: {kind} (available: {', '.join(FILL_MODELS)})")
+    if kind == default.name:
+        options = {**default.options, **options}
+    return FILL_MODELS[kind](**options)
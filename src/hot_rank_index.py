@@ -0,0 +1,165 @@
+"""
+Precomputed per-day hot-rank index (ranks 1..max_rank)
+
+For every trading date the index holds the stocks ranked 1..max_rank, sorted
+by rank, as three flat arrays (rank, code, row id) plus per-date offsets.
+The row id is the stock's position within that day's rows of the feature
+panel in (date, code) order, which is the order load_features() returns, so
+a DayContext can turn "hot_rank <= N" into a slice of the index instead of
+filtering the whole day.
+
+The index is built by prepare_features.py and stored next to the feature
+data as a small .npz file (a few hundred KB for several years).
+"""
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_MAX_RANK = 100
+INDEX_FILE = "_hot_rank_index.npz"
+
+
+def index_path(features_path: Union[str, Path]) -> Path:
+    """Index file of a feature dataset directory or single feature file"""
+    features_path = Path(features_path)
+    if features_path.is_dir():
+        return features_path / INDEX_FILE
+    return features_path.with_name(features_path.stem + ".hot_rank_index.npz")
+
+
+class HotRankIndex:
+    """date -> (rank, code, row id) arrays of the top max_rank stocks, in rank order"""
+
+    def __init__(self, dates: np.ndarray, offsets: np.ndarray, ranks: np.ndarray,
+                 codes: np.ndarray, rows: np.ndarray, max_rank: int = DEFAULT_MAX_RANK):
+        """
+        Args:
+            dates: Sorted unique trading dates (datetime64[D])
+            offsets: Start of each date's entries, len(dates) + 1
+            ranks: Hot ranks (int16)
+            codes: Stock codes (fixed-width str)
+            rows: Row positions within the day in (date, code) order (int32)
+            max_rank: Highest rank stored
+        """
+        self.dates = dates
+        self.offsets = offsets
+        self.ranks = ranks
+        self.codes = codes
+        self.rows = rows
+        self.max_rank = max_rank
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __repr__(self):
+        return f"HotRankIndex({len(self.dates)} dates, {len(self.ranks)} entries, max_rank={self.max_rank})"
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, max_rank: int = DEFAULT_MAX_RANK) -> "HotRankIndex":
+        """
+        Build the index from a feature frame
+
+        Args:
+            df: Frame with date, code, hot_rank (all rows of each date, any order)
+            max_rank: Highest rank to store
+
+        Returns:
+            HotRankIndex
+        """
+        dates = pd.to_datetime(df["date"]).to_numpy().astype("datetime64[D]")
+        codes = df["code"].astype(str).to_numpy().astype("U6")
+        ranks = pd.to_numeric(df["hot_rank"], errors="coerce").to_numpy(dtype=float)
+
+        # Row id = position within the day in (date, code) order
+        order = np.lexsort((codes, dates))
+        dates, codes, ranks = dates[order], codes[order], ranks[order]
+        day_start = np.r_[True, dates[1:] != dates[:-1]]
+        starts = np.flatnonzero(day_start)
+        rows = np.arange(len(dates)) - np.repeat(starts, np.diff(np.r_[starts, len(dates)]))
+
+        keep = (ranks >= 1) & (ranks <= max_rank)
+        dates, codes, ranks, rows = dates[keep], codes[keep], ranks[keep].astype(np.int16), rows[keep]
+        order = np.lexsort((codes, ranks, dates))
+        dates, codes, ranks, rows = dates[order], codes[order], ranks[order], rows[order]
+
+        unique_dates, first = np.unique(dates, return_index=True)
+        offsets = np.r_[first, len(dates)].astype(np.int64)
+        return cls(unique_dates, offsets, ranks, codes, rows.astype(np.int32), max_rank)
+
+    def merge(self, newer: "HotRankIndex") -> "HotRankIndex":
+        """Index with the dates of `newer` replacing / extending the dates of this one"""
+        frames = []
+        for index, dates in ((self, np.setdiff1d(self.dates, newer.dates)), (newer, newer.dates)):
+            for d in dates:
+                lo, hi = index._bounds(d)
+                frames.append((d, index.ranks[lo:hi], index.codes[lo:hi], index.rows[lo:hi]))
+        frames.sort(key=lambda f: f[0])
+        if not frames:
+            return newer
+        sizes = np.array([len(f[1]) for f in frames], dtype=np.int64)
+        return HotRankIndex(
+            np.array([f[0] for f in frames], dtype="datetime64[D]"),
+            np.r_[0, np.cumsum(sizes)].astype(np.int64),
+            np.concatenate([f[1] for f in frames]),
+            np.concatenate([f[2] for f in frames]),
+            np.concatenate([f[3] for f in frames]),
+            max(self.max_rank, newer.max_rank),
+        )
+
+    def save(self, path: Union[str, Path]) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(f, dates=self.dates, offsets=self.offsets, ranks=self.ranks,
+                     codes=self.codes, rows=self.rows, max_rank=np.int16(self.max_rank))
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> Optional["HotRankIndex"]:
+        """Load an index file (None if it does not exist)"""
+        path = Path(path)
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            return cls(data["dates"], data["offsets"], data["ranks"], data["codes"],
+                       data["rows"], int(data["max_rank"]))
+
+    @classmethod
+    def for_features(cls, features_path: Union[str, Path]) -> Optional["HotRankIndex"]:
+        """Index stored next to a feature dataset / file (None if not built)"""
+        return cls.load(index_path(features_path))
+
+    def _position(self, date) -> int:
+        """Position of a date in self.dates (-1 if not indexed)"""
+        key = np.datetime64(pd.Timestamp(date), "D")
+        i = int(np.searchsorted(self.dates, key))
+        return i if i < len(self.dates) and self.dates[i] == key else -1
+
+    def _bounds(self, date) -> Tuple[int, int]:
+        i = self._position(date)
+        if i < 0:
+            return 0, 0
+        return int(self.offsets[i]), int(self.offsets[i + 1])
+
+    def has_date(self, date) -> bool:
+        return self._position(date) >= 0
+
+    def top(self, date, n: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Stocks ranked 1..n on a date, in rank order
+
+        Args:
+            date: Trading date
+            n: Rank limit (must not exceed max_rank)
+
+        Returns:
+            (ranks, codes, rows) views; empty when the date is not indexed
+        """
+        if n > self.max_rank:
+            raise ValueError(f"Rank limit {n} exceeds the index's max_rank {self.max_rank}")
+        lo, hi = self._bounds(date)
+        hi = lo + int(np.searchsorted(self.ranks[lo:hi], n, side="right"))
+        return self.ranks[lo:hi], self.codes[lo:hi], self.rows[lo:hi]
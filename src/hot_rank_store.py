@@ -0,0 +1,338 @@
+"""
+Normalized multi-source hot-rank store
+
+All popularity rankings (THS via pywencai, Kaipanla, adata THS top 100, ...)
+are kept in one Hive-partitioned Parquet dataset with a single schema:
+
+  data/hot_sources/store/
+    source=pywencai_ths/date=2025-03-18/part-0.parquet
+    source=adata_ths/date=2026-03-20/part-0.parquet
+
+  columns: date, source, code, name, rank, heat, fetch_time
+
+A (source, date) partition holds that source's complete list for the day.
+Writes are upserts at partition level: partitions present in the new rows
+are replaced atomically, all others are kept. Readers prune partitions by
+directory name before opening any file, so "THS ranks of the last 30 days"
+or "dates already stored for a source" never scan the other sources.
+
+Raw API frames are turned into this schema by the vectorized normalizers
+below (one per raw layout).
+"""
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+STORE_COLUMNS = ("date", "source", "code", "name", "rank", "heat", "fetch_time")
+PART_FILE = "part-0.parquet"
+DEFAULT_MAX_RANK = 100
+_PARTITION_RE = re.compile(r"^source=([^/]+)/date=(\d{4}-\d{2}-\d{2})$")
+
+# Source labels
+WENCAI_THS = "pywencai_ths"
+WENCAI_KAIPANLA = "pywencai_kaipanla"
+ADATA_THS = "adata_ths"
+
+
+def empty_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "date": pd.Series(dtype=str),
+        "source": pd.Series(dtype=str),
+        "code": pd.Series(dtype=str),
+        "name": pd.Series(dtype=str),
+        "rank": pd.Series(dtype="int16"),
+        "heat": pd.Series(dtype=float),
+        "fetch_time": pd.Series(dtype="datetime64[ns]"),
+    })
+
+
+def normalize_codes(codes: pd.Series) -> pd.Series:
+    """"600000.SH" / 600000.0 / "1" -> "600000" / "000001" (non-numeric codes unchanged)"""
+    s = codes.astype(str).str.strip().str.split(".", n=1).str[0]
+    return s.where(~s.str.isdigit(), s.str.zfill(6))
+
+
+def _finish(df: pd.DataFrame, max_rank: int) -> pd.DataFrame:
+    """Drop rows without a rank in 1..max_rank and cast to the store schema"""
+    df = df[df["rank"].between(1, max_rank) & df["code"].ne("")]
+    out = pd.DataFrame({
+        "date": df["date"].astype(str),
+        "source": df["source"].astype(str),
+        "code": df["code"].astype(str),
+        "name": df["name"].fillna("").astype(str),
+        "rank": df["rank"].astype("int16"),
+        "heat": pd.to_numeric(df["heat"], errors="coerce").astype(float),
+        "fetch_time": pd.to_datetime(df["fetch_time"]),
+    })
+    return out.reset_index(drop=True)
+
+
+def _column(df: pd.DataFrame, *names: str) -> pd.Series:
+    """First existing column of `names` (empty strings if none)"""
+    for name in names:
+        if name in df.columns:
+            return df[name]
+    return pd.Series("", index=df.index)
+
+
+def _wencai_date_columns(df: pd.DataFrame, prefix: str) -> Dict[str, str]:
+    """YYYYMMDD -> column for wencai's per-date columns like 个股热度排名[20250318]"""
+    found = {}
+    for col in df.columns:
+        m = re.fullmatch(re.escape(prefix) + r"\[(\d{8})\]", str(col))
+        if m:
+            found[m.group(1)] = col
+    return found
+
+
+def wencai_rank_dates(raw: pd.DataFrame) -> List[str]:
+    """Dates (YYYY-MM-DD) that have a 个股热度排名[YYYYMMDD] column in a pywencai result"""
+    if not isinstance(raw, pd.DataFrame):
+        return []
+    return sorted(f"{d8[:4]}-{d8[4:6]}-{d8[6:]}" for d8 in _wencai_date_columns(raw, "个股热度排名"))
+
+
+def normalize_wencai(raw: pd.DataFrame, source: str = WENCAI_THS, date=None,
+                     fetch_time=None, max_rank: int = DEFAULT_MAX_RANK) -> pd.DataFrame:
+    """
+    Normalize a pywencai 人气榜 result
+
+    Rank / heat live in per-date columns 个股热度排名[YYYYMMDD] / 个股热度[YYYYMMDD].
+    The row's date is its `query_date` column (multi-day dumps), else `date`,
+    else the date of the rank column. Columns are picked per distinct date, not
+    per row.
+
+    Args:
+        raw: pywencai DataFrame (or a CSV dump of one)
+        source: Source label
+        date: Trading date when the frame has no query_date column
+        fetch_time: Fetch timestamp (default: now)
+        max_rank: Highest rank kept
+
+    Returns:
+        Store-schema DataFrame
+    """
+    if raw is None or raw.empty:
+        return empty_frame()
+    rank_cols = _wencai_date_columns(raw, "个股热度排名")
+    heat_cols = _wencai_date_columns(raw, "个股热度")
+    if "query_date" in raw.columns:
+        dates = pd.to_datetime(raw["query_date"], errors="coerce").dt.strftime("%Y-%m-%d")
+    elif date is not None:
+        dates = pd.Series(pd.Timestamp(date).strftime("%Y-%m-%d"), index=raw.index)
+    elif rank_cols:
+        d8 = max(rank_cols)
+        dates = pd.Series(f"{d8[:4]}-{d8[4:6]}-{d8[6:]}", index=raw.index)
+    else:
+        return empty_frame()
+
+    rank = pd.Series(np.nan, index=raw.index)
+    heat = pd.Series(np.nan, index=raw.index)
+    for day, index in dates.groupby(dates).groups.items():
+        d8 = day.replace("-", "")
+        if d8 in rank_cols:
+            rank.loc[index] = pd.to_numeric(raw.loc[index, rank_cols[d8]], errors="coerce")
+        if d8 in heat_cols:
+            heat.loc[index] = pd.to_numeric(raw.loc[index, heat_cols[d8]], errors="coerce")
+
+    df = pd.DataFrame({
+        "date": dates,
+        "source": source,
+        "code": normalize_codes(_column(raw, "股票代码", "code")),
+        "name": _column(raw, "股票简称"),
+        "rank": rank,
+        "heat": heat,
+        "fetch_time": pd.Timestamp(fetch_time or datetime.now()),
+    })
+    return _finish(df.dropna(subset=["date"]), max_rank)
+
+
+def normalize_adata_ths(raw: pd.DataFrame, fetch_time=None, source: str = ADATA_THS,
+                        max_rank: int = DEFAULT_MAX_RANK) -> pd.DataFrame:
+    """
+    Normalize adata.sentiment.hot.hot_rank_100_ths() output
+
+    The list is a snapshot; its date is the date of `fetch_time` (argument,
+    else the frame's fetch_time column, else now).
+    """
+    if raw is None or raw.empty:
+        return empty_frame()
+    if fetch_time is None and "fetch_time" in raw.columns and pd.notna(raw["fetch_time"].iloc[0]):
+        fetch_time = raw["fetch_time"].iloc[0]
+    fetch_time = pd.Timestamp(fetch_time or datetime.now())
+    df = pd.DataFrame({
+        "date": fetch_time.strftime("%Y-%m-%d"),
+        "source": source,
+        "code": normalize_codes(_column(raw, "stock_code")),
+        "name": _column(raw, "short_name", "stock_name"),
+        "rank": pd.to_numeric(_column(raw, "rank"), errors="coerce"),
+        "heat": pd.to_numeric(_column(raw, "hot_value", "hot"), errors="coerce"),
+        "fetch_time": fetch_time,
+    })
+    return _finish(df, max_rank)
+
+
+NORMALIZERS = {
+    WENCAI_THS: lambda raw, **kw: normalize_wencai(raw, source=WENCAI_THS, **kw),
+    WENCAI_KAIPANLA: lambda raw, **kw: normalize_wencai(raw, source=WENCAI_KAIPANLA, **kw),
+    ADATA_THS: normalize_adata_ths,
+}
+
+# Raw CSV of each source in a try_hot_rank_multi_source.py run directory
+RUN_DIR_FILES = {
+    WENCAI_THS: "wencai_hot_rank_last30d_pywencai.csv",
+    WENCAI_KAIPANLA: "kaipanla_hot_rank_snapshot_pywencai.csv",
+    ADATA_THS: "ths_hot_rank_100_snapshot_adata.csv",
+}
+
+
+def normalize_run_dir(run_dir: Union[str, Path], max_rank: int = DEFAULT_MAX_RANK) -> pd.DataFrame:
+    """
+    Normalize the raw CSVs of one probe run directory
+
+    Args:
+        run_dir: data/experiments/hot_rank_multi_source/<run>
+        max_rank: Highest rank kept
+
+    Returns:
+        Store-schema rows of every source file present (fetch_time defaults
+        to the run's attempt_summary.json run_time)
+    """
+    run_dir = Path(run_dir)
+    fetch_time = None
+    summary = run_dir / "attempt_summary.json"
+    if summary.exists():
+        fetch_time = json.loads(summary.read_text(encoding="utf-8")).get("run_time")
+
+    frames = []
+    for source, name in RUN_DIR_FILES.items():
+        path = run_dir / name
+        if not path.exists():
+            continue
+        raw = pd.read_csv(path, dtype={"股票代码": str, "stock_code": str})
+        if source == ADATA_THS:
+            frames.append(NORMALIZERS[source](raw, max_rank=max_rank))
+        else:
+            frames.append(NORMALIZERS[source](raw, fetch_time=fetch_time, max_rank=max_rank))
+    frames = [f for f in frames if not f.empty]
+    return pd.concat(frames, ignore_index=True) if frames else empty_frame()
+
+
+def _partition_dir(root: Path, source: str, date: str) -> Path:
+    return root / f"source={source}" / f"date={date}"
+
+
+def write_hot_ranks(df: pd.DataFrame, root: Union[str, Path]) -> Dict[str, int]:
+    """
+    Upsert normalized rows
+
+    Every (source, date) in `df` replaces that partition (duplicate codes
+    keep the last row); other partitions are untouched. Each partition is
+    written to a temp file and renamed, so readers never see half a day.
+
+    Args:
+        df: Store-schema rows (normalize_* output)
+        root: Store directory
+
+    Returns:
+        {"partitions": written partitions, "rows": written rows}
+    """
+    root = Path(root)
+    if df is None or df.empty:
+        return {"partitions": 0, "rows": 0}
+    df = df.loc[:, list(STORE_COLUMNS)].drop_duplicates(subset=["source", "date", "code"], keep="last")
+    written = 0
+    for (source, date), part in df.groupby(["source", "date"], sort=True):
+        part = part.sort_values(["rank", "code"], kind="stable").reset_index(drop=True)
+        directory = _partition_dir(root, source, date)
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp = directory / (PART_FILE + ".tmp")
+        part.to_parquet(tmp, index=False)
+        os.replace(tmp, directory / PART_FILE)
+        written += 1
+    return {"partitions": written, "rows": int(len(df))}
+
+
+def list_partitions(root: Union[str, Path], sources: Optional[Iterable[str]] = None,
+                    start_date=None, end_date=None) -> List[tuple]:
+    """
+    (source, date, path) of stored partitions, from directory names only
+
+    Args:
+        root: Store directory
+        sources: Only these sources (default: all)
+        start_date: Inclusive lower date bound
+        end_date: Inclusive upper date bound
+
+    Returns:
+        Sorted list of (source, "YYYY-MM-DD", Path)
+    """
+    root = Path(root)
+    if not root.exists():
+        return []
+    wanted = set(sources) if sources is not None else None
+    start = pd.Timestamp(start_date).strftime("%Y-%m-%d") if start_date is not None else None
+    end = pd.Timestamp(end_date).strftime("%Y-%m-%d") if end_date is not None else None
+    found = []
+    for source_dir in root.glob("source=*"):
+        for date_dir in source_dir.glob("date=*"):
+            m = _PARTITION_RE.match(date_dir.relative_to(root).as_posix())
+            path = date_dir / PART_FILE
+            if not m or not path.exists():
+                continue
+            source, date = m.groups()
+            if wanted is not None and source not in wanted:
+                continue
+            if (start and date < start) or (end and date > end):
+                continue
+            found.append((source, date, path))
+    return sorted(found)
+
+
+def stored_dates(root: Union[str, Path], source: str) -> List[str]:
+    """Dates stored for one source, ascending"""
+    return [date for _, date, _ in list_partitions(root, [source])]
+
+
+def latest_date(root: Union[str, Path], source: str) -> Optional[str]:
+    """Most recent stored date of a source (None if nothing stored)"""
+    dates = stored_dates(root, source)
+    return dates[-1] if dates else None
+
+
+def read_hot_ranks(root: Union[str, Path], sources: Optional[Iterable[str]] = None,
+                   start_date=None, end_date=None, max_rank: Optional[int] = None,
+                   columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Query the store
+
+    Args:
+        root: Store directory
+        sources: Only these sources (default: all)
+        start_date: Inclusive lower date bound
+        end_date: Inclusive upper date bound
+        max_rank: Only ranks <= max_rank (pushed down to the Parquet scan)
+        columns: Columns to return (default: all)
+
+    Returns:
+        Rows sorted by (date, source, rank, code); empty store-schema frame
+        when nothing matches
+    """
+    import pyarrow.dataset as ds
+
+    files = [str(path) for _, _, path in list_partitions(root, sources, start_date, end_date)]
+    columns = list(columns) if columns is not None else list(STORE_COLUMNS)
+    if not files:
+        return empty_frame()[columns]
+    dataset = ds.dataset(files, format="parquet")
+    scan_filter = ds.field("rank") <= max_rank if max_rank is not None else None
+    sort_cols = [c for c in ("date", "source", "rank", "code") if c in columns]
+    df = dataset.to_table(columns=columns, filter=scan_filter).to_pandas()
+    return df.sort_values(sort_cols, kind="stable").reset_index(drop=True) if sort_cols else df
@@ -0,0 +1,324 @@
+"""
+Backtest result cache keyed by strategy config and feature data version
+"""
+import hashlib
+import json
+import logging
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+def config_hash(config: dict) -> str:
+    """
+    Hash the merged strategy config (strategy + params + backtest)
+
+    Args:
+        config: Merged strategy config
+
+    Returns:
+        md5 hex digest
+    """
+    relevant = {k: config.get(k) for k in ("strategy", "params", "backtest")}
+    payload = json.dumps(relevant, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+
+def path_fingerprint(path: str) -> str:
+    """
+    Cheap fingerprint of a file or a directory of parquet files
+
+    Uses (relative path, size, mtime_ns) so a rewritten feature file or a
+    changed partition produces a new fingerprint without hashing the data.
+
+    Args:
+        path: File or directory path
+
+    Returns:
+        md5 hex digest ("missing" if the path does not exist)
+    """
+    path = Path(path)
+    if not path.exists():
+        return "missing"
+
+    if path.is_file():
+        files = [path]
+        root = path.parent
+    else:
+        files = sorted(p for p in path.rglob("*") if p.is_file() and p.suffix in (".parquet", ".json"))
+        root = path
+
+    h = hashlib.md5()
+    for f in files:
+        st = f.stat()
+        h.update(f"{f.relative_to(root).as_posix()}|{st.st_size}|{st.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+SRC_DIR = Path(__file__).resolve().parent
+
+
+def source_fingerprint(engine_file: str, src_dir: Path = SRC_DIR) -> str:
+    """
+    Content fingerprint of an engine and the shared src/ modules it builds on
+
+    Engines import fill models, the feature store, day context, metrics etc.
+    from src/, so a change in any of those must invalidate cached results
+    just like a change in the engine itself.
+
+    Args:
+        engine_file: Engine source file
+        src_dir: Directory of the shared modules (default: this package's src/)
+
+    Returns:
+        md5 hex digest ("missing" if the engine file does not exist)
+    """
+    engine = Path(engine_file)
+    if not engine.exists():
+        return "missing"
+    h = hashlib.md5()
+    for f in [engine] + sorted(Path(src_dir).glob("*.py")):
+        h.update(f.name.encode("utf-8") + b"\0")
+        h.update(f.read_bytes())
+    return h.hexdigest()
+
+
+class ResultCache:
+    """Store trades/portfolio frames of finished backtests on disk"""
+
+    def __init__(self, cache_dir: str, max_age_days: Optional[float] = None,
+                 max_size_mb: Optional[float] = None):
+        """
+        Initialize result cache
+
+        Args:
+            cache_dir: Root directory of cache entries
+            max_age_days: Entries older than this are evicted on put (None = keep)
+            max_size_mb: Total size budget, least recently used entries are evicted first
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_age_days = max_age_days
+        self.max_size_mb = max_size_mb
+
+    @classmethod
+    def from_config(cls, config: dict, project_root: Path) -> Optional["ResultCache"]:
+        """
+        Build cache from the `cache` section of a strategy config
+
+        Args:
+            config: Merged strategy config
+            project_root: Base directory for a relative cache dir
+
+        Returns:
+            ResultCache, or None when caching is disabled
+        """
+        cache_cfg = config.get("cache", {}) or {}
+        if not cache_cfg.get("enabled", True):
+            return None
+        cache_dir = Path(cache_cfg.get("dir", "data/.cache/backtest_results"))
+        if not cache_dir.is_absolute():
+            cache_dir = Path(project_root) / cache_dir
+        return cls(
+            cache_dir,
+            max_age_days=cache_cfg.get("max_age_days"),
+            max_size_mb=cache_cfg.get("max_size_mb"),
+        )
+
+    def make_key(self, config: dict, features_path: str, start_date: Optional[str] = None,
+                 end_date: Optional[str] = None, engine_file: Optional[str] = None) -> str:
+        """
+        Build cache key
+
+        Args:
+            config: Merged strategy config
+            features_path: Feature file / dataset path
+            start_date: Backtest start date (None = engine default)
+            end_date: Backtest end date (None = engine default)
+            engine_file: Engine source file; it and all src/*.py modules are
+                         fingerprinted, so logic changes invalidate the cache
+
+        Returns:
+            Cache key (hex string)
+        """
+        strategy = config.get("strategy", {})
+        parts = {
+            "name": strategy.get("name"),
+            "version": strategy.get("version"),
+            "config": config_hash(config),
+            "features": path_fingerprint(features_path),
+            "start": str(start_date) if start_date else None,
+            "end": str(end_date) if end_date else None,
+            "engine": source_fingerprint(engine_file) if engine_file else None,
+        }
+        payload = json.dumps(parts, sort_keys=True)
+        return hashlib.md5(payload.encode("utf-8")).hexdigest()[:16]
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.cache_dir / key
+
+    def get(self, key: str) -> Optional[Tuple[Any, Any, Dict]]:
+        """
+        Load a cached result
+
+        Args:
+            key: Cache key
+
+        Returns:
+            (trades_df, portfolio_df, meta) or None on miss
+        """
+        import pandas as pd
+
+        entry = self._entry_dir(key)
+        meta_file = entry / "meta.json"
+        if not meta_file.exists():
+            return None
+
+        try:
+            with open(meta_file, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            trades_file = entry / "trades.parquet"
+            trades_df = pd.read_parquet(trades_file) if trades_file.exists() else pd.DataFrame()
+            portfolio_file = entry / "portfolio.parquet"
+            portfolio_df = pd.read_parquet(portfolio_file) if portfolio_file.exists() else pd.DataFrame()
+        except Exception as e:
+            logger.warning(f"Corrupted cache entry {key}, ignored: {e}")
+            return None
+
+        # touch for LRU eviction
+        meta["last_access"] = datetime.now().isoformat()
+        self._write_meta(entry, meta)
+        return trades_df, portfolio_df, meta
+
+    def put(self, key: str, trades_df, portfolio_df, meta: Optional[Dict] = None):
+        """
+        Store a result
+
+        Args:
+            key: Cache key
+            trades_df: Raw trades DataFrame
+            portfolio_df: Daily portfolio DataFrame
+            meta: Extra metadata (strategy name, stats, date range ...)
+        """
+        entry = self._entry_dir(key)
+        tmp = entry.with_name(entry.name + ".tmp")
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir(parents=True, exist_ok=True)
+
+        if trades_df is not None and not trades_df.empty:
+            trades_df.to_parquet(tmp / "trades.parquet", index=False)
+        if portfolio_df is not None and not portfolio_df.empty:
+            portfolio_df.to_parquet(tmp / "portfolio.parquet", index=False)
+
+        now = datetime.now().isoformat()
+        meta = dict(meta or {})
+        meta.update({
+            "key": key,
+            "created_at": now,
+            "last_access": now,
+            "n_trades": 0 if trades_df is None else int(len(trades_df)),
+        })
+        self._write_meta(tmp, meta)
+
+        if entry.exists():
+            shutil.rmtree(entry)
+        tmp.rename(entry)
+
+        self.evict()
+
+    @staticmethod
+    def _write_meta(entry: Path, meta: Dict):
+        with open(entry / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2, default=str)
+
+    def entries(self) -> List[Dict]:
+        """
+        List cache entries
+
+        Returns:
+            List of meta dicts with `size_bytes` and `path`, newest access first
+        """
+        if not self.cache_dir.exists():
+            return []
+
+        result = []
+        for entry in self.cache_dir.iterdir():
+            meta_file = entry / "meta.json"
+            if not entry.is_dir() or not meta_file.exists():
+                continue
+            try:
+                with open(meta_file, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except Exception:
+                meta = {"key": entry.name}
+            meta["path"] = str(entry)
+            meta["size_bytes"] = sum(p.stat().st_size for p in entry.iterdir() if p.is_file())
+            result.append(meta)
+
+        result.sort(key=lambda m: m.get("last_access", ""), reverse=True)
+        return result
+
+    def remove(self, key: str) -> bool:
+        """Remove one entry"""
+        entry = self._entry_dir(key)
+        if entry.exists():
+            shutil.rmtree(entry)
+            return True
+        return False
+
+    def purge(self, older_than_days: Optional[float] = None, max_size_mb: Optional[float] = None,
+              remove_all: bool = False) -> int:
+        """
+        Remove entries by age and/or total size
+
+        Args:
+            older_than_days: Remove entries not accessed within N days
+            max_size_mb: Keep most recently used entries within this budget
+            remove_all: Remove everything
+
+        Returns:
+            Number of removed entries
+        """
+        entries = self.entries()
+        removed = 0
+
+        if remove_all:
+            for meta in entries:
+                removed += self.remove(Path(meta["path"]).name)
+            return removed
+
+        keep = []
+        if older_than_days is not None:
+            cutoff = time.time() - older_than_days * 86400
+            for meta in entries:
+                try:
+                    ts = datetime.fromisoformat(meta.get("last_access", "")).timestamp()
+                except ValueError:
+                    ts = 0
+                if ts < cutoff:
+                    removed += self.remove(Path(meta["path"]).name)
+                else:
+                    keep.append(meta)
+        else:
+            keep = entries
+
+        if max_size_mb is not None:
+            budget = max_size_mb * 1024 * 1024
+            total = 0
+            for meta in keep:  # newest access first
+                total += meta["size_bytes"]
+                if total > budget:
+                    removed += self.remove(Path(meta["path"]).name)
+
+        return removed
+
+    def evict(self) -> int:
+        """Apply the configured age/size limits"""
+        if self.max_age_days is None and self.max_size_mb is None:
+            return 0
+        return self.purge(older_than_days=self.max_age_days, max_size_mb=self.max_size_mb)
@@ -0,0 +1,354 @@
+"""
+Security master: code -> exchange, board and daily price-limit percentage
+
+Board detection used to be re-implemented with string prefix tests in the
+feature pipeline, the downloader and every engine, and the copies disagreed
+('30' vs '300'/'301', '689' missing, '605' falling back to SZ). All of them
+now go through classify_code(), which is cached per code, and the vectorized
+helpers below classify each distinct code once and broadcast the result.
+
+SecurityMaster persists the per-code dimension (listing date) together with
+an SCD2 name history (valid_from/valid_to), so ST flags and listing age are
+joins on a small table instead of row-wise regex scans over the lake.
+"""
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, NamedTuple, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+MAIN = "main"
+GEM = "gem"  # ChiNext (创业板)
+STAR = "star"  # STAR Market (科创板)
+BSE = "bse"  # Beijing Stock Exchange (北交所)
+
+# Default daily limit per board (backtest_base.yaml `limit_up_rules` can override)
+BOARD_LIMIT_PCT = {MAIN: 0.10, GEM: 0.20, STAR: 0.20, BSE: 0.30}
+ST_LIMIT_PCT = 0.05
+
+# Default location of the persisted master (relative to the project root); the
+# configured one is data_config.yaml `data.security_master_dir`
+DEFAULT_MASTER_DIR = "data/processed/security_master"
+DATA_CONFIG = "config/data_config.yaml"
+
+# Names flagging risk-warning / delisting-period stocks (ST, *ST, 退)
+ST_NAME_PATTERN = "ST|退"
+
+# limit_up_rules keys in backtest_base.yaml
+RULE_KEYS = {MAIN: "main_board", GEM: "gem_board", STAR: "star_board", BSE: "bse_board"}
+
+# (prefix, exchange, board), checked in order: longer prefixes first
+PREFIX_RULES = (
+    ("688", "SH", STAR),
+    ("689", "SH", STAR),
+    ("920", "BJ", BSE),
+    ("30", "SZ", GEM),
+    ("60", "SH", MAIN),
+    ("900", "SH", MAIN),  # SH B shares
+    ("00", "SZ", MAIN),
+    ("200", "SZ", MAIN),  # SZ B shares
+    ("8", "BJ", BSE),
+    ("4", "BJ", BSE),
+)
+
+
+class SecurityInfo(NamedTuple):
+    exchange: str
+    board: str
+    limit_pct: float
+
+
+@lru_cache(maxsize=None)
+def classify_code(code: str) -> SecurityInfo:
+    """
+    Exchange, board and default limit percentage of a stock code
+
+    Args:
+        code: 6-digit stock code
+
+    Returns:
+        SecurityInfo (unknown prefixes fall back to the SH/SZ main board)
+    """
+    code = str(code).zfill(6)
+    for prefix, exchange, board in PREFIX_RULES:
+        if code.startswith(prefix):
+            return SecurityInfo(exchange, board, BOARD_LIMIT_PCT[board])
+    exchange = "SH" if code.startswith("6") else "SZ"
+    return SecurityInfo(exchange, MAIN, BOARD_LIMIT_PCT[MAIN])
+
+
+def market_symbol(code: str) -> str:
+    """Exchange-prefixed symbol used by EastMoney/Xueqiu endpoints, e.g. SZ000001"""
+    return f"{classify_code(code).exchange}{code}"
+
+
+def board_limit_pcts(rules: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """Board -> limit percentage, with `limit_up_rules` overrides applied"""
+    rules = rules or {}
+    return {board: rules.get(key, BOARD_LIMIT_PCT[board]) for board, key in RULE_KEYS.items()}
+
+
+def security_table(codes: Iterable[str]) -> pd.DataFrame:
+    """
+    Materialize the security master for a set of codes
+
+    Args:
+        codes: Stock codes (duplicates are ignored)
+
+    Returns:
+        DataFrame: code, exchange, board, limit_pct (one row per code)
+    """
+    unique = pd.unique(pd.Series(list(codes), dtype=object))
+    rows = [(code, *classify_code(code)) for code in unique]
+    return pd.DataFrame(rows, columns=["code", "exchange", "board", "limit_pct"])
+
+
+def _per_row(codes: pd.Series, field: str) -> np.ndarray:
+    """Look up a SecurityInfo field for each row, classifying each distinct code once"""
+    inverse, uniques = pd.factorize(codes.astype(str))
+    values = np.array([getattr(classify_code(code), field) for code in uniques])
+    if len(values) == 0:
+        return np.empty(len(codes), dtype=object)
+    return values[inverse]
+
+
+def boards_of(codes: pd.Series) -> np.ndarray:
+    """Board of each row"""
+    return _per_row(codes, "board")
+
+
+def board_mask(codes: pd.Series, boards: Iterable[str]) -> np.ndarray:
+    """Boolean array: row's board is one of `boards`"""
+    return np.isin(boards_of(codes), list(boards))
+
+
+def limit_pcts_of(codes: pd.Series, is_st: Optional[pd.Series] = None,
+                  rules: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """
+    Daily limit percentage of each row
+
+    Args:
+        codes: Stock codes
+        is_st: Optional ST flags; ST rows use the ST limit
+        rules: Optional `limit_up_rules` overrides (main_board, gem_board, ..., st_stock)
+
+    Returns:
+        float array aligned with codes
+    """
+    pcts = board_limit_pcts(rules)
+    limit_pct = pd.Series(boards_of(codes)).map(pcts).to_numpy(dtype=float)
+    if is_st is not None:
+        st_pct = (rules or {}).get("st_stock", ST_LIMIT_PCT)
+        limit_pct = np.where(np.asarray(is_st, dtype=bool), st_pct, limit_pct)
+    return limit_pct
+
+
+def is_st_name(names: pd.Series) -> np.ndarray:
+    """ST flag derived from stock names"""
+    return names.str.contains(ST_NAME_PATTERN, na=False, regex=True).to_numpy(dtype=bool)
+
+
+def resolve_master_dir(project_root: Union[str, Path], data_config: Optional[dict] = None) -> Path:
+    """
+    Directory of the persisted master
+
+    Every reader and writer resolves it here, from `data.security_master_dir`
+    of config/data_config.yaml, so the location is configured in one place.
+
+    Args:
+        project_root: Project root (relative paths are resolved against it)
+        data_config: Already loaded `data` section (default: read DATA_CONFIG)
+
+    Returns:
+        Absolute master directory
+    """
+    project_root = Path(project_root)
+    if data_config is None:
+        data_config = {}
+        config_path = project_root / DATA_CONFIG
+        if config_path.exists():
+            import yaml
+
+            with open(config_path, "r", encoding="utf-8") as f:
+                data_config = (yaml.safe_load(f) or {}).get("data", {}) or {}
+    return project_root / data_config.get("security_master_dir", DEFAULT_MASTER_DIR)
+
+
+class SecurityMaster:
+    """
+    Persisted security master
+
+    securities.parquet: code, exchange, board, limit_pct, list_date, updated_at
+    name_history.parquet: code, name, is_st, valid_from, valid_to (valid_to is
+    NaT for the current name)
+
+    Both files are rewritten as a whole; they hold one row per code and one row
+    per name change, so they stay small.
+    """
+
+    SECURITIES_FILE = "securities.parquet"
+    NAMES_FILE = "name_history.parquet"
+    SECURITY_COLUMNS = ["code", "exchange", "board", "limit_pct", "list_date", "updated_at"]
+    NAME_COLUMNS = ["code", "name", "is_st", "valid_from", "valid_to"]
+
+    def __init__(self, root: Union[str, Path], securities: Optional[pd.DataFrame] = None,
+                 names: Optional[pd.DataFrame] = None):
+        self.root = Path(root)
+        self.securities = securities if securities is not None else pd.DataFrame(columns=self.SECURITY_COLUMNS)
+        self.names = names if names is not None else pd.DataFrame(columns=self.NAME_COLUMNS)
+
+    @classmethod
+    def load(cls, root: Union[str, Path]) -> "SecurityMaster":
+        """Load the master from `root` (empty master if it has not been built yet)"""
+        root = Path(root)
+        securities = names = None
+        if (root / cls.SECURITIES_FILE).exists():
+            securities = pd.read_parquet(root / cls.SECURITIES_FILE)
+        if (root / cls.NAMES_FILE).exists():
+            names = pd.read_parquet(root / cls.NAMES_FILE)
+        return cls(root, securities, names)
+
+    def save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.securities.to_parquet(self.root / self.SECURITIES_FILE, index=False)
+        self.names.to_parquet(self.root / self.NAMES_FILE, index=False)
+
+    def __len__(self):
+        return len(self.securities)
+
+    def _ensure_codes(self, codes: Iterable[str]) -> None:
+        """Add classified rows for codes not in the master yet"""
+        known = set(self.securities["code"])
+        new = [code for code in pd.unique(pd.Series(list(codes), dtype=object)) if code not in known]
+        if not new:
+            return
+        table = security_table(new)
+        table["list_date"] = pd.NaT
+        table["updated_at"] = pd.Timestamp(datetime.now())
+        frames = [df for df in (self.securities, table[self.SECURITY_COLUMNS]) if not df.empty]
+        self.securities = pd.concat(frames, ignore_index=True)
+
+    def update_listing(self, listings: pd.DataFrame) -> int:
+        """
+        Merge listing dates from the exchange stock lists
+
+        Args:
+            listings: DataFrame with code, list_date
+
+        Returns:
+            Number of codes whose listing date was added or changed
+        """
+        listings = listings.dropna(subset=["code", "list_date"]).drop_duplicates("code", keep="last")
+        self._ensure_codes(listings["code"])
+        new_dates = pd.to_datetime(listings.set_index("code")["list_date"])
+        securities = self.securities.set_index("code")
+        current = pd.to_datetime(securities["list_date"]).reindex(new_dates.index)
+        changed = new_dates.index[current.ne(new_dates) | current.isna()]
+        securities.loc[changed, "list_date"] = new_dates.loc[changed]
+        securities.loc[changed, "updated_at"] = pd.Timestamp(datetime.now())
+        self.securities = securities.reset_index()[self.SECURITY_COLUMNS]
+        return len(changed)
+
+    def observe_names(self, observations: pd.DataFrame) -> int:
+        """
+        Record observed names, opening a new history interval at each change
+
+        Observations can be a stock-list snapshot (one date) or the lake's
+        code/date/name columns; earlier observations extend history backwards.
+
+        Args:
+            observations: DataFrame with code, date, name
+
+        Returns:
+            Number of name intervals added
+        """
+        obs = observations[["code", "date", "name"]].dropna(subset=["name"])
+        obs = obs[obs["name"].astype(str).str.strip() != ""]
+        if obs.empty:
+            return 0
+        self._ensure_codes(obs["code"])
+        obs = obs.assign(date=pd.to_datetime(obs["date"])).sort_values(["code", "date"], kind="stable")
+        # Only the first day of each run of identical names matters
+        starts = obs[obs["name"] != obs.groupby("code")["name"].shift()]
+        runs = pd.DataFrame({"code": starts["code"].to_numpy(), "name": starts["name"].to_numpy(),
+                             "valid_from": starts["date"].to_numpy()})
+
+        before = len(self.names)
+        history = pd.concat([df for df in (self.names[["code", "name", "valid_from"]], runs) if not df.empty],
+                            ignore_index=True)
+        history["valid_from"] = pd.to_datetime(history["valid_from"])
+        history = history.sort_values(["code", "valid_from"], kind="stable").drop_duplicates(
+            ["code", "valid_from"], keep="first")
+        history = history[history["name"] != history.groupby("code")["name"].shift()]
+        history["valid_to"] = history.groupby("code")["valid_from"].shift(-1) - pd.Timedelta(days=1)
+        history["is_st"] = is_st_name(history["name"].astype(str))
+        self.names = history[self.NAME_COLUMNS].reset_index(drop=True)
+        return len(self.names) - before
+
+    def st_flags(self, codes: pd.Series, dates: pd.Series, fallback_names: Optional[pd.Series] = None) -> np.ndarray:
+        """
+        ST flag of each (code, date) row from the name history
+
+        Args:
+            codes: Stock codes
+            dates: Trading dates
+            fallback_names: Row names used where the history has no interval
+                            covering the date (None: such rows are not ST)
+
+        Returns:
+            bool array aligned with codes
+        """
+        st = np.full(len(codes), np.nan)
+        if not self.names.empty:
+            left = pd.DataFrame({"code": codes.astype(str).to_numpy(), "date": pd.to_datetime(dates).to_numpy(),
+                                 "_row": np.arange(len(codes))}).sort_values("date", kind="stable")
+            right = self.names[["code", "valid_from", "is_st"]].assign(
+                code=lambda df: df["code"].astype(str), valid_from=lambda df: pd.to_datetime(df["valid_from"]),
+                is_st=lambda df: df["is_st"].astype(float)).sort_values("valid_from", kind="stable")
+            merged = pd.merge_asof(left, right, left_on="date", right_on="valid_from",
+                                   by="code", direction="backward")
+            st[merged["_row"].to_numpy()] = merged["is_st"].to_numpy(dtype=float)
+        known = ~np.isnan(st)
+        fallback = is_st_name(fallback_names) if fallback_names is not None else np.zeros(len(codes), dtype=bool)
+        return np.where(known, st == 1.0, fallback)
+
+    def list_dates(self) -> Dict[str, pd.Timestamp]:
+        """code -> listing date (codes without a known listing date are omitted)"""
+        securities = self.securities.dropna(subset=["list_date"])
+        return dict(zip(securities["code"], pd.to_datetime(securities["list_date"])))
+
+    def days_since_listing(self, codes: pd.Series, dates: pd.Series,
+                           calendar: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Trading days since listing (1 on the listing day)
+
+        Days inside the data window are counted on the trading calendar
+        (default: the distinct `dates`); days before it are counted as
+        weekdays, which ignores holidays but only affects stocks listed before
+        the calendar starts.
+
+        Args:
+            codes: Stock codes
+            dates: Trading dates
+            calendar: Sorted trading dates covering `dates` (pass the full lake
+                      calendar so a partial window counts like a full rebuild)
+
+        Returns:
+            float array aligned with codes, NaN where the listing date is unknown
+        """
+        dates = pd.to_datetime(dates).to_numpy(dtype="datetime64[D]")
+        list_date = pd.to_datetime(codes.astype(str).map(self.list_dates())).to_numpy(dtype="datetime64[D]")
+        days = np.full(len(codes), np.nan)
+        known = ~np.isnat(list_date)
+        if not known.any():
+            return days
+        calendar = np.unique(dates) if calendar is None else np.asarray(calendar, dtype="datetime64[D]")
+        pos_date = np.searchsorted(calendar, dates[known])
+        pos_list = np.searchsorted(calendar, list_date[known])
+        in_window = pos_date - pos_list + 1
+        before = np.maximum(np.busday_count(list_date[known], calendar[0]), 0)
+        days[known] = in_window + before
+        return days
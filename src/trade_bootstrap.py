@@ -0,0 +1,116 @@
+"""
+Monte Carlo resampling of trade ledgers (shuffle / iid / block bootstrap)
+
+Each simulated path replays N trade returns with the engines' cash-splits
+sizing: every trade commits init_cash / cash_splits (or nav / cash_splits
+when compounding), and the NAV moves by that amount times net_pnl_pct.
+Paths are generated as (n_sims, n_trades) arrays and processed in chunks.
+"""
+from typing import Dict, Optional
+
+import numpy as np
+
+
+METHODS = ("shuffle", "bootstrap", "block")
+
+
+def resample_indices(rng: np.random.Generator, n_trades: int, n_sims: int,
+                     method: str = "block", block_size: int = 5) -> np.ndarray:
+    """
+    Trade index matrix for n_sims resampled ledgers
+
+    Args:
+        rng: Random generator
+        n_trades: Number of trades in the ledger
+        n_sims: Number of simulated ledgers
+        method: shuffle (permutation), bootstrap (iid with replacement) or
+                block (circular block bootstrap, keeps streaks of wins/losses)
+        block_size: Block length for the block bootstrap
+
+    Returns:
+        int array (n_sims, n_trades)
+    """
+    if method == "shuffle":
+        return rng.permuted(np.tile(np.arange(n_trades), (n_sims, 1)), axis=1)
+    if method == "bootstrap":
+        return rng.integers(0, n_trades, size=(n_sims, n_trades))
+    if method == "block":
+        block_size = max(1, min(block_size, n_trades))
+        n_blocks = -(-n_trades // block_size)
+        starts = rng.integers(0, n_trades, size=(n_sims, n_blocks))
+        idx = (starts[:, :, None] + np.arange(block_size)) % n_trades
+        return idx.reshape(n_sims, -1)[:, :n_trades]
+    raise ValueError(f"Unknown method: {method}")
+
+
+def nav_paths(returns: np.ndarray, init_cash: float, cash_splits: int, compound: bool = False) -> np.ndarray:
+    """
+    NAV after each trade
+
+    Args:
+        returns: net_pnl_pct matrix (n_sims, n_trades)
+        init_cash: Starting capital
+        cash_splits: Number of equal slots; one trade uses one slot
+        compound: Size slots from current NAV instead of init_cash
+
+    Returns:
+        NAV matrix (n_sims, n_trades)
+    """
+    if compound:
+        return init_cash * np.cumprod(1.0 + returns / cash_splits, axis=1)
+    return init_cash + np.cumsum(returns * (init_cash / cash_splits), axis=1)
+
+
+def path_stats(navs: np.ndarray, init_cash: float) -> Dict[str, np.ndarray]:
+    """
+    Final NAV and max drawdown of each path (drawdown measured from init_cash on)
+
+    Args:
+        navs: NAV matrix (n_sims, n_trades)
+        init_cash: Starting capital
+
+    Returns:
+        {"final_nav": (n_sims,), "max_drawdown": (n_sims,)}
+    """
+    peaks = np.maximum(np.maximum.accumulate(navs, axis=1), init_cash)
+    drawdown = navs / peaks - 1
+    return {"final_nav": navs[:, -1], "max_drawdown": drawdown.min(axis=1)}
+
+
+def simulate_chunk(returns: np.ndarray, n_sims: int, seed, init_cash: float, cash_splits: int,
+                   method: str = "block", block_size: int = 5, compound: bool = False) -> Dict[str, np.ndarray]:
+    """
+    One chunk of simulations (picklable entry point for process pools)
+
+    Args:
+        returns: Ledger net_pnl_pct, ordered by exit date
+        n_sims: Simulations in this chunk
+        seed: Seed or np.random.SeedSequence
+        init_cash: Starting capital
+        cash_splits: Number of equal slots
+        method: Resampling method (see resample_indices)
+        block_size: Block length for the block bootstrap
+        compound: Size slots from current NAV
+
+    Returns:
+        path_stats of the chunk
+    """
+    rng = np.random.default_rng(seed)
+    idx = resample_indices(rng, len(returns), n_sims, method, block_size)
+    return path_stats(nav_paths(returns[idx], init_cash, cash_splits, compound), init_cash)
+
+
+def summarize(values: np.ndarray, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)) -> Dict[str, float]:
+    """Mean and quantiles of a simulated distribution"""
+    summary = {"mean": float(values.mean())}
+    for q, v in zip(quantiles, np.quantile(values, quantiles)):
+        summary[f"p{int(q * 100):02d}"] = float(v)
+    return summary
+
+
+def infer_cash_splits(buy_cost: np.ndarray, init_cash: float) -> Optional[int]:
+    """Cash splits implied by the median position size of a ledger"""
+    buy_cost = buy_cost[np.isfinite(buy_cost) & (buy_cost > 0)]
+    if len(buy_cost) == 0:
+        return None
+    return max(1, int(round(init_cash / float(np.median(buy_cost)))))
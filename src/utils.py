@@ -2,6 +2,7 @@
 Common utilities for AShare data processing
 """
 import logging
+import threading
 import time
 from functools import wraps
 from typing import Any, Callable
@@ -74,27 +75,27 @@ def retry_on_exception(max_retries: int = 3, delay: float = 1.0, backoff: float
 
 
 class RateLimiter:
-    """Simple rate limiter using token bucket algorithm"""
+    """Simple rate limiter using token bucket algorithm (thread-safe)"""
     
     def __init__(self, rate: float):
         """
         Args:
-            rate: Maximum number of calls per second (0 = no limit)
+            rate: Maximum number of calls per second across all threads (0 = no limit)
         """
         self.rate = rate
         self.last_call = 0.0
+        self._lock = threading.Lock()
         
     def wait(self):
         """Wait if necessary to respect rate limit"""
         if self.rate <= 0:
             return
         
-        now = time.time()
-        time_since_last = now - self.last_call
-        min_interval = 1.0 / self.rate
+        # Reserve the next slot under the lock, sleep outside it
+        with self._lock:
+            now = time.time()
+            slot = max(now, self.last_call + 1.0 / self.rate)
+            self.last_call = slot
         
-        if time_since_last < min_interval:
-            sleep_time = min_interval - time_since_last
-            time.sleep(sleep_time)
-        
-        self.last_call = time.time()
+        if slot > now:
+            time.sleep(slot - now)